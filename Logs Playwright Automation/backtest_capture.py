@@ -0,0 +1,240 @@
+"""
+Capture backtest logs and orders from the QuantConnect web app's network traffic.
+
+The backtest page loads its logs and orders as JSON from the API (paged
+POST requests to /api/v2/backtests/read/log and /api/v2/backtests/orders/read).
+Instead of clicking through the page to its download buttons, ResponseCapture
+keeps those responses as they arrive and writes them in the same formats the
+download buttons produce:
+
+    logs_<backtest id>.txt      one "YYYY-MM-DD HH:MM:SS message" line per log entry
+    orders_<backtest id>.csv    Time,Symbol,Price,Quantity,Type,Status,Value,Tag
+
+Plain CSV/text responses (an orders or logs file fetched directly) are written
+as they are. Nothing in this module needs Playwright: ResponseCapture works with
+anything that has the url/status/headers/body()/request attributes of a
+Playwright Response, which keeps it testable against mock_backtest_server.py.
+"""
+import csv
+import io
+import json
+import os
+import re
+
+# Response URL -> artifact kind
+CAPTURE_PATTERNS = {
+    "logs": re.compile(r"/backtests/(read/log|log)\b|/logs?\.(txt|json)\b", re.IGNORECASE),
+    "orders": re.compile(r"/backtests/(orders/read|read/orders)\b|/orders\.(csv|json)\b", re.IGNORECASE),
+}
+
+ARTIFACT_FILES = {
+    "logs": "logs_{name}.txt",
+    "orders": "orders_{name}.csv",
+}
+
+ORDER_COLUMNS = ["Time", "Symbol", "Price", "Quantity", "Type", "Status", "Value", "Tag"]
+
+# LEAN enum values as they appear in the API's order JSON
+ORDER_TYPES = {
+    0: "Market", 1: "Limit", 2: "Stop Market", 3: "Stop Limit", 4: "Market On Open",
+    5: "Market On Close", 6: "Option Exercise", 7: "Limit If Touched", 8: "Combo Market",
+    9: "Combo Limit", 10: "Combo Leg Limit", 11: "Trailing Stop",
+}
+ORDER_STATUSES = {
+    0: "New", 1: "Submitted", 2: "Partially Filled", 3: "Filled", 5: "Canceled",
+    6: "None", 7: "Invalid", 8: "Cancel Pending", 9: "Update Submitted",
+}
+
+
+def classify_url(url):
+    """Artifact kind ("logs" / "orders") a response URL carries, or None"""
+    for kind, pattern in CAPTURE_PATTERNS.items():
+        if pattern.search(url):
+            return kind
+    return None
+
+
+def _field(record, *names, default=None):
+    """First present field of a JSON record, trying camelCase and PascalCase spellings"""
+    for name in names:
+        for key in (name, name[:1].upper() + name[1:]):
+            if key in record and record[key] is not None:
+                return record[key]
+    return default
+
+
+class CapturedPage:
+    """Body of one captured response"""
+
+    def __init__(self, kind, url, status, content_type, body, start=0):
+        self.kind = kind
+        self.url = url
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.start = start      # First row of the page (request "start"), for ordering paged responses
+
+    @property
+    def is_json(self):
+        return "json" in self.content_type or self.body[:1] in (b"{", b"[")
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+class ResponseCapture:
+    """Collects the logs/orders responses of a page and writes them as files"""
+
+    def __init__(self):
+        self.responses = []     # (kind, response) in arrival order; bodies are read in collect()
+        self.pages = []
+
+    def on_response(self, response):
+        """page.on("response") handler - only remembers matching responses, never blocks"""
+        kind = classify_url(response.url)
+        if kind is not None:
+            self.responses.append((kind, response))
+
+    def has(self, kind):
+        """Whether a response of this kind has arrived"""
+        return any(seen == kind for seen, _ in self.responses)
+
+    def collect(self):
+        """
+        Read the bodies of the remembered responses (call after the page settled).
+
+        Returns:
+            list: CapturedPage per successful response
+        """
+        for kind, response in self.responses[len(self.pages):]:
+            headers = {name.lower(): value for name, value in (response.headers or {}).items()}
+            start = 0
+            try:
+                post = response.request.post_data_json if response.request is not None else None
+                if isinstance(post, dict):
+                    start = int(_field(post, "start", default=0))
+            except (TypeError, ValueError):
+                start = 0
+            body = response.body() if response.status < 400 else b""
+            self.pages.append(CapturedPage(kind, response.url, response.status,
+                                           headers.get("content-type", ""), body, start))
+        return [page for page in self.pages if page.status < 400]
+
+    def is_complete(self, kind):
+        """
+        Whether every page of a kind has arrived: the captured JSON pages cover the
+        "length" the API reports (responses without a length count as complete).
+        """
+        pages = [page for page in self.collect() if page.kind == kind]
+        if not pages:
+            return False
+        covered = set()
+        total = 0
+        for page in pages:
+            if not page.is_json:
+                return True
+            payload = page.json()
+            if not isinstance(payload, dict) or _field(payload, "length") is None:
+                return True
+            total = max(total, int(_field(payload, "length")))
+            entries = _field(payload, "logs", "orders", default=[])
+            covered.update(range(page.start, page.start + len(entries)))
+        return len(covered) >= total
+
+    def write(self, download_dir, name, kinds=None):
+        """
+        Write every captured kind as its artifact file.
+
+        Parameters:
+            download_dir: Output directory
+            name: Backtest ID for the file names
+            kinds: Only these kinds (default: all)
+
+        Returns:
+            dict: kind -> written path
+        """
+        pages = self.collect()
+        written = {}
+        for kind, file_pattern in ARTIFACT_FILES.items():
+            if kinds is not None and kind not in kinds:
+                continue
+            # A page fetched twice (re-render, retry) is kept once - the latest copy
+            latest = {page.start: page for page in pages if page.kind == kind}
+            mine = [latest[start] for start in sorted(latest)]
+            if not mine:
+                continue
+            text = logs_text(mine) if kind == "logs" else orders_text(mine)
+            path = os.path.join(download_dir, file_pattern.format(name=name))
+            write_atomic(path, text.encode("utf-8"))
+            written[kind] = path
+        return written
+
+
+def write_atomic(path, data):
+    """Write a file via a temporary name, so readers never see a partial file"""
+    temporary = path + ".part"
+    with open(temporary, "wb") as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+def logs_text(pages):
+    """Log file text from captured log pages (JSON "logs" lists or plain text)"""
+    lines = []
+    for page in pages:
+        if page.is_json:
+            payload = page.json()
+            entries = payload if isinstance(payload, list) else _field(payload, "logs", "backtestLogs", default=[])
+            lines.extend(str(entry).rstrip("\r\n") for entry in entries)
+        else:
+            lines.extend(page.body.decode("utf-8", errors="replace").splitlines())
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def order_row(order):
+    """One API order record as a trades CSV row"""
+    symbol = _field(order, "symbol", default="")
+    if isinstance(symbol, dict):
+        symbol = _field(symbol, "value", "permtick", "id", default="")
+    price = float(_field(order, "price", default=0) or 0)
+    quantity = float(_field(order, "quantity", default=0) or 0)
+    order_type = _field(order, "type", default="")
+    status = _field(order, "status", default="")
+    value = _field(order, "value", default=None)
+    quantity_text = f"{quantity:g}"
+    return [
+        _field(order, "lastFillTime", "time", default=""),
+        symbol,
+        f"{price:g}",
+        quantity_text,
+        ORDER_TYPES.get(order_type, order_type) if isinstance(order_type, int) else order_type,
+        ORDER_STATUSES.get(status, status) if isinstance(status, int) else status,
+        f"{float(value) if value is not None else price * quantity:g}",
+        _field(order, "tag", default=""),
+    ]
+
+
+def orders_text(pages):
+    """Orders CSV text from captured order pages (JSON "orders" lists/maps or CSV)"""
+    csv_pages = [page for page in pages if not page.is_json]
+    if csv_pages and len(csv_pages) == len(pages):
+        return "".join(page.body.decode("utf-8", errors="replace") for page in csv_pages[:1])
+
+    orders = {}
+    for page in pages:
+        if not page.is_json:
+            continue
+        payload = page.json()
+        entries = payload if isinstance(payload, list) else _field(payload, "orders", default=[])
+        if isinstance(entries, dict):
+            entries = list(entries.values())
+        for entry in entries:
+            # Overlapping pages repeat orders - the order ID keeps one copy of each
+            orders[_field(entry, "id", default=len(orders))] = entry
+
+    stream = io.StringIO()
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(ORDER_COLUMNS)
+    for order_id in sorted(orders, key=lambda key: (isinstance(key, str), key)):
+        writer.writerow(order_row(orders[order_id]))
+    return stream.getvalue()
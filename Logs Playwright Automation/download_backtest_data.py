@@ -1,213 +1,226 @@
 import os
-import time
-from playwright.sync_api import Playwright, sync_playwright
+import queue
+import shutil
+import tempfile
+import threading
+from playwright.sync_api import Playwright, sync_playwright, TimeoutError as PlaywrightTimeoutError
+from backtest_capture import ARTIFACT_FILES, ResponseCapture, classify_url
+from download_manifest import DownloadManifest
 
-def save_debug_screenshot(page, step_name, download_dir):
-    """Save a screenshot with a descriptive name"""
+# Selector fallbacks for the backtest page, tried in order
+LOGS_TAB_SELECTORS = [
+    "a:has-text('Logs')",
+    ".logs-tab",
+    "[data-testid='logs-tab']",
+    "//*[contains(@class, 'tab') and contains(., 'Logs')]",
+    "//a[contains(., 'Logs')]"
+]
+DOWNLOAD_LOGS_SELECTORS = [
+    "a:has-text('Download Logs')",
+    "button:has-text('Download Logs')",
+    ".download-logs",
+    "[data-testid='download-logs']",
+    "//a[contains(., 'Download Logs')]"
+]
+ORDERS_TAB_SELECTORS = [
+    "a:has-text('Orders')",
+    ".orders-tab",
+    "[data-testid='orders-tab']",
+    "//*[contains(@class, 'tab') and contains(., 'Orders')]",
+    "//a[contains(., 'Orders')]"
+]
+DOWNLOAD_ORDERS_SELECTORS = [
+    "a:has-text('Download Orders')",
+    "button:has-text('Download Orders')",
+    ".download-orders",
+    "[data-testid='download-orders']",
+    "//a[contains(., 'Download Orders')]"
+]
+
+DEFAULT_STORAGE_STATE = "qc_auth.json"
+DEFAULT_TIMEOUT = 30000  # ms to wait for an element, download or response
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MODE = "capture"
+
+# Elements whose click makes the page request logs / orders, for capture mode
+CAPTURE_TRIGGERS = {
+    "logs": "a:has-text('Logs'), .logs-tab, [data-testid='logs-tab']",
+    "orders": "a:has-text('Orders'), .orders-tab, [data-testid='orders-tab']",
+}
+
+def backtest_name(backtest_url):
+    """Backtest ID used in file names (last path segment of the URL)"""
+    return os.path.basename(backtest_url.rstrip('/'))
+
+def first_match(page, selectors):
+    """Locator for the first element matching any of the fallback selectors"""
+    locator = page.locator(selectors[0])
+    for selector in selectors[1:]:
+        locator = locator.or_(page.locator(selector))
+    return locator.first
+
+def click_first(page, selectors, timeout=DEFAULT_TIMEOUT):
+    """
+    Click the first element matching any of the fallback selectors.
+    
+    No sleeps, retries or screenshots: Playwright's auto-waiting holds the click
+    until the element is attached, visible, stable and enabled, and scrolls it
+    into view, so an element that is still loading is simply waited for.
+    
+    Returns:
+        bool: True if an element was clicked before the timeout
+    """
     try:
-        timestamp = int(time.time())
-        filename = f"debug_{step_name}_{timestamp}.png"
-        path = os.path.join(download_dir, filename)
-        page.screenshot(path=path)
-        print(f"Debug screenshot saved: {path}")
-        return path
-    except Exception as e:
-        print(f"Error saving debug screenshot: {e}")
-        return None
+        first_match(page, selectors).click(timeout=timeout)
+        return True
+    except PlaywrightTimeoutError as e:
+        print(f"No clickable element for {selectors[0]} (+{len(selectors) - 1} fallbacks): {e}")
+        return False
 
-def scroll_to_element(page, selector, context="", download_dir=None, timeout=10000):
-    """Scroll to make sure element is in view"""
-    debug_id = f"{context}_{int(time.time())}" if context else str(int(time.time()))
-    print(f"\n[DEBUG {debug_id}] Scrolling to element: {selector}")
+def open_backtest(page, backtest_url, timeout=DEFAULT_TIMEOUT):
+    """Navigate to a backtest and wait for its content"""
+    print(f"Navigating to: {backtest_url}")
+    page.goto(backtest_url, wait_until="networkidle")
+    print(f"Page title: {page.title()}")
+    print(f"Current URL: {page.url}")
     
+    # Any of these elements holds the backtest content
+    content_selector = "#code-frame, .backtest-container, .backtest-body, .backtest, .container"
     try:
-        # First take a screenshot before any scrolling
-        save_debug_screenshot(page, f"before_scroll_{debug_id}", download_dir)
-        
-        # Try to find the element with a longer timeout
-        print(f"[DEBUG {debug_id}] Waiting for element to be attached...")
-        element = page.wait_for_selector(selector, state='attached', timeout=timeout)
-        
-        # Take screenshot after finding the element
-        save_debug_screenshot(page, f"element_found_{debug_id}", download_dir)
-        
-        # Get element position for debugging
-        try:
-            box = element.bounding_box()
-            print(f"[DEBUG {debug_id}] Element position - x: {box['x']}, y: {box['y']}, width: {box['width']}, height: {box['height']}")
-        except Exception as e:
-            print(f"[DEBUG {debug_id}] Could not get element position: {e}")
-        
-        # Scroll to the element
-        print(f"[DEBUG {debug_id}] Scrolling element into view...")
-        element.scroll_into_view_if_needed()
-        page.wait_for_timeout(500)  # Wait for scroll to complete
-        
-        # Scroll a bit more to ensure it's fully in view (sometimes needed for fixed headers)
-        print("[DEBUG {debug_id}] Adjusting scroll position...")
-        page.evaluate("window.scrollBy(0, -100)")
-        page.wait_for_timeout(300)
-        
-        # Take screenshot after scrolling
-        save_debug_screenshot(page, f"after_scroll_{debug_id}", download_dir)
-        
-        # Check if element is visible
-        is_visible = element.is_visible()
-        print(f"[DEBUG {debug_id}] Is element visible? {is_visible}")
-        
-        if not is_visible:
-            print("[DEBUG {debug_id}] Element not visible after scrolling, trying to make it visible...")
-            page.evaluate("arguments[0].scrollIntoView({block: 'center'})", element)
-            page.wait_for_timeout(500)
-            
-            # Take another screenshot after adjustment
-            save_debug_screenshot(page, f"after_adjustment_{debug_id}", download_dir)
-            
-        # Final check
-        is_visible = element.is_visible()
-        print(f"[DEBUG {debug_id}] Final visibility check: {is_visible}")
-        
-        if not is_visible:
-            print("[DEBUG {debug_id}] WARNING: Element still not visible after all attempts!")
-            
-        return element
+        page.locator(content_selector).first.wait_for(state="visible", timeout=timeout)
+        print("Found backtest content")
+    except PlaywrightTimeoutError as e:
+        print(f"Warning: Could not find expected elements: {e}")
+        print("Page content:", page.content()[:1000])  # Print first 1000 chars of page content
+        raise
+
+def download_logs(page, backtest_url, download_dir, timeout=DEFAULT_TIMEOUT):
+    """Open the Logs tab and save the logs; returns the file path"""
+    print("\n--- Downloading logs ---")
+    if not click_first(page, LOGS_TAB_SELECTORS, timeout):
+        raise Exception("Could not find or click the Logs tab")
+    
+    # The download has to be expected before the click that starts it; the click
+    # itself waits for the button to appear once the logs have loaded
+    with page.expect_download(timeout=timeout) as download_info:
+        if not click_first(page, DOWNLOAD_LOGS_SELECTORS, timeout):
+            raise Exception("Could not find or click the Download Logs button")
+        print("Waiting for download to start...")
+    
+    # Save the file
+    download_path = os.path.join(download_dir, f"logs_{backtest_name(backtest_url)}.txt")
+    download_info.value.save_as(download_path)
+    print(f"Downloaded logs to: {download_path}")
+    return download_path
+
+def download_orders(page, backtest_url, download_dir, timeout=DEFAULT_TIMEOUT):
+    """Open the Orders tab and save the orders; returns the file path"""
+    print("\n--- Downloading orders ---")
+    if not click_first(page, ORDERS_TAB_SELECTORS, timeout):
+        raise Exception("Could not find or click the Orders tab")
+    
+    # The download has to be expected before the click that starts it
+    with page.expect_download(timeout=timeout) as download_info:
+        if not click_first(page, DOWNLOAD_ORDERS_SELECTORS, timeout):
+            raise Exception("Could not find or click the Download Orders button")
+        print("Waiting for orders download to start...")
+    
+    # Save the file
+    download_path = os.path.join(download_dir, f"orders_{backtest_name(backtest_url)}.csv")
+    download_info.value.save_as(download_path)
+    print(f"Downloaded orders to: {download_path}")
+    return download_path
+
+def capture_backtest(page, backtest_url, download_dir, timeout=DEFAULT_TIMEOUT, kinds=None, on_saved=None):
+    """
+    Save a backtest's logs and orders from the API responses the page loads.
+    
+    No download buttons, sleeps or screenshots: the responses are captured as they
+    arrive (see backtest_capture.py). A kind the page doesn't load by itself is
+    requested by clicking its tab once, waiting on the response rather than a timer.
+    Each kind is written as soon as all of its pages are in.
+    
+    Parameters:
+        kinds: Artifacts to save (default: logs and orders)
+        on_saved: Called with (kind, path) after each file is written
+    
+    Returns:
+        list: Saved file paths, in the order of kinds
+    """
+    name = backtest_name(backtest_url)
+    capture = ResponseCapture()
+    page.on("response", capture.on_response)
+    
+    print(f"[CAPTURE] Navigating to: {backtest_url}")
+    page.goto(backtest_url, wait_until="networkidle")
+    
+    saved = []
+    for kind in kinds or ARTIFACT_FILES:
+        if not capture.has(kind):
+            print(f"[CAPTURE] {name}: requesting {kind}")
+            with page.expect_response(lambda response, kind=kind: classify_url(response.url) == kind,
+                                      timeout=timeout):
+                page.locator(CAPTURE_TRIGGERS[kind]).first.click(timeout=timeout)
         
-    except Exception as e:
-        print(f"[DEBUG {debug_id}] ERROR in scroll_to_element: {str(e)}")
-        print("[DEBUG {debug_id}] Page content (first 1000 chars):")
-        print(page.content()[:1000])
+        # Paged responses: wait for each further page until the reported length is covered
+        while not capture.is_complete(kind):
+            page.wait_for_event("response", lambda response, kind=kind: classify_url(response.url) == kind,
+                                timeout=timeout)
         
-        # Take a screenshot of the full page
-        try:
-            full_page_path = os.path.join(download_dir, f"fullpage_error_{debug_id}.png")
-            page.screenshot(path=full_page_path, full_page=True)
-            print(f"[DEBUG {debug_id}] Full page screenshot saved to: {full_page_path}")
-        except Exception as screenshot_error:
-            print(f"[DEBUG {debug_id}] Failed to take full page screenshot: {screenshot_error}")
-            
-        return None
+        written = capture.write(download_dir, name, kinds=[kind])
+        if kind not in written:
+            raise Exception(f"No {kind} response captured")
+        print(f"[CAPTURE] Saved {kind} to: {written[kind]}")
+        saved.append(written[kind])
+        if on_saved:
+            on_saved(kind, written[kind])
+    return saved
 
-def wait_and_click(page, selector, context="", download_dir=None, max_attempts=3, timeout=10000):
-    """Helper function to wait for an element and click it"""
-    debug_id = f"{context}_{int(time.time())}" if context else str(int(time.time()))
+def fetch_artifacts(page, backtest_url, download_dir, mode=DEFAULT_MODE, kinds=None, manifest=None):
+    """
+    Fetch the given artifacts of a backtest, recording each finished file in the manifest.
     
-    for attempt in range(max_attempts):
-        try:
-            print(f"\n[DEBUG {debug_id}] Attempt {attempt + 1}/{max_attempts} - Waiting for element: {selector}")
-            
-            # First scroll to the element with debugging context
-            element = scroll_to_element(
-                page, 
-                selector, 
-                context=f"{context}_attempt{attempt+1}",
-                download_dir=download_dir,
-                timeout=timeout
-            )
-            
-            if not element:
-                error_msg = f"[DEBUG {debug_id}] Could not find element: {selector}"
-                print(error_msg)
-                raise Exception(error_msg)
-            
-            # Wait for the element to be clickable
-            print(f"[DEBUG {debug_id}] Waiting for element to be clickable...")
-            element = page.wait_for_selector(selector, state='visible', timeout=timeout)
-            
-            # Add a small highlight to see what's being clicked (for debugging)
-            try:
-                highlight_js = """
-                (selector) => {
-                    const style = document.createElement('style');
-                    style.textContent = `
-                        .highlighted-element {
-                            outline: 3px solid #ff0000 !important;
-                            background-color: rgba(255, 0, 0, 0.2) !important;
-                            transition: all 0.3s ease;
-                            box-shadow: 0 0 10px 5px rgba(255, 0, 0, 0.5) !important;
-                            position: relative;
-                            z-index: 9999 !important;
-                        }
-                    `;
-                    document.head.appendChild(style);
-                    
-                    const elements = document.querySelectorAll(selector);
-                    elements.forEach(el => {
-                        el.classList.add('highlighted-element');
-                        setTimeout(() => el.classList.remove('highlighted-element'), 1500);
-                    });
-                    
-                    return elements.length;
-                }
-                """
-                highlighted = page.evaluate(highlight_js, selector)
-                print(f"[DEBUG {debug_id}] Highlighted {highlighted} element(s)")
-                
-                # Take a screenshot after highlighting
-                save_debug_screenshot(page, f"highlight_{debug_id}", download_dir)
-                
-            except Exception as e:
-                print(f"[DEBUG {debug_id}] Error during highlighting: {e}")
-            
-            # Click the element
-            print(f"[DEBUG {debug_id}] Clicking element...")
-            
-            # Try different click methods
-            try:
-                # Method 1: Standard click
-                element.click(delay=100)
-                print(f"[DEBUG {debug_id}] Standard click successful")
-            except Exception as click_error:
-                print(f"[DEBUG {debug_id}] Standard click failed, trying JavaScript click: {click_error}")
-                try:
-                    # Method 2: JavaScript click
-                    page.evaluate("el => el.click()", element)
-                    print(f"[DEBUG {debug_id}] JavaScript click successful")
-                except Exception as js_click_error:
-                    print(f"[DEBUG {debug_id}] JavaScript click failed, trying coordinates: {js_click_error}")
-                    # Method 3: Click using coordinates
-                    box = element.bounding_box()
-                    page.mouse.click(box['x'] + box['width']/2, box['y'] + box['height']/2)
-                    print(f"[DEBUG {debug_id}] Coordinate click successful")
-            
-            # Small delay after click
-            time.sleep(1.5)
-            
-            # Take a screenshot after clicking
-            save_debug_screenshot(page, f"after_click_{debug_id}", download_dir)
-            
-            return True
-            
-        except Exception as e:
-            error_msg = f"[DEBUG {debug_id}] Attempt {attempt + 1} failed: {str(e)}"
-            print(error_msg)
-            
-            # Save error screenshot
-            error_screenshot = os.path.join(download_dir, f"error_attempt{attempt+1}_{debug_id}.png")
-            try:
-                page.screenshot(path=error_screenshot, full_page=True)
-                print(f"[DEBUG {debug_id}] Error screenshot saved to: {error_screenshot}")
-            except Exception as screenshot_error:
-                print(f"[DEBUG {debug_id}] Failed to save error screenshot: {screenshot_error}")
-            
-            if attempt == max_attempts - 1:  # Last attempt
-                print(f"[DEBUG {debug_id}] Failed to click element after {max_attempts} attempts")
-                return False
-                
-            # Wait a bit before retrying, increasing delay with each attempt
-            retry_delay = (attempt + 1) * 2
-            print(f"[DEBUG {debug_id}] Waiting {retry_delay} seconds before retry...")
-            time.sleep(retry_delay)
-    
-    return False
+    Returns:
+        list: Saved file paths
+    """
+    name = backtest_name(backtest_url)
+    kinds = list(kinds or ARTIFACT_FILES)
+    
+    def saved(kind, path):
+        if manifest is not None:
+            changed = manifest.record(name, kind, path)
+            print(f"[MANIFEST] {name} {kind}: {'updated' if changed else 'unchanged'}")
+    
+    if mode == "capture":
+        return capture_backtest(page, backtest_url, download_dir, kinds=kinds, on_saved=saved)
+    
+    open_backtest(page, backtest_url)
+    paths = []
+    downloaders = {"logs": download_logs, "orders": download_orders}
+    for kind in kinds:
+        path = downloaders[kind](page, backtest_url, download_dir)
+        saved(kind, path)
+        paths.append(path)
+    return paths
 
-def run(playwright: Playwright, backtest_url: str, download_dir: str = None) -> None:
+def run(playwright: Playwright, backtest_url: str, download_dir: str = None, mode: str = DEFAULT_MODE,
+        force: bool = False, verify: bool = False) -> None:
+    """Interactive single-backtest run: visible browser, devtools and a video of the session"""
     # Set up download directory
-    download_dir = download_dir or os.path.join(os.getcwd(), 'downloads')
+    download_dir = os.path.abspath(download_dir or os.path.join(os.getcwd(), 'downloads'))
     os.makedirs(download_dir, exist_ok=True)
     print(f"[INIT] Downloads will be saved to: {download_dir}")
     
-    # Create a debug directory for this run
-    debug_dir = os.path.join(download_dir, f"debug_{int(time.time())}")
+    # Skip artifacts the manifest already has
+    name = backtest_name(backtest_url)
+    manifest = DownloadManifest(download_dir)
+    kinds = list(ARTIFACT_FILES) if force else manifest.pending(name, verify=verify)
+    if not kinds:
+        print(f"[MANIFEST] {name} already downloaded (use --force to fetch it again)")
+        return
+    
+    # One debug directory per backtest, reused by later runs
+    debug_dir = os.path.join(download_dir, "debug", name)
     os.makedirs(debug_dir, exist_ok=True)
     print(f"[INIT] Debug files will be saved to: {debug_dir}")
     
@@ -220,7 +233,7 @@ def run(playwright: Playwright, backtest_url: str, download_dir: str = None) ->
     )
     
     # Use saved storage state if it exists
-    storage_state = "qc_auth.json"
+    storage_state = DEFAULT_STORAGE_STATE
     context = browser.new_context(
         storage_state=storage_state if os.path.exists(storage_state) else None,
         accept_downloads=True,
@@ -253,196 +266,218 @@ def run(playwright: Playwright, backtest_url: str, download_dir: str = None) ->
     
     page.on("pageerror", log_page_error)
     
+    manifest.start(name, backtest_url)
+    error = None
     try:
-        # Navigate to the backtest URL
-        print(f"Navigating to: {backtest_url}")
-        page.goto(backtest_url, wait_until="networkidle")
-        
-        # Wait for the page to fully load
-        print("Waiting for page to load...")
-        page.wait_for_load_state("networkidle")
+        if mode == "capture":
+            fetch_artifacts(page, backtest_url, download_dir, mode, kinds, manifest)
+            print("\n--- Script completed ---")
+            return
         
-        # Debug information
-        print(f"Page title: {page.title()}")
-        print(f"Current URL: {page.url}")
-        
-        # Take a screenshot for debugging
-        screenshot_path = os.path.join(download_dir, "page_debug.png")
-        page.screenshot(path=screenshot_path)
-        print(f"Debug screenshot saved as {screenshot_path}")
-        
-        # Wait for the main content to load
-        print("Waiting for backtest content...")
-        try:
-            # Try to find any of these elements that might contain the backtest content
-            content_selector = "#code-frame, .backtest-container, .backtest-body, .backtest, .container"
-            page.wait_for_selector(content_selector, state="visible", timeout=15000)
-            print("Found backtest content")
-            
-            # Take another screenshot after content loads
-            page.screenshot(path=os.path.join(download_dir, "content_loaded.png"))
-            
-        except Exception as e:
-            print(f"Warning: Could not find expected elements: {e}")
-            print("Page content:", page.content()[:1000])  # Print first 1000 chars of page content
-            raise
+        open_backtest(page, backtest_url)
         
         # Download logs
-        print("\n--- Downloading logs ---")
-        try:
-            # First, scroll to the bottom to load any lazy-loaded content
-            print("Scrolling to bottom to ensure all content is loaded...")
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)  # Wait for any lazy loading
-            
-            # Try different possible selectors for the Logs tab
-            logs_selectors = [
-                "a:has-text('Logs')",
-                ".logs-tab",
-                "[data-testid='logs-tab']",
-                "//*[contains(@class, 'tab') and contains(., 'Logs')]",
-                "//a[contains(., 'Logs')]"
-            ]
-            
-            logs_clicked = False
-            for selector in logs_selectors:
-                print(f"Trying selector: {selector}")
-                if wait_and_click(page, selector):
-                    logs_clicked = True
-                    break
-                    
-            if not logs_clicked:
-                raise Exception("Could not find or click the Logs tab")
-            
-            # Wait for logs to load
-            time.sleep(2)
-            
-            # Try different possible selectors for the download button
-            download_selectors = [
-                "a:has-text('Download Logs')",
-                "button:has-text('Download Logs')",
-                ".download-logs",
-                "[data-testid='download-logs']",
-                "//a[contains(., 'Download Logs')]"
-            ]
-            
-            download_clicked = False
-            for selector in download_selectors:
-                print(f"Trying download selector: {selector}")
-                if wait_and_click(page, selector):
-                    download_clicked = True
-                    break
-                    
-            if not download_clicked:
-                raise Exception("Could not find or click the Download Logs button")
-            
-            # Wait for download to start
-            with page.expect_download() as download_info:
-                print("Waiting for download to start...")
-                download = download_info.value
-                
-                # Save the file
-                filename = f"logs_{os.path.basename(backtest_url.rstrip('/'))}.txt"
-                download_path = os.path.join(download_dir, filename)
-                download.save_as(download_path)
-                print(f"Downloaded logs to: {download_path}")
-                
-        except Exception as e:
-            print(f"Error downloading logs: {e}")
-            page.screenshot(path=os.path.join(download_dir, "error_logs.png"))
+        if "logs" in kinds:
+            try:
+                manifest.record(name, "logs", download_logs(page, backtest_url, download_dir))
+            except Exception as e:
+                print(f"Error downloading logs: {e}")
+                page.screenshot(path=os.path.join(debug_dir, "error_logs.png"))
         
         # Download orders
-        print("\n--- Downloading orders ---")
-        try:
-            # Scroll to top first
-            page.evaluate("window.scrollTo(0, 0)")
-            time.sleep(1)
-            
-            # Try different possible selectors for the Orders tab
-            orders_selectors = [
-                "a:has-text('Orders')",
-                ".orders-tab",
-                "[data-testid='orders-tab']",
-                "//*[contains(@class, 'tab') and contains(., 'Orders')]",
-                "//a[contains(., 'Orders')]"
-            ]
-            
-            orders_clicked = False
-            for selector in orders_selectors:
-                print(f"Trying selector: {selector}")
-                if wait_and_click(page, selector):
-                    orders_clicked = True
-                    break
-                    
-            if not orders_clicked:
-                raise Exception("Could not find or click the Orders tab")
-            
-            # Wait for orders to load
-            time.sleep(2)
-            
-            # Try different possible selectors for the download button
-            download_selectors = [
-                "a:has-text('Download Orders')",
-                "button:has-text('Download Orders')",
-                ".download-orders",
-                "[data-testid='download-orders']",
-                "//a[contains(., 'Download Orders')]"
-            ]
-            
-            download_clicked = False
-            for selector in download_selectors:
-                print(f"Trying download selector: {selector}")
-                if wait_and_click(page, selector):
-                    download_clicked = True
-                    break
-                    
-            if not download_clicked:
-                raise Exception("Could not find or click the Download Orders button")
-            
-            # Wait for download to start
-            with page.expect_download() as download_info:
-                print("Waiting for orders download to start...")
-                download = download_info.value
-                
-                # Save the file
-                filename = f"orders_{os.path.basename(backtest_url.rstrip('/'))}.csv"
-                download_path = os.path.join(download_dir, filename)
-                download.save_as(download_path)
-                print(f"Downloaded orders to: {download_path}")
-                
-        except Exception as e:
-            print(f"Error downloading orders: {e}")
-            page.screenshot(path=os.path.join(download_dir, "error_orders.png"))
+        if "orders" in kinds:
+            try:
+                manifest.record(name, "orders", download_orders(page, backtest_url, download_dir))
+            except Exception as e:
+                print(f"Error downloading orders: {e}")
+                page.screenshot(path=os.path.join(debug_dir, "error_orders.png"))
         
         print("\n--- Script completed ---")
         
     except Exception as e:
+        error = str(e)
         print(f"\nAn error occurred: {str(e)}")
         # Take a screenshot if something goes wrong
-        error_screenshot = os.path.join(download_dir, "error_screenshot.png")
+        error_screenshot = os.path.join(debug_dir, "error_screenshot.png")
         page.screenshot(path=error_screenshot)
         print(f"Screenshot saved as {error_screenshot}")
         raise  # Re-raise the exception to see full traceback
     
     finally:
+        manifest.finish(name, error)
+        
         # Keep browser open for inspection
         print("\nPress Enter to close the browser...")
         input()
         context.close()
         browser.close()
 
+def download_backtest(browser, backtest_url, download_dir, storage_state=DEFAULT_STORAGE_STATE, mode=DEFAULT_MODE,
+                      manifest=None, kinds=None):
+    """
+    Download one backtest's logs and orders in a fresh headless context.
+    
+    mode "capture" saves the page's API responses, "dom" clicks the download buttons.
+    With a manifest, only `kinds` are fetched and each finished file is recorded.
+    
+    The session is recorded to a scratch directory; the video and a full-page
+    screenshot are kept under <download_dir>/failures/<backtest id>/ only when
+    the download fails.
+    
+    Returns:
+        dict: url, ok, files (saved paths) and error (message, failures only)
+    """
+    name = backtest_name(backtest_url)
+    video_dir = tempfile.mkdtemp(prefix=f"qc_video_{name}_")
+    context = browser.new_context(
+        storage_state=storage_state if storage_state and os.path.exists(storage_state) else None,
+        accept_downloads=True,
+        viewport={'width': 1920, 'height': 1080},
+        record_video_dir=video_dir
+    )
+    page = context.new_page()
+    result = {"url": backtest_url, "ok": False, "files": [], "error": None}
+    failure_dir = os.path.join(download_dir, "failures", name)
+    
+    if manifest is not None:
+        manifest.start(name, backtest_url)
+    try:
+        result["files"] = fetch_artifacts(page, backtest_url, download_dir, mode, kinds, manifest)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        print(f"[BATCH] {name} failed: {e}")
+        os.makedirs(failure_dir, exist_ok=True)
+        try:
+            page.screenshot(path=os.path.join(failure_dir, "error_screenshot.png"), full_page=True)
+        except Exception as screenshot_error:
+            print(f"[BATCH] {name}: could not save failure screenshot: {screenshot_error}")
+    finally:
+        video = page.video
+        context.close()  # Finishes writing the video
+        if not result["ok"] and video:
+            try:
+                video.save_as(os.path.join(failure_dir, "session.webm"))
+            except Exception as video_error:
+                print(f"[BATCH] {name}: could not save failure video: {video_error}")
+        shutil.rmtree(video_dir, ignore_errors=True)
+        if manifest is not None:
+            manifest.finish(name, result["error"])
+    return result
+
+def _batch_worker(jobs, results, results_lock, download_dir, storage_state, mode, manifest):
+    """Worker thread: own Playwright instance and headless browser, one context per backtest"""
+    # The sync API is bound to the thread that started it, so every worker starts its own
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True, downloads_path=download_dir)
+        try:
+            while True:
+                try:
+                    backtest_url, kinds = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                result = download_backtest(browser, backtest_url, download_dir, storage_state, mode,
+                                           manifest, kinds)
+                with results_lock:
+                    results.append(result)
+                    print(f"[BATCH] {len(results)} done - {backtest_name(backtest_url)}: "
+                          f"{'ok' if result['ok'] else 'FAILED'}")
+        finally:
+            browser.close()
+
+def run_batch(backtest_urls, download_dir=None, concurrency=DEFAULT_CONCURRENCY,
+              storage_state=DEFAULT_STORAGE_STATE, mode=DEFAULT_MODE, force=False, verify=False):
+    """
+    Download many backtests with up to `concurrency` headless browsers in parallel.
+    
+    Every context loads the same saved login (qc_auth.json), so log in once with
+    the interactive mode first. Backtests the download directory's manifest has
+    complete are skipped and interrupted ones only fetch their missing artifacts,
+    unless force is set; verify re-hashes the existing files before trusting them.
+    
+    Returns:
+        list: download_backtest results, in completion order
+    """
+    download_dir = os.path.abspath(download_dir or os.path.join(os.getcwd(), 'downloads'))
+    os.makedirs(download_dir, exist_ok=True)
+    if storage_state and not os.path.exists(storage_state):
+        print(f"[INIT] Warning: {storage_state} not found - batch downloads need a saved login")
+    
+    manifest = DownloadManifest(download_dir)
+    jobs = queue.Queue()
+    skipped = 0
+    for backtest_url in dict.fromkeys(backtest_urls):  # Drop duplicates, keep order
+        kinds = list(ARTIFACT_FILES) if force else manifest.pending(backtest_name(backtest_url), verify=verify)
+        if kinds:
+            jobs.put((backtest_url, kinds))
+        else:
+            skipped += 1
+    print(f"[MANIFEST] {skipped} backtests already downloaded, {jobs.qsize()} to fetch")
+    if jobs.empty():
+        return []
+    workers = max(1, min(concurrency, jobs.qsize()))
+    print(f"[INIT] Downloading {jobs.qsize()} backtests to {download_dir} with {workers} browsers")
+    
+    results = []
+    results_lock = threading.Lock()
+    threads = [threading.Thread(target=_batch_worker, name=f"backtest-download-{index}",
+                                args=(jobs, results, results_lock, download_dir, storage_state, mode, manifest))
+               for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    failed = [result for result in results if not result["ok"]]
+    print(f"\n[BATCH] {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    for result in failed:
+        print(f"[BATCH] FAILED {result['url']}: {result['error']}")
+    return results
+
+def read_url_file(path):
+    """Backtest URLs from a text file, one per line (blank lines and # comments skipped)"""
+    with open(path) as handle:
+        return [line.strip() for line in handle if line.strip() and not line.lstrip().startswith('#')]
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Download QuantConnect backtest data')
-    parser.add_argument('url', nargs='?', 
-                       default='https://www.quantconnect.com/project/23136343',
-                       help='QuantConnect backtest URL')
+    parser.add_argument('url', nargs='*',
+                       default=['https://www.quantconnect.com/project/23136343'],
+                       help='QuantConnect backtest URL(s); more than one runs the headless batch mode')
     parser.add_argument('--download-dir', '-d', 
                        default='downloads',
                        help='Directory to save downloaded files (default: ./downloads)')
+    parser.add_argument('--batch', action='store_true',
+                       help='Headless batch mode even for a single URL')
+    parser.add_argument('--url-file',
+                       help='Text file of backtest URLs, one per line (implies --batch)')
+    parser.add_argument('--concurrency', '-j', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'Parallel browsers in batch mode (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--mode', choices=['capture', 'dom'], default=DEFAULT_MODE,
+                       help='capture: save the API responses the page loads (default); '
+                            'dom: click through to the download buttons')
+    parser.add_argument('--force', action='store_true',
+                       help='Fetch again even if the manifest has the backtest complete')
+    parser.add_argument('--verify', action='store_true',
+                       help='Re-hash downloaded files instead of trusting their recorded size')
+    parser.add_argument('--storage-state', default=DEFAULT_STORAGE_STATE,
+                       help=f'Saved login shared by the batch contexts (default: {DEFAULT_STORAGE_STATE})')
     
     args = parser.parse_args()
+    urls = list(args.url)
+    if args.url_file:
+        file_urls = read_url_file(args.url_file)
+        if not file_urls:
+            parser.error(f"No URLs in {args.url_file}")
+        # A URL file replaces the default URL rather than adding to it
+        urls = (urls if args.url != parser.get_default('url') else []) + file_urls
+    
+    if args.batch or args.url_file or len(urls) > 1:
+        results = run_batch(urls, args.download_dir, args.concurrency, args.storage_state, args.mode,
+                            args.force, args.verify)
+        raise SystemExit(0 if all(result["ok"] for result in results) else 1)
     
     with sync_playwright() as playwright:
-        run(playwright, args.url, args.download_dir)
+        run(playwright, urls[0], args.download_dir, args.mode, args.force, args.verify)
@@ -0,0 +1,122 @@
+"""
+Resumable manifest of downloaded backtest artifacts.
+
+<download dir>/manifest.json records, per backtest ID:
+
+    {
+      "url": "https://www.quantconnect.com/project/.../backtest-id",
+      "status": "complete" | "in_progress" | "failed",
+      "error": null,
+      "updated": "2024-06-01T02:00:00",
+      "files": {
+        "logs":   {"path": "logs_<id>.txt",   "size": 81234, "sha256": "..."},
+        "orders": {"path": "orders_<id>.csv", "size": 10552, "sha256": "..."}
+      }
+    }
+
+An artifact counts as done while its file still exists with the recorded size
+(and, with verify=True, the recorded SHA-256). Backtests whose artifacts are all
+done are skipped; an interrupted or failed backtest only fetches the artifacts
+it is missing. Every change is written to disk straight away (atomically), so a
+run killed halfway loses at most the artifact it was downloading.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+from backtest_capture import ARTIFACT_FILES, write_atomic
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+COMPLETE = "complete"
+IN_PROGRESS = "in_progress"
+FAILED = "failed"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadManifest:
+    """manifest.json of a download directory; safe to share between batch worker threads"""
+
+    def __init__(self, download_dir):
+        self.download_dir = download_dir
+        self.path = os.path.join(download_dir, MANIFEST_FILE)
+        self._lock = threading.RLock()
+        self.backtests = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as handle:
+                self.backtests = json.load(handle).get("backtests", {})
+
+    def save(self):
+        """Write the manifest atomically"""
+        with self._lock:
+            os.makedirs(self.download_dir, exist_ok=True)
+            data = json.dumps({"version": MANIFEST_VERSION, "backtests": self.backtests}, indent=1, sort_keys=True)
+            write_atomic(self.path, data.encode("utf-8"))
+
+    def _entry(self, backtest_id):
+        return self.backtests.setdefault(backtest_id, {"url": None, "status": IN_PROGRESS, "error": None,
+                                                       "updated": None, "files": {}})
+
+    def _touch(self, entry):
+        entry["updated"] = datetime.datetime.now().replace(microsecond=0).isoformat()
+
+    def artifact_done(self, backtest_id, kind, verify=False):
+        """Whether an artifact was recorded and its file is still intact"""
+        with self._lock:
+            record = self.backtests.get(backtest_id, {}).get("files", {}).get(kind)
+        if not record:
+            return False
+        path = os.path.join(self.download_dir, record["path"])
+        if not os.path.exists(path) or os.path.getsize(path) != record["size"]:
+            return False
+        return not verify or file_sha256(path) == record["sha256"]
+
+    def pending(self, backtest_id, kinds=tuple(ARTIFACT_FILES), verify=False):
+        """Artifacts of a backtest still to download"""
+        return [kind for kind in kinds if not self.artifact_done(backtest_id, kind, verify)]
+
+    def start(self, backtest_id, url):
+        """Mark a backtest as being downloaded"""
+        with self._lock:
+            entry = self._entry(backtest_id)
+            entry.update(url=url, status=IN_PROGRESS, error=None)
+            self._touch(entry)
+            self.save()
+
+    def record(self, backtest_id, kind, path):
+        """
+        Record a finished artifact file (hash and size).
+
+        Returns:
+            bool: True if the content changed from what was recorded before
+        """
+        size = os.path.getsize(path)
+        sha256 = file_sha256(path)
+        with self._lock:
+            entry = self._entry(backtest_id)
+            previous = entry["files"].get(kind)
+            entry["files"][kind] = {"path": os.path.relpath(path, self.download_dir), "size": size, "sha256": sha256}
+            self._touch(entry)
+            self.save()
+        return previous is None or previous["sha256"] != sha256
+
+    def finish(self, backtest_id, error=None):
+        """Mark a backtest complete (all artifacts done) or failed"""
+        with self._lock:
+            entry = self._entry(backtest_id)
+            missing = self.pending(backtest_id)
+            entry["status"] = COMPLETE if not error and not missing else FAILED
+            entry["error"] = error or (f"missing {', '.join(missing)}" if missing else None)
+            self._touch(entry)
+            self.save()
@@ -0,0 +1,208 @@
+"""
+Local stand-in for a QuantConnect backtest page, for testing the capture mode.
+
+Serves a minimal backtest page and replays captured API responses:
+
+    GET  /project/<id>...                  page with Logs and Orders tabs
+    POST /api/v2/backtests/orders/read     {"orders": [...], "length": n, "success": true}
+    POST /api/v2/backtests/read/log        {"logs": [...], "length": n, "success": true}
+
+Both endpoints page through the captured lists with the request's start/end like
+the real API, and the page fetches every page: orders as soon as it loads, logs
+when the Logs tab is clicked (so the downloader has to trigger one of them).
+
+Captured responses come from a folder holding logs.json and orders.json (bodies
+saved from the browser's network tab), or are built from an existing download
+pair (<name>_logs.txt and <name>_trades.csv).
+
+Usage:
+    python mock_backtest_server.py --captures captured/ --port 8765
+    python mock_backtest_server.py --from-download "../.windsurf/Alert Apricot Duck/Alert Apricot Duck"
+    python download_backtest_data.py http://127.0.0.1:8765/project/1/backtest/abc --batch --storage-state ""
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backtest_capture import ORDER_STATUSES, ORDER_TYPES
+
+LOG_PAGE_SIZE = 250
+ORDER_PAGE_SIZE = 100
+
+PAGE_HTML = """<!doctype html>
+<html><head><title>Backtest {backtest}</title></head>
+<body>
+<div class="backtest-container">
+  <a class="tab orders-tab" href="#orders">Orders</a>
+  <a class="tab logs-tab" href="#logs">Logs</a>
+  <pre id="status">loading</pre>
+</div>
+<script>
+async function readAll(path, key, pageSize) {
+  let start = 0, rows = [];
+  while (true) {
+    const response = await fetch(path, {method: "POST", headers: {"Content-Type": "application/json"},
+      body: JSON.stringify({projectId: "{project}", backtestId: "{backtest}", start: start, end: start + pageSize})});
+    const page = await response.json();
+    rows = rows.concat(page[key]);
+    start += pageSize;
+    if (start >= page.length) return rows;
+  }
+}
+readAll("/api/v2/backtests/orders/read", "orders", {order_page})
+  .then(rows => document.getElementById("status").textContent = rows.length + " orders");
+document.querySelector(".logs-tab").addEventListener("click", () =>
+  readAll("/api/v2/backtests/read/log", "logs", {log_page})
+    .then(rows => document.getElementById("status").textContent = rows.length + " log lines"));
+</script>
+</body></html>
+"""
+
+_TYPE_CODES = {name.replace(" ", "").lower(): code for code, name in ORDER_TYPES.items()}
+_STATUS_CODES = {name.replace(" ", "").lower(): code for code, name in ORDER_STATUSES.items()}
+
+
+def captures_from_download(prefix):
+    """
+    API responses rebuilt from a downloaded <prefix>_logs.txt / <prefix>_trades.csv pair.
+
+    Returns:
+        dict: {"logs": [...], "orders": [...]}
+    """
+    with open(prefix + "_logs.txt", encoding="utf-8") as handle:
+        logs = [line.rstrip("\r\n") for line in handle if line.strip()]
+
+    orders = []
+    with open(prefix + "_trades.csv", newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [name.strip().lower() for name in next(reader)]
+        for record in reader:
+            if not record:
+                continue
+            row = dict(zip(header, (field.strip() for field in record)))
+            orders.append({
+                "id": len(orders) + 1,
+                "symbol": {"value": row["symbol"]},
+                "price": float(row["price"]),
+                "quantity": float(row["quantity"]),
+                "type": _TYPE_CODES.get(row.get("type", "").replace(" ", "").lower(), 0),
+                "status": _STATUS_CODES.get(row.get("status", "").replace(" ", "").lower(), 3),
+                "time": row["time"],
+                "lastFillTime": row["time"],
+                "value": float(row.get("value") or 0),
+                "tag": row.get("tag", "").strip('"'),
+            })
+    return {"logs": logs, "orders": orders}
+
+
+def captures_from_folder(folder):
+    """API responses from saved logs.json / orders.json bodies"""
+    captures = {"logs": [], "orders": []}
+    for key in captures:
+        path = os.path.join(folder, f"{key}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                payload = json.load(handle)
+            entries = payload.get(key, []) if isinstance(payload, dict) else payload
+            captures[key] = list(entries.values()) if isinstance(entries, dict) else list(entries)
+    return captures
+
+
+class MockBacktestServer:
+    """Threaded HTTP server replaying captured backtest responses"""
+
+    def __init__(self, captures, host="127.0.0.1", port=0):
+        """
+        Parameters:
+            captures: {"logs": [...], "orders": [...]}
+            host: Interface to bind
+            port: Port (0 picks a free one)
+        """
+        self.captures = captures
+        self.requests = []      # (method, path) served, for tests
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server.requests.append(("GET", self.path))
+                parts = [part for part in self.path.split("?")[0].split("/") if part]
+                project = parts[1] if len(parts) > 1 else "0"
+                backtest = parts[-1] if parts else "backtest"
+                html = (PAGE_HTML.replace("{project}", project).replace("{backtest}", backtest)
+                        .replace("{order_page}", str(ORDER_PAGE_SIZE)).replace("{log_page}", str(LOG_PAGE_SIZE)))
+                self._send(200, "text/html; charset=utf-8", html.encode("utf-8"))
+
+            def do_POST(self):
+                server.requests.append(("POST", self.path))
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    request = {}
+                key = {"/api/v2/backtests/read/log": "logs",
+                       "/api/v2/backtests/orders/read": "orders"}.get(self.path.split("?")[0])
+                if key is None:
+                    self._send(404, "application/json", b'{"success": false, "errors": ["Not found"]}')
+                    return
+                rows = server.captures.get(key, [])
+                page_size = LOG_PAGE_SIZE if key == "logs" else ORDER_PAGE_SIZE
+                start = int(request.get("start", 0))
+                end = min(int(request.get("end", start + page_size)), start + page_size)
+                body = json.dumps({key: rows[start:end], "length": len(rows), "success": True})
+                self._send(200, "application/json", body.encode("utf-8"))
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--captures", help="Folder with logs.json and orders.json")
+    source.add_argument("--from-download", metavar="PREFIX", help="Path prefix of a <prefix>_logs.txt/_trades.csv pair")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    captures = captures_from_folder(args.captures) if args.captures else captures_from_download(args.from_download)
+    server = MockBacktestServer(captures, args.host, args.port)
+    print(f"Serving {len(captures['logs'])} log lines and {len(captures['orders'])} orders at "
+          f"{server.url}/project/1/backtest/mock")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
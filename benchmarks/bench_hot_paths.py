@@ -0,0 +1,336 @@
+"""
+Benchmark suite for the v2 hot paths.
+
+Measures per-call latency, retained allocations and peak traced memory of:
+- UniverseBuilder.get_option_chains          (every on_data until the chain loads)
+- ChainSnapshot.from_chain                   (once per loaded chain)
+- SpreadSelector.select_bull_put_spread      (loop and grid modes, once per day)
+- OrderExecutor.calculate_current_spread_value (live legs and snapshot lookup)
+- RiskManager.monitor_positions              (every on_data while a spread is open;
+                                              [quiet]: no leg re-quoted in the slice)
+- GreeksEngine.compute                       (whole-chain IV and greeks, uncached)
+
+over synthetic SPY-like chains from ±20 to ±300 strikes and 1 to 10 daily
+expiries. The modules run on the offline/ AlgorithmImports stand-in, wired
+the way main.py wires them (shared AlgoLogger with the same rate limits).
+
+Results are written as JSON (one record per case plus run metadata) so runs
+can be compared; --compare prints the latency ratio against an earlier
+results file and exits non-zero if any case regressed past --threshold.
+
+Results go to benchmarks/results/bench_results.json by default (ignored by git).
+
+Usage:
+    python benchmarks/bench_hot_paths.py
+    python benchmarks/bench_hot_paths.py --strikes 20 100 --expiries 1 \
+        --output /tmp/after.json --compare benchmarks/results/bench_results.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(_REPO_DIR, "v2_credit_spread_algo"))
+sys.path.insert(0, os.path.join(_REPO_DIR, "offline"))  # The suite builds stand-in objects directly
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "bench_results.json")
+
+import numpy as np
+from AlgorithmImports import *
+from algo_logger import AlgoLogger, LogLevel
+from chain_snapshot import ChainSnapshot
+from greeks_engine import GreeksEngine
+from order_executor import OrderExecutor
+from risk_manager import RiskManager
+from spread_position import SpreadState
+from spread_selector import SpreadSelector
+from universe_builder import UniverseBuilder
+
+STRIKE_RANGES = [20, 50, 100, 200, 300]
+EXPIRY_COUNTS = [1, 2, 5, 10]
+SPOT = 470.0
+NOW = datetime.datetime(2024, 1, 2, 10, 0)
+
+
+def build_slice(canonical, strike_range, expiries, time=NOW, spot=SPOT, seed=0):
+    """
+    Build a Slice holding one synthetic chain.
+
+    Parameters:
+        canonical: Canonical option symbol
+        strike_range: $1 strikes either side of spot
+        expiries: Number of daily expiries, today first
+        time: Slice time
+        spot: Underlying price
+        seed: Quote noise seed
+
+    Returns:
+        Slice: Slice with the chain under slice.option_chains[canonical]
+    """
+    rng = random.Random(seed)
+    underlying = canonical.underlying
+    expiry_dates = []
+    day = time.date()
+    while len(expiry_dates) < expiries:
+        if day.weekday() < 5:
+            expiry_dates.append(day)
+        day += datetime.timedelta(days=1)
+
+    contracts = []
+    for days_out, expiry in enumerate(expiry_dates):
+        slope = 8 / (1 + days_out) ** 0.5  # Deltas flatten for later expiries
+        for k in range(-strike_range, strike_range + 1):
+            strike = float(round(spot) + k)
+            moneyness = (strike - spot) / spot
+            put_delta = max(0.001, min(0.999, 0.5 + moneyness * slope))
+            for right, delta in ((OptionRight.PUT, -put_delta), (OptionRight.CALL, 1 - put_delta)):
+                mid = max(0.0, abs(delta) * 3.0 * (1 + days_out) ** 0.5 + rng.uniform(-0.02, 0.02))
+                bid = round(max(0.0, mid - 0.01), 2)
+                ask = round(mid + 0.01, 2)
+                symbol = Symbol.create_option(underlying, Market.USA, OptionStyle.AMERICAN, right, strike, expiry)
+                contracts.append(OptionContract(symbol, bid, ask, round(mid, 2), Greeks(delta=delta),
+                                                underlying_last_price=spot, time=time))
+
+    chains = OptionChains()
+    chains[canonical] = OptionChain(canonical, time, spot, contracts)
+    return Slice(time, chains)
+
+
+class Harness:
+    """The v2 modules wired as in main.py, on a stand-in algorithm with logging discarded."""
+
+    def __init__(self):
+        algorithm = QCAlgorithm()
+        algorithm._log_handler = lambda line: None
+        algorithm.time = NOW
+
+        logger = AlgoLogger(algorithm, lambda text: None, level=LogLevel.INFO, flush_on="bar")
+        logger.configure("CHAIN WAIT SPY", min_interval=600)
+        logger.configure("POSITION UPDATE", min_interval=3600)
+
+        self.algorithm = algorithm
+        self.logger = logger
+        self.universe_builder = UniverseBuilder(algorithm)
+        self.universe_builder.initialize_universe("SPY", Resolution.MINUTE)
+        self.universe_builder.log_method = logger
+        self.order_executor = OrderExecutor(algorithm, universe=self.universe_builder.primary)
+        self.order_executor.log_method = logger
+        self.risk_manager = RiskManager(algorithm, self.order_executor)
+        self.greeks_engine = GreeksEngine(algorithm)
+        self.selectors = {}
+        for mode in ("loop", "grid"):
+            self.selectors[mode] = SpreadSelector(algorithm, evaluation_mode=mode)
+            self.selectors[mode].log_method = logger
+
+        self.algorithm.securities[self.universe_builder.equity_symbol]._update(NOW, SPOT, SPOT, SPOT)
+
+    def open_spread(self, snapshot, legs_known):
+        """
+        Put the executor in the state of a filled spread near the money.
+
+        Parameters:
+            snapshot: ChainSnapshot the spread's legs are taken from
+            legs_known: True once leg symbols are recorded (fill seen), False before
+        """
+        today = NOW.date()
+        short_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, round(SPOT) - 5)
+        long_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, round(SPOT) - 8)
+        short_contract = snapshot.contracts[short_row]
+        long_contract = snapshot.contracts[long_row]
+
+        for contract in (short_contract, long_contract):
+            security = self.algorithm.securities.get(contract.symbol) or Security(contract.symbol)
+            security._update(NOW, contract.bid_price, contract.ask_price, contract.last_price)
+            self.algorithm.securities[contract.symbol] = security
+
+        executor = self.order_executor
+        for spread in list(executor.spreads.values()):
+            executor._drop(spread)
+        spread = executor._new_spread(short_contract.symbol if legs_known else None,
+                                      long_contract.symbol if legs_known else None,
+                                      short_contract.strike, long_contract.strike, today)
+        # Credit high enough that the stop-loss never fires during the measurement
+        spread.initial_credit = 10.0
+        spread.max_profit = 1000.0
+        if legs_known:
+            spread.held = {short_contract.symbol: -1, long_contract.symbol: 1}
+        executor._transition(spread, SpreadState.OPEN)
+
+def measure(function, min_time):
+    """
+    Measure one callable.
+
+    Parameters:
+        function: Zero-argument callable
+        min_time: Minimum seconds per timing repeat
+
+    Returns:
+        dict: latency (min/median µs per call), blocks still allocated after one call
+              and the peak traced bytes during it
+    """
+    function()  # Warm caches, lazy indexes and rate-limit state
+
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = sorted(t / number * 1e6 for t in timer.repeat(repeat=5, number=number))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        ignore_self = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        before = tracemalloc.take_snapshot().filter_traces(ignore_self)
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(ignore_self)
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return {
+        "min_us": round(runs[0], 3),
+        "median_us": round(runs[len(runs) // 2], 3),
+        "calls": number,
+        "retained_blocks": blocks,
+        "peak_bytes": peak - baseline,
+    }
+
+
+def run_cases(strike_ranges, expiry_counts, min_time):
+    """Run every case for every chain shape and return the result records."""
+    harness = Harness()
+    algorithm = harness.algorithm
+    canonical = harness.universe_builder.option_symbol
+    records = []
+
+    for strike_range in strike_ranges:
+        for expiries in expiry_counts:
+            data_slice = build_slice(canonical, strike_range, expiries)
+            chain = data_slice.option_chains[canonical]
+            snapshot = ChainSnapshot.from_chain(chain, NOW)
+            first = len(records)
+
+            # Inputs as chain_greeks builds them, so the measurement bypasses its per-bar cache
+            prices = (snapshot.bid + snapshot.ask) / 2
+            minutes = (snapshot.expiry.astype('datetime64[m]') + np.timedelta64(GreeksEngine.EXPIRY_CLOSE_MINUTES, 'm')
+                       - np.datetime64(NOW, 'm')).astype(np.float64)
+            is_put = snapshot.right == ChainSnapshot.RIGHT_PUT
+
+            cases = {
+                "universe.get_option_chains": lambda: harness.universe_builder.get_option_chains(data_slice),
+                "snapshot.from_chain": lambda: ChainSnapshot.from_chain(chain, NOW),
+                "selector.select[loop]": lambda: harness.selectors["loop"].select_bull_put_spread(snapshot, SPOT),
+                "selector.select[grid]": lambda: harness.selectors["grid"].select_bull_put_spread(snapshot, SPOT),
+                "greeks.compute": lambda: harness.greeks_engine.compute(prices, SPOT, snapshot.strike, is_put, minutes),
+            }
+            for name, function in cases.items():
+                records.append(_record(name, strike_range, expiries, len(snapshot), measure(function, min_time)))
+
+            for legs_known, variant in ((True, "live"), (False, "snapshot")):
+                harness.open_spread(snapshot, legs_known)
+                executor_case = lambda: harness.order_executor.calculate_current_spread_value(snapshot)
+                monitor_case = lambda: harness.risk_manager.monitor_positions(snapshot)
+                records.append(_record(f"executor.current_spread_value[{variant}]", strike_range, expiries,
+                                       len(snapshot), measure(executor_case, min_time)))
+                records.append(_record(f"risk.monitor_positions[{variant}]", strike_range, expiries,
+                                       len(snapshot), measure(monitor_case, min_time)))
+            # Held legs not re-quoted in the slice - the armed stop-loss trigger skips the bar
+            harness.open_spread(snapshot, True)
+            harness.risk_manager.arm_stop_loss(harness.order_executor.current_spread)
+            quiet_slice = Slice(NOW)
+            quiet_case = lambda: harness.risk_manager.monitor_positions(snapshot, quiet_slice)
+            records.append(_record("risk.monitor_positions[quiet]", strike_range, expiries,
+                                   len(snapshot), measure(quiet_case, min_time)))
+
+            for record in records[first:]:
+                print(f"{record['case']:<40} ±{strike_range:<4} x{expiries:<3} {record['contracts']:>6} contracts "
+                      f"{record['min_us']:>10.1f} us {record['retained_blocks']:>6} blocks "
+                      f"{record['peak_bytes'] / 1024:>9.1f} KiB", file=sys.stderr)
+
+    return records
+
+
+def _record(case, strike_range, expiries, contracts, measurement):
+    record = {"case": case, "strike_range": strike_range, "expiries": expiries, "contracts": contracts}
+    record.update(measurement)
+    return record
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+    }
+
+
+def compare(records, baseline_path, threshold):
+    """
+    Print latency ratios against a previous results file.
+
+    Returns:
+        int: Number of cases slower than threshold × baseline
+    """
+    with open(baseline_path) as handle:
+        baseline = {(r["case"], r["strike_range"], r["expiries"]): r for r in json.load(handle)["results"]}
+
+    regressions = 0
+    print(f"\n{'case':<40} {'shape':>10} {'base us':>10} {'now us':>10} {'ratio':>7}")
+    for record in records:
+        key = (record["case"], record["strike_range"], record["expiries"])
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        ratio = record["min_us"] / previous["min_us"] if previous["min_us"] > 0 else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        regressions += ratio > threshold
+        shape = f"±{record['strike_range']}x{record['expiries']}"
+        print(f"{record['case']:<40} {shape:>10} {previous['min_us']:>10.1f} {record['min_us']:>10.1f} "
+              f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strikes", type=int, nargs="+", default=STRIKE_RANGES, help="Strike ranges (±N)")
+    parser.add_argument("--expiries", type=int, nargs="+", default=EXPIRY_COUNTS, help="Expiry counts")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per timing repeat (default: 0.05)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="Results file (default: benchmarks/results/bench_results.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Latency ratio counted as a regression (default: 1.25)")
+    args = parser.parse_args()
+
+    records = run_cases(args.strikes, args.expiries, args.min_time)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as handle:
+        json.dump({"metadata": _metadata(), "results": records}, handle, indent=1)
+    print(f"Wrote {len(records)} results to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(records, args.compare, args.threshold)
+        if regressions:
+            print(f"{regressions} case(s) regressed past {args.threshold}x", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
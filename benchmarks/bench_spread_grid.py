@@ -0,0 +1,127 @@
+"""
+Benchmark SpreadSelector pair evaluation: "loop" (existing) vs "grid" (vectorized).
+
+Builds synthetic 0 DTE SPY-like chains at increasing strike ranges, checks both
+modes pick the same spread and prints the per-call latency of each for two
+scenarios:
+- first-fit: the default thresholds, where an early short candidate usually wins
+- exhaustive: thresholds no spread can meet, so every short candidate is evaluated
+
+Uses LEAN's AlgorithmImports when it is importable (QC research environment or
+a local LEAN Python environment) and the offline/ stand-in otherwise.
+
+Usage:
+    python benchmarks/bench_spread_grid.py [--repeat N]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import timeit
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(_REPO_DIR, "v2_credit_spread_algo"))
+sys.path.append(os.path.join(_REPO_DIR, "offline"))  # Fallback AlgorithmImports stand-in
+
+from AlgorithmImports import *
+from chain_snapshot import ChainSnapshot
+from spread_selector import SpreadSelector
+
+STRIKE_RANGES = [20, 50, 100, 200, 300]
+
+
+class _Greeks:
+    def __init__(self, delta):
+        self.delta = delta
+
+
+class _Contract:
+    """Minimal stand-in exposing the OptionContract fields ChainSnapshot reads."""
+
+    def __init__(self, symbol, strike, right, expiry, bid, ask, delta, implied_volatility=0.15, open_interest=1000):
+        self.symbol = symbol
+        self.strike = strike
+        self.right = right
+        self.expiry = expiry
+        self.bid_price = bid
+        self.ask_price = ask
+        self.last_price = round((bid + ask) / 2, 2)
+        self.greeks = _Greeks(delta)
+        self.implied_volatility = implied_volatility
+        self.open_interest = open_interest
+
+
+class _QuietAlgorithm:
+    """Just enough of QCAlgorithm for SpreadSelector, with logging discarded."""
+
+    def __init__(self, time):
+        self.time = time
+
+    def log(self, message):
+        pass
+
+
+def build_chain(strike_range, spot=470.0, time=None, seed=0):
+    """Build a synthetic 0 DTE chain with ±strike_range $1 strikes around spot."""
+    rng = random.Random(seed)
+    expiry = datetime.datetime.combine(time.date(), datetime.time(16, 0))
+    underlying = Symbol.create("SPY", SecurityType.EQUITY, Market.USA)
+    contracts = []
+    for k in range(-strike_range, strike_range + 1):
+        strike = float(round(spot) + k)
+        for right in (OptionRight.PUT, OptionRight.CALL):
+            # Delta falls off with distance from spot; puts are negative
+            moneyness = (strike - spot) / spot
+            put_delta = max(0.001, min(0.999, 0.5 + moneyness * 8))
+            delta = -put_delta if right == OptionRight.PUT else 1 - put_delta
+            mid = max(0.0, abs(delta) * 3.0 + rng.uniform(-0.02, 0.02))
+            bid = round(max(0.0, mid - 0.01), 2)
+            ask = round(mid + 0.01, 2)
+            symbol = Symbol.create_option(underlying, Market.USA, OptionStyle.AMERICAN, right, strike, expiry)
+            contracts.append(_Contract(symbol, strike, right, expiry, bid, ask, delta))
+    return contracts
+
+
+def _pick(candidate):
+    """Comparable summary of a selection result."""
+    if candidate is None:
+        return None
+    return candidate.short_strike, candidate.long_strike, candidate.net_credit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per measurement (default: 200)")
+    args = parser.parse_args()
+
+    now = datetime.datetime(2024, 1, 2, 10, 0)
+    algorithm = _QuietAlgorithm(now)
+    scenarios = {
+        "first-fit": {},
+        "exhaustive": {"min_credit_pct": 10.0, "min_credit_fallback_pct": 10.0},
+    }
+
+    print(f"{'scenario':>10} {'strikes':>8} {'puts':>6} {'loop us':>10} {'grid us':>10} {'speedup':>8}  same")
+    for name, params in scenarios.items():
+        loop_selector = SpreadSelector(algorithm, evaluation_mode="loop", **params)
+        grid_selector = SpreadSelector(algorithm, evaluation_mode="grid", **params)
+
+        for strike_range in STRIKE_RANGES:
+            snapshot = ChainSnapshot.from_chain(build_chain(strike_range, time=now), now)
+            num_puts = len(snapshot.indices(ChainSnapshot.RIGHT_PUT, now.date()))
+
+            loop_result = loop_selector.select_bull_put_spread(snapshot, 470.0)
+            grid_result = grid_selector.select_bull_put_spread(snapshot, 470.0)
+            same = _pick(loop_result) == _pick(grid_result)
+
+            loop_us = min(timeit.repeat(lambda: loop_selector.select_bull_put_spread(snapshot, 470.0),
+                                        number=args.repeat, repeat=3)) / args.repeat * 1e6
+            grid_us = min(timeit.repeat(lambda: grid_selector.select_bull_put_spread(snapshot, 470.0),
+                                        number=args.repeat, repeat=3)) / args.repeat * 1e6
+            print(f"{name:>10} {'±' + str(strike_range):>8} {num_puts:>6} {loop_us:>10.1f} {grid_us:>10.1f} "
+                  f"{loop_us / grid_us:>7.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1350 @@
+"""
+Local stand-in for LEAN's AlgorithmImports module.
+
+Implements the subset of the QuantConnect Python API that the v2 modules
+touch, so V2CreditSpreadAlgoAlgorithm can be imported and replayed on a
+laptop (see replay.py):
+
+- QCAlgorithm: logging, time, warm-up, parameters, portfolio, securities,
+  transactions, add_equity/add_option/add_index/add_index_option,
+  market/limit/combo limit/strategy orders and scheduled events
+- Slice.option_chains / quote_bars, OptionChain, OptionContract, QuoteBar, Greeks,
+  OptionFilterUniverse
+- OrderTicket, OrderEvent (with a zero OrderFee), Order, Leg, GroupOrderManager and the
+  OrderStatus/OrderType enums
+- Symbol (OCC-style option tickers, canonical "?SPY" / "?SPXW" symbols)
+- OptionStrategies.bull_put_spread
+- ObjectStore (LEAN's LocalObjectStore: one file per key under the storage root)
+
+Member names follow LEAN's snake_case Python API. Where the v2 code relies on
+a PascalCase alias (symbol.SecurityType, equity.Symbol) the alias exists too.
+
+The algorithm-facing classes only hold state; the replay engine drives the
+clock, feeds data and fills orders through the underscore-prefixed hooks.
+
+This directory lives next to the cloud project, never inside it, so it can
+never shadow the real AlgorithmImports in LEAN.
+"""
+import datetime
+import json
+import os
+
+# ------------------------------------------------------------------------------
+# Enums
+# ------------------------------------------------------------------------------
+
+class Resolution:
+    TICK = 0
+    SECOND = 1
+    MINUTE = 2
+    HOUR = 3
+    DAILY = 4
+
+
+class TimeZones:
+    NEW_YORK = "America/New_York"
+    UTC = "UTC"
+
+
+class Market:
+    USA = "usa"
+
+
+class SecurityType:
+    BASE = 0
+    EQUITY = 1
+    OPTION = 2
+    INDEX = 3
+    INDEX_OPTION = 4
+
+
+class OptionRight:
+    CALL = 0
+    PUT = 1
+
+
+class OptionStyle:
+    AMERICAN = 0
+    EUROPEAN = 1
+
+
+class OrderType:
+    MARKET = 0
+    LIMIT = 1
+    STOP_MARKET = 2
+    STOP_LIMIT = 3
+    MARKET_ON_OPEN = 4
+    MARKET_ON_CLOSE = 5
+    OPTION_EXERCISE = 6
+    LIMIT_IF_TOUCHED = 7
+    COMBO_MARKET = 8
+    COMBO_LIMIT = 9
+    COMBO_LEG_LIMIT = 10
+
+
+class OrderStatus:
+    NEW = 0
+    SUBMITTED = 1
+    PARTIALLY_FILLED = 2
+    FILLED = 3
+    CANCELED = 5
+    NONE = 6
+    INVALID = 7
+    CANCEL_PENDING = 8
+    UPDATE_SUBMITTED = 9
+
+
+class OrderDirection:
+    BUY = 0
+    SELL = 1
+    HOLD = 2
+
+
+# Statuses after which an order can no longer fill
+_CLOSED_STATUSES = (OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.INVALID)
+
+# Option security type of each underlying security type
+_OPTION_TYPES = {SecurityType.EQUITY: SecurityType.OPTION, SecurityType.INDEX: SecurityType.INDEX_OPTION}
+
+# ------------------------------------------------------------------------------
+# Symbols
+# ------------------------------------------------------------------------------
+
+class SecurityIdentifier:
+    """Market and option details of a symbol, like LEAN's Symbol.id."""
+
+    def __init__(self, security_type, strike_price=None, option_right=None, date=None, market=Market.USA,
+                 symbol=None):
+        self.security_type = security_type
+        self.strike_price = strike_price
+        self.option_right = option_right
+        self.date = date
+        self.market = market
+        self.symbol = symbol        # Ticker, or the option root for options (SPY, SPXW)
+
+
+class Symbol:
+    """
+    Security identifier.
+
+    Equities and indices use their ticker as value, canonical options "?<root>"
+    and option contracts the OCC format, e.g. "SPY   240102P00471000". The option
+    root is the underlying ticker unless a target option is given, as for SPX
+    weeklies ("SPXW  240102P04700000" on the SPX index). Symbols compare and
+    hash by value, so a symbol can be looked up with its string value as LEAN
+    allows (slice.option_chains[symbol.value]).
+
+    As in LEAN, option contract details live on symbol.id (strike_price,
+    option_right, date, and symbol for the option root). Options on an index
+    are SecurityType.INDEX_OPTION.
+    """
+
+    def __init__(self, value, security_type, underlying=None, id=None, is_canonical=False):
+        self.value = value
+        self.security_type = security_type
+        self.underlying = underlying
+        self.id = id or SecurityIdentifier(security_type)
+        self.is_canonical = is_canonical
+
+    @staticmethod
+    def create(ticker, security_type, market=Market.USA):
+        return Symbol(ticker.upper(), security_type, id=SecurityIdentifier(security_type, market=market,
+                                                                            symbol=ticker.upper()))
+
+    @staticmethod
+    def create_canonical_option(underlying, market=Market.USA, alias=None, target_option=None):
+        root = (target_option or underlying.value).upper()
+        security_type = _OPTION_TYPES[underlying.security_type]
+        return Symbol(alias or "?" + root, security_type, underlying=underlying,
+                      id=SecurityIdentifier(security_type, market=market, symbol=root), is_canonical=True)
+
+    @staticmethod
+    def create_option(underlying, *args):
+        """
+        Option contract symbol, with LEAN's two overloads:
+        create_option(underlying, market, style, right, strike, expiry) and
+        create_option(underlying, target_option, market, style, right, strike, expiry).
+        """
+        if len(args) == 6:
+            target_option, market, style, right, strike, expiry = args
+        else:
+            target_option = None
+            market, style, right, strike, expiry = args
+        if isinstance(underlying, str):
+            underlying = Symbol.create(underlying, SecurityType.EQUITY, market)
+        root = (target_option or underlying.value).upper()
+        security_type = _OPTION_TYPES[underlying.security_type]
+        expiry_date = expiry.date() if isinstance(expiry, datetime.datetime) else expiry
+        value = "{:<6}{}{}{:08d}".format(root, expiry_date.strftime("%y%m%d"),
+                                         "P" if right == OptionRight.PUT else "C",
+                                         int(round(strike * 1000)))
+        identifier = SecurityIdentifier(security_type, float(strike), right,
+                                        datetime.datetime.combine(expiry_date, datetime.time()), market, root)
+        return Symbol(value, security_type, underlying=underlying, id=identifier)
+
+    @property
+    def SecurityType(self):
+        return self.security_type
+
+    @property
+    def has_underlying(self):
+        return self.underlying is not None
+
+    @property
+    def canonical(self):
+        if self.security_type not in _OPTION_TYPES.values() or self.is_canonical:
+            return self
+        return Symbol.create_canonical_option(self.underlying, self.id.market, target_option=self.id.symbol)
+
+    def __eq__(self, other):
+        if isinstance(other, Symbol):
+            return self.value == other.value
+        if isinstance(other, str):
+            return self.value == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"Symbol({self.value!r})"
+
+# ------------------------------------------------------------------------------
+# Exchange hours
+# ------------------------------------------------------------------------------
+
+# Database names of the security types (the Equity in "Equity-usa-[*]")
+_SECURITY_TYPE_NAMES = {
+    SecurityType.BASE: "Base",
+    SecurityType.EQUITY: "Equity",
+    SecurityType.OPTION: "Option",
+    SecurityType.INDEX: "Index",
+    SecurityType.INDEX_OPTION: "IndexOption",
+}
+
+_market_hours_index = None
+
+
+def _market_hours_entry(symbol):
+    """Market-hours database entry of a symbol, from the compiled index (market_hours.py)."""
+    global _market_hours_index
+    if _market_hours_index is None:
+        from market_hours import load_market_hours
+        _market_hours_index = load_market_hours()
+    ticker = symbol.id.symbol or symbol.value
+    return _market_hours_index.entry(symbol.id.market, _SECURITY_TYPE_NAMES[symbol.security_type], ticker)
+
+
+class SecurityExchangeHours:
+    """
+    Trading hours of a security, like LEAN's security.exchange.hours, read from
+    data/market-hours (holidays, early closes and late opens included).
+    Times are naive datetimes in the exchange time zone.
+    """
+
+    # How far get_next_market_open/close search before giving up
+    _SEARCH_DAYS = 30
+
+    def __init__(self, entry):
+        self._entry = entry
+        self.time_zone = entry.exchange_time_zone
+
+    def _runs(self, date, extended_market_hours):
+        """Contiguous open periods of a date as (start, end) datetimes."""
+        midnight = datetime.datetime.combine(date, datetime.time())
+        runs = []
+        for start, end, state in self._entry.sessions(date):
+            if state != "market" and not extended_market_hours:
+                continue
+            if runs and runs[-1][1] == midnight + start:
+                runs[-1] = (runs[-1][0], midnight + end)
+            else:
+                runs.append((midnight + start, midnight + end))
+        return runs
+
+    def is_date_open(self, local_date_time, extended_market_hours=False):
+        date = local_date_time.date() if isinstance(local_date_time, datetime.datetime) else local_date_time
+        return bool(self._runs(date, extended_market_hours))
+
+    def is_open(self, local_date_time, extended_market_hours=False):
+        return any(start <= local_date_time < end
+                   for start, end in self._runs(local_date_time.date(), extended_market_hours))
+
+    def get_next_market_open(self, local_date_time, extended_market_hours=False):
+        """First market open strictly after local_date_time."""
+        for offset in range(self._SEARCH_DAYS):
+            for start, _ in self._runs(local_date_time.date() + datetime.timedelta(days=offset), extended_market_hours):
+                if start > local_date_time:
+                    return start
+        raise ValueError(f"No market open within {self._SEARCH_DAYS} days of {local_date_time}")
+
+    def get_next_market_close(self, local_date_time, extended_market_hours=False):
+        """First market close strictly after local_date_time."""
+        for offset in range(self._SEARCH_DAYS):
+            for _, end in self._runs(local_date_time.date() + datetime.timedelta(days=offset), extended_market_hours):
+                if end > local_date_time:
+                    return end
+        raise ValueError(f"No market close within {self._SEARCH_DAYS} days of {local_date_time}")
+
+
+class SecurityExchange:
+    def __init__(self, hours):
+        self.hours = hours
+        self.time_zone = hours.time_zone
+
+# ------------------------------------------------------------------------------
+# Securities and portfolio
+# ------------------------------------------------------------------------------
+
+class SymbolProperties:
+    def __init__(self, contract_multiplier=1, minimum_price_variation=0.01, lot_size=1):
+        self.contract_multiplier = contract_multiplier
+        self.minimum_price_variation = minimum_price_variation
+        self.lot_size = lot_size
+
+
+_symbol_properties_table = None
+
+
+def _symbol_properties(symbol):
+    """Symbol properties from data/symbol-properties (symbol_properties.py), as LEAN assigns them."""
+    global _symbol_properties_table
+    if _symbol_properties_table is None:
+        from symbol_properties import SymbolPropertiesTable
+        _symbol_properties_table = SymbolPropertiesTable()
+    ticker = symbol.id.symbol or symbol.value
+    row = _symbol_properties_table.properties(symbol.id.market, _SECURITY_TYPE_NAMES[symbol.security_type], ticker)
+    return SymbolProperties(row["contract_multiplier"], row["minimum_price_variation"], row["lot_size"])
+
+
+class Security:
+    """A subscribed security with its latest quote."""
+
+    def __init__(self, symbol, resolution=Resolution.MINUTE):
+        self.symbol = symbol
+        self.type = symbol.security_type
+        self.resolution = resolution
+        self.symbol_properties = _symbol_properties(symbol)
+        self.bid_price = 0.0
+        self.ask_price = 0.0
+        self.last_price = 0.0
+        self.price = 0.0
+        self.local_time = None       # Time of the last quote update
+        self._filter = None          # Option universes only: the set_filter function
+        self._exchange = None
+
+    @property
+    def Symbol(self):
+        return self.symbol
+
+    @property
+    def exchange(self):
+        # Loaded on first use - only scheduling code needs the market-hours database
+        if self._exchange is None:
+            self._exchange = SecurityExchange(SecurityExchangeHours(_market_hours_entry(self.symbol)))
+        return self._exchange
+
+    @property
+    def has_data(self):
+        return self.local_time is not None
+
+    def set_filter(self, filter_function):
+        self._filter = filter_function
+
+    def _update(self, time, bid, ask, last):
+        """Replay hook: apply this bar's quote."""
+        self.bid_price = bid
+        self.ask_price = ask
+        self.last_price = last
+        mid = (bid + ask) / 2 if bid > 0 and ask > 0 else 0.0
+        self.price = last if last > 0 else mid
+        self.local_time = time
+
+
+class SecurityHolding:
+    def __init__(self, symbol, multiplier=1):
+        self.symbol = symbol
+        self.multiplier = multiplier
+        self.quantity = 0
+        self.average_price = 0.0
+        self.market_price = 0.0
+        self.realized_profit = 0.0
+
+    @property
+    def invested(self):
+        return self.quantity != 0
+
+    @property
+    def is_long(self):
+        return self.quantity > 0
+
+    @property
+    def is_short(self):
+        return self.quantity < 0
+
+    @property
+    def holdings_value(self):
+        return self.quantity * self.market_price * self.multiplier
+
+    @property
+    def unrealized_profit(self):
+        return self.quantity * (self.market_price - self.average_price) * self.multiplier
+
+    def _apply_fill(self, price, quantity):
+        """Replay hook: update quantity, average price and realized profit for a fill."""
+        if self.quantity == 0 or (self.quantity > 0) == (quantity > 0):
+            # Opening or adding
+            total = self.quantity + quantity
+            self.average_price = (self.average_price * self.quantity + price * quantity) / total
+            self.quantity = total
+            return
+
+        # Reducing, closing or flipping
+        closed = quantity if abs(quantity) <= abs(self.quantity) else -self.quantity
+        self.realized_profit += -closed * (price - self.average_price) * self.multiplier
+        self.quantity += quantity
+        if self.quantity == 0:
+            self.average_price = 0.0
+        elif (self.quantity > 0) == (quantity > 0):
+            # Flipped through zero - the remainder opens at the fill price
+            self.average_price = price
+
+
+class SecurityManager(dict):
+    """algorithm.securities: Symbol -> Security."""
+
+
+class SecurityPortfolioManager(dict):
+    """algorithm.portfolio: Symbol -> SecurityHolding, plus cash and total value."""
+
+    def __init__(self, securities):
+        super().__init__()
+        self._securities = securities
+        self.cash = 0.0
+
+    def __missing__(self, symbol):
+        multiplier = 100 if getattr(symbol, "security_type", None) in _OPTION_TYPES.values() else 1
+        holding = SecurityHolding(symbol, multiplier)
+        self[symbol] = holding
+        return holding
+
+    @property
+    def invested(self):
+        return any(holding.invested for holding in self.values())
+
+    @property
+    def total_holdings_value(self):
+        total = 0.0
+        for symbol, holding in self.items():
+            if holding.quantity:
+                security = self._securities.get(symbol)
+                if security is not None and security.price > 0:
+                    holding.market_price = security.price
+                total += holding.holdings_value
+        return total
+
+    @property
+    def total_portfolio_value(self):
+        return self.cash + self.total_holdings_value
+
+    @property
+    def total_unrealized_profit(self):
+        _ = self.total_holdings_value  # refresh market prices
+        return sum(holding.unrealized_profit for holding in self.values())
+
+    def set_cash(self, cash):
+        self.cash = float(cash)
+
+# ------------------------------------------------------------------------------
+# Option chains
+# ------------------------------------------------------------------------------
+
+class Greeks:
+    """Contract greeks - like LEAN, values not computed yet are 0.0."""
+
+    def __init__(self, delta=0.0, gamma=0.0, theta=0.0, vega=0.0, rho=0.0):
+        self.delta = delta
+        self.gamma = gamma
+        self.theta = theta
+        self.vega = vega
+        self.rho = rho
+
+
+class OptionContract:
+    """A single option contract quote within an OptionChain."""
+
+    def __init__(self, symbol, bid_price=0.0, ask_price=0.0, last_price=0.0, greeks=None,
+                 implied_volatility=0.0, open_interest=0, volume=0, underlying_last_price=0.0, time=None):
+        self.symbol = symbol
+        self.bid_price = bid_price
+        self.ask_price = ask_price
+        self.last_price = last_price
+        self.greeks = greeks if greeks is not None else Greeks()
+        self.implied_volatility = implied_volatility
+        self.open_interest = open_interest
+        self.volume = volume
+        self.underlying_last_price = underlying_last_price
+        self.time = time
+
+    @property
+    def strike(self):
+        return self.symbol.id.strike_price
+
+    @property
+    def right(self):
+        return self.symbol.id.option_right
+
+    @property
+    def expiry(self):
+        return self.symbol.id.date
+
+    @property
+    def underlying_symbol(self):
+        return self.symbol.underlying
+
+
+class OptionChain:
+    """The filtered contracts of one canonical option at one point in time."""
+
+    def __init__(self, canonical_symbol, time, underlying_price, contracts):
+        self.symbol = canonical_symbol
+        self.time = time
+        self.underlying = _UnderlyingQuote(canonical_symbol.underlying, underlying_price)
+        self.contracts = {contract.symbol: contract for contract in contracts}
+
+    def __iter__(self):
+        return iter(self.contracts.values())
+
+    def __len__(self):
+        return len(self.contracts)
+
+
+class _UnderlyingQuote:
+    def __init__(self, symbol, price):
+        self.symbol = symbol
+        self.price = price
+
+
+class OptionChains(dict):
+    """slice.option_chains: canonical Symbol -> OptionChain."""
+
+
+class Bar:
+    """One side of a QuoteBar (only the close is tracked)."""
+
+    __slots__ = ("close",)
+
+    def __init__(self, close):
+        self.close = close
+
+
+class QuoteBar:
+    """A contract's quote for one bar: bid and ask at the bar's close."""
+
+    __slots__ = ("symbol", "end_time", "bid", "ask")
+
+    def __init__(self, symbol, end_time, bid, ask):
+        self.symbol = symbol
+        self.end_time = end_time
+        self.bid = Bar(bid)
+        self.ask = Bar(ask)
+
+
+class QuoteBars(dict):
+    """slice.quote_bars: Symbol -> QuoteBar for the securities quoted in this bar."""
+
+    def contains_key(self, symbol):
+        return symbol in self
+
+
+class Slice:
+    """The data for one time step."""
+
+    def __init__(self, time, option_chains=None, quote_bars=None):
+        self.time = time
+        self.option_chains = option_chains if option_chains is not None else OptionChains()
+        self.quote_bars = quote_bars if quote_bars is not None else QuoteBars()
+
+    @property
+    def has_data(self):
+        return bool(self.option_chains)
+
+
+class OptionFilterUniverse:
+    """
+    Contract universe passed to an option's set_filter function.
+
+    Supports the filters the v2 UniverseBuilder uses: include_weeklys,
+    expiration(min_days, max_days) and strikes(min_offset, max_offset),
+    where strike offsets count listed strikes around the at-the-money strike.
+    """
+
+    def __init__(self, symbols, underlying_price, date):
+        self._symbols = list(symbols)
+        self._underlying_price = underlying_price
+        self._date = date
+
+    def include_weeklys(self):
+        return self
+
+    def expiration(self, min_days, max_days):
+        if isinstance(min_days, datetime.timedelta):
+            min_days = min_days.days
+        if isinstance(max_days, datetime.timedelta):
+            max_days = max_days.days
+        self._symbols = [s for s in self._symbols
+                         if min_days <= (s.id.date.date() - self._date).days <= max_days]
+        return self
+
+    def strikes(self, min_strike, max_strike):
+        listed = sorted({s.id.strike_price for s in self._symbols})
+        if not listed:
+            return self
+        atm = min(range(len(listed)), key=lambda i: abs(listed[i] - self._underlying_price))
+        low = listed[max(0, atm + min_strike)]
+        high = listed[min(len(listed) - 1, atm + max_strike)]
+        self._symbols = [s for s in self._symbols if low <= s.id.strike_price <= high]
+        return self
+
+    def puts_only(self):
+        self._symbols = [s for s in self._symbols if s.id.option_right == OptionRight.PUT]
+        return self
+
+    def calls_only(self):
+        self._symbols = [s for s in self._symbols if s.id.option_right == OptionRight.CALL]
+        return self
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+# ------------------------------------------------------------------------------
+# Option strategies
+# ------------------------------------------------------------------------------
+
+class OptionLegData:
+    def __init__(self, right, strike, expiration, quantity):
+        self.right = right
+        self.strike = strike
+        self.expiration = expiration
+        self.quantity = quantity
+
+
+class OptionStrategy:
+    def __init__(self, name, canonical_option, option_legs):
+        self.name = name
+        self.canonical_option = canonical_option
+        self.underlying = canonical_option.underlying if canonical_option is not None else None
+        self.option_legs = option_legs
+
+
+class OptionStrategies:
+    @staticmethod
+    def bull_put_spread(canonical_option, higher_strike, lower_strike, expiration):
+        """Short the higher strike put, long the lower strike put."""
+        return OptionStrategy("Bull Put Spread", canonical_option, [
+            OptionLegData(OptionRight.PUT, higher_strike, expiration, -1),
+            OptionLegData(OptionRight.PUT, lower_strike, expiration, 1),
+        ])
+
+# ------------------------------------------------------------------------------
+# Orders
+# ------------------------------------------------------------------------------
+
+class Order:
+    def __init__(self, order_id, symbol, quantity, order_type, time, limit_price=None, tag=""):
+        self.id = order_id
+        self.symbol = symbol
+        self.quantity = quantity
+        self.type = order_type
+        self.time = time
+        self.limit_price = limit_price
+        self.tag = tag
+        self.status = OrderStatus.NEW
+        self.price = 0.0
+        self.last_fill_time = None
+        self.group_order_manager = None     # GroupOrderManager of a combo order's legs
+
+    @property
+    def direction(self):
+        return OrderDirection.BUY if self.quantity > 0 else OrderDirection.SELL
+
+
+class Leg:
+    """One leg of a combo order: symbol and quantity per unit of the combo."""
+
+    def __init__(self, symbol, quantity, order_price=None):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.order_price = order_price
+
+    @staticmethod
+    def create(symbol, quantity, order_price=None):
+        return Leg(symbol, quantity, order_price)
+
+
+class GroupOrderManager:
+    """Shared state of the leg orders of one combo order."""
+
+    def __init__(self, group_id, count, quantity, limit_price=None):
+        self.id = group_id
+        self.count = count
+        self.quantity = quantity            # Combo quantity (the legs are ratio x quantity)
+        self.limit_price = limit_price      # Net price per combo unit (sum of leg ratio x price)
+        self.order_ids = []
+
+
+class CashAmount:
+    def __init__(self, amount, currency="USD"):
+        self.amount = amount
+        self.currency = currency
+
+
+class OrderFee:
+    """Fee of a fill (the stand-in's fills are fee-free)."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class OrderEvent:
+    def __init__(self, order, status, time, fill_price=0.0, fill_quantity=0, message=""):
+        self.order_id = order.id
+        self.symbol = order.symbol
+        self.status = status
+        self.utc_time = time
+        self.fill_price = fill_price
+        self.fill_quantity = fill_quantity
+        self.quantity = order.quantity
+        self.direction = order.direction
+        self.message = message
+        self.is_assignment = order.type == OrderType.OPTION_EXERCISE
+        self.order_fee = OrderFee(CashAmount(0.0))
+
+    def __str__(self):
+        return (f"OrderEvent(id={self.order_id}, {self.symbol}, status={self.status}, "
+                f"fill={self.fill_quantity}@{self.fill_price})")
+
+
+class OrderResponse:
+    def __init__(self, order_id, is_success, message=""):
+        self.order_id = order_id
+        self.is_success = is_success
+        self.is_error = not is_success
+        self.error_message = message
+
+
+class OrderTicket:
+    """Handle to a submitted order."""
+
+    def __init__(self, transactions, order):
+        self._transactions = transactions
+        self._order = order
+        self.quantity_filled = 0
+        self.average_fill_price = 0.0
+
+    @property
+    def order_id(self):
+        return self._order.id
+
+    @property
+    def symbol(self):
+        return self._order.symbol
+
+    @property
+    def quantity(self):
+        return self._order.quantity
+
+    @property
+    def status(self):
+        return self._order.status
+
+    @property
+    def order_type(self):
+        return self._order.type
+
+    @property
+    def tag(self):
+        return self._order.tag
+
+    @property
+    def time(self):
+        return self._order.time
+
+    def cancel(self, tag=None):
+        return self._transactions._cancel(self._order, tag)
+
+    def update_limit_price(self, limit_price, tag=None):
+        return self._transactions._update_limit_price(self._order, limit_price, tag)
+
+
+class SecurityTransactionManager:
+    """
+    algorithm.transactions: order submission, tickets and fills.
+
+    Market orders fill synchronously at submission while the market is open
+    (buys at the ask, sells at the bid), so their events reach on_order_event
+    before the order call returns, as in LEAN backtests. Limit orders and
+    market orders placed while the market is closed fill on a later bar
+    through _scan_fills. Combo limit orders fill all legs together once the
+    legs' net price reaches the combo limit. Fees and slippage are not modelled.
+    """
+
+    def __init__(self, algorithm):
+        self._algorithm = algorithm
+        self._orders = {}
+        self._tickets = {}
+        self._next_id = 1
+        self._next_group_id = 1
+
+    def get_order_ticket(self, order_id):
+        return self._tickets.get(order_id)
+
+    def get_order_by_id(self, order_id):
+        return self._orders.get(order_id)
+
+    def get_order_tickets(self):
+        return list(self._tickets.values())
+
+    def get_open_orders(self, symbol=None):
+        return [order for order in self._orders.values()
+                if order.status not in _CLOSED_STATUSES and (symbol is None or order.symbol == symbol)]
+
+    def cancel_open_orders(self, symbol=None, tag=None):
+        return [self._cancel(order, tag) for order in self.get_open_orders(symbol)]
+
+    @property
+    def orders_count(self):
+        return len(self._orders)
+
+    # --- replay hooks -------------------------------------------------------
+
+    def _submit(self, symbol, quantity, order_type, limit_price=None, tag=""):
+        algorithm = self._algorithm
+        order = Order(self._next_id, symbol, quantity, order_type, algorithm.time, limit_price, tag or "")
+        self._next_id += 1
+        self._orders[order.id] = order
+        ticket = OrderTicket(self, order)
+        self._tickets[order.id] = ticket
+
+        if symbol not in algorithm.securities:
+            order.status = OrderStatus.INVALID
+            algorithm._raise_order_event(OrderEvent(order, OrderStatus.INVALID, algorithm.time,
+                                                    message=f"{symbol} not found in Securities"))
+            return ticket
+        if quantity == 0:
+            order.status = OrderStatus.INVALID
+            algorithm._raise_order_event(OrderEvent(order, OrderStatus.INVALID, algorithm.time,
+                                                    message="Order quantity cannot be zero"))
+            return ticket
+
+        if limit_price is not None:
+            order.limit_price = self._round_limit_price(symbol, limit_price)
+
+        order.status = OrderStatus.SUBMITTED
+        algorithm._raise_order_event(OrderEvent(order, OrderStatus.SUBMITTED, algorithm.time))
+
+        if order_type == OrderType.MARKET and algorithm._market_open:
+            self._try_fill(order, algorithm.securities[symbol])
+        return ticket
+
+    def _submit_combo(self, legs, quantity, limit_price, tag=""):
+        """Submit a combo limit order: one COMBO_LIMIT order per leg sharing a GroupOrderManager."""
+        algorithm = self._algorithm
+        group = GroupOrderManager(self._next_group_id, len(legs), quantity)
+        self._next_group_id += 1
+        tickets = []
+        for leg in legs:
+            order = Order(self._next_id, leg.symbol, leg.quantity * quantity, OrderType.COMBO_LIMIT,
+                          algorithm.time, None, tag or "")
+            order.group_order_manager = group
+            self._next_id += 1
+            self._orders[order.id] = order
+            group.order_ids.append(order.id)
+            ticket = OrderTicket(self, order)
+            self._tickets[order.id] = ticket
+            tickets.append(ticket)
+
+        # The legs are accepted or rejected together
+        missing = [leg.symbol for leg in legs if leg.symbol not in algorithm.securities]
+        if missing or quantity == 0 or not legs:
+            message = f"{missing[0]} not found in Securities" if missing else "Order quantity cannot be zero"
+            for ticket in tickets:
+                ticket._order.status = OrderStatus.INVALID
+                algorithm._raise_order_event(OrderEvent(ticket._order, OrderStatus.INVALID, algorithm.time,
+                                                        message=message))
+            return tickets
+
+        group.limit_price = self._round_limit_price(legs[0].symbol, limit_price)
+        for ticket in tickets:
+            ticket._order.limit_price = group.limit_price
+            ticket._order.status = OrderStatus.SUBMITTED
+            algorithm._raise_order_event(OrderEvent(ticket._order, OrderStatus.SUBMITTED, algorithm.time))
+        return tickets
+
+    def _try_fill_combo(self, group):
+        """Fill every leg of a combo limit order if the legs' net price reaches the limit."""
+        securities = self._algorithm.securities
+        orders = [self._orders[order_id] for order_id in group.order_ids]
+        prices = []
+        for order in orders:
+            security = securities.get(order.symbol)
+            price = (security.ask_price if order.quantity > 0 else security.bid_price) if security is not None else 0
+            if price <= 0:
+                return False
+            prices.append(price)
+        # Net price per combo unit; buying the combo needs it at or below the limit, selling at or above
+        net_price = sum(order.quantity * price for order, price in zip(orders, prices)) / group.quantity
+        if (group.quantity > 0 and net_price > group.limit_price) or \
+                (group.quantity < 0 and net_price < group.limit_price):
+            return False
+        for order, price in zip(orders, prices):
+            self._fill(order, price)
+        return True
+
+    def _try_fill(self, order, security):
+        """Fill the order against the security's current quote if possible."""
+        if order.type == OrderType.MARKET:
+            price = security.ask_price if order.quantity > 0 else security.bid_price
+            if price <= 0:
+                price = security.price
+            if price <= 0 and order.quantity > 0:
+                return False
+        elif order.type == OrderType.LIMIT:
+            if order.quantity > 0:
+                if not (0 < security.ask_price <= order.limit_price):
+                    return False
+                price = security.ask_price
+            else:
+                if not security.bid_price >= order.limit_price or security.bid_price <= 0:
+                    return False
+                price = security.bid_price
+        else:
+            return False
+        self._fill(order, price)
+        return True
+
+    def _fill(self, order, price, message=""):
+        algorithm = self._algorithm
+        holding = algorithm.portfolio[order.symbol]
+        security = algorithm.securities.get(order.symbol)
+        multiplier = security.symbol_properties.contract_multiplier if security is not None else holding.multiplier
+        holding.multiplier = multiplier
+        holding._apply_fill(price, order.quantity)
+        algorithm.portfolio.cash -= price * order.quantity * multiplier
+
+        order.status = OrderStatus.FILLED
+        order.price = price
+        order.last_fill_time = algorithm.time
+        ticket = self._tickets[order.id]
+        ticket.quantity_filled = order.quantity
+        ticket.average_fill_price = price
+        algorithm._raise_order_event(OrderEvent(order, OrderStatus.FILLED, algorithm.time,
+                                                fill_price=price, fill_quantity=order.quantity, message=message))
+
+    def _scan_fills(self, time):
+        """Fill open orders against quotes that arrived after the order was placed."""
+        scanned_groups = set()
+        for order in list(self._orders.values()):
+            if order.status not in (OrderStatus.SUBMITTED, OrderStatus.UPDATE_SUBMITTED):
+                continue
+            security = self._algorithm.securities.get(order.symbol)
+            if security is None or security.local_time != time or order.time >= time:
+                continue
+            group = order.group_order_manager
+            if group is not None:
+                # A combo is checked once per bar, when any of its legs is re-quoted
+                if group.id not in scanned_groups:
+                    scanned_groups.add(group.id)
+                    self._try_fill_combo(group)
+                continue
+            self._try_fill(order, security)
+
+    def _cancel(self, order, tag=None):
+        if order.status in _CLOSED_STATUSES:
+            return OrderResponse(order.id, False, "Order already closed")
+        # Canceling one leg of a combo cancels all of its legs
+        group = order.group_order_manager
+        orders = [self._orders[order_id] for order_id in group.order_ids] if group is not None else [order]
+        for leg_order in orders:
+            if leg_order.status in _CLOSED_STATUSES:
+                continue
+            leg_order.status = OrderStatus.CANCELED
+            if tag:
+                leg_order.tag = tag
+            self._algorithm._raise_order_event(OrderEvent(leg_order, OrderStatus.CANCELED, self._algorithm.time,
+                                                          message="Order canceled"))
+        return OrderResponse(order.id, True)
+
+    def _round_limit_price(self, symbol, limit_price):
+        """Round a limit price to the security's minimum price variation, warning like LEAN does."""
+        tick = self._algorithm.securities[symbol].symbol_properties.minimum_price_variation
+        rounded = round(round(limit_price / tick) * tick, 10)
+        if rounded != limit_price:
+            self._algorithm.log(f"Warning: To meet brokerage precision requirements, order LimitPrice was "
+                                f"rounded to {rounded} from {limit_price}")
+        return rounded
+
+    def _update_limit_price(self, order, limit_price, tag=None):
+        if order.status in _CLOSED_STATUSES or order.type not in (OrderType.LIMIT, OrderType.COMBO_LIMIT):
+            return OrderResponse(order.id, False, "Order cannot be updated")
+        limit_price = self._round_limit_price(order.symbol, limit_price)
+        # A combo's limit is the group's net price - updating any leg updates all of them
+        group = order.group_order_manager
+        if group is not None:
+            group.limit_price = limit_price
+        orders = [self._orders[order_id] for order_id in group.order_ids] if group is not None else [order]
+        for leg_order in orders:
+            if leg_order.status in _CLOSED_STATUSES:
+                continue
+            leg_order.limit_price = limit_price
+            leg_order.time = self._algorithm.time
+            if tag:
+                leg_order.tag = tag
+            leg_order.status = OrderStatus.UPDATE_SUBMITTED
+            self._algorithm._raise_order_event(OrderEvent(leg_order, OrderStatus.UPDATE_SUBMITTED,
+                                                          self._algorithm.time))
+        return OrderResponse(order.id, True)
+
+    def _settle_expired(self, symbol, underlying_price):
+        """Cash-settle an expired option holding at intrinsic value and cancel its open orders."""
+        for order in self.get_open_orders(symbol):
+            self._cancel(order, "Contract expired")
+        holding = self._algorithm.portfolio.get(symbol)
+        if holding is None or holding.quantity == 0:
+            return
+        strike = symbol.id.strike_price
+        if symbol.id.option_right == OptionRight.PUT:
+            intrinsic = max(0.0, strike - underlying_price)
+        else:
+            intrinsic = max(0.0, underlying_price - strike)
+        order = Order(self._next_id, symbol, -holding.quantity, OrderType.OPTION_EXERCISE,
+                      self._algorithm.time, tag="Simulated expiry")
+        self._next_id += 1
+        self._orders[order.id] = order
+        self._tickets[order.id] = OrderTicket(self, order)
+        self._fill(order, intrinsic, message="Option expired" if intrinsic == 0 else "Option exercised/assigned")
+
+# ------------------------------------------------------------------------------
+# Scheduling
+# ------------------------------------------------------------------------------
+
+class DateRule:
+    def __init__(self, name, predicate):
+        self.name = name
+        self._predicate = predicate
+
+    def applies(self, date, is_trading_day):
+        return self._predicate(date, is_trading_day)
+
+
+class TimeRule:
+    def __init__(self, name, resolve):
+        self.name = name
+        self._resolve = resolve
+
+    def time_on(self, date, session):
+        """Datetime the rule fires on `date`, or None. session is (open, close) or None."""
+        return self._resolve(date, session)
+
+
+class DateRules:
+    def every_day(self, symbol=None):
+        # Without a symbol LEAN fires every calendar day, holidays included
+        if symbol is None:
+            return DateRule("EveryDay", lambda date, trading: True)
+        return DateRule(f"EveryDay({symbol})", lambda date, trading: trading)
+
+    def on(self, *dates):
+        # Either dates/datetimes or a single (year, month, day)
+        if len(dates) == 3 and all(isinstance(part, int) for part in dates):
+            dates = (datetime.date(*dates),)
+        wanted = {d.date() if isinstance(d, datetime.datetime) else d for d in dates}
+        return DateRule("On", lambda date, trading: date in wanted)
+
+
+class TimeRules:
+    def at(self, hour, minute=0, second=0):
+        clock = datetime.time(hour, minute, second)
+        return TimeRule(f"At({clock})", lambda date, session: datetime.datetime.combine(date, clock))
+
+    def after_market_open(self, symbol, minutes_after_open=0.0, extended_market_open=False):
+        offset = datetime.timedelta(minutes=minutes_after_open)
+        return TimeRule(f"AfterMarketOpen({symbol}, {minutes_after_open})",
+                        lambda date, session: session[0] + offset if session else None)
+
+    def before_market_close(self, symbol, minutes_before_close=0.0, extended_market_close=False):
+        offset = datetime.timedelta(minutes=minutes_before_close)
+        return TimeRule(f"BeforeMarketClose({symbol}, {minutes_before_close})",
+                        lambda date, session: session[1] - offset if session else None)
+
+
+class ScheduledEvent:
+    def __init__(self, date_rule, time_rule, callback, name=None):
+        self.date_rule = date_rule
+        self.time_rule = time_rule
+        self.callback = callback
+        self.name = name or f"{date_rule.name}: {time_rule.name}"
+
+
+class ScheduleManager:
+    def __init__(self):
+        self.events = []
+
+    def on(self, date_rule, time_rule, callback):
+        event = ScheduledEvent(date_rule, time_rule, callback)
+        self.events.append(event)
+        return event
+
+    def _events_on(self, date, session):
+        """Replay hook: (time, event) pairs firing on `date`, in time then registration order."""
+        due = []
+        for order, event in enumerate(self.events):
+            if not event.date_rule.applies(date, session is not None):
+                continue
+            fire_time = event.time_rule.time_on(date, session)
+            if fire_time is not None:
+                due.append((fire_time, order, event))
+        due.sort(key=lambda item: (item[0], item[1]))
+        return [(fire_time, event) for fire_time, _, event in due]
+
+# ------------------------------------------------------------------------------
+# Object store
+# ------------------------------------------------------------------------------
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _object_store_root():
+    """Storage folder from lean.json's object-store-root, else ./storage at the repo root (LEAN's default)."""
+    try:
+        with open(os.path.join(_REPO_DIR, "lean.json")) as handle:
+            # lean.json allows // comments
+            config = json.loads("\n".join(line for line in handle if not line.lstrip().startswith("//")))
+    except (OSError, ValueError):
+        config = {}
+    return os.path.join(_REPO_DIR, config.get("object-store-root", "storage"))
+
+
+class ObjectStore:
+    """algorithm.object_store: keys are relative paths of files under the storage root."""
+
+    def __init__(self, root=None):
+        self.root = root or _object_store_root()
+
+    def get_file_path(self, key):
+        path = os.path.join(self.root, *key.strip("/").split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def contains_key(self, key):
+        return os.path.isfile(os.path.join(self.root, *key.strip("/").split("/")))
+
+    def save_bytes(self, key, contents):
+        path = self.get_file_path(key)
+        with open(path + ".tmp", "wb") as handle:
+            handle.write(bytes(contents))
+        os.replace(path + ".tmp", path)
+        return True
+
+    def save(self, key, text):
+        return self.save_bytes(key, text.encode("utf-8"))
+
+    def read_bytes(self, key):
+        if not self.contains_key(key):
+            raise KeyError(f"Object store key not found: {key}")
+        with open(self.get_file_path(key), "rb") as handle:
+            return handle.read()
+
+    def read(self, key):
+        return self.read_bytes(key).decode("utf-8")
+
+    def delete(self, key):
+        if not self.contains_key(key):
+            return False
+        os.remove(self.get_file_path(key))
+        return True
+
+    @property
+    def keys(self):
+        found = []
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                found.append(os.path.relpath(os.path.join(folder, name), self.root).replace(os.sep, "/"))
+        return sorted(found)
+
+# ------------------------------------------------------------------------------
+# Algorithm
+# ------------------------------------------------------------------------------
+
+def _midnight(date):
+    if isinstance(date, datetime.datetime):
+        return date.replace(hour=0, minute=0, second=0, microsecond=0)
+    return datetime.datetime.combine(date, datetime.time())
+
+
+class QCAlgorithm:
+    """
+    Base algorithm. Subclasses implement initialize/on_data/on_order_event as in LEAN.
+
+    Logs go to _log_handler (print by default), prefixed with the algorithm time.
+    """
+
+    def __init__(self):
+        self.time = datetime.datetime(1998, 1, 1)
+        self.start_date = None
+        self.end_date = None
+        self.time_zone = TimeZones.NEW_YORK
+        self.benchmark = None
+        self.live_mode = False
+        self.securities = SecurityManager()
+        self.portfolio = SecurityPortfolioManager(self.securities)
+        self.transactions = SecurityTransactionManager(self)
+        self.schedule = ScheduleManager()
+        self.object_store = ObjectStore()
+        self.date_rules = DateRules()
+        self.time_rules = TimeRules()
+        self.warm_up_period = None
+        self.is_warming_up = False
+        self._parameters = {}           # name -> value, set by the replay (--parameter)
+        self._market_open = False
+        self._log_handler = print
+
+    # --- lifecycle (overridden by the algorithm) ----------------------------
+
+    def initialize(self):
+        pass
+
+    def on_data(self, slice):
+        pass
+
+    def on_order_event(self, order_event):
+        pass
+
+    def on_end_of_day(self, symbol):
+        pass
+
+    def on_end_of_algorithm(self):
+        pass
+
+    # --- setup ---------------------------------------------------------------
+
+    def set_start_date(self, year, month=None, day=None):
+        # start_date/end_date are datetimes at midnight, as in LEAN
+        self.start_date = _midnight(year if month is None else datetime.date(year, month, day))
+        self.time = self.start_date
+
+    def set_end_date(self, year, month=None, day=None):
+        self.end_date = _midnight(year if month is None else datetime.date(year, month, day))
+
+    def set_cash(self, cash):
+        self.portfolio.set_cash(cash)
+
+    def set_time_zone(self, time_zone):
+        self.time_zone = time_zone
+
+    def set_warm_up(self, period, resolution=None):
+        self.warm_up_period = (period, resolution)
+
+    def set_benchmark(self, symbol):
+        self.benchmark = symbol
+
+    def get_parameter(self, name, default_value=None):
+        """Project parameter as a string, or default_value when it isn't set (as in LEAN)."""
+        return self._parameters.get(name, default_value)
+
+    def add_equity(self, ticker, resolution=Resolution.MINUTE, market=Market.USA):
+        symbol = Symbol.create(ticker, SecurityType.EQUITY, market)
+        security = self.securities.get(symbol) or Security(symbol, resolution)
+        self.securities[symbol] = security
+        return security
+
+    def add_option(self, underlying, resolution=Resolution.MINUTE, market=Market.USA):
+        return self._add_option_universe(underlying, SecurityType.EQUITY, None, resolution, market)
+
+    def add_index(self, ticker, resolution=Resolution.MINUTE, market=Market.USA):
+        symbol = Symbol.create(ticker, SecurityType.INDEX, market)
+        security = self.securities.get(symbol) or Security(symbol, resolution)
+        self.securities[symbol] = security
+        return security
+
+    def add_index_option(self, underlying, target_option=None, resolution=Resolution.MINUTE, market=Market.USA):
+        # Also accepts LEAN's add_index_option(underlying, resolution) overload
+        if not isinstance(target_option, str) and target_option is not None:
+            target_option, resolution = None, target_option
+        return self._add_option_universe(underlying, SecurityType.INDEX, target_option, resolution, market)
+
+    def _add_option_universe(self, underlying, underlying_type, target_option, resolution, market):
+        if isinstance(underlying, str):
+            underlying = Symbol.create(underlying, underlying_type, market)
+        if underlying not in self.securities:
+            self.securities[underlying] = Security(underlying, resolution)
+        canonical = Symbol.create_canonical_option(underlying, market, target_option=target_option)
+        security = self.securities.get(canonical) or Security(canonical, resolution)
+        self.securities[canonical] = security
+        return security
+
+    # --- logging -------------------------------------------------------------
+
+    def log(self, message):
+        self._log_handler(f"{self.time:%Y-%m-%d %H:%M:%S} {message}")
+
+    def debug(self, message):
+        self._log_handler(f"{self.time:%Y-%m-%d %H:%M:%S} {message}")
+
+    def error(self, message):
+        self._log_handler(f"{self.time:%Y-%m-%d %H:%M:%S} ERROR {message}")
+
+    # --- orders --------------------------------------------------------------
+
+    def market_order(self, symbol, quantity, asynchronous=False, tag=""):
+        return self.transactions._submit(self._resolve_symbol(symbol), quantity, OrderType.MARKET, tag=tag)
+
+    def limit_order(self, symbol, quantity, limit_price, tag=""):
+        return self.transactions._submit(self._resolve_symbol(symbol), quantity, OrderType.LIMIT,
+                                         limit_price=limit_price, tag=tag)
+
+    def combo_limit_order(self, legs, quantity, limit_price, tag=""):
+        return self.transactions._submit_combo(legs, quantity, limit_price, tag=tag)
+
+    def buy(self, symbol, quantity):
+        if isinstance(symbol, OptionStrategy):
+            return self._strategy_orders(symbol, quantity)
+        return self.market_order(symbol, abs(quantity))
+
+    def sell(self, symbol, quantity):
+        if isinstance(symbol, OptionStrategy):
+            return self._strategy_orders(symbol, -quantity)
+        return self.market_order(symbol, -abs(quantity))
+
+    def liquidate(self, symbol=None, tag="Liquidated"):
+        tickets = []
+        for held_symbol, holding in list(self.portfolio.items()):
+            if holding.quantity and (symbol is None or held_symbol == symbol):
+                tickets.append(self.market_order(held_symbol, -holding.quantity, tag=tag))
+        return tickets
+
+    def _strategy_orders(self, strategy, quantity):
+        """Submit one market order per strategy leg, scaled by quantity."""
+        tickets = []
+        canonical = strategy.canonical_option
+        for leg in strategy.option_legs:
+            symbol = Symbol.create_option(canonical.underlying, canonical.id.symbol, canonical.id.market,
+                                          OptionStyle.AMERICAN, leg.right, leg.strike, leg.expiration)
+            tickets.append(self.market_order(symbol, leg.quantity * quantity))
+        return tickets
+
+    def _resolve_symbol(self, symbol):
+        if isinstance(symbol, Symbol):
+            return symbol
+        for known in self.securities:
+            if known.value == str(symbol).upper():
+                return known
+        return Symbol.create(str(symbol), SecurityType.EQUITY)
+
+    # --- replay hooks --------------------------------------------------------
+
+    def _raise_order_event(self, order_event):
+        self.on_order_event(order_event)
@@ -0,0 +1,447 @@
+"""
+Columnar store of QuantConnect backtest logs and trade CSVs.
+
+Backtest downloads come in pairs named after the backtest:
+
+    <name>_logs.txt     "YYYY-MM-DD HH:MM:SS message" per line (algorithm time)
+    <name>_trades.csv   Time,Symbol,Price,Quantity,Type,Status,Value,Tag (UTC)
+
+Each file is streamed once into NumPy columns and kept in a store folder as a
+compressed .npz, with a manifest of the source files' sizes and modification
+times. Ingesting again only parses new or changed files, so queries over
+hundreds of backtests read columns instead of re-parsing text.
+
+Log tables:    source, time, tag, message, symbol, underlying, expiry, right, strike
+Trade tables:  source, time, symbol, underlying, expiry, right, strike,
+               price, quantity, order_type, status, value
+
+- tag: the line's log prefix. The prefixes the strategies' analyses key on
+  (TAG_PREFIXES, e.g. "TRADE ORDER", "STOP-LOSS TRIGGERED", "Order Event: FILLED")
+  are found even behind a module prefix ("RISK MANAGER - STOP-LOSS TRIGGERED:");
+  other lines get their leading upper-case prefix ("FAILSAFE", "MARKET DATA"),
+  or "" when there is none.
+- symbol: the first OCC option symbol in the line ("SPY   240102P00471000"),
+  split into underlying/expiry/right/strike in one vectorized pass per file.
+- right: 0 call, 1 put, -1 no option symbol (as ChainSnapshot.RIGHT_CALL/RIGHT_PUT).
+- Trade times are converted from UTC to the algorithm time zone, so they line
+  up with the log lines.
+
+Round trips are rebuilt from the trade fills, one per source, underlying and
+expiry (the strategies hold at most one spread per underlying and expiry, as in
+replay.py): opened/closed times, fills, legs, profit in dollars and whether
+every leg was flat again by the last fill.
+
+Usage:
+    python offline/backtest_logs.py ingest .windsurf --store backtest_store
+    python offline/backtest_logs.py tags --store backtest_store
+    python offline/backtest_logs.py trips --store backtest_store --source "Alert Apricot Duck" --out trips.csv
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import sys
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+LOG_SUFFIX = "_logs.txt"
+TRADES_SUFFIX = "_trades.csv"
+
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+
+DEFAULT_TIME_ZONE = "America/New_York"
+DEFAULT_MULTIPLIER = 100.0
+
+# Prefixes tagged wherever they follow an optional "MODULE - " prefix, longest first
+TAG_PREFIXES = (
+    "Order Event: FILLED",
+    "STOP-LOSS TRIGGERED",
+    "TAKE-PROFIT TRIGGERED",
+    "POSITION CLOSE",
+    "SPREAD SELECTED",
+    "TRADE FILLED",
+    "TRADE ORDER",
+)
+_TAG_RE = re.compile(r"(?:[A-Z][A-Z ]* - )?(%s)\b" % "|".join(re.escape(prefix) for prefix in TAG_PREFIXES))
+_PREFIX_RE = re.compile(r"([A-Z][A-Z0-9_/ -]*?[A-Z0-9_])(?::| -) ")
+_LINE_RE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) ?(.*)")
+
+# OCC option symbol: root padded to 6, YYMMDD, C/P, strike x 1000 in 8 digits
+OCC_LENGTH = 21
+_OCC_RE = re.compile(r"[A-Z][A-Z0-9.]{0,5} *\d{6}[CP]\d{8}")
+
+LOG_COLUMNS = ("time", "tag", "message", "symbol")
+TRADE_COLUMNS = ("time", "symbol", "price", "quantity", "order_type", "status", "value")
+OCC_COLUMNS = ("underlying", "expiry", "right", "strike")
+
+
+def parse_occ(symbols):
+    """
+    Split OCC option symbols into columns.
+
+    Parameters:
+        symbols: Sequence of strings; entries that are not OCC symbols give empty values
+
+    Returns:
+        dict: underlying (str), expiry (datetime64[D], NaT), right (int8: 0 call, 1 put, -1)
+              and strike (float64, NaN) arrays
+    """
+    text = np.asarray(symbols, dtype=str)
+    count = len(text)
+    if count == 0:
+        return {"underlying": np.array([], dtype=str), "expiry": np.array([], dtype="datetime64[D]"),
+                "right": np.array([], dtype=np.int8), "strike": np.array([], dtype=np.float64)}
+
+    # One byte per character, one row per symbol (shorter entries are zero padded)
+    chars = np.char.ljust(text, OCC_LENGTH).astype(f"S{OCC_LENGTH}").view(np.uint8).reshape(count, OCC_LENGTH)
+    digits = chars.astype(np.int64) - ord("0")
+    right_char = chars[:, 12]
+    valid = ((np.char.str_len(text) == OCC_LENGTH)
+             & ((right_char == ord("C")) | (right_char == ord("P")))
+             & np.all((digits[:, 6:12] >= 0) & (digits[:, 6:12] <= 9), axis=1)
+             & np.all((digits[:, 13:] >= 0) & (digits[:, 13:] <= 9), axis=1))
+
+    years = 2000 + digits[:, 6] * 10 + digits[:, 7]
+    months = digits[:, 8] * 10 + digits[:, 9]
+    days = digits[:, 10] * 10 + digits[:, 11]
+    expiry = ((years - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+              + np.clip(months - 1, 0, 11).astype("timedelta64[M]")).astype("datetime64[D]")
+    expiry = expiry + np.clip(days - 1, 0, 30).astype("timedelta64[D]")
+    strike = digits[:, 13:] @ (10 ** np.arange(7, -1, -1)) / 1000.0
+
+    underlying = np.char.strip(chars[:, :6].copy().view("S6").ravel().astype(str))
+    return {
+        "underlying": np.where(valid, underlying, ""),
+        "expiry": np.where(valid, expiry, np.datetime64("NaT", "D")),
+        "right": np.where(valid, (right_char == ord("P")).astype(np.int8), np.int8(-1)).astype(np.int8),
+        "strike": np.where(valid, strike, np.nan),
+    }
+
+
+def tag_message(message):
+    """Log tag of one message (see the module docstring)."""
+    match = _TAG_RE.match(message)
+    if match:
+        return match.group(1)
+    match = _PREFIX_RE.match(message)
+    return match.group(1) if match else ""
+
+
+def _columns(values, dtype=str):
+    # Fixed-width arrays save without pickling; an empty column still needs a width
+    return np.array(values, dtype=dtype) if values else np.array([], dtype=dtype)
+
+
+def parse_log(path):
+    """
+    Stream a backtest log into columns.
+
+    Lines without a timestamp continue the previous message.
+
+    Returns:
+        dict: LOG_COLUMNS plus OCC_COLUMNS arrays
+    """
+    times, tags, messages, symbols = [], [], [], []
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            line = line.rstrip("\r\n")
+            match = _LINE_RE.match(line)
+            if match is None:
+                if messages and line.strip():
+                    messages[-1] += "\n" + line
+                continue
+            stamp, message = match.groups()
+            times.append(stamp)
+            tags.append(tag_message(message))
+            messages.append(message)
+            symbol = _OCC_RE.search(message)
+            symbols.append(symbol.group(0) if symbol else "")
+
+    columns = {
+        "time": _columns(times, "datetime64[s]"),
+        "tag": _columns(tags),
+        "message": _columns(messages),
+        "symbol": _columns(symbols),
+    }
+    columns.update(parse_occ(columns["symbol"]))
+    return columns
+
+
+def _to_local(stamps, time_zone):
+    """UTC datetime64[s] array -> naive local times (one conversion per distinct stamp)."""
+    unique, inverse = np.unique(stamps, return_inverse=True)
+    zone = ZoneInfo(time_zone)
+    local = [stamp.replace(tzinfo=datetime.timezone.utc).astimezone(zone).replace(tzinfo=None)
+             for stamp in unique.astype(object)]
+    return np.array(local, dtype="datetime64[s]")[inverse] if len(unique) else unique
+
+
+def parse_trades(path, time_zone=DEFAULT_TIME_ZONE):
+    """
+    Stream a backtest trades CSV into columns.
+
+    Returns:
+        dict: TRADE_COLUMNS plus OCC_COLUMNS arrays, times in the given time zone
+    """
+    values = {name: [] for name in TRADE_COLUMNS}
+    with open(path, newline="", encoding="utf-8", errors="replace") as handle:
+        reader = csv.reader(handle)
+        header = [name.strip().lower() for name in next(reader, [])]
+        positions = {name: header.index(name) for name in header}
+        for record in reader:
+            if not record or not record[0].strip():
+                continue
+            record = [field.strip() for field in record] + [""] * (len(header) - len(record))
+            values["time"].append(record[positions["time"]].rstrip("Z"))
+            values["symbol"].append(record[positions["symbol"]])
+            values["price"].append(float(record[positions["price"]] or "nan"))
+            values["quantity"].append(float(record[positions["quantity"]] or 0))
+            values["order_type"].append(record[positions["type"]] if "type" in positions else "")
+            values["status"].append(record[positions["status"]] if "status" in positions else "")
+            values["value"].append(float(record[positions["value"]] or "nan") if "value" in positions else np.nan)
+
+    columns = {
+        "time": _to_local(_columns(values["time"], "datetime64[s]"), time_zone),
+        "symbol": _columns(values["symbol"]),
+        "price": _columns(values["price"], np.float64),
+        "quantity": _columns(values["quantity"], np.float64),
+        "order_type": _columns(values["order_type"]),
+        "status": _columns(values["status"]),
+        "value": _columns(values["value"], np.float64),
+    }
+    columns.update(parse_occ(columns["symbol"]))
+    return columns
+
+
+def round_trips(trades, multiplier=DEFAULT_MULTIPLIER):
+    """
+    Rebuild round trips from trade fills, one per source, underlying and expiry.
+
+    Parameters:
+        trades: Trade table columns (with a source column)
+        multiplier: Contract multiplier for the profit (default: 100)
+
+    Returns:
+        dict: source, underlying, expiry, opened, closed, fills, legs, profit and
+              closed_out (every leg flat again) arrays, ordered by source and open time
+    """
+    filled = (np.char.lower(trades["status"]) == "filled") & (trades["right"] >= 0)
+    columns = {name: column[filled] for name, column in trades.items()}
+    if not len(columns["time"]):
+        return {"source": _columns([]), "underlying": _columns([]), "expiry": _columns([], "datetime64[D]"),
+                "opened": _columns([], "datetime64[s]"), "closed": _columns([], "datetime64[s]"),
+                "fills": _columns([], np.int64), "legs": _columns([], np.int64),
+                "profit": _columns([], np.float64), "closed_out": _columns([], bool)}
+
+    # Group ids for (source, underlying, expiry) and for each contract within the source
+    trip_key = np.char.add(np.char.add(columns["source"], "|"),
+                           np.char.add(np.char.add(columns["underlying"], "|"),
+                                       columns["expiry"].astype(str)))
+    _, trip = np.unique(trip_key, return_inverse=True)
+    _, leg = np.unique(np.char.add(np.char.add(columns["source"], "|"), columns["symbol"]), return_inverse=True)
+
+    order = np.lexsort((columns["time"], trip))
+    trip, leg = trip[order], leg[order]
+    columns = {name: column[order] for name, column in columns.items()}
+    starts = np.flatnonzero(np.r_[True, trip[1:] != trip[:-1]])
+    ends = np.r_[starts[1:], len(trip)] - 1
+
+    # Net position of every (trip, contract) pair; a trip is closed out when all are flat
+    pairs, pair = np.unique(np.stack([trip, leg], axis=1), axis=0, return_inverse=True)
+    pair = pair.ravel()
+    net = np.bincount(pair, weights=columns["quantity"], minlength=len(pairs))
+    open_pairs = np.bincount(pairs[:, 0], weights=np.abs(net) > 1e-9, minlength=trip.max() + 1)
+    legs = np.bincount(pairs[:, 0], minlength=trip.max() + 1)
+
+    cash = -columns["price"] * columns["quantity"] * multiplier
+    trip_ids = trip[starts]
+    trips = {
+        "source": columns["source"][starts],
+        "underlying": columns["underlying"][starts],
+        "expiry": columns["expiry"][starts],
+        "opened": columns["time"][starts],
+        "closed": columns["time"][ends],
+        "fills": np.diff(np.r_[starts, len(trip)]).astype(np.int64),
+        "legs": legs[trip_ids].astype(np.int64),
+        "profit": np.round(np.add.reduceat(cash, starts), 2),
+        "closed_out": open_pairs[trip_ids] == 0,
+    }
+    order = np.lexsort((trips["opened"], trips["source"]))
+    return {name: column[order] for name, column in trips.items()}
+
+
+def find_sources(paths):
+    """
+    Backtest log and trade files under the given files or folders.
+
+    Returns:
+        list: (path, kind, source name) with kind "logs" or "trades"
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(os.path.join(folder, name)
+                                for folder, _, names in os.walk(path) for name in names)
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            name = os.path.basename(candidate)
+            if name.endswith(LOG_SUFFIX):
+                found.append((candidate, "logs", name[:-len(LOG_SUFFIX)]))
+            elif name.endswith(TRADES_SUFFIX):
+                found.append((candidate, "trades", name[:-len(TRADES_SUFFIX)]))
+    return found
+
+
+class BacktestLogStore:
+    """Folder of parsed log and trade tables, re-parsing only new or changed source files."""
+
+    def __init__(self, root, time_zone=DEFAULT_TIME_ZONE):
+        """
+        Open (or create) a store.
+
+        Parameters:
+            root: Store folder
+            time_zone: Algorithm time zone for trade times (default: America/New_York)
+        """
+        self.root = root
+        self.time_zone = time_zone
+        self.manifest = {"version": STORE_VERSION, "time_zone": time_zone, "files": {}}
+        path = os.path.join(root, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as handle:
+                manifest = json.load(handle)
+            # Tables from another store version or time zone are rebuilt on the next ingest
+            if manifest.get("version") == STORE_VERSION and manifest.get("time_zone") == time_zone:
+                self.manifest = manifest
+
+    @property
+    def files(self):
+        """Ingested source files: absolute path -> entry (kind, source, size, mtime, table)."""
+        return self.manifest["files"]
+
+    def ingest(self, paths):
+        """
+        Parse new or changed log and trade files under the given paths.
+
+        Returns:
+            tuple: (files parsed, files unchanged)
+        """
+        os.makedirs(self.root, exist_ok=True)
+        parsed = unchanged = 0
+        for path, kind, source in find_sources(paths):
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = self.files.get(path)
+            if (entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+                    and os.path.exists(os.path.join(self.root, entry["table"]))):
+                unchanged += 1
+                continue
+
+            columns = parse_log(path) if kind == "logs" else parse_trades(path, self.time_zone)
+            table = f"{kind}-{hashlib.sha1(path.encode()).hexdigest()[:16]}.npz"
+            np.savez_compressed(os.path.join(self.root, table), **columns)
+            self.files[path] = {"kind": kind, "source": source, "size": stat.st_size,
+                                "mtime": stat.st_mtime_ns, "table": table, "rows": len(columns["time"])}
+            parsed += 1
+
+        temporary = os.path.join(self.root, MANIFEST + ".tmp")
+        with open(temporary, "w") as handle:
+            json.dump(self.manifest, handle, indent=1)
+        os.replace(temporary, os.path.join(self.root, MANIFEST))
+        return parsed, unchanged
+
+    def sources(self, kind=None):
+        """Names of the ingested backtests."""
+        return sorted({entry["source"] for entry in self.files.values() if kind in (None, entry["kind"])})
+
+    def table(self, kind, sources=None):
+        """
+        Columns of every ingested table of one kind, with a source column.
+
+        Parameters:
+            kind: "logs" or "trades"
+            sources: Backtest names to include (default: all)
+
+        Returns:
+            dict: column name -> array
+        """
+        parts = {}
+        for entry in sorted(self.files.values(), key=lambda entry: (entry["source"], entry["table"])):
+            if entry["kind"] != kind or (sources and entry["source"] not in sources):
+                continue
+            with np.load(os.path.join(self.root, entry["table"])) as arrays:
+                for name in arrays.files:
+                    parts.setdefault(name, []).append(arrays[name])
+                parts.setdefault("source", []).append(np.full(entry["rows"], entry["source"]))
+        return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+    def round_trips(self, sources=None, multiplier=DEFAULT_MULTIPLIER):
+        """Round trips of the ingested trade files (see round_trips)."""
+        trades = self.table("trades", sources)
+        if not trades:
+            return round_trips({"status": _columns([]), "right": _columns([], np.int8), "time": _columns([])})
+        return round_trips(trades, multiplier)
+
+
+def write_table(path, columns):
+    """Write columns to .csv or .npz."""
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            writer.writerows(zip(*(column.tolist() for column in columns.values())))
+    else:
+        np.savez(path, **columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("ingest", "tags", "trips"))
+    parser.add_argument("paths", nargs="*", help="Files or folders to ingest")
+    parser.add_argument("--store", required=True, help="Store folder")
+    parser.add_argument("--source", action="append", default=[], help="Only this backtest (repeatable)")
+    parser.add_argument("--time-zone", default=DEFAULT_TIME_ZONE, help="Algorithm time zone of the backtests")
+    parser.add_argument("--multiplier", type=float, default=DEFAULT_MULTIPLIER, help="Contract multiplier")
+    parser.add_argument("--out", help="Write the table to this .csv or .npz file")
+    args = parser.parse_args()
+
+    store = BacktestLogStore(args.store, args.time_zone)
+    if args.command == "ingest":
+        if not args.paths:
+            parser.error("ingest needs files or folders")
+        parsed, unchanged = store.ingest(args.paths)
+        print(f"Parsed {parsed} files, {unchanged} unchanged, {len(store.sources())} backtests in {args.store}",
+              file=sys.stderr)
+        return
+
+    if args.command == "tags":
+        logs = store.table("logs", args.source)
+        if not logs:
+            return
+        keys, counts = np.unique(np.char.add(np.char.add(logs["source"], "\t"), logs["tag"]), return_counts=True)
+        rows = sorted((key.split("\t") + [count] for key, count in zip(keys.tolist(), counts.tolist())),
+                      key=lambda row: (row[0], -row[2]))
+        for source, tag, count in rows:
+            print(f"{source:<32} {tag or '(untagged)':<40} {count:>7}")
+        return
+
+    trips = store.round_trips(args.source, args.multiplier)
+    if args.out:
+        write_table(args.out, trips)
+    for source in np.unique(trips["source"]).tolist():
+        mine = trips["source"] == source
+        closed = mine & trips["closed_out"]
+        profit = trips["profit"][closed]
+        win_rate = float(np.mean(profit > 0)) if len(profit) else 0.0
+        print(f"{source:<32} trips {int(mine.sum()):>5}  closed {int(closed.sum()):>5}  "
+              f"profit {profit.sum():>10.2f}  win {win_rate:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
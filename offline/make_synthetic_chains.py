@@ -0,0 +1,163 @@
+"""
+Generate synthetic per-minute option chains in the replay data layout.
+
+The underlying follows a random walk and contracts are priced with
+Black-Scholes (zero rates, a simple put skew) on trading time to a 16:00
+expiry, with quotes rounded outward to $0.01. The data is only meant to
+exercise the algorithm and the replay engine, not to be realistic.
+
+Trading days and session times come from data/market-hours (see
+market_hours.py): holidays have no file and half days end at the early close.
+Bar times are written in New York time, the algorithm time zone, also for
+underlyings listed in another exchange time zone (SPX sessions are Chicago).
+
+Usage:
+    python offline/make_synthetic_chains.py --out offline_data --start 2024-01-02 --end 2024-01-31
+    python offline/make_synthetic_chains.py --out offline_data --strikes 300 --expiries 10
+    python offline/make_synthetic_chains.py --out offline_data --ticker SPX --security-type Index \
+        --spot 4750 --strike-step 5
+"""
+import argparse
+import csv
+import datetime
+import math
+import os
+import random
+import zoneinfo
+
+from market_hours import load_market_hours
+from replay import CHAIN_COLUMNS, chain_file
+
+SESSION_MINUTES = 390                       # Regular session, for annualizing
+ALGORITHM_TIME_ZONE = zoneinfo.ZoneInfo("America/New_York")
+MINUTES_PER_YEAR = 252 * SESSION_MINUTES
+
+
+def _norm_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def black_scholes(spot, strike, years, vol, is_put):
+    """
+    Price and delta of a European option with zero rates.
+
+    Returns:
+        tuple: (price, delta)
+    """
+    if years <= 0 or vol <= 0:
+        if is_put:
+            return max(0.0, strike - spot), (-1.0 if spot < strike else 0.0)
+        return max(0.0, spot - strike), (1.0 if spot > strike else 0.0)
+    sqrt_t = vol * math.sqrt(years)
+    d1 = (math.log(spot / strike) + 0.5 * vol * vol * years) / sqrt_t
+    d2 = d1 - sqrt_t
+    if is_put:
+        return strike * _norm_cdf(-d2) - spot * _norm_cdf(-d1), _norm_cdf(d1) - 1.0
+    return spot * _norm_cdf(d1) - strike * _norm_cdf(d2), _norm_cdf(d1)
+
+
+def trading_days(hours, start, end):
+    """Dates from start to end (inclusive) with a regular session."""
+    day = start
+    while day <= end:
+        if hours.is_open(day):
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def session_minutes(hours, day):
+    """Minutes in the day's regular session (390, or fewer on a half day)."""
+    return int((hours.market_close(day) - hours.market_open(day)).total_seconds() // 60)
+
+
+def write_day(path, day, spot, rng, strike_range, expiries, vol, hours, strike_step=1.0):
+    """
+    Write one day of chains and return the closing underlying price.
+
+    Parameters:
+        path: Output CSV path
+        day: Trading date
+        spot: Previous close
+        rng: random.Random
+        strike_range: Strikes either side of the opening price
+        expiries: Number of daily expiries listed (today first)
+        vol: Annualized volatility of the walk and at-the-money implied vol
+        hours: Market-hours entry of the underlying
+        strike_step: Dollars between listed strikes (default: 1)
+    """
+    expiry_dates = []
+    candidate = day
+    while len(expiry_dates) < expiries:
+        if hours.is_open(candidate):
+            expiry_dates.append(candidate)
+        candidate += datetime.timedelta(days=1)
+
+    # Trading minutes of the sessions after today up to each expiry
+    later_minutes = [sum(session_minutes(hours, d) for d in trading_days(hours, day, expiry) if d != day)
+                     for expiry in expiry_dates]
+    today_minutes = session_minutes(hours, day)
+
+    center = round(spot / strike_step) * strike_step
+    strikes = [float(center + k * strike_step) for k in range(-strike_range, strike_range + 1)]
+    minute_vol = vol / math.sqrt(MINUTES_PER_YEAR)
+    # Session open in the algorithm time zone
+    exchange_zone = zoneinfo.ZoneInfo(hours.exchange_time_zone)
+    session_open = hours.market_open(day).replace(tzinfo=exchange_zone).astimezone(ALGORITHM_TIME_ZONE)
+
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(CHAIN_COLUMNS)
+        for minute in range(1, today_minutes + 1):
+            spot *= math.exp(rng.gauss(0.0, minute_vol))
+            bar_time = session_open + datetime.timedelta(minutes=minute)
+            stamp = bar_time.strftime("%Y-%m-%d %H:%M")
+            underlying = round(spot, 2)
+
+            for expiry, later in zip(expiry_dates, later_minutes):
+                # Trading minutes left: the rest of today plus the later sessions up to the expiry
+                minutes_left = today_minutes - minute + later
+                years = minutes_left / MINUTES_PER_YEAR
+                for strike in strikes:
+                    skew = 1.0 + 10.0 * max(0.0, (spot - strike) / spot)
+                    for is_put in (True, False):
+                        price, delta = black_scholes(spot, strike, years, vol * skew, is_put)
+                        half_spread = max(0.01, price * 0.02)
+                        bid = max(0.0, math.floor((price - half_spread) * 100) / 100)
+                        ask = math.ceil((price + half_spread) * 100) / 100
+                        writer.writerow((stamp, underlying, "P" if is_put else "C", strike, expiry.isoformat(),
+                                         f"{bid:.2f}", f"{ask:.2f}", f"{price:.2f}", f"{delta:.4f}",
+                                         f"{vol * skew:.4f}", 1000))
+    return spot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Output data directory")
+    parser.add_argument("--ticker", default="SPY")
+    parser.add_argument("--start", default="2024-01-02", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", default="2024-01-05", help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--spot", type=float, default=472.0, help="Starting underlying price")
+    parser.add_argument("--strikes", type=int, default=25, help="Strikes either side of the open (default: 25)")
+    parser.add_argument("--expiries", type=int, default=1, help="Daily expiries listed per day (default: 1)")
+    parser.add_argument("--vol", type=float, default=0.18, help="Annualized volatility (default: 0.18)")
+    parser.add_argument("--strike-step", type=float, default=1.0, help="Dollars between strikes (default: 1)")
+    parser.add_argument("--security-type", default="Equity",
+                        help="Underlying type for the market hours: Equity or Index (default: Equity)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime.datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.datetime.strptime(args.end, "%Y-%m-%d").date()
+    os.makedirs(os.path.join(args.out, args.ticker.lower()), exist_ok=True)
+
+    hours = load_market_hours().entry("usa", args.security_type, args.ticker)
+    spot = args.spot
+    for day in trading_days(hours, start, end):
+        spot = write_day(chain_file(args.out, args.ticker, day), day, spot, rng, args.strikes, args.expiries,
+                         args.vol, hours, args.strike_step)
+        print(f"{day}: close {spot:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Compiled, memory-mapped index of LEAN's market-hours database.
+
+data/market-hours/market-hours-database.json is ~155k lines; parsing it costs
+far more than any tool reading it needs. This module compiles it once into a
+compact binary index next to the JSON and memory-maps that index on load.
+
+Layout of the index (all integers little-endian):
+
+    magic b"QCMH" | u16 version | u32 metadata length | metadata JSON | arrays
+
+The metadata JSON is small (entry keys, time zone names, source file stamp and
+where each array starts); the arrays are read in place with np.frombuffer:
+
+- entries     int32 [entry, 4]       data tz, exchange tz, week, calendar
+- week_slots  int32 [week, 7, 2]     offset/count into segments, Monday first
+- segments    int32 [segment, 3]     start, end (seconds from midnight), state
+- calendars   int32 [calendar, 3]    first day (date ordinal), offset into day_codes, length
+- day_codes   uint16 [day]           0 = regular day, otherwise a row of day_kinds
+- day_kinds   int32 [kind, 3]        flags, early close, late open (seconds, -1 = none)
+
+Identical weekly schedules and holiday calendars are stored once (538 entries
+share 82 weeks and 98 calendars), and each calendar keeps one code per day
+over the span of its special days, so every date lookup is a direct index.
+
+Usage:
+    python offline/market_hours.py build
+    python offline/market_hours.py show Equity usa SPY 2024-07-03
+"""
+import argparse
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_SOURCE = os.path.join(_REPO_DIR, "data", "market-hours", "market-hours-database.json")
+DEFAULT_INDEX = os.path.join(_REPO_DIR, "data", "market-hours", "market-hours-database.idx")
+
+MAGIC = b"QCMH"
+VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+STATES = ("closed", "premarket", "market", "postmarket")
+
+# Day flags
+HOLIDAY = 1
+EARLY_CLOSE = 2
+LATE_OPEN = 4
+BANK_HOLIDAY = 8
+
+
+def _parse_time_span(text):
+    """
+    Parse a .NET TimeSpan as written in the database ("09:30:00", "1.00:00:00",
+    "1:00:00:00", "22:0:00") into seconds from midnight.
+    """
+    days = 0
+    if "." in text:
+        day_text, text = text.split(".", 1)
+        days = int(day_text)
+    parts = [int(part) for part in text.split(":")]
+    if len(parts) == 4:
+        days += parts.pop(0)
+    hours, minutes, seconds = parts
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _parse_date(text):
+    """Parse an M/D/YYYY database date into a date ordinal."""
+    month, day, year = text.split("/")
+    return datetime.date(int(year), int(month), int(day)).toordinal()
+
+
+def compile_index(source_path=DEFAULT_SOURCE, index_path=DEFAULT_INDEX):
+    """
+    Compile the market-hours JSON into a binary index.
+
+    Parameters:
+        source_path: market-hours-database.json
+        index_path: Index file to write (replaced atomically)
+
+    Returns:
+        str: The index path
+    """
+    with open(source_path) as handle:
+        entries = json.load(handle)["entries"]
+
+    time_zones = {}
+    weeks = {}
+    calendars = {}
+    day_kinds = {(0, -1, -1): 0}   # Code 0 is a regular day
+    entry_rows = []
+    segments = []
+    week_slots = []
+    calendar_rows = []
+    day_codes = []
+
+    for key, entry in entries.items():
+        data_tz = time_zones.setdefault(entry["dataTimeZone"], len(time_zones))
+        exchange_tz = time_zones.setdefault(entry["exchangeTimeZone"], len(time_zones))
+
+        # Weekly schedule, deduplicated
+        week = tuple(tuple((_parse_time_span(s["start"]), _parse_time_span(s["end"]), STATES.index(s["state"]))
+                           for s in entry.get(day, ())) for day in WEEKDAYS)
+        week_id = weeks.get(week)
+        if week_id is None:
+            week_id = weeks[week] = len(weeks)
+            for day_segments in week:
+                week_slots.append((len(segments), len(day_segments)))
+                segments.extend(day_segments)
+
+        # Special days, deduplicated: ordinal -> [flags, early close, late open]
+        special = {}
+        for text in entry.get("holidays", ()):
+            special.setdefault(_parse_date(text), [0, -1, -1])[0] |= HOLIDAY
+        for text in entry.get("bankHolidays", ()):
+            special.setdefault(_parse_date(text), [0, -1, -1])[0] |= BANK_HOLIDAY
+        for text, close in entry.get("earlyCloses", {}).items():
+            day = special.setdefault(_parse_date(text), [0, -1, -1])
+            day[0] |= EARLY_CLOSE
+            day[1] = _parse_time_span(close)
+        for text, open_time in entry.get("lateOpens", {}).items():
+            day = special.setdefault(_parse_date(text), [0, -1, -1])
+            day[0] |= LATE_OPEN
+            day[2] = _parse_time_span(open_time)
+
+        calendar = tuple(sorted((ordinal, tuple(kind)) for ordinal, kind in special.items()))
+        calendar_id = calendars.get(calendar)
+        if calendar_id is None:
+            calendar_id = calendars[calendar] = len(calendars)
+            if calendar:
+                first, last = calendar[0][0], calendar[-1][0]
+                codes = [0] * (last - first + 1)
+                for ordinal, kind in calendar:
+                    codes[ordinal - first] = day_kinds.setdefault(kind, len(day_kinds))
+                calendar_rows.append((first, len(day_codes), len(codes)))
+                day_codes.extend(codes)
+            else:
+                calendar_rows.append((0, len(day_codes), 0))
+
+        entry_rows.append((data_tz, exchange_tz, week_id, calendar_id))
+
+    if len(day_kinds) > np.iinfo(np.uint16).max:
+        raise ValueError(f"Too many distinct special days for a uint16 code: {len(day_kinds)}")
+
+    arrays = {
+        "entries": np.array(entry_rows, dtype="<i4").reshape(-1, 4),
+        "week_slots": np.array(week_slots, dtype="<i4").reshape(-1, 7, 2),
+        "segments": np.array(segments, dtype="<i4").reshape(-1, 3),
+        "calendars": np.array(calendar_rows, dtype="<i4").reshape(-1, 3),
+        "day_codes": np.array(day_codes, dtype="<u2"),
+        "day_kinds": np.array(sorted(day_kinds, key=day_kinds.get), dtype="<i4").reshape(-1, 3),
+    }
+
+    stat = os.stat(source_path)
+    metadata = {
+        "keys": list(entries),
+        "time_zones": sorted(time_zones, key=time_zones.get),
+        "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+        "arrays": {},
+    }
+
+    # Array offsets depend on the metadata length, so lay out relative to the data start
+    # and pad the metadata so the data starts 8-byte aligned.
+    position = 0
+    for name, array in arrays.items():
+        metadata["arrays"][name] = {"offset": position, "dtype": array.dtype.str, "shape": list(array.shape)}
+        position += (array.nbytes + 7) // 8 * 8
+    metadata_bytes = json.dumps(metadata, separators=(",", ":")).encode()
+    metadata_bytes += b" " * (-(_HEADER.size + len(metadata_bytes)) % 8)
+
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, VERSION, len(metadata_bytes)))
+        handle.write(metadata_bytes)
+        for array in arrays.values():
+            data = array.tobytes()
+            handle.write(data + b"\0" * (-len(data) % 8))
+    os.replace(temp_path, index_path)
+    return index_path
+
+
+class MarketHoursEntry:
+    """
+    Trading hours of one database entry (e.g. Equity-usa-[*]).
+
+    Times are seconds-from-midnight offsets in the exchange time zone, returned as
+    timedelta (some sessions end at 24:00) or combined with the date as datetime.
+    """
+
+    def __init__(self, index, key, row):
+        self._index = index
+        self.key = key
+        data_tz, exchange_tz, self._week, self._calendar = (int(value) for value in index._entries[row])
+        self.data_time_zone = index.time_zones[data_tz]
+        self.exchange_time_zone = index.time_zones[exchange_tz]
+
+    def __repr__(self):
+        return f"MarketHoursEntry({self.key})"
+
+    def _day_kind(self, date):
+        """(flags, early close seconds, late open seconds) for a date."""
+        index = self._index
+        first, offset, length = index._calendars[self._calendar]
+        position = date.toordinal() - int(first)
+        if 0 <= position < length:
+            code = index._day_codes[offset + position]
+            if code:
+                flags, early_close, late_open = index._day_kinds[code]
+                return int(flags), int(early_close), int(late_open)
+        return 0, -1, -1
+
+    def is_holiday(self, date) -> bool:
+        return bool(self._day_kind(date)[0] & HOLIDAY)
+
+    def is_bank_holiday(self, date) -> bool:
+        return bool(self._day_kind(date)[0] & BANK_HOLIDAY)
+
+    def early_close(self, date):
+        """Early close time for the date as a timedelta, or None on a regular day."""
+        flags, early_close, _ = self._day_kind(date)
+        return datetime.timedelta(seconds=early_close) if flags & EARLY_CLOSE else None
+
+    def late_open(self, date):
+        """Late open time for the date as a timedelta, or None on a regular day."""
+        flags, _, late_open = self._day_kind(date)
+        return datetime.timedelta(seconds=late_open) if flags & LATE_OPEN else None
+
+    def sessions(self, date):
+        """
+        Trading segments for a calendar date with holidays, early closes and late
+        opens applied (segments are clipped to the early close and late open, the
+        same way LEAN builds a day's market hours).
+
+        Returns:
+            list: (start timedelta, end timedelta, state name) in time order, empty when closed
+        """
+        index = self._index
+        flags, early_close, late_open = self._day_kind(date)
+        if flags & HOLIDAY:
+            return []
+
+        offset, count = index._week_slots[self._week, date.weekday()]
+        result = []
+        for start, end, state in index._segments[offset:offset + count].tolist():
+            if flags & EARLY_CLOSE:
+                if start >= early_close:
+                    continue
+                end = min(end, early_close)
+            if flags & LATE_OPEN:
+                if end <= late_open:
+                    continue
+                start = max(start, late_open)
+            result.append((datetime.timedelta(seconds=start), datetime.timedelta(seconds=end), STATES[state]))
+        return result
+
+    def market_open(self, date, extended_hours=False):
+        """
+        Start of the date's regular session (or of its first segment with extended_hours).
+
+        Returns:
+            datetime.datetime: Open in the exchange time zone, or None if the market is closed
+        """
+        segments = [s for s in self.sessions(date) if extended_hours or s[2] == "market"]
+        return datetime.datetime.combine(date, datetime.time()) + segments[0][0] if segments else None
+
+    def market_close(self, date, extended_hours=False):
+        """
+        End of the date's regular session (or of its last segment with extended_hours),
+        early closes included.
+
+        Returns:
+            datetime.datetime: Close in the exchange time zone, or None if the market is closed
+        """
+        segments = [s for s in self.sessions(date) if extended_hours or s[2] == "market"]
+        return datetime.datetime.combine(date, datetime.time()) + segments[-1][1] if segments else None
+
+    def is_open(self, date, extended_hours=False) -> bool:
+        return self.market_open(date, extended_hours) is not None
+
+
+class MarketHoursIndex:
+    """
+    Read-only view of a compiled index. Arrays are memory-mapped, so opening the
+    index costs one small metadata parse no matter how large the database is.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX):
+        """
+        Parameters:
+            path: Index written by compile_index
+        """
+        self.path = path
+        with open(path, "rb") as handle:
+            self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, metadata_length = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} market-hours index")
+        data_start = _HEADER.size + metadata_length
+        metadata = json.loads(self._buffer[_HEADER.size:data_start])
+
+        self.source = metadata["source"]
+        self.time_zones = metadata["time_zones"]
+        self.keys = metadata["keys"]
+        self._rows = {key.lower(): row for row, key in enumerate(self.keys)}
+        self._resolved = {}
+
+        arrays = {}
+        for name, layout in metadata["arrays"].items():
+            count = int(np.prod(layout["shape"]))
+            arrays[name] = np.frombuffer(self._buffer, dtype=layout["dtype"], count=count,
+                                         offset=data_start + layout["offset"]).reshape(layout["shape"])
+        self._entries = arrays["entries"]
+        self._week_slots = arrays["week_slots"]
+        self._segments = arrays["segments"]
+        self._calendars = arrays["calendars"]
+        self._day_codes = arrays["day_codes"]
+        self._day_kinds = arrays["day_kinds"]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_current(self, source_path=DEFAULT_SOURCE) -> bool:
+        """True if the index was compiled from the current version of the source JSON."""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return True  # Nothing to compare against - the index is all there is
+        return self.source == {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def entry(self, market, security_type, symbol=None) -> MarketHoursEntry:
+        """
+        Look up an entry, falling back to the market-wide [*] entry like LEAN does.
+
+        Parameters:
+            market: Market name, e.g. "usa" or "cboe"
+            security_type: Security type, e.g. "Equity", "Option", "IndexOption" (case-insensitive)
+            symbol: Ticker, e.g. "SPY" (default: the [*] entry)
+
+        Returns:
+            MarketHoursEntry: The entry
+
+        Raises:
+            KeyError: If neither the symbol nor the [*] entry exists
+        """
+        security_type = getattr(security_type, "name", security_type)  # Accept enum members
+        cache_key = (str(market).lower(), str(security_type).lower(), (symbol or "[*]").lower())
+        entry = self._resolved.get(cache_key)
+        if entry is None:
+            market, security_type, symbol = cache_key
+            for candidate in (f"{security_type}-{market}-{symbol}", f"{security_type}-{market}-[*]"):
+                row = self._rows.get(candidate)
+                if row is not None:
+                    entry = MarketHoursEntry(self, self.keys[row], row)
+                    break
+            else:
+                raise KeyError(f"No market hours for {security_type}-{market}-{symbol}")
+            self._resolved[cache_key] = entry
+        return entry
+
+    def close(self):
+        self._entries = self._week_slots = self._segments = None
+        self._calendars = self._day_codes = self._day_kinds = None
+        self._resolved.clear()
+        self._buffer.close()
+
+
+def load_market_hours(index_path=DEFAULT_INDEX, source_path=DEFAULT_SOURCE) -> MarketHoursIndex:
+    """
+    Memory-map the market-hours index, compiling it first if it is missing or
+    older than the source JSON.
+
+    Parameters:
+        index_path: Compiled index
+        source_path: market-hours-database.json the index is built from
+
+    Returns:
+        MarketHoursIndex: The loaded index
+    """
+    if not os.path.exists(index_path):
+        compile_index(source_path, index_path)
+        return MarketHoursIndex(index_path)
+
+    index = MarketHoursIndex(index_path)
+    if not index.is_current(source_path):
+        index.close()
+        compile_index(source_path, index_path)
+        index = MarketHoursIndex(index_path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="market-hours-database.json")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="Compiled index path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Compile the index")
+    show = commands.add_parser("show", help="Print one entry's sessions for a date")
+    show.add_argument("security_type")
+    show.add_argument("market")
+    show.add_argument("symbol")
+    show.add_argument("date", type=lambda text: datetime.datetime.strptime(text, "%Y-%m-%d").date())
+    args = parser.parse_args()
+
+    if args.command == "build":
+        compile_index(args.source, args.index)
+        index = MarketHoursIndex(args.index)
+        print(f"Wrote {len(index)} entries to {args.index} ({os.path.getsize(args.index) / 1024:.0f} KiB)",
+              file=sys.stderr)
+        return
+
+    entry = load_market_hours(args.index, args.source).entry(args.market, args.security_type, args.symbol)
+    print(f"{entry.key} ({entry.exchange_time_zone}) on {args.date:%a %Y-%m-%d}")
+    sessions = entry.sessions(args.date)
+    if not sessions:
+        print("  closed" + (" (holiday)" if entry.is_holiday(args.date) else ""))
+    for start, end, state in sessions:
+        print(f"  {state:<11} {start} - {end}")
+    if entry.early_close(args.date) is not None:
+        print(f"  early close at {entry.early_close(args.date)}")
+    if entry.late_open(args.date) is not None:
+        print(f"  late open at {entry.late_open(args.date)}")
+
+
+if __name__ == "__main__":
+    main()
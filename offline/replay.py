@@ -0,0 +1,579 @@
+"""
+Offline chain replay for the v2 credit spread algorithm.
+
+Runs a QCAlgorithm subclass against per-minute option chains stored on disk,
+using the local AlgorithmImports stand-in in this directory instead of LEAN.
+Intended for profiling and quick iteration, not as a substitute for a cloud
+backtest: fills are taken straight from the recorded quotes, there are no
+fees or slippage, expired options are cash-settled at intrinsic value and
+warm-up is skipped.
+
+Data layout - one CSV per underlying per trading day:
+
+    <data>/<ticker>/<YYYYMMDD>.csv
+
+where ticker is the underlying's (spy, qqq, spx - SPXW contracts read spx).
+
+with one row per contract per minute:
+
+    time,underlying_price,right,strike,expiry,bid,ask,last,delta,iv,open_interest
+    2024-01-02 09:31,472.65,P,470,2024-01-02,0.51,0.53,0.52,-0.21,0.13,1520
+
+- time: bar end time (09:31 covers 09:30-09:31), in the algorithm time zone
+- right: P or C
+- delta, iv, open_interest: optional, leave delta empty for missing greeks
+
+Days recorded by the algorithm's ChainRecorder (record_chains=true) replay the
+same way: point --data at the object store's chains folder, where each day is
+a folder of .npz column parts instead of a CSV:
+
+    <data>/<ticker>/<YYYYMMDD>/part-00000.npz
+
+Trading sessions come from the data: a day's session opens one minute before
+its first bar and closes at its last bar, so half days close early. Scheduled
+events still run on every calendar day their date rule allows.
+
+Use make_synthetic_chains.py to generate a data set.
+
+Usage:
+    python offline/replay.py --data offline_data --start 2024-01-02 --end 2024-01-05
+    python offline/replay.py --data offline_data --profile 30 --quiet
+    python offline/replay.py --data offline_data --parameter underlyings=SPY,QQQ,IWM
+    python offline/replay.py --data storage/chains --start 2024-01-02 --end 2024-01-05
+"""
+import argparse
+import cProfile
+import csv
+import datetime
+import glob
+import importlib
+import os
+import pstats
+import re
+import sys
+import time as wall_clock
+
+import numpy as np
+
+_OFFLINE_DIR = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_ALGORITHM_DIR = os.path.join(_OFFLINE_DIR, "..", "v2_credit_spread_algo")
+
+# The stand-in must win over any other AlgorithmImports on the path
+if _OFFLINE_DIR not in sys.path[:1]:
+    sys.path.insert(0, _OFFLINE_DIR)
+
+from AlgorithmImports import *
+
+CHAIN_COLUMNS = ("time", "underlying_price", "right", "strike", "expiry",
+                 "bid", "ask", "last", "delta", "iv", "open_interest")
+
+BAR_PERIOD = datetime.timedelta(minutes=1)
+
+UNDERLYING_TYPES = (SecurityType.EQUITY, SecurityType.INDEX)
+OPTION_TYPES = (SecurityType.OPTION, SecurityType.INDEX_OPTION)
+# Entry order tags carry the executor's spread ID (SpreadPosition.order_tag)
+SPREAD_TAG = re.compile(r"Spread #(\d+)\b")
+
+
+def chain_file(data_dir, ticker, date):
+    """Path of the chain file for one underlying and trading day."""
+    return os.path.join(data_dir, ticker.lower(), f"{date:%Y%m%d}.csv")
+
+
+def recorded_day_dir(data_dir, ticker, date):
+    """Folder of ChainRecorder parts for one underlying and trading day."""
+    return os.path.join(data_dir, ticker.lower(), f"{date:%Y%m%d}")
+
+
+def load_chain_day(path):
+    """
+    Load one day of per-minute chain rows.
+
+    Parameters:
+        path: Chain CSV file
+
+    Returns:
+        list: (time, underlying_price, rows) per minute in time order, where each row is
+              (right, strike, expiry_date, bid, ask, last, delta, iv, open_interest)
+    """
+    minutes = {}
+    times = {}      # Parsed timestamps and dates are cached - every minute repeats them per contract
+    expiries = {}
+    with open(path, newline="") as handle:
+        for record in csv.DictReader(handle):
+            stamp = record["time"]
+            bar_time = times.get(stamp)
+            if bar_time is None:
+                bar_time = times[stamp] = datetime.datetime.strptime(stamp, "%Y-%m-%d %H:%M")
+
+            expiry = expiries.get(record["expiry"])
+            if expiry is None:
+                expiry = expiries[record["expiry"]] = datetime.datetime.strptime(record["expiry"], "%Y-%m-%d").date()
+
+            entry = minutes.get(bar_time)
+            if entry is None:
+                entry = minutes[bar_time] = (float(record["underlying_price"]), [])
+
+            delta = record.get("delta") or ""
+            entry[1].append((
+                OptionRight.PUT if record["right"].upper().startswith("P") else OptionRight.CALL,
+                float(record["strike"]),
+                expiry,
+                float(record["bid"] or 0),
+                float(record["ask"] or 0),
+                float(record["last"] or 0),
+                float(delta) if delta else None,
+                float(record.get("iv") or 0),
+                int(float(record.get("open_interest") or 0)),
+            ))
+
+    return [(bar_time, price, rows) for bar_time, (price, rows) in sorted(minutes.items())]
+
+
+def load_recorded_day(directory):
+    """
+    Load one day recorded by ChainRecorder, in the same shape as load_chain_day.
+
+    Parameters:
+        directory: Day folder of part-NNNNN.npz column files
+
+    Returns:
+        list: (time, underlying_price, rows) per minute in time order
+    """
+    parts = sorted(glob.glob(os.path.join(directory, "part-*.npz")))
+    if not parts:
+        return []
+
+    columns = {name: [] for name in CHAIN_COLUMNS}
+    for part in parts:
+        with np.load(part) as arrays:
+            for name in CHAIN_COLUMNS:
+                columns[name].append(arrays[name])
+    columns = {name: np.concatenate(chunks) for name, chunks in columns.items()}
+
+    # Parts are written in time order already; the stable sort only guards against hand-merged folders
+    order = np.argsort(columns["time"], kind="stable")
+    times = columns["time"][order]
+    starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+
+    # Convert column-wise, then build the row tuples in one pass
+    delta = columns["delta"][order]
+    rows = list(zip(
+        [OptionRight.PUT if right == 1 else OptionRight.CALL for right in columns["right"][order].tolist()],
+        columns["strike"][order].tolist(),
+        columns["expiry"][order].astype(object).tolist(),
+        columns["bid"][order].tolist(),
+        columns["ask"][order].tolist(),
+        columns["last"][order].tolist(),
+        [None if value != value else value for value in delta.tolist()],
+        columns["iv"][order].tolist(),
+        columns["open_interest"][order].tolist(),
+    ))
+    prices = columns["underlying_price"][order]
+    bar_times = times.astype("datetime64[m]").astype(object)
+    return [(bar_times[start], float(prices[start]), rows[start:end]) for start, end in zip(starts, ends)]
+
+
+class ReplayResult:
+    """Outcome of a replay run."""
+
+    def __init__(self, algorithm, start, end, starting_value, equity_curve, elapsed):
+        self.algorithm = algorithm
+        self.start = start
+        self.end = end
+        self.starting_value = starting_value
+        self.equity_curve = equity_curve   # (date, total portfolio value) after each trading day
+        self.elapsed = elapsed             # Wall-clock seconds
+
+    @property
+    def filled_orders(self):
+        return [order for order in self.algorithm.transactions._orders.values()
+                if order.status == OrderStatus.FILLED]
+
+    @property
+    def trades(self):
+        """
+        Closed option positions as round trips, one per spread. Opening fills are
+        grouped by the spread ID in their order tag; closing fills (close orders,
+        expiry settlements) go to the spreads holding the other side of the leg,
+        oldest first, so concurrent spreads on one expiry stay separate trades.
+        Untagged opening fills are grouped by underlying and expiry. Positions still
+        open at the end are left out.
+
+        Returns:
+            list: dicts with underlying, expiry, spread (ID or None), opened, closed, fills and
+                profit (dollars), in open order
+        """
+        groups = {}
+        holders = {}    # Symbol -> keys of the groups holding it, oldest first
+        for order in sorted(self.filled_orders, key=lambda order: (order.last_fill_time, order.id)):
+            symbol = order.symbol
+            if symbol.security_type not in OPTION_TYPES:
+                continue
+            multiplier = self.algorithm.portfolio[symbol].multiplier
+            match = SPREAD_TAG.search(order.tag or "")
+            spread_id = int(match.group(1)) if match else None
+
+            # Closing quantity goes to the groups holding the opposite side, the rest opens a position
+            allocations = []
+            remaining = order.quantity
+            for key in holders.get(symbol, []):
+                held = groups[key]["_open"][symbol]
+                if remaining == 0 or held * remaining >= 0:
+                    continue
+                quantity = -held if abs(held) < abs(remaining) else remaining
+                allocations.append((key, quantity))
+                remaining -= quantity
+            if remaining:
+                key = (symbol.underlying.value, spread_id if match else symbol.id.date.date())
+                allocations.append((key, remaining))
+
+            for key, quantity in allocations:
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {"underlying": symbol.underlying.value, "expiry": symbol.id.date.date(),
+                                           "spread": spread_id, "opened": order.last_fill_time, "closed": None,
+                                           "fills": 0, "profit": 0.0, "_open": {}}
+                group["fills"] += 1
+                group["profit"] -= order.price * quantity * multiplier
+                group["closed"] = order.last_fill_time
+                group["_open"][symbol] = group["_open"].get(symbol, 0) + quantity
+                symbol_holders = holders.setdefault(symbol, [])
+                if group["_open"][symbol] == 0:
+                    if key in symbol_holders:
+                        symbol_holders.remove(key)
+                elif key not in symbol_holders:
+                    symbol_holders.append(key)
+
+        trades = []
+        for group in groups.values():
+            if any(group.pop("_open").values()):
+                continue
+            group["profit"] = round(group["profit"], 2)
+            trades.append(group)
+        return trades
+
+    @property
+    def final_value(self):
+        return self.equity_curve[-1][1] if self.equity_curve else self.starting_value
+
+    @property
+    def max_drawdown(self):
+        """Largest peak-to-trough decline of the daily equity curve, as a fraction of the peak."""
+        peak = self.starting_value
+        drawdown = 0.0
+        for _, value in self.equity_curve:
+            peak = max(peak, value)
+            if peak > 0:
+                drawdown = max(drawdown, (peak - value) / peak)
+        return drawdown
+
+    def summary(self):
+        trades = self.trades
+        wins = sum(1 for trade in trades if trade["profit"] > 0)
+        return {
+            "start": str(self.start),
+            "end": str(self.end),
+            "trading_days": len(self.equity_curve),
+            "starting_value": round(self.starting_value, 2),
+            "final_value": round(self.final_value, 2),
+            "net_profit": round(self.final_value - self.starting_value, 2),
+            "max_drawdown": round(self.max_drawdown, 4),
+            "orders": self.algorithm.transactions.orders_count,
+            "fills": len(self.filled_orders),
+            "trades": len(trades),
+            "win_rate": round(wins / len(trades), 4) if trades else 0.0,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+class ReplayEngine:
+    """
+    Drives an algorithm through recorded chains minute by minute.
+
+    Per trading day:
+    1. Load each subscribed option's chain file and run its set_filter once on the
+       day's listed contracts (as LEAN's daily universe selection does)
+    2. For every minute: fire scheduled events due before it, update the underlying
+       and contract quotes, fill working orders, fire events due at it, call on_data
+    3. After the last bar: on_end_of_day for each underlying, settle expiring options,
+       then fire any events still due that day (e.g. after an early close)
+    """
+
+    def __init__(self, algorithm, data_dir, start=None, end=None):
+        """
+        Parameters:
+            algorithm: Algorithm instance (initialize is called by run)
+            data_dir: Root of the chain data (see module docstring)
+            start: First date to replay (default: the algorithm's start date)
+            end: Last date to replay (default: the algorithm's end date)
+        """
+        self.algorithm = algorithm
+        self.data_dir = data_dir
+        self.start = start
+        self.end = end
+
+    def run(self):
+        """
+        Initialize the algorithm and replay every day from start to end.
+
+        Returns:
+            ReplayResult: Equity curve and order statistics
+        """
+        algorithm = self.algorithm
+        started = wall_clock.perf_counter()
+
+        # Date overrides replace the algorithm's own set_start_date/set_end_date calls, so
+        # everything initialize derives from the start date (e.g. its schedule) follows them
+        if self.start is not None:
+            algorithm.set_start_date = lambda *args: QCAlgorithm.set_start_date(algorithm, self.start)
+        if self.end is not None:
+            algorithm.set_end_date = lambda *args: QCAlgorithm.set_end_date(algorithm, self.end)
+        algorithm.initialize()
+        algorithm.is_warming_up = False  # No warm-up data offline
+
+        start = self.start or algorithm.start_date
+        end = self.end or algorithm.end_date
+        if start is None or end is None:
+            raise ValueError("Replay needs start and end dates (set them in initialize or pass them in)")
+        start = start.date() if isinstance(start, datetime.datetime) else start
+        end = end.date() if isinstance(end, datetime.datetime) else end
+
+        starting_value = algorithm.portfolio.total_portfolio_value
+        equity_curve = []
+
+        day = start
+        while day <= end:
+            if self._run_day(day):
+                equity_curve.append((day, algorithm.portfolio.total_portfolio_value))
+            day += datetime.timedelta(days=1)
+
+        algorithm.on_end_of_algorithm()
+        return ReplayResult(algorithm, start, end, starting_value, equity_curve,
+                            wall_clock.perf_counter() - started)
+
+    def _option_subscriptions(self):
+        return [security for security in self.algorithm.securities.values()
+                if security.symbol.security_type in OPTION_TYPES and security.symbol.is_canonical]
+
+    def _run_day(self, day):
+        """
+        Replay one calendar day.
+
+        Returns:
+            bool: True if the day had data (a trading session)
+        """
+        algorithm = self.algorithm
+
+        # Load the day's chains and run universe selection
+        day_data = {}
+        for option in self._option_subscriptions():
+            ticker = option.symbol.underlying.value
+            path = chain_file(self.data_dir, ticker, day)
+            recorded = recorded_day_dir(self.data_dir, ticker, day)
+            minutes = None
+            if os.path.exists(path):
+                minutes = load_chain_day(path)
+            elif os.path.isdir(recorded):
+                minutes = load_recorded_day(recorded)
+            if minutes:
+                day_data[option.symbol] = (self._select_contracts(option, minutes, day),
+                                           {bar_time: (price, rows) for bar_time, price, rows in minutes})
+
+        times = sorted({bar_time for _, by_time in day_data.values() for bar_time in by_time})
+        session = (times[0] - BAR_PERIOD, times[-1]) if times else None
+        events = algorithm.schedule._events_on(day, session)
+        next_event = 0
+
+        for bar_time in times:
+            while next_event < len(events) and events[next_event][0] < bar_time:
+                self._fire(events[next_event], session)
+                next_event += 1
+
+            algorithm.time = bar_time
+            algorithm._market_open = True
+            data_slice = self._update_securities(bar_time, day_data)
+            algorithm.transactions._scan_fills(bar_time)
+
+            while next_event < len(events) and events[next_event][0] == bar_time:
+                self._fire(events[next_event], session)
+                next_event += 1
+
+            algorithm.time = bar_time
+            algorithm._market_open = True
+            algorithm.on_data(data_slice)
+
+        algorithm._market_open = False
+        if session is not None:
+            algorithm.time = session[1]
+            for security in list(algorithm.securities.values()):
+                if security.symbol.security_type in UNDERLYING_TYPES:
+                    algorithm.on_end_of_day(security.symbol)
+            self._settle_expiries(day)
+
+        while next_event < len(events):
+            self._fire(events[next_event], session)
+            next_event += 1
+
+        return session is not None
+
+    def _select_contracts(self, option, minutes, day):
+        """
+        Run the option's filter over the contracts listed in the day's data.
+
+        Returns:
+            dict: (right, strike, expiry date) -> Symbol for the selected contracts
+        """
+        canonical = option.symbol
+        style = OptionStyle.EUROPEAN if canonical.security_type == SecurityType.INDEX_OPTION else OptionStyle.AMERICAN
+        listed = {}
+        for _, _, rows in minutes:
+            for row in rows:
+                key = row[:3]
+                if key not in listed:
+                    listed[key] = Symbol.create_option(canonical.underlying, canonical.id.symbol, canonical.id.market,
+                                                       style, *key)
+
+        universe = OptionFilterUniverse(listed.values(), minutes[0][1], day)
+        if option._filter is not None:
+            universe = option._filter(universe)
+        chosen = set(universe)
+
+        selected = {key: symbol for key, symbol in listed.items() if symbol in chosen}
+        for symbol in selected.values():
+            if symbol not in self.algorithm.securities:
+                self.algorithm.securities[symbol] = Security(symbol, option.resolution)
+        return selected
+
+    def _update_securities(self, bar_time, day_data):
+        """Apply this minute's quotes to the securities and build the slice."""
+        securities = self.algorithm.securities
+        chains = OptionChains()
+        quote_bars = QuoteBars()
+
+        for canonical, (selected, by_time) in day_data.items():
+            entry = by_time.get(bar_time)
+            if entry is None:
+                continue
+            underlying_price, rows = entry
+            underlying = securities.get(canonical.underlying)
+            if underlying is not None:
+                underlying._update(bar_time, underlying_price, underlying_price, underlying_price)
+
+            contracts = []
+            for right, strike, expiry, bid, ask, last, delta, iv, open_interest in rows:
+                symbol = selected.get((right, strike, expiry))
+                if symbol is None:
+                    continue
+                securities[symbol]._update(bar_time, bid, ask, last)
+                if bid > 0 or ask > 0:
+                    quote_bars[symbol] = QuoteBar(symbol, bar_time, bid, ask)
+                contracts.append(OptionContract(symbol, bid, ask, last, Greeks(delta=delta or 0.0), iv, open_interest,
+                                                underlying_last_price=underlying_price, time=bar_time))
+            if contracts:
+                chains[canonical] = OptionChain(canonical, bar_time, underlying_price, contracts)
+
+        return Slice(bar_time, chains, quote_bars)
+
+    def _fire(self, due, session):
+        fire_time, event = due
+        algorithm = self.algorithm
+        algorithm.time = fire_time
+        algorithm._market_open = session is not None and session[0] <= fire_time <= session[1]
+        event.callback()
+
+    def _settle_expiries(self, day):
+        """Settle options expiring today and drop contracts that are no longer held."""
+        algorithm = self.algorithm
+        for symbol in list(algorithm.securities):
+            if symbol.security_type not in OPTION_TYPES or symbol.is_canonical:
+                continue
+            if symbol.id.date.date() > day:
+                continue
+            underlying = algorithm.securities.get(symbol.underlying)
+            algorithm.transactions._settle_expired(symbol, underlying.price if underlying is not None else 0.0)
+            holding = algorithm.portfolio.get(symbol)
+            if holding is None or holding.quantity == 0:
+                del algorithm.securities[symbol]
+
+
+def load_algorithm_class(algorithm_dir=_DEFAULT_ALGORITHM_DIR, module_name="main", class_name=None):
+    """
+    Import an algorithm module from a LEAN project folder.
+
+    Parameters:
+        algorithm_dir: Project folder (modules import each other by bare name)
+        module_name: Module holding the algorithm class (default: main)
+        class_name: Class to load (default: the first QCAlgorithm subclass found)
+
+    Returns:
+        type: The algorithm class
+    """
+    algorithm_dir = os.path.abspath(algorithm_dir)
+    if algorithm_dir not in sys.path:
+        sys.path.insert(1, algorithm_dir)
+    module = importlib.import_module(module_name)
+
+    if class_name is not None:
+        return getattr(module, class_name)
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, QCAlgorithm) and value is not QCAlgorithm:
+            return value
+    raise ValueError(f"No QCAlgorithm subclass found in {module_name}")
+
+
+def _parse_date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def _parse_parameter(text):
+    name, separator, value = text.partition("=")
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got {text!r}")
+    return name.strip(), value.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="Chain data directory")
+    parser.add_argument("--start", type=_parse_date, help="First date (YYYY-MM-DD, default: algorithm start)")
+    parser.add_argument("--end", type=_parse_date, help="Last date (YYYY-MM-DD, default: algorithm end)")
+    parser.add_argument("--algorithm-dir", default=_DEFAULT_ALGORITHM_DIR, help="LEAN project folder")
+    parser.add_argument("--module", default="main", help="Module holding the algorithm (default: main)")
+    parser.add_argument("--class-name", help="Algorithm class (default: first QCAlgorithm subclass)")
+    parser.add_argument("--parameter", type=_parse_parameter, action="append", default=[], metavar="NAME=VALUE",
+                        help="Project parameter for get_parameter (repeatable)")
+    parser.add_argument("--log-file", help="Write algorithm logs here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="Discard algorithm logs")
+    parser.add_argument("--profile", type=int, metavar="N", help="Profile the run and print the top N functions")
+    args = parser.parse_args()
+
+    algorithm = load_algorithm_class(args.algorithm_dir, args.module, args.class_name)()
+    algorithm._parameters.update(args.parameter)
+
+    log_file = None
+    if args.quiet:
+        algorithm._log_handler = lambda line: None
+    elif args.log_file:
+        log_file = open(args.log_file, "w")
+        algorithm._log_handler = lambda line: log_file.write(line + "\n")
+
+    engine = ReplayEngine(algorithm, args.data, args.start, args.end)
+    try:
+        if args.profile:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(engine.run)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(args.profile)
+        else:
+            result = engine.run()
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    for key, value in result.summary().items():
+        print(f"{key:>16}: {value}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Parameter sweep for the v2 credit spread algorithm over offline chain data.
+
+Fans a grid of SpreadSelector / RiskManager settings out across a local
+process pool. Every worker replays the same chain data (see replay.py)
+through the v2 modules with one combination of settings and reports its
+P/L, win rate, max drawdown and trade count. Results are written to one
+columnar file: .npz (one NumPy array per column) or .csv.
+
+Settings are applied right after the algorithm's initialize, so anything not
+in the grid keeps the value main.py gives it:
+
+    target_delta, max_delta, min_credit_pct, min_credit_fallback_pct,
+    max_spread_width, width_fallbacks     -> algorithm.spread_selector
+    stop_loss_multiple                    -> every underlying's RiskManager
+
+take_profit_pct is not sweepable: take-profit is disabled in main.py, so the
+RiskManager only stores it and every value would replay the same.
+
+Grid values are comma separated; list values (width_fallbacks) use "/" between
+their items. A JSON file mapping names to lists of values works as well.
+
+Each worker keeps the days it has parsed in memory, so only the first run on a
+worker pays for reading the CSV files (or recorded parts).
+
+Usage:
+    python offline/sweep.py --data offline_data --out sweep.npz \\
+        --grid target_delta=0.10,0.15,0.20 --grid stop_loss_multiple=1.5,2,3
+    python offline/sweep.py --data offline_data --out sweep.csv --grid-file grid.json --workers 8
+"""
+import argparse
+import csv
+import functools
+import itertools
+import json
+import os
+import sys
+import time as wall_clock
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import replay
+from replay import ReplayEngine, load_algorithm_class, _DEFAULT_ALGORITHM_DIR, _parse_date, _parse_parameter
+
+# Tunable settings and the module that holds them
+SELECTOR_SETTINGS = ("target_delta", "max_delta", "min_credit_pct", "min_credit_fallback_pct",
+                     "max_spread_width", "width_fallbacks")
+RISK_SETTINGS = ("stop_loss_multiple",)
+SETTINGS = SELECTOR_SETTINGS + RISK_SETTINGS
+# Settings the modules hold but the strategy never acts on (take-profit is disabled)
+INERT_SETTINGS = ("take_profit_pct",)
+
+METRIC_COLUMNS = ("net_profit", "final_value", "win_rate", "max_drawdown", "trades", "orders", "elapsed_seconds")
+
+# Parsed chain days kept per worker process
+CACHED_DAYS = 256
+
+
+def parse_value(name, text):
+    """Grid value from its command-line text (width_fallbacks: "5/4/3" -> [5.0, 4.0, 3.0])."""
+    if name == "width_fallbacks":
+        return [float(part) for part in text.split("/") if part]
+    return float(text)
+
+
+def parse_grid(entries, grid_file=None):
+    """
+    Sweep grid from --grid NAME=V1,V2 entries and an optional JSON file.
+
+    Returns:
+        dict: setting name -> list of values, in the order given
+    """
+    grid = {}
+    if grid_file:
+        with open(grid_file) as handle:
+            grid.update(json.load(handle))
+    for entry in entries:
+        name, _, values = entry.partition("=")
+        grid[name.strip()] = [parse_value(name.strip(), value) for value in values.split(",") if value]
+
+    inert = sorted(set(grid) & set(INERT_SETTINGS))
+    if inert:
+        raise ValueError(f"Settings {inert} have no effect on the replay (take-profit is disabled)")
+    unknown = sorted(set(grid) - set(SETTINGS))
+    if unknown:
+        raise ValueError(f"Unknown settings {unknown}, expected some of {list(SETTINGS)}")
+    empty = sorted(name for name, values in grid.items() if not values)
+    if empty:
+        raise ValueError(f"No values for {empty}")
+    return grid
+
+
+def combinations(grid):
+    """Every combination of the grid as a list of {name: value} dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def apply_settings(algorithm, settings):
+    """
+    Set sweep settings on an initialized algorithm's modules.
+
+    Parameters:
+        algorithm: V2CreditSpreadAlgoAlgorithm after initialize
+        settings: {setting name: value}
+    """
+    for name, value in settings.items():
+        if name in SELECTOR_SETTINGS:
+            setattr(algorithm.spread_selector, name, list(value) if name == "width_fallbacks" else value)
+    risk = {name: value for name, value in settings.items() if name in RISK_SETTINGS}
+    if risk:
+        for universe in algorithm.universes:
+            universe.risk_manager.update_parameters(**risk)
+
+
+def _install_day_cache():
+    """Keep parsed chain days in memory for the worker's later runs (the rows are never modified)."""
+    for name in ("load_chain_day", "load_recorded_day"):
+        loader = getattr(replay, name)
+        if not hasattr(loader, "cache_info"):
+            setattr(replay, name, functools.lru_cache(maxsize=CACHED_DAYS)(loader))
+
+
+def run_combination(task):
+    """
+    Replay one combination of settings (runs in a worker process).
+
+    Parameters:
+        task: (index, settings, data_dir, start, end, algorithm_dir, parameters)
+
+    Returns:
+        tuple: (index, summary dict of ReplayResult)
+    """
+    index, settings, data_dir, start, end, algorithm_dir, parameters = task
+    _install_day_cache()
+
+    algorithm = load_algorithm_class(algorithm_dir)()
+    algorithm._log_handler = lambda line: None
+    algorithm._parameters.update(parameters)
+
+    initialize = algorithm.initialize
+
+    def initialize_with_settings():
+        initialize()
+        apply_settings(algorithm, settings)
+
+    algorithm.initialize = initialize_with_settings
+    return index, ReplayEngine(algorithm, data_dir, start, end).run().summary()
+
+
+def _column_text(value):
+    if isinstance(value, list):
+        return "/".join(f"{item:g}" for item in value)
+    return value
+
+
+def write_results(path, grid, rows):
+    """
+    Write the sweep results column-wise.
+
+    Parameters:
+        path: Output file, .npz (NumPy arrays) or .csv
+        grid: Sweep grid (its names become the leading columns)
+        rows: (settings, summary) per combination, in grid order
+    """
+    names = list(grid)
+    columns = {}
+    for name in names:
+        values = [_column_text(settings[name]) for settings, _ in rows]
+        columns[name] = np.array(values, dtype=str if name == "width_fallbacks" else np.float64)
+    for metric in METRIC_COLUMNS:
+        columns[metric] = np.array([summary[metric] for _, summary in rows],
+                                   dtype=np.int64 if metric in ("trades", "orders") else np.float64)
+
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            writer.writerows(zip(*(column.tolist() for column in columns.values())))
+    else:
+        np.savez(path, **columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="Chain data directory")
+    parser.add_argument("--out", required=True, help="Results file (.npz or .csv)")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Values of one setting (repeatable)")
+    parser.add_argument("--grid-file", help="JSON file of {setting: [values]}")
+    parser.add_argument("--start", type=_parse_date, help="First date (YYYY-MM-DD, default: algorithm start)")
+    parser.add_argument("--end", type=_parse_date, help="Last date (YYYY-MM-DD, default: algorithm end)")
+    parser.add_argument("--parameter", type=_parse_parameter, action="append", default=[], metavar="NAME=VALUE",
+                        help="Project parameter for get_parameter, same for every run (repeatable)")
+    parser.add_argument("--algorithm-dir", default=_DEFAULT_ALGORITHM_DIR, help="LEAN project folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--top", type=int, default=10, help="Print the N best combinations by net profit")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid, args.grid_file)
+    if not grid:
+        parser.error("Nothing to sweep - pass --grid or --grid-file")
+    settings_list = combinations(grid)
+    tasks = [(index, settings, args.data, args.start, args.end, args.algorithm_dir, dict(args.parameter))
+             for index, settings in enumerate(settings_list)]
+
+    print(f"Sweeping {len(tasks)} combinations of {', '.join(grid)} on {args.workers} workers", file=sys.stderr)
+    started = wall_clock.perf_counter()
+    summaries = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_combination, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            index, summary = future.result()
+            summaries[index] = summary
+            print(f"[{done}/{len(tasks)}] {settings_list[index]} -> net {summary['net_profit']:.2f}, "
+                  f"win {summary['win_rate']:.0%}, dd {summary['max_drawdown']:.2%}, trades {summary['trades']}",
+                  file=sys.stderr)
+
+    rows = list(zip(settings_list, summaries))
+    write_results(args.out, grid, rows)
+    print(f"Wrote {len(rows)} results to {args.out} in {wall_clock.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    best = sorted(rows, key=lambda row: row[1]["net_profit"], reverse=True)[:args.top]
+    for settings, summary in best:
+        described = ", ".join(f"{name}={_column_text(value)}" for name, value in settings.items())
+        print(f"{summary['net_profit']:>10.2f}  win {summary['win_rate']:>6.1%}  dd {summary['max_drawdown']:>6.2%}  "
+              f"trades {summary['trades']:>4}  {described}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Columnar, indexed table of LEAN's symbol-properties database.
+
+data/symbol-properties/symbol-properties-database.csv is parsed once into
+NumPy columns (contract multiplier, minimum price variation, lot size, ...)
+plus a dict from (market, security type, symbol) to row. Lookups fall back
+to the market-wide [*] row like LEAN's SymbolPropertiesDatabase, so the
+cost of a lookup is one or two dict probes regardless of the file size.
+
+Usage:
+    python offline/symbol_properties.py usa option SPY
+    python offline/symbol_properties.py usa indexoption SPX
+"""
+import argparse
+import csv
+import os
+
+import numpy as np
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_SOURCE = os.path.join(_REPO_DIR, "data", "symbol-properties", "symbol-properties-database.csv")
+
+# Numeric columns and their value when the CSV leaves them empty
+NUMERIC_COLUMNS = {
+    "contract_multiplier": 1.0,
+    "minimum_price_variation": 0.01,
+    "lot_size": 1.0,
+    "minimum_order_size": np.nan,
+    "price_magnifier": 1.0,
+    "strike_multiplier": 1.0,
+}
+TEXT_COLUMNS = ("market", "symbol", "type", "description", "quote_currency", "market_ticker")
+
+
+class SymbolPropertiesTable:
+    """Symbol properties held column-wise, indexed by (market, security type, symbol)."""
+
+    def __init__(self, path=DEFAULT_SOURCE):
+        """
+        Parse the CSV.
+
+        Parameters:
+            path: symbol-properties-database.csv
+        """
+        self.path = path
+        text = {name: [] for name in TEXT_COLUMNS}
+        numbers = {name: [] for name in NUMERIC_COLUMNS}
+
+        with open(path, newline="") as handle:
+            reader = csv.reader(line for line in handle if line.strip() and not line.lstrip().startswith("#"))
+            header = next(reader)
+            positions = {name: header.index(name) for name in header}
+            for record in reader:
+                record += [""] * (len(header) - len(record))
+                for name in TEXT_COLUMNS:
+                    text[name].append(record[positions[name]].strip())
+                for name, default in NUMERIC_COLUMNS.items():
+                    value = record[positions[name]].strip()
+                    numbers[name].append(float(value) if value else default)
+
+        self.columns = {name: np.array(values, dtype=object) for name, values in text.items()}
+        self.columns.update({name: np.array(values, dtype=np.float64) for name, values in numbers.items()})
+
+        # Later rows win, as when LEAN loads the file into its dictionary
+        self._rows = {}
+        for row, key in enumerate(zip(text["market"], text["type"], text["symbol"])):
+            self._rows[tuple(part.lower() for part in key)] = row
+
+    def __len__(self):
+        return len(self.columns["symbol"])
+
+    def find(self, market, security_type, symbol=None):
+        """
+        Row of a symbol's properties, falling back to the market-wide [*] row.
+
+        Parameters:
+            market: Market name, e.g. "usa"
+            security_type: Security type as written in the CSV, e.g. "option", "indexoption"
+            symbol: Ticker (for options, the underlying ticker); default: the [*] row
+
+        Returns:
+            int: Row position, or None if neither row exists
+        """
+        market, security_type = market.lower(), security_type.lower()
+        if symbol is not None:
+            row = self._rows.get((market, security_type, symbol.lower()))
+            if row is not None:
+                return row
+        return self._rows.get((market, security_type, "[*]"))
+
+    def properties(self, market, security_type, symbol=None):
+        """
+        Properties of a symbol as a dict of column values.
+
+        Raises:
+            KeyError: If the symbol has no row and there is no [*] row
+        """
+        row = self.find(market, security_type, symbol)
+        if row is None:
+            raise KeyError(f"No symbol properties for {market}/{security_type}/{symbol}")
+        return {name: column[row].item() if hasattr(column[row], "item") else column[row]
+                for name, column in self.columns.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("market")
+    parser.add_argument("security_type")
+    parser.add_argument("symbol", nargs="?")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="symbol-properties-database.csv")
+    args = parser.parse_args()
+
+    table = SymbolPropertiesTable(args.source)
+    for name, value in table.properties(args.market, args.security_type, args.symbol).items():
+        print(f"{name:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
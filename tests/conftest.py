@@ -0,0 +1,105 @@
+"""
+Shared test setup: the algorithm and tool folders are flat script directories,
+so their modules are imported the way LEAN and the scripts do - by putting the
+folders on sys.path. Without LEAN installed, AlgorithmImports resolves to the
+offline stand-in, whose order fills drive the executor tests.
+"""
+import datetime
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for folder in ("v2_credit_spread_algo", "offline", "Logs Playwright Automation"):
+    path = os.path.join(REPO_DIR, folder)
+    if path not in sys.path:
+        sys.path.append(path)
+
+from AlgorithmImports import *
+from order_executor import OrderExecutor
+from risk_manager import RiskManager
+from spread_candidate import SpreadCandidate
+from universe_builder import UniverseBuilder
+
+NOW = datetime.datetime(2024, 1, 2, 10, 0)
+
+
+class Harness:
+    """
+    One SPY shard wired as in main.py on the stand-in algorithm.
+
+    Quotes are set with quote() and applied on every bar; next_bar() runs a bar
+    the way the replay does: stand-in limit fills first, then the executor's
+    working orders. Log lines are kept in .logs.
+    """
+
+    def __init__(self):
+        algorithm = QCAlgorithm()
+        self.logs = []
+        algorithm._log_handler = self.logs.append
+        algorithm.time = NOW
+        algorithm._market_open = True
+        algorithm.set_cash(10000)
+        algorithm.on_order_event = self._on_order_event
+
+        universe = UniverseBuilder(algorithm).initialize_universe("SPY", Resolution.MINUTE)
+        self.algorithm = algorithm
+        self.underlying = universe.underlying_symbol
+        self.executor = OrderExecutor(algorithm, universe=universe)
+        self.risk_manager = RiskManager(algorithm, self.executor)
+        self.working_orders = self.executor.working_orders
+        self.quotes = {}        # Symbol -> (bid, ask), applied every bar
+
+    def _on_order_event(self, order_event):
+        self.executor.on_order_event(order_event)
+        self.risk_manager.on_order_event(order_event)
+
+    def put(self, strike):
+        """0 DTE SPY put of a strike, subscribed"""
+        expiry = datetime.datetime.combine(NOW.date(), datetime.time())
+        symbol = Symbol.create_option(self.underlying, Market.USA, OptionStyle.AMERICAN, OptionRight.PUT,
+                                      strike, expiry)
+        if symbol not in self.algorithm.securities:
+            self.algorithm.securities[symbol] = Security(symbol)
+        return symbol
+
+    def quote(self, symbol, bid, ask):
+        """Set a contract's quote (applied now and on every following bar)"""
+        self.quotes[symbol] = (bid, ask)
+        self.algorithm.securities[symbol]._update(self.algorithm.time, bid, ask, round((bid + ask) / 2, 4))
+
+    def next_bar(self):
+        """Advance one minute: re-quote, fill limit orders, then work the entry orders"""
+        self.algorithm.time += datetime.timedelta(minutes=1)
+        for symbol, (bid, ask) in self.quotes.items():
+            self.quote(symbol, bid, ask)
+        self.algorithm.transactions._scan_fills(self.algorithm.time)
+        self.working_orders.on_bar()
+
+    def candidate(self, short_strike=470.0, long_strike=466.0, short_quote=(1.00, 1.40), long_quote=(0.30, 0.50)):
+        """A SpreadCandidate of two subscribed puts with the given quotes"""
+        short_symbol, long_symbol = self.put(short_strike), self.put(long_strike)
+        self.quote(short_symbol, *short_quote)
+        self.quote(long_symbol, *long_quote)
+        width = short_strike - long_strike
+        net_credit = short_quote[0] - long_quote[1]
+        return SpreadCandidate(spread=None, short_symbol=short_symbol, long_symbol=long_symbol,
+                               short_strike=short_strike, long_strike=long_strike,
+                               expiry=datetime.datetime.combine(NOW.date(), datetime.time()),
+                               short_bid=short_quote[0], short_ask=short_quote[1],
+                               long_bid=long_quote[0], long_ask=long_quote[1],
+                               short_delta=-0.15, long_delta=-0.08, width=width, net_credit=net_credit,
+                               credit_percentage=net_credit / width * 100, spread_type="PREFERRED")
+
+    def limit(self, order_id):
+        return self.algorithm.transactions.get_order_by_id(order_id).limit_price
+
+    def logged(self, text):
+        return [line for line in self.logs if text in line]
+
+
+@pytest.fixture
+def harness():
+    return Harness()
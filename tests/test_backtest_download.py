@@ -0,0 +1,127 @@
+"""
+Capture-mode downloads against the local mock backtest server.
+
+The first tests drive ResponseCapture with the server's real HTTP responses
+(no browser needed); the last runs download_backtest_data.run_batch in capture
+mode end to end and is skipped when Playwright or its Chromium isn't installed.
+"""
+import csv
+import json
+import urllib.request
+
+import pytest
+
+from backtest_capture import ORDER_COLUMNS, ResponseCapture
+from mock_backtest_server import LOG_PAGE_SIZE, ORDER_PAGE_SIZE, MockBacktestServer
+
+NUM_LOGS = LOG_PAGE_SIZE * 2 + 17        # Three pages of logs
+NUM_ORDERS = ORDER_PAGE_SIZE + 5         # Two pages of orders
+BACKTEST = "mockbacktest"
+
+
+def make_captures():
+    logs = [f"2024-01-02 10:{index // 60:02d}:{index % 60:02d} log line {index}" for index in range(NUM_LOGS)]
+    orders = [{"id": index + 1, "symbol": {"value": f"SPY 240102P00{470 - index % 5}000"},
+               "price": 0.5 + index / 100, "quantity": -1 if index % 2 else 1, "type": 1, "status": 3,
+               "time": "2024-01-02T10:00:00Z", "lastFillTime": "2024-01-02T10:00:01Z",
+               "value": 50.0, "tag": f"order {index + 1}"}
+              for index in range(NUM_ORDERS)]
+    return {"logs": logs, "orders": orders}
+
+
+class _Request:
+    def __init__(self, post_data_json):
+        self.post_data_json = post_data_json
+
+
+class _Response:
+    """The parts of a Playwright Response that ResponseCapture reads, from a urllib reply"""
+
+    def __init__(self, url, reply, payload):
+        self.url = url
+        self.status = reply.status
+        self.headers = dict(reply.headers.items())
+        self._body = reply.read()
+        self.request = _Request(payload)
+
+    def body(self):
+        return self._body
+
+
+def fetch(url, payload):
+    """POST a JSON API request like the backtest page does"""
+    data = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as reply:
+        return _Response(url, reply, payload)
+
+
+@pytest.fixture
+def server():
+    server = MockBacktestServer(make_captures()).start()
+    yield server
+    server.stop()
+
+
+def read_pages(server, capture, path, page_size, count):
+    for start in range(0, count, page_size):
+        capture.on_response(fetch(server.url + path, {"projectId": "1", "backtestId": BACKTEST,
+                                                      "start": start, "end": start + page_size}))
+
+
+def check_files(download_dir, captures):
+    with open(download_dir / f"logs_{BACKTEST}.txt", encoding="utf-8") as handle:
+        assert handle.read().splitlines() == captures["logs"]
+    with open(download_dir / f"orders_{BACKTEST}.csv", newline="", encoding="utf-8") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ORDER_COLUMNS
+    assert [row[-1] for row in rows[1:]] == [order["tag"] for order in captures["orders"]]
+
+
+def test_capture_waits_for_every_page(server):
+    capture = ResponseCapture()
+    read_pages(server, capture, "/api/v2/backtests/read/log", LOG_PAGE_SIZE, LOG_PAGE_SIZE * 2)
+    assert capture.has("logs")
+    assert not capture.is_complete("logs")      # Third page still missing
+    assert not capture.has("orders")
+
+    read_pages(server, capture, "/api/v2/backtests/read/log", LOG_PAGE_SIZE, NUM_LOGS)
+    assert capture.is_complete("logs")
+
+
+def test_capture_writes_server_responses(server, tmp_path):
+    capture = ResponseCapture()
+    # Pages out of order and one page twice, as re-renders and retries deliver them
+    read_pages(server, capture, "/api/v2/backtests/orders/read", ORDER_PAGE_SIZE, NUM_ORDERS)
+    read_pages(server, capture, "/api/v2/backtests/read/log", LOG_PAGE_SIZE, NUM_LOGS)
+    capture.on_response(fetch(server.url + "/api/v2/backtests/orders/read",
+                              {"start": 0, "end": ORDER_PAGE_SIZE}))
+    assert capture.is_complete("orders") and capture.is_complete("logs")
+
+    written = capture.write(str(tmp_path), BACKTEST)
+    assert sorted(written) == ["logs", "orders"]
+    check_files(tmp_path, server.captures)
+
+
+def test_batch_capture_mode(server, tmp_path):
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as playwright:
+        try:
+            playwright.chromium.launch(headless=True).close()
+        except Exception as e:
+            pytest.skip(f"Chromium not available: {e}")
+
+    from download_backtest_data import run_batch
+    from download_manifest import DownloadManifest
+
+    url = f"{server.url}/project/1/backtest/{BACKTEST}"
+    results = run_batch([url], str(tmp_path), concurrency=1, storage_state="", mode="capture")
+    assert [result["ok"] for result in results] == [True], results
+    check_files(tmp_path, server.captures)
+
+    # Only the orders load by themselves: the logs must have been requested through the tab
+    assert ("POST", "/api/v2/backtests/read/log") in server.requests
+
+    # Complete in the manifest, so a second run fetches nothing
+    assert DownloadManifest(str(tmp_path)).pending(BACKTEST) == []
+    assert run_batch([url], str(tmp_path), concurrency=1, storage_state="", mode="capture") == []
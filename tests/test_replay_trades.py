@@ -0,0 +1,40 @@
+"""
+ReplayResult.trades: round trips grouped by spread, not by underlying and expiry.
+"""
+import pytest
+
+from AlgorithmImports import *
+from order_executor import OrderExecutor
+from replay import ReplayResult
+
+
+def test_concurrent_spreads_on_one_expiry_are_separate_trades(harness):
+    executor = harness.executor
+    executor.entry_mode = OrderExecutor.ENTRY_LEGS
+    executor.max_open_spreads = 2
+    first = harness.candidate(470.0, 466.0)
+    second = harness.candidate(465.0, 461.0, short_quote=(0.60, 0.80), long_quote=(0.10, 0.20))
+    assert executor.place_spread_order(first) and executor.place_spread_order(second)
+    one, two = executor.spreads.values()
+
+    # Both spreads on the same expiry fill at their mid limits
+    harness.quote(first.short_symbol, 1.20, 1.30)
+    harness.quote(first.long_symbol, 0.35, 0.40)
+    harness.quote(second.short_symbol, 0.70, 0.75)
+    harness.quote(second.long_symbol, 0.10, 0.15)
+    harness.next_bar()
+    assert one.net_credit() == pytest.approx(1.20 - 0.40)
+    assert two.net_credit() == pytest.approx(0.70 - 0.15)
+
+    # Only the first spread is closed: the second stays an open position
+    assert executor.close_spread_position(reason="test", spread=one)
+    trades = ReplayResult(harness.algorithm, None, None, 10000, [], 0.0).trades
+    assert [trade["spread"] for trade in trades] == [one.spread_id]
+    assert trades[0]["profit"] == pytest.approx(100 * (one.net_credit() - one.net_debit()))
+
+    assert executor.close_spread_position(reason="test", spread=two)
+    trades = ReplayResult(harness.algorithm, None, None, 10000, [], 0.0).trades
+    assert sorted(trade["spread"] for trade in trades) == [one.spread_id, two.spread_id]
+    assert all(trade["expiry"] == first.expiry.date() for trade in trades)
+    assert sum(trade["profit"] for trade in trades) == pytest.approx(
+        100 * sum(spread.net_credit() - spread.net_debit() for spread in (one, two)))
@@ -0,0 +1,138 @@
+"""
+SpreadPosition bookkeeping and the OrderExecutor's spread state machine.
+"""
+import pytest
+
+from AlgorithmImports import *
+from order_executor import OrderExecutor
+from spread_position import SpreadPosition, SpreadState
+
+ALL_STATES = [SpreadState.OPENING, SpreadState.OPEN, SpreadState.CLOSING, SpreadState.CLOSED, SpreadState.CANCELED]
+
+
+def test_fill_bookkeeping(harness):
+    short_symbol, long_symbol = harness.put(470.0), harness.put(466.0)
+    spread = SpreadPosition(1, short_symbol, long_symbol, 470.0, 466.0, None)
+    spread.add_order(11, SpreadPosition.ENTRY)
+    spread.add_order(12, SpreadPosition.ENTRY)
+    assert sorted(spread.working_orders(SpreadPosition.ENTRY)) == [11, 12]
+    assert spread.width == 4.0
+
+    # The short leg fills in two parts, the long leg in one
+    spread.record_fill(11, short_symbol, -1, 1.20)
+    assert not spread.is_complete and not spread.is_flat
+    spread.record_fill(11, short_symbol, -1, 1.10)
+    spread.order_done(11)
+    spread.record_fill(12, long_symbol, 2, 0.40)
+    spread.order_done(12)
+    assert spread.working_orders() == []
+    assert spread.held == {short_symbol: -2, long_symbol: 2}
+    assert spread.is_complete
+    assert spread.net_credit() == pytest.approx(1.20 + 1.10 - 2 * 0.40)
+
+    # Closing fills are booked separately and flatten the legs
+    spread.add_order(13, SpreadPosition.CLOSE)
+    spread.record_fill(13, short_symbol, 2, 0.30)
+    spread.record_fill(13, long_symbol, -2, 0.05)
+    assert spread.is_flat and not spread.is_complete
+    assert spread.net_debit() == pytest.approx(2 * 0.30 - 2 * 0.05)
+    assert spread.net_credit() == pytest.approx(1.50)
+    assert spread.working_orders(SpreadPosition.CLOSE) == [13]
+
+
+@pytest.mark.parametrize("start", [SpreadState.OPENING, SpreadState.OPEN, SpreadState.CLOSING])
+@pytest.mark.parametrize("target", ALL_STATES)
+def test_transition_table(harness, start, target):
+    executor = harness.executor
+    spread = executor._new_spread(harness.put(470.0), harness.put(466.0), 470.0, 466.0, None)
+    # Walk to the start state along allowed transitions
+    for state in {SpreadState.OPENING: [], SpreadState.OPEN: [SpreadState.OPEN],
+                  SpreadState.CLOSING: [SpreadState.OPEN, SpreadState.CLOSING]}[start]:
+        assert executor._transition(spread, state)
+
+    allowed = target in SpreadState.TRANSITIONS[start]
+    assert executor._transition(spread, target) is allowed
+    assert spread.state == (target if allowed else start)
+    assert bool(harness.logged("Invalid spread transition")) is not allowed
+    # Terminal states unregister the spread, the others keep it counted once
+    assert (spread.spread_id in executor.spreads) is (spread.state not in SpreadState.TERMINAL)
+    assert len(executor.spreads_in(*ALL_STATES)) == len(executor.spreads)
+
+
+def test_entry_fill_and_close(harness):
+    executor = harness.executor
+    executor.entry_mode = OrderExecutor.ENTRY_LEGS
+    candidate = harness.candidate()
+    assert executor.place_spread_order(candidate)
+    spread = executor.current_spread
+    assert spread.state == SpreadState.OPENING and executor.pending_open
+    assert all(executor.spread_for_order(order_id) is spread for order_id in spread.orders)
+
+    # Quotes reach the mid limits: both legs fill on the next bar
+    harness.quote(candidate.short_symbol, 1.20, 1.30)
+    harness.quote(candidate.long_symbol, 0.35, 0.40)
+    harness.next_bar()
+    assert spread.state == SpreadState.OPEN and executor.spread_is_open
+    assert spread.initial_credit == pytest.approx(1.20 - 0.40)
+    assert executor.positions.quantity(candidate.short_symbol) == -1
+
+    # A second entry is refused while the first is active (max_open_spreads = 1)
+    assert not executor.place_spread_order(candidate)
+
+    assert executor.close_spread_position(reason="test")
+    assert spread.state == SpreadState.CLOSED
+    assert spread.close_reason == "test"
+    assert spread.net_debit() == pytest.approx(1.30 - 0.35)
+    assert executor.spreads == {} and not executor.spread_is_open
+    assert executor.spread_for_order(next(iter(spread.orders))) is None
+
+
+def test_entry_canceled_without_fills(harness):
+    executor = harness.executor
+    executor.entry_mode = OrderExecutor.ENTRY_LEGS
+    assert executor.place_spread_order(harness.candidate())
+    spread = executor.current_spread
+    assert executor.close_spread_position(reason="never mind", spread=spread)
+    assert spread.state == SpreadState.CANCELED
+    assert executor.spreads == {}
+
+
+def test_partial_entry_becomes_open_and_closes(harness):
+    executor = harness.executor
+    executor.entry_mode = OrderExecutor.ENTRY_LEGS
+    candidate = harness.candidate()
+    assert executor.place_spread_order(candidate)
+    spread = executor.current_spread
+
+    # Only the short leg reaches its limit, then the entry is canceled
+    harness.quote(candidate.short_symbol, 1.25, 1.30)
+    harness.next_bar()
+    assert spread.state == SpreadState.OPENING and spread.held == {candidate.short_symbol: -1}
+    assert executor.close_spread_position(reason="entry timeout", spread=spread)
+
+    # The filled leg is an open position booked at its actual credit, and is closed right away
+    assert harness.logged("ENTRY INCOMPLETE")
+    assert spread.initial_credit == pytest.approx(1.25)
+    assert spread.state == SpreadState.CLOSED and spread.is_flat
+
+
+def test_concurrent_spreads_route_by_order(harness):
+    executor = harness.executor
+    executor.entry_mode = OrderExecutor.ENTRY_LEGS
+    executor.max_open_spreads = 2
+    first = harness.candidate(470.0, 466.0)
+    assert executor.place_spread_order(first)
+    second = harness.candidate(465.0, 461.0, short_quote=(0.60, 0.80), long_quote=(0.10, 0.20))
+    assert executor.place_spread_order(second)
+    assert not executor.place_spread_order(harness.candidate(460.0, 456.0))
+    assert harness.logged("max_open_spreads=2")
+    spread_one, spread_two = executor.spreads.values()
+
+    # Only the second spread's legs fill
+    harness.quote(second.short_symbol, 0.70, 0.75)
+    harness.quote(second.long_symbol, 0.10, 0.15)
+    harness.next_bar()
+    assert spread_one.state == SpreadState.OPENING
+    assert spread_two.state == SpreadState.OPEN
+    assert spread_two.net_credit() == pytest.approx(0.70 - 0.15)
+    assert spread_one.held == {}
@@ -0,0 +1,89 @@
+"""
+Grid vs loop spread selection: the vectorized pair grid must pick the same
+spread as the one-pair-at-a-time loop on any chain.
+"""
+import datetime
+import random
+
+import pytest
+
+from AlgorithmImports import *
+from chain_snapshot import ChainSnapshot
+from spread_selector import SpreadSelector
+
+NOW = datetime.datetime(2024, 1, 2, 10, 0)
+SPOT = 470.0
+
+SCENARIOS = {
+    "default": {},
+    "exhaustive": {"min_credit_pct": 10.0, "min_credit_fallback_pct": 10.0},
+    "fallback-tier": {"min_credit_pct": 0.45, "min_credit_fallback_pct": 0.10},
+    "narrow": {"max_spread_width": 2.0, "width_fallbacks": [2.0, 1.0]},
+    "high-delta": {"target_delta": 0.30, "max_delta": 0.45},
+}
+
+
+def make_algorithm():
+    """Stand-in algorithm with SPY options subscribed (contract specs) and logging discarded"""
+    algorithm = QCAlgorithm()
+    algorithm._log_handler = lambda line: None
+    algorithm.time = NOW
+    algorithm.add_option("SPY")
+    return algorithm
+
+
+def build_chain(seed, strike_range=40, step=1.0):
+    """
+    A noisy 0 DTE chain: missing strikes, zero bids, crossed-looking quotes and
+    deltas LEAN hasn't computed (0.0), so both selectors hit their skip paths.
+    """
+    rng = random.Random(seed)
+    underlying = Symbol.create("SPY", SecurityType.EQUITY, Market.USA)
+    expiry = datetime.datetime.combine(NOW.date(), datetime.time(16, 0))
+    contracts = []
+    for k in range(-strike_range, strike_range + 1):
+        if rng.random() < 0.1:
+            continue
+        strike = float(round(SPOT) + k * step)
+        for right in (OptionRight.PUT, OptionRight.CALL):
+            moneyness = (strike - SPOT) / SPOT
+            put_delta = max(0.001, min(0.999, 0.5 + moneyness * rng.uniform(6, 10)))
+            delta = -put_delta if right == OptionRight.PUT else 1 - put_delta
+            if rng.random() < 0.05:
+                delta = 0.0
+            mid = max(0.0, abs(delta) * 3.0 + rng.uniform(-0.05, 0.05))
+            half_spread = rng.choice([0.01, 0.02, 0.05])
+            bid = 0.0 if rng.random() < 0.05 else round(max(0.0, mid - half_spread), 2)
+            ask = round(mid + half_spread, 2)
+            symbol = Symbol.create_option(underlying, Market.USA, OptionStyle.AMERICAN, right, strike, expiry)
+            contracts.append(OptionContract(symbol, bid, ask, round(mid, 2), Greeks(delta=delta)))
+    return ChainSnapshot.from_chain(contracts, NOW)
+
+
+def pick(candidate):
+    if candidate is None:
+        return None
+    return (candidate.short_symbol, candidate.long_symbol, candidate.width,
+            round(candidate.net_credit, 10), candidate.spread_type)
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_grid_matches_loop(scenario):
+    algorithm = make_algorithm()
+    loop = SpreadSelector(algorithm, evaluation_mode="loop", **SCENARIOS[scenario])
+    grid = SpreadSelector(algorithm, evaluation_mode="grid", **SCENARIOS[scenario])
+    found = 0
+    for seed in range(40):
+        snapshot = build_chain(seed, step=0.5 if seed % 4 == 0 else 1.0)
+        expected = pick(loop.select_bull_put_spread(snapshot, SPOT))
+        assert pick(grid.select_bull_put_spread(snapshot, SPOT)) == expected, f"seed {seed}"
+        found += expected is not None
+    # The chains must exercise selection, not just the no-spread path (exhaustive never qualifies)
+    assert found > 0 or scenario == "exhaustive"
+
+
+def test_grid_matches_loop_without_puts():
+    algorithm = make_algorithm()
+    snapshot = ChainSnapshot.from_chain([], NOW)
+    assert SpreadSelector(algorithm, evaluation_mode="grid").select_bull_put_spread(snapshot, SPOT) is None
+    assert SpreadSelector(algorithm, evaluation_mode="loop").select_bull_put_spread(snapshot, SPOT) is None
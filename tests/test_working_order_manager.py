@@ -0,0 +1,116 @@
+"""
+WorkingOrderManager: the repricing ladder, the concession cap and the entry timeout.
+
+The harness candidate quotes the short put 1.00/1.40 and the long put 0.30/0.50:
+leg entries go out at the mids (1.20 / 0.40) and a combo at the net mid (0.80).
+The target credit is 0.95 x (1.00 - 0.50) = 0.475 and the default 25% cap allows
+0.11875 of concession.
+"""
+import pytest
+
+from AlgorithmImports import *
+from order_executor import OrderExecutor
+from spread_position import SpreadState
+
+TARGET_CREDIT = 0.95 * (1.00 - 0.50)
+CAP = 0.25 * TARGET_CREDIT
+
+
+def place(harness, entry_mode):
+    harness.executor.entry_mode = entry_mode
+    candidate = harness.candidate()
+    assert harness.executor.place_spread_order(candidate)
+    spread = harness.executor.current_spread
+    return candidate, spread, harness.working_orders._entries[spread.spread_id]
+
+
+def leg_limits(harness, spread):
+    return tuple(harness.limit(order_id) for order_id in sorted(spread.orders))
+
+
+def test_leg_ladder_walks_from_mid_within_cap(harness):
+    candidate, spread, entry = place(harness, OrderExecutor.ENTRY_LEGS)
+    limits = [leg_limits(harness, spread)]
+    for _ in range(6):
+        harness.next_bar()
+        limits.append(leg_limits(harness, spread))
+        assert entry.concession <= CAP + 1e-9
+
+    assert limits == [
+        (1.20, 0.40),       # Submitted at mid
+        (1.20, 0.40),       # Rung 0: mid again
+        (1.15, 0.43),       # Rung 0.25: 1.20 - 0.05 / 0.40 + 0.025, rounded towards the market
+        (1.12, 0.43),       # Rung 0.5: the short reaches the cap (1.11125), rounded back inside it
+        (1.12, 0.43),       # Capped - no further concession
+        (1.12, 0.43),
+        (1.12, 0.43),
+    ]
+    assert entry.concession == pytest.approx(0.08 + 0.03)
+    assert spread.state == SpreadState.OPENING
+    assert harness.working_orders.total_reprices == 3
+
+
+def test_repriced_legs_fill_and_record_latency(harness):
+    candidate, spread, entry = place(harness, OrderExecutor.ENTRY_LEGS)
+    harness.next_bar()
+    harness.next_bar()
+    assert leg_limits(harness, spread) == (1.15, 0.43)
+
+    # The market comes to the repriced limits
+    harness.quote(candidate.short_symbol, 1.15, 1.40)
+    harness.quote(candidate.long_symbol, 0.30, 0.43)
+    harness.next_bar()
+    assert spread.state == SpreadState.OPEN
+    assert spread.net_credit() == pytest.approx(1.15 - 0.43)
+
+    stats = harness.working_orders.statistics()
+    assert stats['entries_filled'] == 1 and stats['entries_timed_out'] == 0
+    assert stats['avg_bars_to_fill'] == 2
+    assert stats['avg_concession'] == pytest.approx(0.08)
+    assert stats['credit_captured_pct'] == pytest.approx((1.15 - 0.43) / TARGET_CREDIT)
+    assert harness.logged("ENTRY LATENCY")
+    assert harness.working_orders._entries == {}
+
+
+def test_unfilled_entry_times_out(harness):
+    harness.working_orders.update_parameters(timeout_bars=3)
+    candidate, spread, entry = place(harness, OrderExecutor.ENTRY_LEGS)
+    order_ids = list(spread.orders)
+    harness.next_bar()
+    harness.next_bar()
+    assert spread.state == SpreadState.OPENING
+
+    harness.next_bar()
+    assert harness.logged("ENTRY TIMEOUT")
+    assert spread.state == SpreadState.CANCELED
+    assert harness.executor.spreads == {}
+    assert all(harness.algorithm.transactions.get_order_by_id(order_id).status == OrderStatus.CANCELED
+               for order_id in order_ids)
+    assert harness.working_orders.statistics()['entries_timed_out'] == 1
+    assert harness.working_orders.statistics()['entries_filled'] == 0
+
+
+def test_combo_entry_starts_at_net_mid_and_is_repriced(harness):
+    candidate, spread, entry = place(harness, OrderExecutor.ENTRY_COMBO)
+    combo_id = min(spread.orders)
+    # Net quote: bid 1.00 - 0.50 = 0.50, ask 1.40 - 0.30 = 1.10, mid 0.80 (above the natural credit)
+    assert harness.limit(combo_id) == 0.80
+
+    limits = []
+    for _ in range(5):
+        harness.next_bar()
+        limits.append(harness.limit(combo_id))
+        assert entry.concession <= CAP + 1e-9
+    # Rung 0 holds the mid; 0.25 gives 0.725 (rounded down); 0.5 reaches the cap 0.68125 (rounded back up)
+    assert limits == [0.80, 0.72, 0.69, 0.69, 0.69]
+    assert spread.state == SpreadState.OPENING
+    assert harness.working_orders.total_reprices == 2
+
+    # The short bid rises to meet the capped credit: the combo fills with both legs
+    harness.quote(candidate.short_symbol, 1.19, 1.40)
+    harness.next_bar()
+    assert spread.state == SpreadState.OPEN
+    assert spread.net_credit() == pytest.approx(1.19 - 0.50)
+    stats = harness.working_orders.statistics()
+    assert stats['entries_filled'] == 1 and stats['reprices'] == 2
+    assert stats['avg_concession'] == pytest.approx(0.80 - 0.69)
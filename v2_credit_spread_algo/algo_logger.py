@@ -0,0 +1,202 @@
+from AlgorithmImports import *
+from typing import Callable, Optional
+
+class LogLevel:
+    """Log levels, ordered by severity."""
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    CRITICAL = 50
+
+
+class AlgoLogger:
+    """
+    Structured, level-gated, buffered logging shared by all v2 modules.
+
+    Responsibilities:
+    1. Gate messages by category level and warm-up before any formatting happens
+    2. Rate-limit noisy categories (e.g. at most one POSITION UPDATE per hour)
+    3. Buffer formatted lines and emit them in batches at bar or day boundaries
+
+    Messages are formatted lazily: pass a %-style format string plus arguments
+    (or a zero-argument callable) and the string is only built if the message
+    will actually be emitted. Plain pre-formatted strings are accepted too.
+
+    The category of a message is taken from its structured prefix (the upper-case
+    text before " - " or ":", e.g. "MARKET DATA" or "SPREAD SELECTED") unless
+    one is passed explicitly. Messages without a prefix fall in "GENERAL".
+
+    The logger is callable, so it can be assigned directly to a module's
+    log_method hook.
+    """
+
+    DEFAULT_CATEGORY = "GENERAL"
+
+    def __init__(self, algorithm: QCAlgorithm, emit: Callable[[str], None],
+                 level: int = LogLevel.INFO,
+                 flush_on: str = "bar",
+                 max_buffer_lines: int = 100):
+        """
+        Initialize the logger.
+
+        Parameters:
+            algorithm: The algorithm instance (for time and warm-up state)
+            emit: Function that writes a string to the platform log (e.g. QCAlgorithm.log)
+            level: Default minimum level for categories without their own level (default: INFO)
+            flush_on: "bar" to emit the buffer on every on_bar() call, "day" to emit only
+                      at day end, or "immediate" to emit every message as it is logged
+            max_buffer_lines: Flush early once this many lines are buffered (default: 100)
+        """
+        if flush_on not in ("bar", "day", "immediate"):
+            raise ValueError(f"Unknown flush_on '{flush_on}', expected 'bar', 'day' or 'immediate'")
+
+        self.algorithm = algorithm
+        self.emit = emit
+        self.level = level
+        self.flush_on = flush_on
+        self.max_buffer_lines = max_buffer_lines
+
+        # Per-category configuration
+        self._category_levels = {}      # category -> minimum level
+        self._category_intervals = {}   # category -> minimum seconds between messages
+
+        # Runtime state
+        self._buffer = []
+        self._last_emitted = {}         # category -> algorithm time of last accepted message
+        self._suppressed = {}           # category -> messages dropped by rate limits today
+
+    def configure(self, category: str, level: Optional[int] = None, min_interval: Optional[float] = None) -> None:
+        """
+        Set the level and/or rate limit for a category.
+
+        Parameters:
+            category: Category name (e.g. "POSITION UPDATE")
+            level: Minimum level to emit for this category
+            min_interval: Minimum algorithm-time seconds between messages of this category
+        """
+        if level is not None:
+            self._category_levels[category] = level
+        if min_interval is not None:
+            self._category_intervals[category] = min_interval
+
+    def is_enabled(self, level: int = LogLevel.INFO, category: Optional[str] = None) -> bool:
+        """
+        Check whether a message at this level and category would pass the level gates.
+        Does not consult or consume the category rate limit.
+
+        Parameters:
+            level: Message level
+            category: Message category (default category if None)
+
+        Returns:
+            bool: True if the message would be emitted
+        """
+        if level < LogLevel.CRITICAL and self.algorithm.is_warming_up:
+            return False
+        return level >= self._category_levels.get(category or self.DEFAULT_CATEGORY, self.level)
+
+    def log(self, message, *args, category: Optional[str] = None, level: int = LogLevel.INFO) -> None:
+        """
+        Log a message if its level and category allow it.
+
+        Parameters:
+            message: %-style format string, plain string, or zero-argument callable
+            *args: Arguments for the format string (formatting is deferred until emission)
+            category: Explicit category; inferred from the message prefix if None
+            level: Message level (default: INFO)
+        """
+        # Skip everything below CRITICAL during warm-up before doing any other work
+        if level < LogLevel.CRITICAL and self.algorithm.is_warming_up:
+            return
+
+        if category is None:
+            category = self._category_of(message)
+
+        if level < self._category_levels.get(category, self.level):
+            return
+
+        # Rate limit by algorithm time; CRITICAL messages are never rate limited
+        min_interval = self._category_intervals.get(category)
+        if min_interval is not None and level < LogLevel.CRITICAL:
+            now = self.algorithm.time
+            last = self._last_emitted.get(category)
+            if last is not None and (now - last).total_seconds() < min_interval:
+                self._suppressed[category] = self._suppressed.get(category, 0) + 1
+                return
+            self._last_emitted[category] = now
+
+        # Only now pay for formatting
+        if callable(message):
+            text = message()
+        elif args:
+            text = message % args
+        else:
+            text = message
+
+        self._buffer.append(text)
+
+        if (self.flush_on == "immediate" or level >= LogLevel.CRITICAL
+                or len(self._buffer) >= self.max_buffer_lines):
+            self.flush()
+
+    def __call__(self, message, *args, **kwargs) -> None:
+        """Log at INFO so the logger can be used as a log_method hook."""
+        self.log(message, *args, **kwargs)
+
+    def debug(self, message, *args, category: Optional[str] = None) -> None:
+        self.log(message, *args, category=category, level=LogLevel.DEBUG)
+
+    def info(self, message, *args, category: Optional[str] = None) -> None:
+        self.log(message, *args, category=category, level=LogLevel.INFO)
+
+    def warning(self, message, *args, category: Optional[str] = None) -> None:
+        self.log(message, *args, category=category, level=LogLevel.WARNING)
+
+    def critical(self, message, *args, category: Optional[str] = None) -> None:
+        self.log(message, *args, category=category, level=LogLevel.CRITICAL)
+
+    def flush(self) -> None:
+        """Emit all buffered lines as a single platform log call."""
+        if not self._buffer:
+            return
+        text = "\n".join(self._buffer)
+        self._buffer = []
+        self.emit(text)
+
+    def on_bar(self) -> None:
+        """Bar boundary: emit the buffer when batching per bar."""
+        if self.flush_on == "bar":
+            self.flush()
+
+    def on_day_end(self) -> None:
+        """Day boundary: report rate-limited counts and emit the buffer."""
+        if self._suppressed:
+            summary = ", ".join(f"{category}={count}" for category, count in sorted(self._suppressed.items()))
+            self._buffer.append(f"LOGGER - Rate-limited messages today: {summary}")
+            self._suppressed = {}
+        self.flush()
+
+    def _category_of(self, message) -> str:
+        """
+        Infer the category from a structured message prefix.
+
+        Parameters:
+            message: Format string, plain string or callable
+
+        Returns:
+            str: Upper-case prefix before " - " or ":", or DEFAULT_CATEGORY
+        """
+        if not isinstance(message, str):
+            return self.DEFAULT_CATEGORY
+
+        end = len(message)
+        for separator in (" - ", ":"):
+            position = message.find(separator, 0, 40)
+            if 0 < position < end:
+                end = position
+
+        if end == len(message):
+            return self.DEFAULT_CATEGORY
+
+        prefix = message[:end]
+        return prefix if prefix.isupper() else self.DEFAULT_CATEGORY
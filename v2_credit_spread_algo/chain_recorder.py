@@ -0,0 +1,184 @@
+from AlgorithmImports import *
+from typing import Callable, Optional
+import io
+import numpy as np
+from chain_snapshot import ChainSnapshot
+
+class _ColumnBuffer:
+    """Fixed-capacity column arrays for one underlying's rows of one day."""
+
+    def __init__(self, columns: dict, capacity: int):
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.capacity = capacity
+        self.size = 0
+        self.date = None
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.size
+
+    def append(self, snapshot: ChainSnapshot, start: int, stop: int) -> None:
+        """Copy snapshot rows [start, stop) into the buffer."""
+        rows = slice(self.size, self.size + stop - start)
+        columns = self.columns
+        columns["time"][rows] = np.datetime64(snapshot.time, 'm')
+        columns["underlying_price"][rows] = snapshot.underlying_price or np.nan
+        columns["right"][rows] = snapshot.right[start:stop]
+        columns["strike"][rows] = snapshot.strike[start:stop]
+        columns["expiry"][rows] = snapshot.expiry[start:stop]
+        columns["bid"][rows] = snapshot.bid[start:stop]
+        columns["ask"][rows] = snapshot.ask[start:stop]
+        columns["last"][rows] = snapshot.last[start:stop]
+        columns["delta"][rows] = snapshot.delta[start:stop]
+        columns["iv"][rows] = snapshot.iv[start:stop]
+        columns["open_interest"][rows] = snapshot.open_interest[start:stop]
+        self.size += stop - start
+
+    def filled(self) -> dict:
+        """Views of the filled rows."""
+        return {name: column[:self.size] for name, column in self.columns.items()}
+
+
+class ChainRecorder:
+    """
+    Records every slice's filtered option chain to the object store.
+
+    Rows (one per contract per slice) are copied from the slice's ChainSnapshot
+    into a fixed-capacity column buffer per underlying. A full buffer, a new
+    day and the day end write the buffered rows as one compressed part, so
+    memory stays bounded and every part is written exactly once:
+
+        <key_prefix>/<ticker>/<YYYYMMDD>/part-00000.npz, part-00001.npz, ...
+
+    Each part is a NumPy .npz with one array per column (time, underlying_price,
+    right, strike, expiry, bid, ask, last, delta, iv, open_interest), so readers
+    load columns straight into arrays without parsing text. offline/replay.py
+    replays a recorded folder like its CSV data (--data <object store>/chains).
+
+    Within a run a day's parts are only ever appended; when a day is finished,
+    parts left over from an earlier run of the same day are deleted.
+    """
+
+    COLUMNS = {
+        "time": "datetime64[m]",
+        "underlying_price": np.float64,
+        "right": np.int8,           # ChainSnapshot.RIGHT_CALL / RIGHT_PUT
+        "strike": np.float64,
+        "expiry": "datetime64[D]",
+        "bid": np.float64,
+        "ask": np.float64,
+        "last": np.float64,
+        "delta": np.float64,        # NaN when the chain had no greeks
+        "iv": np.float64,
+        "open_interest": np.int64,
+    }
+
+    def __init__(self, algorithm: QCAlgorithm, key_prefix: str = "chains",
+                 buffer_rows: int = 65536, compress: bool = True):
+        """
+        Initialize the recorder.
+
+        Parameters:
+            algorithm: The algorithm instance (for the object store)
+            key_prefix: Object store folder of the recordings (default: chains)
+            buffer_rows: Rows buffered per underlying before a part is written (default: 65536)
+            compress: Write compressed parts (default: True)
+        """
+        self.algorithm = algorithm
+        self.key_prefix = key_prefix.strip("/")
+        self.buffer_rows = buffer_rows
+        self.compress = compress
+        self._buffers = {}      # ticker -> _ColumnBuffer
+        self._parts = {}        # (ticker, date) -> parts written this run
+        self._log_method = None
+
+    @property
+    def log_method(self) -> Optional[Callable]:
+        """Get the current logging method"""
+        return self._log_method
+
+    @log_method.setter
+    def log_method(self, method: Callable):
+        """Setter for log_method property"""
+        self._log_method = method
+
+    def log(self, message: str, *args, **kwargs) -> None:
+        """Log through the shared log method, or algorithm.log when none is set."""
+        if self._log_method:
+            self._log_method(message, *args, **kwargs)
+        else:
+            self.algorithm.log(message % args if args else message)
+
+    def part_key(self, ticker: str, date, part: int) -> str:
+        """Object store key of one part of a day."""
+        return f"{self.key_prefix}/{ticker.lower()}/{date:%Y%m%d}/part-{part:05d}.npz"
+
+    def record(self, ticker: str, snapshot: ChainSnapshot) -> None:
+        """
+        Buffer a slice's chain.
+
+        Parameters:
+            ticker: Underlying ticker (partition name)
+            snapshot: ChainSnapshot of the slice's filtered chain
+        """
+        count = len(snapshot)
+        if count == 0:
+            return
+
+        buffer = self._buffers.get(ticker)
+        if buffer is None:
+            buffer = self._buffers[ticker] = _ColumnBuffer(self.COLUMNS, self.buffer_rows)
+
+        # A new day starts a new partition
+        date = snapshot.time.date()
+        if buffer.date != date:
+            if buffer.size:
+                self._write_part(ticker, buffer)
+                self._finish_day(ticker, buffer.date)
+            buffer.date = date
+
+        start = 0
+        while start < count:
+            if buffer.free == 0:
+                self._write_part(ticker, buffer)
+            stop = min(count, start + buffer.free)
+            buffer.append(snapshot, start, stop)
+            start = stop
+
+    def flush(self, end_of_day: bool = True) -> int:
+        """
+        Write every underlying's buffered rows.
+
+        Parameters:
+            end_of_day: Also close the day's partitions (default: True)
+
+        Returns:
+            int: Rows written
+        """
+        written = 0
+        for ticker, buffer in self._buffers.items():
+            written += buffer.size
+            if buffer.size:
+                self._write_part(ticker, buffer)
+            if end_of_day and buffer.date is not None:
+                self._finish_day(ticker, buffer.date)
+                buffer.date = None
+        return written
+
+    def _write_part(self, ticker: str, buffer: _ColumnBuffer) -> None:
+        """Write the buffer as the day's next part and empty it."""
+        parts = self._parts.get((ticker, buffer.date), 0)
+        stream = io.BytesIO()
+        (np.savez_compressed if self.compress else np.savez)(stream, **buffer.filled())
+        self.algorithm.object_store.save_bytes(self.part_key(ticker, buffer.date, parts), stream.getvalue())
+        self._parts[(ticker, buffer.date)] = parts + 1
+        buffer.size = 0
+
+    def _finish_day(self, ticker: str, date) -> None:
+        """Delete parts of the day left over from an earlier run."""
+        part = self._parts.get((ticker, date), 0)
+        object_store = self.algorithm.object_store
+        while object_store.contains_key(self.part_key(ticker, date, part)):
+            object_store.delete(self.part_key(ticker, date, part))
+            part += 1
+        self.log("RECORDER - %s %s: %d parts", ticker, date, self._parts.get((ticker, date), 0))
@@ -0,0 +1,205 @@
+from AlgorithmImports import *
+import numpy as np
+
+class ChainSnapshot:
+    """
+    Compact, array-backed view of an option chain built once per slice.
+
+    Walking an OptionChain yields Python.NET contract objects, so every
+    list comprehension over the chain pays for attribute marshalling. The
+    snapshot walks the chain exactly once and keeps the fields the strategy
+    needs as NumPy columns, so the selector, order executor and main
+    algorithm can filter and search with array operations instead.
+
+    Columns (all of length len(snapshot), aligned with `contracts`):
+    - strike: float64 strike price
+    - bid, ask, last: float64 quote prices
+    - delta: float64 delta as reported by the chain (NaN when greeks are missing -
+      LEAN reports greeks it hasn't computed as 0.0, so zero counts as missing)
+    - iv: float64 implied volatility as reported by the chain
+    - open_interest: int64 open interest
+    - right: int8, RIGHT_CALL or RIGHT_PUT
+    - expiry: datetime64[D] expiration date
+
+    Contracts can also be resolved in O(1) by (right, expiry, strike) through a
+    hash index that is built lazily on first lookup, so at most once per snapshot.
+    """
+
+    RIGHT_CALL = 0
+    RIGHT_PUT = 1
+
+    # Strikes are keyed in integer ticks so lookups don't depend on float equality
+    STRIKE_TICK = 0.001
+
+    def __init__(self, contracts: list, time, underlying_price: float = None):
+        """
+        Build the snapshot from a list of option contracts.
+
+        Parameters:
+            contracts: List of OptionContract objects from a single option chain
+            time: Algorithm time the snapshot was taken at
+            underlying_price: Underlying price the chain was quoted against (None if unknown)
+        """
+        self.time = time
+        self.contracts = contracts
+        self.underlying_price = underlying_price
+        self._index = None  # (right, expiry date, strike ticks) -> position, built on first lookup
+
+        count = len(contracts)
+        self.strike = np.empty(count, dtype=np.float64)
+        self.bid = np.empty(count, dtype=np.float64)
+        self.ask = np.empty(count, dtype=np.float64)
+        self.last = np.empty(count, dtype=np.float64)
+        self.delta = np.empty(count, dtype=np.float64)
+        self.iv = np.empty(count, dtype=np.float64)
+        self.open_interest = np.empty(count, dtype=np.int64)
+        self.right = np.empty(count, dtype=np.int8)
+        self.expiry = np.empty(count, dtype='datetime64[D]')
+
+        # Single pass over the contracts - this is the only place we touch the .NET objects
+        for i, contract in enumerate(contracts):
+            self.strike[i] = contract.strike
+            self.bid[i] = contract.bid_price
+            self.ask[i] = contract.ask_price
+            self.last[i] = contract.last_price
+            self.delta[i] = self.reported_delta(contract.greeks)
+            self.iv[i] = contract.implied_volatility or 0.0
+            self.open_interest[i] = contract.open_interest or 0
+            self.right[i] = self.RIGHT_PUT if contract.right == OptionRight.PUT else self.RIGHT_CALL
+            self.expiry[i] = np.datetime64(contract.expiry.date(), 'D')
+
+    @staticmethod
+    def reported_delta(greeks) -> float:
+        """
+        Delta reported in a contract's greeks, NaN when it is missing.
+
+        LEAN fills greeks it has not computed yet with 0.0, and a priced option
+        never has a delta of exactly zero, so None, 0.0 and non-finite values
+        all mean "not computed".
+
+        Parameters:
+            greeks: The contract's Greeks (may be None)
+
+        Returns:
+            float: The delta, or NaN if missing
+        """
+        delta = greeks.delta if greeks is not None else None
+        if delta is None:
+            return np.nan
+        delta = float(delta)
+        return delta if delta != 0.0 and np.isfinite(delta) else np.nan
+
+    @classmethod
+    def from_chain(cls, option_chain, time) -> 'ChainSnapshot':
+        """
+        Build a snapshot from an OptionChain (or any iterable of contracts).
+
+        Parameters:
+            option_chain: Option chain to snapshot
+            time: Algorithm time the snapshot was taken at
+
+        Returns:
+            ChainSnapshot: The snapshot (empty if option_chain is None)
+        """
+        contracts = list(option_chain) if option_chain is not None else []
+        underlying = getattr(option_chain, 'underlying', None)
+        underlying_price = underlying.price if underlying is not None and underlying.price else None
+        return cls(contracts, time, underlying_price)
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    @property
+    def canonical_symbol(self):
+        """Canonical option symbol of the chain, or None if the snapshot is empty."""
+        for contract in self.contracts:
+            if contract is not None and contract.symbol is not None:
+                return contract.symbol.canonical
+        return None
+
+    def count(self, right: int) -> int:
+        """
+        Count contracts of a given right.
+
+        Parameters:
+            right: RIGHT_CALL or RIGHT_PUT
+
+        Returns:
+            int: Number of contracts with that right
+        """
+        return int(np.count_nonzero(self.right == right))
+
+    def count_expiring(self, expiry_date) -> int:
+        """
+        Count contracts expiring on a given date.
+
+        Parameters:
+            expiry_date: datetime.date to match
+
+        Returns:
+            int: Number of contracts expiring on that date
+        """
+        return int(np.count_nonzero(self.expiry == np.datetime64(expiry_date, 'D')))
+
+    def has_expiry(self, expiry_date) -> bool:
+        """Check whether any contract expires on the given date."""
+        return self.count_expiring(expiry_date) > 0
+
+    def expiry_dates(self) -> list:
+        """
+        Get the sorted unique expiration dates in the snapshot.
+
+        Returns:
+            list: datetime.date objects in ascending order
+        """
+        return [d.astype(object) for d in np.unique(self.expiry)]
+
+    def indices(self, right: int, expiry_date) -> np.ndarray:
+        """
+        Get the positions of all contracts matching a right and expiry.
+        Positions preserve the original chain order.
+
+        Parameters:
+            right: RIGHT_CALL or RIGHT_PUT
+            expiry_date: datetime.date to match
+
+        Returns:
+            np.ndarray: Integer positions into the snapshot columns
+        """
+        mask = (self.right == right) & (self.expiry == np.datetime64(expiry_date, 'D'))
+        return np.flatnonzero(mask)
+
+    @classmethod
+    def strike_ticks(cls, strike: float) -> int:
+        """Convert a strike price to integer ticks for index keys."""
+        return int(round(strike / cls.STRIKE_TICK))
+
+    def _build_index(self) -> dict:
+        """
+        Build the (right, expiry date, strike ticks) -> position index.
+        The first contract in chain order wins if a key repeats.
+
+        Returns:
+            dict: The index
+        """
+        index = {}
+        ticks = np.rint(self.strike / self.STRIKE_TICK).astype(np.int64)
+        for position, key in enumerate(zip(self.right.tolist(), self.expiry.tolist(), ticks.tolist())):
+            index.setdefault(key, position)
+        return index
+
+    def find(self, right: int, expiry_date, strike: float):
+        """
+        Find the contract matching right, expiry and strike in O(1).
+
+        Parameters:
+            right: RIGHT_CALL or RIGHT_PUT
+            expiry_date: datetime.date to match
+            strike: Strike price to match (resolved to the nearest STRIKE_TICK)
+
+        Returns:
+            int or None: Position of the contract, or None if not found
+        """
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index.get((right, expiry_date, self.strike_ticks(strike)))
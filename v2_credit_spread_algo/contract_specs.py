@@ -0,0 +1,100 @@
+from AlgorithmImports import *
+import math
+
+class ContractSpecs:
+    """
+    Contract multipliers and tick sizes from LEAN's symbol properties.
+
+    LEAN loads data/symbol-properties/symbol-properties-database.csv and attaches
+    the matching row to every security as security.symbol_properties. This class
+    reads it once per underlying (all contracts of an option chain share one row)
+    and provides:
+    - multiplier(symbol): contract multiplier (100 for SPY options) for P/L math
+    - tick_size(symbol): minimum price variation
+    - round_price(symbol, price, direction): snap a limit price to a valid tick
+
+    Off-tick limit prices get rounded by the brokerage model (LEAN warns and rounds
+    to the nearest tick) or rejected outright by some brokerages. Rounding ourselves
+    keeps the direction under our control: sells round down and buys round up, so a
+    limit never ends up less marketable than the price we computed.
+    """
+
+    ROUND_DOWN = -1     # Sell limits
+    ROUND_NEAREST = 0
+    ROUND_UP = 1        # Buy limits
+
+    def __init__(self, algorithm: QCAlgorithm):
+        """
+        Initialize the specs cache.
+
+        Parameters:
+            algorithm: The algorithm instance
+        """
+        self.algorithm = algorithm
+        self._specs = {}    # canonical symbol -> (multiplier, tick size, decimals)
+
+    def _lookup(self, symbol: Symbol):
+        """
+        (multiplier, tick size, decimals) of a symbol, cached per canonical symbol.
+
+        Raises:
+            KeyError: If neither the symbol nor its canonical symbol is subscribed
+        """
+        key = symbol.canonical if symbol.security_type in (SecurityType.OPTION, SecurityType.INDEX_OPTION) else symbol
+        specs = self._specs.get(key)
+        if specs is None:
+            securities = self.algorithm.securities
+            security = securities[symbol] if symbol in securities else securities[key]
+            properties = security.symbol_properties
+            tick = float(properties.minimum_price_variation)
+            # Decimals of the tick, to strip float noise from rounded prices (0.05 -> 2)
+            decimals = max(0, -int(math.floor(math.log10(tick)))) + 1 if tick > 0 else 2
+            specs = self._specs[key] = (float(properties.contract_multiplier), tick, decimals)
+        return specs
+
+    def multiplier(self, symbol: Symbol) -> float:
+        """
+        Contract multiplier of a symbol.
+
+        Parameters:
+            symbol: Option contract, canonical option or equity symbol
+
+        Returns:
+            float: Units of the underlying per contract (100 for standard options)
+        """
+        return self._lookup(symbol)[0]
+
+    def tick_size(self, symbol: Symbol) -> float:
+        """
+        Minimum price variation of a symbol.
+
+        Parameters:
+            symbol: Option contract, canonical option or equity symbol
+
+        Returns:
+            float: Tick size in dollars
+        """
+        return self._lookup(symbol)[1]
+
+    def round_price(self, symbol: Symbol, price: float, direction: int = ROUND_NEAREST) -> float:
+        """
+        Snap a price to the symbol's tick grid.
+
+        Parameters:
+            symbol: Symbol the price is for
+            price: Price to round
+            direction: ROUND_DOWN (sells), ROUND_UP (buys) or ROUND_NEAREST (default)
+
+        Returns:
+            float: Price on a valid tick, never below one tick
+        """
+        _, tick, decimals = self._lookup(symbol)
+        # The small epsilon keeps prices already on a tick (0.30 / 0.01 = 29.999...) where they are
+        ticks = price / tick
+        if direction == self.ROUND_DOWN:
+            ticks = math.floor(ticks + 1e-9)
+        elif direction == self.ROUND_UP:
+            ticks = math.ceil(ticks - 1e-9)
+        else:
+            ticks = round(ticks)
+        return round(max(ticks, 1) * tick, decimals)
@@ -0,0 +1,320 @@
+from AlgorithmImports import *
+import datetime
+import numpy as np
+from chain_snapshot import ChainSnapshot
+from session_schedule import session_hours
+
+class ChainGreeks:
+    """
+    Implied volatility and greeks for every contract of a ChainSnapshot.
+
+    All arrays are aligned with the snapshot columns. Entries are NaN where no
+    volatility could be implied (no usable quote, or a price outside the
+    no-arbitrage bounds).
+    """
+
+    def __init__(self, iv, delta, gamma, theta):
+        self.iv = iv            # Annualized implied volatility
+        self.delta = delta      # Signed delta (puts negative, as reported by the chain)
+        self.gamma = gamma      # Per $1 move of the underlying
+        self.theta = theta      # Per calendar day
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Mask of contracts with an implied volatility."""
+        return ~np.isnan(self.iv)
+
+
+class GreeksEngine:
+    """
+    Vectorized Black-Scholes implied volatility and greeks for whole option chains.
+
+    LEAN leaves greeks empty until its price model has data, which in the first
+    minutes of the session can leave every contract without a delta. The engine
+    implies volatility from each contract's mid quote and computes delta, gamma
+    and theta for the entire chain in one NumPy pass. Time to expiry is counted
+    in minutes to the underlying's session close on the expiry date (16:00, or
+    the early close on half days, from the exchange hours), so 0 DTE contracts are
+    priced on the time actually left in the session rather than a whole day.
+
+    LEAN reports greeks it has not computed yet as 0.0, so a zero (or non-finite)
+    delta counts as missing, the same as no greeks at all.
+
+    Contracts are treated as European (no early exercise premium), which is close
+    enough for the short-dated, out-of-the-money puts the strategy trades.
+
+    Results are cached per (symbol, bar): chains by (canonical symbol, snapshot time)
+    and single contracts by (contract symbol, algorithm time). The cache is cleared
+    when the trading day rolls.
+    """
+
+    MINUTES_PER_YEAR = 365 * 24 * 60
+    EXPIRY_CLOSE_MINUTES = 16 * 60          # Regular expiry close (16:00 ET), when the exchange hours can't tell
+    MIN_VOLATILITY = 1e-4
+    MAX_VOLATILITY = 5.0
+
+    def __init__(self, algorithm,
+                 risk_free_rate: float = 0.0,
+                 dividend_yield: float = 0.0,
+                 min_minutes_to_expiry: float = 1.0,
+                 max_iterations: int = 50,
+                 tolerance: float = 1e-6):
+        """
+        Initialize the engine.
+
+        Parameters:
+            algorithm: The algorithm instance (for time and the daily cache roll)
+            risk_free_rate: Continuously compounded annual rate (default: 0)
+            dividend_yield: Continuous annual dividend yield (default: 0)
+            min_minutes_to_expiry: Floor on time to expiry so contracts stay priceable
+                                   into the close (default: 1 minute)
+            max_iterations: Maximum solver iterations (default: 50)
+            tolerance: Price tolerance for the implied volatility solver (default: 1e-6)
+        """
+        self.algorithm = algorithm
+        self.risk_free_rate = risk_free_rate
+        self.dividend_yield = dividend_yield
+        self.min_minutes_to_expiry = min_minutes_to_expiry
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+        self._cache = {}         # (symbol, bar time) -> ChainGreeks or float
+        self._cache_date = None
+        self._close_minutes = {} # (underlying symbol, expiry date) -> session close, minutes after midnight
+
+    def chain_greeks(self, snapshot: ChainSnapshot, underlying_price: float = None) -> ChainGreeks:
+        """
+        Compute implied volatility and greeks for every contract in a snapshot.
+
+        Parameters:
+            snapshot: ChainSnapshot to price
+            underlying_price: Underlying price (default: the price the snapshot was quoted against)
+
+        Returns:
+            ChainGreeks: Arrays aligned with the snapshot, or None if there is no underlying price
+        """
+        if underlying_price is None:
+            underlying_price = snapshot.underlying_price
+        if not underlying_price or len(snapshot) == 0:
+            return None
+
+        self._roll_cache()
+        key = (snapshot.canonical_symbol, snapshot.time, underlying_price)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Mid quote, falling back to the last trade when either side is missing
+        has_quote = (snapshot.bid > 0) & (snapshot.ask > 0)
+        prices = np.where(has_quote, (snapshot.bid + snapshot.ask) / 2, snapshot.last)
+        prices = np.where(prices > 0, prices, np.nan)
+
+        # Minutes from the snapshot time to each contract's expiry close (one lookup per expiry date)
+        now = np.datetime64(snapshot.time, 'm')
+        canonical = snapshot.canonical_symbol
+        underlying = canonical.underlying if canonical is not None else None
+        expiries, positions = np.unique(snapshot.expiry, return_inverse=True)
+        close_offsets = np.array([self.expiry_close_minutes(underlying, expiry.astype(object))
+                                  for expiry in expiries], dtype='timedelta64[m]')
+        expiry_close = snapshot.expiry.astype('datetime64[m]') + close_offsets[positions]
+        minutes = (expiry_close - now).astype(np.float64)
+
+        greeks = self.compute(prices, underlying_price, snapshot.strike,
+                              snapshot.right == ChainSnapshot.RIGHT_PUT, minutes)
+        self._cache[key] = greeks
+        return greeks
+
+    def expiry_close_minutes(self, underlying_symbol, expiry_date: datetime.date) -> int:
+        """
+        Session close of the underlying on an expiry date, in minutes after midnight.
+
+        Parameters:
+            underlying_symbol: Underlying whose exchange hours define the close (None: regular close)
+            expiry_date: Expiration date
+
+        Returns:
+            int: Minutes after midnight (algorithm time) - early closes included
+        """
+        key = (underlying_symbol, expiry_date)
+        minutes = self._close_minutes.get(key)
+        if minutes is None:
+            minutes = self.EXPIRY_CLOSE_MINUTES
+            if underlying_symbol is not None and underlying_symbol in self.algorithm.securities:
+                session = session_hours(self.algorithm, underlying_symbol, expiry_date)
+                if session is not None:
+                    close = session[1]
+                    minutes = (close.date() - expiry_date).days * 24 * 60 + close.hour * 60 + close.minute
+            self._close_minutes[key] = minutes
+        return minutes
+
+    def fill_missing_deltas(self, snapshot: ChainSnapshot, underlying_price: float = None) -> int:
+        """
+        Fill the snapshot's missing deltas with computed ones.
+        Missing means NaN, zero or infinite (LEAN reports uncomputed greeks as 0.0);
+        deltas reported by the chain are left untouched.
+
+        Parameters:
+            snapshot: ChainSnapshot to update in place
+            underlying_price: Underlying price (default: the price the snapshot was quoted against)
+
+        Returns:
+            int: Number of deltas filled
+        """
+        missing = ~np.isfinite(snapshot.delta) | (snapshot.delta == 0)
+        if not missing.any():
+            return 0
+
+        greeks = self.chain_greeks(snapshot, underlying_price)
+        if greeks is None:
+            return 0
+
+        fill = missing & greeks.valid
+        snapshot.delta[fill] = greeks.delta[fill]
+        return int(np.count_nonzero(fill))
+
+    def contract_delta(self, contract, underlying_price: float):
+        """
+        Compute the delta of a single contract from its quote.
+
+        Parameters:
+            contract: OptionContract
+            underlying_price: Current underlying price
+
+        Returns:
+            float: Signed delta, or None if no volatility could be implied
+        """
+        self._roll_cache()
+        key = (contract.symbol, self.algorithm.time)
+        if key in self._cache:
+            return self._cache[key]
+
+        bid, ask, last = contract.bid_price, contract.ask_price, contract.last_price
+        price = (bid + ask) / 2 if bid > 0 and ask > 0 else last
+        close_minutes = self.expiry_close_minutes(contract.symbol.underlying, contract.expiry.date())
+        expiry_close = contract.expiry.replace(hour=0, minute=0, second=0, microsecond=0) + \
+            datetime.timedelta(minutes=close_minutes)
+        minutes = (expiry_close - self.algorithm.time).total_seconds() / 60
+
+        greeks = self.compute(np.array([price if price > 0 else np.nan]), underlying_price,
+                              np.array([contract.strike]), np.array([contract.right == OptionRight.PUT]),
+                              np.array([minutes], dtype=np.float64))
+        delta = None if np.isnan(greeks.delta[0]) else float(greeks.delta[0])
+        self._cache[key] = delta
+        return delta
+
+    def compute(self, prices: np.ndarray, underlying_price: float, strikes: np.ndarray,
+                is_put: np.ndarray, minutes_to_expiry: np.ndarray) -> ChainGreeks:
+        """
+        Imply volatility from prices and compute greeks for a batch of contracts.
+
+        Parameters:
+            prices: Option prices (NaN where there is no usable price)
+            underlying_price: Underlying price
+            strikes: Strike prices
+            is_put: Boolean mask, True for puts
+            minutes_to_expiry: Minutes until expiry
+
+        Returns:
+            ChainGreeks: Implied volatility and greeks, NaN where no volatility fits
+        """
+        spot = float(underlying_price)
+        r, q = self.risk_free_rate, self.dividend_yield
+        years = np.maximum(minutes_to_expiry, self.min_minutes_to_expiry) / self.MINUTES_PER_YEAR
+        discount = np.exp(-r * years)
+        carry = np.exp(-q * years)
+
+        # Prices outside the no-arbitrage bounds have no implied volatility
+        forward_intrinsic = np.where(is_put, strikes * discount - spot * carry, spot * carry - strikes * discount)
+        upper_bound = np.where(is_put, strikes * discount, spot * carry)
+        solvable = ~np.isnan(prices) & (prices > np.maximum(forward_intrinsic, 0.0)) & (prices < upper_bound)
+
+        iv = self._implied_volatility(prices, spot, strikes, is_put, years, discount, carry, solvable)
+
+        # Greeks at the implied volatility
+        sqrt_t = np.sqrt(years)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d1 = (np.log(spot / strikes) + (r - q + 0.5 * iv * iv) * years) / (iv * sqrt_t)
+        d2 = d1 - iv * sqrt_t
+        pdf_d1 = np.exp(-0.5 * d1 * d1) / np.sqrt(2 * np.pi)
+
+        delta = np.where(is_put, carry * (self._norm_cdf(d1) - 1.0), carry * self._norm_cdf(d1))
+        gamma = carry * pdf_d1 / (spot * iv * sqrt_t)
+        time_decay = -spot * carry * pdf_d1 * iv / (2 * sqrt_t)
+        theta = np.where(is_put,
+                         time_decay + r * strikes * discount * self._norm_cdf(-d2) - q * spot * carry * self._norm_cdf(-d1),
+                         time_decay - r * strikes * discount * self._norm_cdf(d2) + q * spot * carry * self._norm_cdf(d1))
+
+        return ChainGreeks(iv, delta, gamma, theta / 365.0)
+
+    def _implied_volatility(self, prices, spot, strikes, is_put, years, discount, carry, solvable):
+        """
+        Solve for implied volatility with a safeguarded Newton iteration.
+
+        Each contract keeps a bracket [low, high] around its root. Newton steps that
+        leave the bracket (or have no vega to work with) fall back to bisection, so
+        every contract converges even deep in or out of the money.
+
+        Returns:
+            np.ndarray: Implied volatility, NaN where not solvable
+        """
+        low = np.full(prices.shape, self.MIN_VOLATILITY)
+        high = np.full(prices.shape, self.MAX_VOLATILITY)
+
+        # Brenner-Subrahmanyam at-the-money approximation as the starting point
+        with np.errstate(invalid='ignore'):
+            sigma = np.sqrt(2 * np.pi / years) * prices / spot
+        sigma = np.where(np.isfinite(sigma), np.clip(sigma, 0.05, 2.0), 0.5)
+
+        active = solvable.copy()
+        log_moneyness = np.log(spot / strikes)
+        sqrt_t = np.sqrt(years)
+
+        for _ in range(self.max_iterations):
+            if not active.any():
+                break
+            idx = np.flatnonzero(active)
+            s, t, st = sigma[idx], years[idx], sqrt_t[idx]
+
+            d1 = (log_moneyness[idx] + (self.risk_free_rate - self.dividend_yield + 0.5 * s * s) * t) / (s * st)
+            d2 = d1 - s * st
+            call = spot * carry[idx] * self._norm_cdf(d1) - strikes[idx] * discount[idx] * self._norm_cdf(d2)
+            model = np.where(is_put[idx], call - spot * carry[idx] + strikes[idx] * discount[idx], call)
+            diff = model - prices[idx]
+
+            converged = np.abs(diff) < self.tolerance
+            active[idx[converged]] = False
+
+            # Tighten the bracket: model too rich means volatility is too high
+            too_high = diff > 0
+            high[idx] = np.where(too_high, s, high[idx])
+            low[idx] = np.where(too_high, low[idx], s)
+
+            vega = spot * carry[idx] * np.exp(-0.5 * d1 * d1) / np.sqrt(2 * np.pi) * st
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                newton = s - diff / vega
+            in_bracket = (vega > 1e-12) & (newton > low[idx]) & (newton < high[idx])
+            step = np.where(in_bracket, newton, 0.5 * (low[idx] + high[idx]))
+            sigma[idx] = np.where(converged, s, step)
+
+        return np.where(solvable, sigma, np.nan)
+
+    @staticmethod
+    def _norm_cdf(x):
+        """
+        Standard normal CDF via the Numerical Recipes erfc approximation, whose
+        relative error stays below 1.2e-7 even far in the tails (cheap OTM options).
+        NumPy has no erf, and this keeps the engine free of a SciPy dependency.
+        """
+        z = np.abs(x) / np.sqrt(2.0)
+        t = 1.0 / (1.0 + 0.5 * z)
+        poly = (-1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (-0.18628806 +
+                t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+        tail = 0.5 * t * np.exp(-z * z + poly)
+        return np.where(x >= 0, 1.0 - tail, tail)
+
+    def _roll_cache(self):
+        """Drop cached results from previous trading days."""
+        today = self.algorithm.time.date()
+        if self._cache_date != today:
+            self._cache.clear()
+            self._cache_date = today
@@ -4,35 +4,53 @@ from AlgorithmImports import *
 from universe_builder import UniverseBuilder   # M1: Universe building
 from spread_selector import SpreadSelector     # M3: Strike selection
 from order_executor import OrderExecutor       # M4: Order execution 
-from risk_manager import RiskManager           # M5: Risk management
+from risk_manager import RiskManager, PortfolioRiskManager  # M5: Risk management
+from chain_snapshot import ChainSnapshot       # Array-backed per-slice chain view
+from algo_logger import AlgoLogger, LogLevel   # Shared level-gated, buffered logging
+from greeks_engine import GreeksEngine         # Vectorized IV/greeks for chains missing greeks
+from session_schedule import SessionSchedule   # Per-session events from the exchange hours
+from contract_specs import ContractSpecs       # Tick sizes and multipliers from the symbol properties
+from chain_recorder import ChainRecorder       # Optional per-minute chain recording to the object store
 
 class V2CreditSpreadAlgoAlgorithm(QCAlgorithm):
     """
     Bull put credit spread strategy with modular architecture.
     
     Modules: M1 Universe, M3 Spread Selection, M4 Order Execution, M5 Risk Management
-    Schedule: 9:30 Load chains, 10:00 Open trades, 15:30 Close positions
+    Underlyings: "underlyings" project parameter, comma separated (default: SPY), e.g.
+                 SPY,QQQ,IWM,SPX - each one is a shard with its own chain, executor and risk state
+    Schedule (per session): Open daily reset, Open+30m open trades, Close-30m close positions
+              (9:30 / 10:00 / 15:30 on a regular day; no events on holidays)
     Risk rules: Stop-loss at 2× credit, take-profit at 50% max gain
     """
     
-    def log(self, message):
-        """Enhanced logging that skips messages during warm-up period.
+    DEFAULT_UNDERLYINGS = "SPY"
+    
+    def log(self, message, *args, **kwargs):
+        """Route messages through the shared AlgoLogger.
+        
+        The logger skips non-critical messages during warm-up, applies category
+        levels and rate limits, and defers formatting of %-style messages until
+        they are actually emitted.
         
         Parameters:
-            message: The message to log
+            message: The message (or %-style format string) to log
+            *args: Format arguments for lazy formatting
+            **kwargs: category / level overrides passed to AlgoLogger.log
         """
-        # Skip logging during warm-up period
-        if not self.is_warming_up:
-            # Call the parent class's log method
-            super().log(message)
+        self.algo_logger.log(message, *args, **kwargs)
     
-    def critical_log(self, message):
+    def critical_log(self, message, *args, **kwargs):
         """Log critical messages even during warm-up period.
         
         Parameters:
-            message: The message to log
+            message: The message (or %-style format string) to log
+            *args: Format arguments for lazy formatting
         """
-        # Always log critical messages regardless of warm-up
+        self.algo_logger.critical(message, *args, **kwargs)
+    
+    def _emit_log(self, message):
+        """Write a (batched) message to the platform log."""
         super().log(message)
     
     def initialize(self):
@@ -44,13 +62,64 @@ class V2CreditSpreadAlgoAlgorithm(QCAlgorithm):
         self.set_time_zone(TimeZones.NEW_YORK)
         self.set_warm_up(10, Resolution.DAILY)
         
+        # Shared logger: level/rate gating with batched emission once per bar
+        self.algo_logger = AlgoLogger(self, self._emit_log, level=LogLevel.INFO, flush_on="bar")
+        self.algo_logger.configure("POSITION UPDATE", min_interval=3600)  # Open position updates once per hour
+        
         # Use critical_log for essential initialization messages
         self.critical_log("Algorithm initialized with $10,000 starting capital")
         
+        # Shared greeks engine - fills in deltas the chain hasn't computed yet (early bars)
+        self.greeks_engine = GreeksEngine(self)
+        # Shared contract specs - limit price ticks and contract multipliers
+        self.contract_specs = ContractSpecs(self)
+        
         # Initialize modules
-        self.universe_builder = UniverseBuilder(self)                # M1
-        self.universe_builder.initialize_universe("SPY", Resolution.MINUTE)
-        self.universe_builder.log_method = self.log  # Pass our log method
+        self.universe_builder = UniverseBuilder(self, greeks_engine=self.greeks_engine)  # M1
+        self.universe_builder.log_method = self.algo_logger  # Pass our shared logger
+        
+        # One shard per underlying, each with its own order execution (M4) and risk management (M5)
+        tickers = [ticker.strip() for ticker in
+                   (self.get_parameter("underlyings") or self.DEFAULT_UNDERLYINGS).split(",") if ticker.strip()]
+        for ticker in tickers:
+            universe = self.universe_builder.initialize_universe(ticker, Resolution.MINUTE)
+            # Chain availability diagnostics every 10 minutes, per underlying so one shard's wait doesn't hide another's
+            self.algo_logger.configure(f"CHAIN WAIT {universe.ticker}", min_interval=600)
+            universe.order_executor = OrderExecutor(self, contract_specs=self.contract_specs, universe=universe)  # M4
+            universe.order_executor.log_method = self.algo_logger    # Pass our shared logger
+            universe.risk_manager = RiskManager(self, universe.order_executor)                             # M5
+            # Optional cap on this underlying's concurrent spreads (OPENING, OPEN or CLOSING; default 1)
+            max_open_spreads = self.get_parameter("max_open_spreads")
+            if max_open_spreads:
+                universe.order_executor.max_open_spreads = max(1, int(max_open_spreads))
+            # Entry as one combo order ("combo", default) or one limit order per leg ("legs")
+            entry_mode = (self.get_parameter("entry_mode") or "").strip().lower()
+            if entry_mode in (OrderExecutor.ENTRY_COMBO, OrderExecutor.ENTRY_LEGS):
+                universe.order_executor.entry_mode = entry_mode
+            # Optional entry repricing: ladder of half-spread fractions beyond mid per bar (e.g. "0,0.5,1"),
+            # concession cap (fraction of target credit) and bars before an unfilled entry is canceled
+            reprice_ladder = self.get_parameter("entry_reprice_ladder")
+            max_concession = self.get_parameter("entry_max_concession_pct")
+            timeout_bars = self.get_parameter("entry_timeout_bars")
+            if reprice_ladder is not None or max_concession or timeout_bars:
+                universe.order_executor.working_orders.update_parameters(
+                    reprice_ladder=[float(rung) for rung in reprice_ladder.split(",") if rung.strip()]
+                    if reprice_ladder is not None else None,
+                    max_concession_pct=float(max_concession) if max_concession else None,
+                    timeout_bars=int(timeout_bars) if timeout_bars else None)
+        self.universes = list(self.universe_builder.universes.values())
+        
+        # Loss limits apply to the whole portfolio: the shards' P/L summed, every shard halted on a trip
+        self.portfolio_risk = PortfolioRiskManager(self, [universe.risk_manager for universe in self.universes])
+        # Optional loss limits from the project parameters (fractions, e.g. 0.05 for 5%)
+        daily_loss_limit = self.get_parameter("daily_loss_limit_pct")
+        drawdown_limit = self.get_parameter("max_drawdown_limit_pct")
+        if daily_loss_limit or drawdown_limit:
+            self.portfolio_risk.update_parameters(
+                daily_loss_limit_pct=float(daily_loss_limit) if daily_loss_limit else None,
+                max_drawdown_limit_pct=float(drawdown_limit) if drawdown_limit else None)
+        
+        # The first underlying is the primary: benchmark and session schedule
         self.equity_symbol = self.universe_builder.equity_symbol
         self.option_symbol = self.universe_builder.option_symbol
         self.set_benchmark(self.equity_symbol)
@@ -58,183 +127,188 @@ class V2CreditSpreadAlgoAlgorithm(QCAlgorithm):
         # Spread selection module (M3)
         # Note: Using default parameters (target_delta=0.15, max_delta=0.30, min_credit_pct=0.20, etc.)
         # These can be customized in spread_selector.py or by passing parameters here
-        self.spread_selector = SpreadSelector(self)
-        self.spread_selector.log_method = self.log  # Pass our log method
-        
-        # Order execution module (M4)
-        self.order_executor = OrderExecutor(self)                  # M4
-        self.order_executor.log_method = self.log    # Pass our log method
+        # Grid mode evaluates all short/long pairs in one NumPy pass (same result as the loop)
+        self.spread_selector = SpreadSelector(self, evaluation_mode="grid", greeks_engine=self.greeks_engine,
+                                              contract_specs=self.contract_specs)
+        self.spread_selector.log_method = self.algo_logger  # Pass our shared logger
         
-        # Risk management module (M5)
-        self.risk_manager = RiskManager(self, self.order_executor)   # M5
+        # Optional chain recorder: every slice's filtered chain, day-partitioned in the object store
+        # (enable with the record_chains=true project parameter, replay with offline/replay.py)
+        self.chain_recorder = None
+        if (self.get_parameter("record_chains") or "").strip().lower() in ("1", "true", "yes"):
+            self.chain_recorder = ChainRecorder(self)
+            self.chain_recorder.log_method = self.algo_logger
         
         # Schedule trading events
-        # Load chains at market open with fallback attempts each minute
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(9, 30), self.load_option_chains)
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(9, 31), self.load_option_chains_fallback)
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(9, 32), self.load_option_chains_fallback)
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(9, 33), self.load_option_chains_fallback)
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(9, 34), self.load_option_chains_fallback)
-        
-        # Trade entry and exit
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(10, 0), self.open_trades)
-        self.schedule.on(self.date_rules.every_day(), 
-                         self.time_rules.at(15, 30), self.close_positions)
-        
-        # State variables
-        self._option_chain = None
-        self._chains_loaded_today = False
+        # Events are compiled per session from the exchange hours, so holidays get none and
+        # the close moves with early closes. Chains load through on_chain_ready from on_data.
+        # All underlyings trade US hours, so the primary underlying's sessions drive every shard.
+        self.session_schedule = SessionSchedule(self, self.equity_symbol)
+        self.session_schedule.log_method = self.algo_logger
+        self.session_schedule.after_open("load_option_chains", 0, self.load_option_chains)  # Daily reset
+        self.session_schedule.after_open("open_trades", 30, self.open_trades)              # Trade entry
+        self.session_schedule.before_close("close_positions", 30, self.close_positions)     # Trade exit
+        self.session_schedule.extend()
 
     def load_option_chains(self):
-        """Initial attempt to load option chains at market open."""
-        # Reset daily state
-        self._chains_loaded_today = False
-        self._option_chain = None
-        
-        # Reset OrderExecutor state
-        self.order_executor.reset_state()
-        
-        # Check if we have any open positions
-        has_positions = False
-        for security in self.portfolio.keys():
-            if "SPY" in str(security) and abs(self.portfolio[security].quantity) > 0:
-                has_positions = True
-                break
-        
-        # Consolidated log message with clear section header
-        self.log(f"DAILY RESET - {'Open positions found' if has_positions else 'No open positions found'}")
-        
-        # Get current equity price
-        equity_price = self.universe_builder.get_latest_equity_price()
-        self.log(f"MARKET DATA - SPY price: ${equity_price:.2f}, Checking for option chain {self.time.strftime('%Y-%m-%d')}")
+        """Reset every underlying's daily state at the session open; chains arrive via on_chain_ready."""
+        for universe in self.universes:
+            # Reset daily state
+            universe.reset_day()
+            
+            # Reset OrderExecutor state
+            universe.order_executor.reset_state()
+            
+            # Check if we have any open positions in this underlying or its options
+            has_positions = universe.order_executor.positions.has_positions
+            
+            # Consolidated log message with clear section header
+            self.log(f"DAILY RESET - {universe.ticker} - {'Open positions found' if has_positions else 'No open positions found'}")
+            
+            # Get current underlying price
+            equity_price = self.universe_builder.get_latest_equity_price(universe)
+            self.log(f"MARKET DATA - {universe.ticker} price: ${equity_price:.2f}, Checking for option chain {self.time.strftime('%Y-%m-%d')}")
 
-    def load_option_chains_fallback(self):
-        """Fallback attempts to load option chains if not loaded at market open."""
-        if not self._chains_loaded_today:
-            # Try to get the option chains without verbose logging
-            try:
-                chain_status = self.universe_builder.get_option_chains(None)
-                if chain_status is not None:
-                    contracts = list(chain_status)
-                    if len(contracts) > 0:
-                        # Get contract breakdown
-                        put_count = sum(1 for contract in contracts if contract.right == OptionRight.PUT)
-                        call_count = sum(1 for contract in contracts if contract.right == OptionRight.CALL)
-                        today = self.time.date()
-                        today_contracts = [c for c in contracts if c.expiry.date() == today]
-                        
-                        # Consolidated log message for option chain data
-                        self.log(f"MARKET DATA - Option chain loaded with {len(contracts)} contracts ({put_count} puts, {call_count} calls), {len(today_contracts)} expiring today")
-                        self._option_chain = chain_status
-                        self._chains_loaded_today = True
-            except Exception as e:
-                # Always log exceptions even during warm-up
-                self.critical_log(f"ERROR - Option chain loading error: {str(e)}")
+    def on_chain_ready(self, universe, snapshot):
+        """Chain ready callback: raised from on_data by an underlying's first non-empty chain of the day.
+        
+        Stores the day's chain snapshot on the underlying's shard and logs its contract breakdown.
+        
+        Parameters:
+            universe: UnderlyingUniverse the chain belongs to
+            snapshot: ChainSnapshot of the loaded option chain
+        """
+        universe.chain_snapshot = snapshot
+        universe.chains_loaded_today = True
+        
+        # Get contract breakdown
+        put_count = snapshot.count(ChainSnapshot.RIGHT_PUT)
+        call_count = snapshot.count(ChainSnapshot.RIGHT_CALL)
+        today_count = snapshot.count_expiring(self.time.date())
+        
+        # Consolidated log message for option chain data
+        self.log(f"MARKET DATA - {universe.ticker} option chain loaded with {len(snapshot)} contracts ({put_count} puts, {call_count} calls), {today_count} expiring today")
 
     def open_trades(self):
-        """Open bull put credit spreads at 10:00 AM ET."""
-        if not self._chains_loaded_today:
-            self.log("TRADE ANALYSIS - SKIPPED - No option chains loaded for today")
+        """Open bull put credit spreads 30 minutes after the session open (10:00 AM ET on a regular day)."""
+        # One selection pass per underlying
+        for universe in self.universes:
+            self._open_trade(universe)
+
+    def _open_trade(self, universe):
+        """Select and place one underlying's bull put credit spread.
+        
+        Parameters:
+            universe: UnderlyingUniverse to trade
+        """
+        if not universe.risk_manager.can_open_trades():
+            self.log(f"TRADE ANALYSIS - {universe.ticker} - SKIPPED - Trading halted by kill switch ({universe.risk_manager.halt_reason})")
+            return
+        
+        if not universe.chains_loaded_today:
+            self.log(f"TRADE ANALYSIS - {universe.ticker} - SKIPPED - No option chains loaded for today")
             return
             
-        if self._option_chain is not None:
+        if universe.chain_snapshot is not None:
             try:
-                # Get current equity price for reference
-                equity_price = self.universe_builder.get_latest_equity_price()
+                snapshot = universe.chain_snapshot
+                
+                # Get current underlying price for reference
+                equity_price = self.universe_builder.get_latest_equity_price(universe)
                 
                 # Consolidated trade analysis log with clear section header
-                self.log(f"TRADE ANALYSIS - SPY price: ${equity_price:.2f}, Chain loaded: {self._chains_loaded_today}")
+                self.log(f"TRADE ANALYSIS - {universe.ticker} price: ${equity_price:.2f}, Chain loaded: {universe.chains_loaded_today}")
                 
                 # Verify today's expiry is available
-                contracts = [contract for contract in self._option_chain]
                 today = self.time.date()
-                expiries = set(contract.expiry.date() for contract in contracts)
-                if today not in expiries:
-                    self.log(f"TRADE ANALYSIS - SKIPPED - No 0 DTE options found for today ({today})")
+                if not snapshot.has_expiry(today):
+                    self.log(f"TRADE ANALYSIS - {universe.ticker} - SKIPPED - No 0 DTE options found for today ({today})")
                     return
                 # Format selection criteria with structured header
                 self.log(f"SELECTION CRITERIA - Target delta: {self.spread_selector.target_delta}, Max delta: {self.spread_selector.max_delta}, Min credit: {self.spread_selector.min_credit_pct*100}% of width")
                 
                 # Log available strikes with structured header
-                today = self.time.date()
-                put_contracts = [contract for contract in contracts if contract.right == OptionRight.PUT and contract.expiry.date() == today]
-                if put_contracts:
-                    strikes = sorted(set([contract.strike for contract in put_contracts]))
+                put_strikes = snapshot.strike[snapshot.indices(ChainSnapshot.RIGHT_PUT, today)]
+                if len(put_strikes) > 0:
                     # Consolidated options universe information
-                    self.log(f"OPTIONS UNIVERSE - Strike range: ${min(strikes):.2f}-${max(strikes):.2f}, Found {len(put_contracts)} put contracts expiring today ({today})")
-                    # Note: In the future, if delta diagnostics are needed, implement a
-                    # calculate_option_delta method in the UniverseBuilder class
+                    self.log(f"OPTIONS UNIVERSE - {universe.ticker} - Strike range: ${put_strikes.min():.2f}-${put_strikes.max():.2f}, Found {len(put_strikes)} put contracts expiring today ({today})")
+                    # Missing deltas are computed by the SpreadSelector's GreeksEngine
                 
-                spread, max_profit, max_loss, breakeven = self.spread_selector.select_bull_put_spread(
-                    self._option_chain, equity_price)
+                candidate = self.spread_selector.select_bull_put_spread(snapshot, equity_price)
                 
-                if spread is not None:
+                if candidate is not None:
                     # Consolidated spread summary in a single log
-                    self.log(f"SPREAD SUMMARY - Bull Put Spread selected, Breakeven: ${breakeven:.2f}, Max P/L: ${max_profit:.2f}/${max_loss:.2f}")
-                    # Execute the trade with M4 (Order Executor)
-                    self.order_executor.place_spread_order(spread, max_profit, max_loss, breakeven)
+                    self.log(f"SPREAD SUMMARY - {universe.ticker} Bull Put Spread selected, Breakeven: ${candidate.breakeven:.2f}, Max P/L: ${candidate.max_profit:.2f}/${candidate.max_loss:.2f}")
+                    # Execute the trade with M4 (Order Executor) straight from the selected legs
+                    universe.order_executor.place_spread_order(candidate)
                 else:
                     # Consolidated message for no suitable spread
-                    self.log(f"SPREAD SUMMARY - No suitable spread found. Reasons: Delta > {self.spread_selector.max_delta} or credit < {self.spread_selector.min_credit_pct*100}% of width")
+                    self.log(f"SPREAD SUMMARY - {universe.ticker} - No suitable spread found. Reasons: Delta > {self.spread_selector.max_delta} or credit < {self.spread_selector.min_credit_pct*100}% of width")
             except Exception as e:
-                self.error(f"Error in spread selection: {str(e)}")
+                self.error(f"Error in {universe.ticker} spread selection: {str(e)}")
         else:
-            self.log("No option chain data available at 10:00 AM ET")
+            self.log(f"No {universe.ticker} option chain data available at trade entry")
 
     def close_positions(self):
-        """Mandatory closing of any open positions at 15:30 ET."""
-        self.log("CLOSE POSITION - Mandatory EOD close check initiated")
-        # Directly check if we have any option positions
-        # This is the most reliable way to determine if we need to close positions
-        has_positions = self._has_option_positions()
+        """Mandatory closing of any open positions 30 minutes before the session close (15:30 ET on a regular day)."""
+        for universe in self.universes:
+            self._close_positions(universe)
+
+    def _close_positions(self, universe):
+        """Mandatory end-of-day close of one underlying's positions.
+        
+        Parameters:
+            universe: UnderlyingUniverse to flatten
+        """
+        order_executor = universe.order_executor
+        self.log(f"CLOSE POSITION - {universe.ticker} - Mandatory EOD close check initiated")
+        # Directly check if we have any option positions (the fill-maintained position index)
+        has_positions = self._has_option_positions(universe)
         
         # Verify our state reflects reality and update flags
-        positions_exist = self.order_executor.daily_state_verification()
+        positions_exist = order_executor.daily_state_verification()
         
         # Double-check that verification agrees with our direct check
         if has_positions != positions_exist:
             self.log(f"WARNING: Position detection inconsistency - direct check: {has_positions}, verification: {positions_exist}")
         
-        # Use has_positions as the source of truth since it directly checks the portfolio
-        if has_positions:
-            self.log("Mandatory end-of-day position closure initiated based on direct position check")
-            
-            # Ensure the flag is set correctly (belt and suspenders approach)
-            self.order_executor.spread_is_open = True
+        # Use has_positions as the source of truth; verification has reconciled the index with the holdings
+        if has_positions or order_executor.pending_open:
+            if has_positions:
+                self.log("Mandatory end-of-day position closure initiated based on direct position check")
+            else:
+                self.log("Canceling unfilled entry orders before the close")
             
-            # Attempt to close using standard method
-            success = self.order_executor.close_spread_position(reason="(mandatory end-of-day close)")
+            # Attempt to close using standard method (cancels working entries, closes held legs)
+            success = order_executor.close_spread_position(reason="(mandatory end-of-day close)")
             
             # If standard close failed, force close as a last resort
-            if not success:
+            if not success and has_positions:
                 self.log("Standard close method failed - forcing position liquidation")
-                self.order_executor.force_close_positions(reason="(mandatory EOD liquidation)")
+                order_executor.force_close_positions(reason="(mandatory EOD liquidation)")
         else:
-            self.log("No open positions to close at end of day")
+            self.log(f"No open {universe.ticker} positions to close at end of day")
             
         # Final verification that we have no positions at end of day
-        still_has_positions = self._has_option_positions()
+        still_has_positions = self._has_option_positions(universe)
                 
         if still_has_positions:
-            self.log("CRITICAL: Failed to close all positions by end of day. Forcing liquidation.")
-            self.order_executor.force_close_positions(reason="(final EOD liquidation)")
+            self.log(f"CRITICAL: Failed to close all {universe.ticker} positions by end of day. Forcing liquidation.")
+            order_executor.force_close_positions(reason="(final EOD liquidation)")
     
-    def _has_option_positions(self):
-        """Helper method to directly check if we have any open option positions.
+    def _has_option_positions(self, universe):
+        """Helper method to directly check if we have any open option positions in an underlying.
+        
+        Parameters:
+            universe: UnderlyingUniverse to check
         
         Returns:
             bool: True if we have any option positions, False otherwise
         """
-        for symbol, holding in self.portfolio.items():
-            if symbol.SecurityType == SecurityType.OPTION and abs(holding.quantity) > 0:
-                self.log(f"Found option position: {symbol} with {holding.quantity} shares")
-                return True
+        # Open legs come from the executor's position index, kept current by fill events
+        for leg in universe.order_executor.positions.legs():
+            self.log(f"Found option position: {leg.symbol} with {leg.quantity} shares")
+            return True
         return False
 
     def on_data(self, slice):
@@ -242,47 +316,79 @@ class V2CreditSpreadAlgoAlgorithm(QCAlgorithm):
         
         Serves two purposes:
         1. Load option chains as soon as available after market open
-        2. Continuous risk monitoring (stop-loss, take-profit)
+        2. Continuous risk monitoring (stop-loss, take-profit) on live leg quotes
         """
         # We don't need to store the slice - OrderExecutor will use universal_builder directly
         
-        # Load option chains if not already loaded today
-        if not self._chains_loaded_today:
-            option_chain = self.universe_builder.get_option_chains(slice)
-            if option_chain is not None:
-                chain_list = list(option_chain)
-                if len(chain_list) > 0:
-                    self._option_chain = option_chain
-                    self._chains_loaded_today = True
-                    
-                    # Get contract breakdown
-                    put_count = sum(1 for contract in chain_list if contract.right == OptionRight.PUT)
-                    call_count = sum(1 for contract in chain_list if contract.right == OptionRight.CALL)
-                    today = self.time.date()
-                    today_contracts = [c for c in chain_list if c.expiry.date() == today]
-                    
-                    # Consolidated log message for option chain data
-                    self.log(f"MARKET DATA - Option chain loaded with {len(chain_list)} contracts ({put_count} puts, {call_count} calls), {len(today_contracts)} expiring today")
+        # One pass per underlying - each shard only touches its own chain and positions
+        for universe in self.universes:
+            # Record the chain first - the snapshot is cached for the rest of this slice
+            if self.chain_recorder is not None:
+                recorded = self.universe_builder.get_chain_snapshot(slice, universe)
+                if recorded is not None:
+                    self.chain_recorder.record(universe.ticker, recorded)
+            
+            # Load option chains if not already loaded today
+            if not universe.chains_loaded_today:
+                snapshot = self.universe_builder.get_chain_snapshot(slice, universe)
+                if snapshot is not None:
+                    if len(snapshot) > 0:
+                        self.on_chain_ready(universe, snapshot)
+                    else:
+                        self.log(f"MARKET DATA - Warning: {universe.ticker} option chain received but contains 0 contracts")
                 else:
-                    self.log(f"MARKET DATA - Warning: Option chain received but contains 0 contracts")
-            else:
-                # Only log this if it's before noon to avoid excessive logging
-                if self.time.hour < 12:
-                    self.log(f"MARKET DATA - Waiting for option chain data")
-        
-        # Perform state verification to ensure flags match reality
-        self.order_executor.reset_state()
-        
-        # Risk monitoring - now implemented in M5 module (RiskManager)
-        if self._option_chain is not None and self.order_executor.spread_is_open:
-            # Use Risk Manager to monitor positions (currently only checking stop-loss)
-            self.risk_manager.monitor_positions(self._option_chain)
-            # Note: Take-profit is disabled per user request
+                    # Only log this if it's before noon; the underlying's CHAIN WAIT category is rate limited
+                    if self.time.hour < 12:
+                        self.log("MARKET DATA - Waiting for %s option chain data", universe.ticker,
+                                 category=f"CHAIN WAIT {universe.ticker}")
+            
+            # Perform state verification to ensure flags match reality
+            order_executor = universe.order_executor
+            order_executor.reset_state()
+            
+            # Reprice or time out working entry orders on this bar's quotes
+            order_executor.working_orders.on_bar()
+            
+            # This underlying's daily P/L and drawdown, closing its spread while halted - only re-marks re-quoted held legs
+            universe.risk_manager.update_statistics(slice)
+            
+            # Risk monitoring - now implemented in M5 module (RiskManager)
+            # Filled spreads are valued from the held legs' live quotes, so no chain is required
+            if order_executor.spread_is_open:
+                # Use Risk Manager to monitor positions (currently only checking stop-loss)
+                universe.risk_manager.monitor_positions(universe.chain_snapshot, slice)
+                # Note: Take-profit is disabled per user request
+        
+        # Portfolio loss limits on the shards' summed P/L - a trip halts and closes every shard
+        self.portfolio_risk.update_statistics()
+        
+        # Emit this bar's buffered log lines in one batch
+        self.algo_logger.on_bar()
+
+    def on_end_of_day(self, symbol):
+        """Report each underlying's P/L statistics, emit the day's remaining log lines and rate-limit summary, write the day's recorded chains and compile upcoming sessions."""
+        # Called once per subscribed symbol - only the primary underlying marks our day end
+        if symbol == self.equity_symbol:
+            for universe in self.universes:
+                universe.risk_manager.report_day_end()
+            self.portfolio_risk.report_day_end()
+            if self.chain_recorder is not None:
+                self.chain_recorder.flush()
+            self.session_schedule.extend()
+            self.algo_logger.on_day_end()
+
+    def on_end_of_algorithm(self):
+        """Report entry fill latency and flush any log lines and recorded chain rows still buffered at the end of the run."""
+        for universe in self.universes:
+            universe.order_executor.working_orders.report()
+        if self.chain_recorder is not None:
+            self.chain_recorder.flush()
+        self.algo_logger.flush()
 
     def on_order_event(self, order_event):
         """Handle order events for tracking spread status.
         
-        Routes events to the order executor module to manage positions.
+        Routes events to the order executor of the underlying the order is for.
         Does not log any order events to reduce log volume.
         
         Parameters:
@@ -291,5 +397,9 @@ class V2CreditSpreadAlgoAlgorithm(QCAlgorithm):
         # No order event logging - only pass the event to the executor module
         # to reduce log volume and focus on critical algorithm information
         
-        # Pass the event to the order executor module
-        self.order_executor.on_order_event(order_event)
+        # Pass the event to the owning underlying's order executor and risk manager modules
+        universe = self.universe_builder.universe_for(order_event.symbol)
+        if universe is not None:
+            universe.order_executor.on_order_event(order_event)
+            # Arm/drop the stop-loss trigger once the executor has updated the spread state
+            universe.risk_manager.on_order_event(order_event)
@@ -1,575 +1,998 @@
 from AlgorithmImports import *
 import datetime
+from typing import Callable, List, Optional
+from chain_snapshot import ChainSnapshot
+from contract_specs import ContractSpecs
+from position_index import PositionIndex
+from spread_position import SpreadPosition, SpreadState
+from universe_builder import UniverseBuilder, UnderlyingUniverse
+from working_order_manager import WorkingOrderManager
 
 class OrderExecutor:
     """
     Handles order execution for credit spreads.
     Responsible for placing orders, tracking order status, and closing positions.
+
+    Each executor works one underlying (its UnderlyingUniverse shard): holdings
+    checks, closes and liquidations only touch that underlying's options.
+
+    Entries go out as one combo limit order for the net credit (both legs fill
+    together, no legging window); if the combo is rejected the legs are sent as
+    two limit orders instead (ENTRY_LEGS mode always does that).
+
+    Every spread is a SpreadPosition with its own state (OPENING, OPEN, CLOSING).
+    on_order_event finds the spread an event belongs to through an order ID map and
+    advances only that spread, so any number of spreads (across expiries, laddered
+    entries) can be working at the same time.
     """
-    
-    def __init__(self, algorithm):
+
+    ENTRY_COMBO = "combo"   # One net-credit combo limit order for both legs
+    ENTRY_LEGS = "legs"     # One limit order per leg
+
+    def __init__(self, algorithm, contract_specs: Optional[ContractSpecs] = None,
+                 universe: Optional[UnderlyingUniverse] = None):
         """
         Initialize the OrderExecutor.
-        
+
         Parameters:
             algorithm: The algorithm instance
+            contract_specs: Shared ContractSpecs for tick sizes and multipliers (default: a private instance)
+            universe: Underlying shard this executor trades (default: none - all option holdings)
         """
         self.algorithm = algorithm
+        self.contract_specs = contract_specs or ContractSpecs(algorithm)
+        self.universe = universe
+        self._label = f"{universe.ticker} " if universe is not None else ""  # Ticker prefix for trade logs
         self.order_tickets = []  # The most recent order tickets
-        self.active_spread_orders = {}  # Dictionary to track all spread orders
-        
-        # State flags
-        self.spread_is_open = False
-        self.pending_open = False
-        self.pending_close = False
+        self.max_open_spreads = 1  # Spreads allowed at once (OPENING, OPEN or CLOSING) - entries beyond are refused (max_open_spreads parameter)
+        self.entry_mode = self.ENTRY_COMBO  # How entries are submitted (falls back to ENTRY_LEGS on rejection)
+
+        # Spread state machine: the active spreads and O(1) routing of order events to them
+        self.spreads = {}               # spread ID -> SpreadPosition, in placement order
+        self._spread_by_order = {}      # order ID -> SpreadPosition the order belongs to
+        self._spread_by_leg = {}        # held leg symbol -> SpreadPosition holding it (expiry settlements)
+        self._state_counts = {state: 0 for state in SpreadState.TRANSITIONS}
+        self._submitting = None         # (spread, phase) while its orders are submitted - see _submit
+        self._next_spread_id = 1
         self.last_reset_date = None  # Track the last date state was reset
-        
-        # Logging control
-        self.last_monitoring_log_time = None
-        
-        # Current spread details
-        self.current_spread_details = {
-            'short_strike': None,
-            'long_strike': None, 
-            'initial_credit': None,
-            'max_profit': None,
-            'max_loss': None,
-            'breakeven': None,
-            'expiry': None
-        }
-        
+
+        # Open option legs, maintained from fill events - position checks never scan the portfolio
+        self.positions = PositionIndex(self._is_own_option,
+                                       universe.underlying_symbol if universe is not None else None)
+        self._positions_seeded = False  # Seeded from the portfolio once, at the first reset
+
+        # Reprices working entry limits each bar, times out stale entries and records fill latency
+        self.working_orders = WorkingOrderManager(algorithm, self)
+
+        # Logging control - monitoring messages use the rate-limited POSITION UPDATE category
+        self._log_method = None  # Will be set by main algorithm
+
+    @property
+    def log_method(self) -> Optional[Callable]:
+        """Getter for log_method property"""
+        return self._log_method
+
+    @log_method.setter
+    def log_method(self, method: Callable):
+        """Setter for log_method property"""
+        self._log_method = method
+
+    def log(self, message, *args, **kwargs) -> None:
+        """Log a message using the provided log method or fall back to algorithm.log
+
+        Parameters:
+            message: Message (or %-style format string / callable) to log
+            *args: Format arguments, formatted lazily by the log method
+            **kwargs: Extra options for the log method (e.g. category)
+        """
+        if self._log_method:
+            self._log_method(message, *args, **kwargs)
+        else:
+            if callable(message):
+                message = message()
+            self.algorithm.log(message % args if args else message)
+
+    def _is_own_option(self, symbol) -> bool:
+        """
+        Check whether a symbol is an option contract this executor manages.
+
+        Parameters:
+            symbol: Holding or order symbol
+
+        Returns:
+            bool: True for options on this executor's underlying (any option without a shard)
+        """
+        if self.universe is not None:
+            return self.universe.is_option(symbol)
+        return symbol.SecurityType in UniverseBuilder.OPTION_TYPES
+
+    # ------------------------------------------------------------------
+    # Spread state
+    # ------------------------------------------------------------------
+
+    @property
+    def spread_is_open(self) -> bool:
+        """Whether any spread holds legs (OPEN or CLOSING)"""
+        return self._state_counts[SpreadState.OPEN] > 0 or self._state_counts[SpreadState.CLOSING] > 0
+
+    @property
+    def pending_open(self) -> bool:
+        """Whether any spread's entry orders are working (OPENING)"""
+        return self._state_counts[SpreadState.OPENING] > 0
+
+    @property
+    def pending_close(self) -> bool:
+        """Whether any spread's close orders are working (CLOSING)"""
+        return self._state_counts[SpreadState.CLOSING] > 0
+
+    @property
+    def current_spread(self) -> Optional[SpreadPosition]:
+        """The most recently placed active spread (None if there is none)"""
+        return next(reversed(self.spreads.values()), None)
+
+    def spreads_in(self, *states) -> List[SpreadPosition]:
+        """
+        Active spreads in the given states.
+
+        Returns:
+            list: SpreadPosition objects in placement order
+        """
+        return [spread for spread in self.spreads.values() if spread.state in states]
+
+    def spread_for_order(self, order_id) -> Optional[SpreadPosition]:
+        """Active spread an order belongs to (None for orders of no spread)"""
+        return self._spread_by_order.get(order_id)
+
+    def _new_spread(self, short_symbol, long_symbol, short_strike, long_strike, expiry, multiplier=None):
+        """Create and register a spread in the OPENING state."""
+        spread = SpreadPosition(self._next_spread_id, short_symbol, long_symbol, short_strike, long_strike,
+                                expiry, multiplier)
+        self._next_spread_id += 1
+        self.spreads[spread.spread_id] = spread
+        self._state_counts[spread.state] += 1
+        return spread
+
+    def _transition(self, spread, state):
+        """
+        Move a spread to a new state; terminal states unregister it.
+
+        Returns:
+            bool: True if the transition is allowed and was made
+        """
+        if state not in SpreadState.TRANSITIONS.get(spread.state, ()):
+            self.algorithm.error(f"Invalid spread transition {spread.state} -> {state} for {spread}")
+            return False
+        self._state_counts[spread.state] -= 1
+        spread.state = state
+        if state in SpreadState.TERMINAL:
+            del self.spreads[spread.spread_id]
+            for order_id in spread.orders:
+                if self._spread_by_order.get(order_id) is spread:
+                    del self._spread_by_order[order_id]
+            for symbol in list(spread.held):
+                if self._spread_by_leg.get(symbol) is spread:
+                    del self._spread_by_leg[symbol]
+        else:
+            self._state_counts[state] += 1
+        return True
+
+    def _drop(self, spread):
+        """Forget a spread whose legs are gone without its fills being seen (no trade summary)."""
+        if spread.state == SpreadState.CLOSING:
+            self._transition(spread, SpreadState.CLOSED)
+        elif spread.state == SpreadState.OPEN:
+            self._transition(spread, SpreadState.CLOSED)
+        elif spread.state == SpreadState.OPENING:
+            self._transition(spread, SpreadState.CANCELED)
+
+    def _attach(self, spread, order_id, phase, working=True):
+        """Attach an order to a spread and route its events to it."""
+        spread.add_order(order_id, phase, working)
+        self._spread_by_order[order_id] = spread
+
+    def _submit(self, spread, phase, submit):
+        """
+        Submit a spread's orders and attach them to it.
+
+        Fill and cancel events can arrive before the order call returns (market orders
+        in backtests), so events of order IDs no spread knows yet are claimed for the
+        submitting spread, and the spread's state is only advanced once all of its
+        orders are in.
+
+        Parameters:
+            spread: SpreadPosition the orders belong to
+            phase: SpreadPosition.ENTRY or SpreadPosition.CLOSE
+            submit: Callable placing the orders, returning a ticket or list of tickets
+
+        Returns:
+            list: The order tickets
+        """
+        tickets = []
+        self._submitting = (spread, phase)
+        try:
+            submitted = submit()
+            if submitted is not None:
+                tickets = [ticket for ticket in (submitted if isinstance(submitted, list) else [submitted])
+                           if ticket is not None]
+        finally:
+            self._submitting = None
+            for ticket in tickets:
+                if ticket.order_id not in spread.orders:
+                    self._attach(spread, ticket.order_id, phase)
+            self._advance(spread)
+        return tickets
+
+    def _spread_for_event(self, order_event) -> Optional[SpreadPosition]:
+        """Spread an order event belongs to, claiming unknown orders for a spread being submitted."""
+        spread = self._spread_by_order.get(order_event.order_id)
+        if spread is None and self._submitting is not None:
+            spread, phase = self._submitting
+            self._attach(spread, order_event.order_id, phase)
+        return spread
+
+    def _advance(self, spread):
+        """
+        Move a spread on once the orders of its current phase are done.
+
+        Parameters:
+            spread: SpreadPosition an order event was booked against
+        """
+        if self._submitting is not None and self._submitting[0] is spread:
+            return
+
+        if spread.state == SpreadState.OPENING:
+            if spread.working_orders(SpreadPosition.ENTRY):
+                return
+            if spread.is_complete:
+                self._transition(spread, SpreadState.OPEN)
+                self._on_spread_opened(spread)
+            elif not spread.is_flat:
+                # Entry ended with only some legs filled - held legs are an open (unhedged) position
+                self._transition(spread, SpreadState.OPEN)
+                spread.initial_credit = spread.net_credit()  # What the filled legs actually brought in
+                spread.entry_time = self.algorithm.time
+                held = ", ".join(f"{symbol}: {quantity}" for symbol, quantity in spread.held.items())
+                self.algorithm.log(f"ENTRY INCOMPLETE - {self._label}Bull Put ${spread.short_strike}/${spread.long_strike} holds only {held}")
+            else:
+                self._transition(spread, SpreadState.CANCELED)
+                self.algorithm.log("Open order canceled")
+                return
+            # A close requested while the entry orders were canceling
+            if spread.close_reason is not None:
+                self._close_spread(spread, spread.close_reason)
+
+        elif spread.state == SpreadState.CLOSING:
+            if spread.working_orders(SpreadPosition.CLOSE):
+                return
+            if spread.is_flat:
+                self._transition(spread, SpreadState.CLOSED)
+                self._on_spread_closed(spread)
+            else:
+                # Close orders ended without flattening the spread - it can be closed again
+                self._transition(spread, SpreadState.OPEN)
+                if any(phase == SpreadPosition.CLOSE for phase in spread.orders.values()):
+                    self.algorithm.log("Close order canceled")
+
+        elif spread.state == SpreadState.OPEN and spread.is_flat:
+            # Legs settled at expiry (or exercised/assigned) without a close of ours
+            self._transition(spread, SpreadState.CLOSED)
+            if spread.close_reason is None:
+                spread.close_reason = "expired"
+                spread.close_time = self.algorithm.time
+            self._on_spread_closed(spread)
+
+    def _adopt_untracked_legs(self):
+        """
+        Track held legs no spread knows about (holdings from before a restart) as a recovered spread.
+
+        Returns:
+            SpreadPosition or None: The recovered spread (OPEN, credit unknown)
+        """
+        untracked = [leg for leg in self.positions.legs() if leg.symbol not in self._spread_by_leg]
+        if not untracked:
+            return None
+        short_leg = next((leg for leg in untracked if leg.quantity < 0), None)
+        long_leg = next((leg for leg in untracked if leg.quantity > 0), None)
+        reference = short_leg or long_leg
+        spread = self._new_spread(short_leg.symbol if short_leg else None, long_leg.symbol if long_leg else None,
+                                  short_leg.strike if short_leg else None, long_leg.strike if long_leg else None,
+                                  reference.expiry)
+        for leg in untracked:
+            spread.held[leg.symbol] = leg.quantity
+            self._spread_by_leg[leg.symbol] = spread
+        self._transition(spread, SpreadState.OPEN)
+        return spread
+
+    def _sync_spread_leg(self, symbol, held):
+        """Correct a spread's held quantity of a leg after the index was reconciled with the holdings."""
+        spread = self._spread_by_leg.get(symbol)
+        if spread is None:
+            return
+        if held == 0:
+            spread.held.pop(symbol, None)
+            del self._spread_by_leg[symbol]
+        else:
+            spread.held[symbol] = held
+        if spread.is_flat and spread.state != SpreadState.OPENING:
+            self._drop(spread)
+
     def reset_state(self):
         """
-        Reset the state flags and spread details based on current portfolio holdings.
+        Reconcile the spread states with the position index once per day.
         Should be called at the beginning of each trading day.
         """
         current_date = self.algorithm.time.date()
-        
+
         # Only reset once per day
         if self.last_reset_date == current_date:
             return
-            
-        self.algorithm.log("Performing daily state reset")
-        
+
+        self.algorithm.log(f"{self._label}Performing daily state reset")
+
+        # Holdings from before the algorithm started (e.g. a live restart) never produced a fill
+        # event, so the position index is seeded from the portfolio once
+        if not self._positions_seeded:
+            self.positions.rebuild(self.algorithm.portfolio)
+            self._positions_seeded = True
+
         # Check if we actually have any option positions
-        has_positions = False
-        for symbol, holding in self.algorithm.portfolio.items():
-            # Skip non-option holdings
-            if symbol.SecurityType != SecurityType.OPTION:
-                continue
-                
-            # We have at least one option position
-            if holding.invested or abs(holding.quantity) > 0:
-                has_positions = True
-                self.algorithm.log(f"Found existing position in {symbol}: {holding.quantity} shares")
-                break
-        
-        # Reset state flags if no positions actually exist
+        has_positions = self.positions.has_option_positions
+        if has_positions:
+            leg = self.positions.legs()[0]
+            self.algorithm.log(f"Found existing position in {leg.symbol}: {leg.quantity} shares")
+
+        # Drop spreads that think they hold legs if no positions actually exist
         if not has_positions:
-            if self.spread_is_open or self.pending_open or self.pending_close:
+            stale = self.spreads_in(SpreadState.OPEN, SpreadState.CLOSING)
+            if stale:
                 self.algorithm.log("Resetting state flags - no actual positions found")
-                self.spread_is_open = False
-                self.pending_open = False
-                self.pending_close = False
-                self._reset_spread_details()
+                for spread in stale:
+                    self._drop(spread)
         else:
-            # Positions exist, make sure our flags reflect this
-            if not self.spread_is_open and not self.pending_open and not self.pending_close:
+            # Positions exist, make sure every held leg belongs to a spread
+            if self._adopt_untracked_legs() is not None:
                 self.algorithm.log("Detected positions but flags were not set - correcting state")
-                self.spread_is_open = True
-        
+
         # Record that we reset state today
         self.last_reset_date = current_date
-    
-    def place_spread_order(self, spread, max_profit, max_loss, breakeven):
+
+    # ------------------------------------------------------------------
+    # Entry
+    # ------------------------------------------------------------------
+
+    def place_spread_order(self, candidate):
         """
-        Place a bull put credit spread order using leg-by-leg limit orders.
-        
+        Place a bull put credit spread order: one combo limit order for the net credit,
+        or leg-by-leg limit orders (ENTRY_LEGS mode, or when the combo is rejected).
+
         Parameters:
-            spread: The spread object (from OptionStrategies)
-            max_profit: Maximum profit for the spread
-            max_loss: Maximum loss for the spread
-            breakeven: Breakeven price for the spread
-            
+            candidate: SpreadCandidate from the SpreadSelector with leg symbols and quotes
+
         Returns:
             bool: True if order was placed, False otherwise
         """
         # Verify state is correct before placing order
         self.reset_state()
-        
-        if self.spread_is_open or self.pending_open:
-            self.algorithm.log("Cannot place order - position already open or pending")
+
+        if len(self.spreads) >= self.max_open_spreads:
+            self.algorithm.log(f"{self._label}Cannot place order - {len(self.spreads)} spread(s) already open or " +
+                               f"pending (max_open_spreads={self.max_open_spreads})")
             return False
-            
+
+        spread = None
         try:
-            # For a bull put spread, breakeven = short_strike - net_credit
-            net_credit = max_profit / 100.0  # Convert max_profit back to actual credit amount
-            short_strike = breakeven + net_credit
-            
-            # Calculate width from max loss and profit (width = (max_loss + max_profit) / 100)
-            width = (max_loss + max_profit) / 100.0
-            long_strike = short_strike - width
-            
-            # Store the strikes for later reference - these are the actual strikes used for the spread
-            # Get the expiry from today's date since we're doing 0 DTE
-            expiry = self.algorithm.time.date()
-            
-            # Create the option contract symbols using proper QuantConnect API methods
-            underlying_symbol = self.algorithm.Securities["SPY"].Symbol
-            
-            # Get option chain for today
-            option_chain = self.algorithm.option_chain(underlying_symbol)
-            
-            # Get option contracts from the chain by filtering for the right strike and expiry
-            # First find the option contracts that match our criteria
-            short_options = [x.symbol for x in option_chain 
-                           if x.right == OptionRight.PUT and abs(x.strike - short_strike) < 0.001 
-                           and x.expiry.date() == expiry]
-            
-            long_options = [x.symbol for x in option_chain 
-                          if x.right == OptionRight.PUT and abs(x.strike - long_strike) < 0.001 
-                          and x.expiry.date() == expiry]
-            
-            # Check if we found matching contracts
-            if not short_options or not long_options:
-                self.algorithm.log(f"Error: Could not find matching option contracts for strikes {short_strike}/{long_strike}")
-                return False
-                
-            short_option = short_options[0]
-            long_option = long_options[0]
-            
-            # Already calculated net_credit earlier, don't need to recalculate
-            
+            # The selector already resolved the legs - no chain lookup needed
+            short_option = candidate.short_symbol
+            long_option = candidate.long_symbol
+            short_strike = candidate.short_strike
+            long_strike = candidate.long_strike
+            width = candidate.width
+            net_credit = candidate.net_credit
+
+            # Store the expiry date for later reference (used when closing via OptionStrategies)
+            expiry = candidate.expiry.date()
+
             # Apply a small buffer to ensure we get filled (95% of theoretical credit)
             # This means we'll accept slightly less credit to improve fill probability
             target_net_credit = net_credit * 0.95
-            
+
             # Calculate order parameters - no logging here to reduce log volume
-            
+
             # Get current prices to inform our limit prices
             short_option_data = self.algorithm.securities[short_option]
             long_option_data = self.algorithm.securities[long_option]
-            
+
             # For a bull put spread, we sell the higher strike put and buy the lower strike put
-            # Determine reasonable price targets for each leg based on current bid/ask
-            short_bid = short_option_data.bid_price
-            long_ask = long_option_data.ask_price
-            
-            # Calculate target prices for each leg
-            # We'll accept a slightly lower price for our short option (selling)
-            # and pay a slightly higher price for our long option (buying)
-            # but ensure the total net credit meets our target
-            short_min_price = short_bid * 0.98  # Min price we'll accept for short leg (98% of bid)
-            long_max_price = short_min_price - target_net_credit  # Max price we'll pay for long leg
-            
-            # Ensure we're not paying more than ask for long leg
-            if long_max_price > long_ask * 1.02:
-                long_max_price = long_ask * 1.02  # Max 2% slippage on ask
-                short_min_price = long_max_price + target_net_credit  # Adjust short price to maintain net credit
-            
-            # Create and submit the limit orders
-            tag = f"TargetCredit:{target_net_credit}"
-            
-            # Placing leg-by-leg orders with consolidated logging
-            self.algorithm.log(f"TRADE ORDER: Bull Put Spread ${short_strike:.2f}/${long_strike:.2f}, Width=${width:.2f}, Target Credit=${target_net_credit:.2f} - Short: ${short_min_price:.2f}, Long: ${long_max_price:.2f}")
-            
-            # In QuantConnect Python API, we need to use the limit_order method
-            # The direction is specified as a negative quantity for selling and positive for buying
-            
-            # Sell the short put with a limit order (negative quantity = sell)
-            short_ticket = self.algorithm.limit_order(short_option, -1, short_min_price, tag)
-            
-            # Buy the long put with a limit order (positive quantity = buy)
-            long_ticket = self.algorithm.limit_order(long_option, 1, long_max_price, tag)
-            
-            # Store the tickets
-            tickets = [short_ticket, long_ticket]
+            # Use each leg's current bid/ask, falling back to the quotes the selection was
+            # based on if there is no live quote
+            short_bid = short_option_data.bid_price or candidate.short_bid
+            short_ask = short_option_data.ask_price or candidate.short_ask
+            long_bid = long_option_data.bid_price or candidate.long_bid
+            long_ask = long_option_data.ask_price or candidate.long_ask
+
+            # Leg orders start at each leg's mid - rung 0 of the working-order ladder, which
+            # then walks them out towards the touch bar by bar within the concession cap.
+            # Snapped to the option tick grid towards the market (sell down, buy up)
+            short_limit = self.contract_specs.round_price(short_option, (short_bid + short_ask) / 2,
+                                                          ContractSpecs.ROUND_DOWN)
+            long_limit = self.contract_specs.round_price(long_option, (long_bid + long_ask) / 2,
+                                                         ContractSpecs.ROUND_UP)
+
+            # The combo starts at its net mid (short mid - long mid), like the legs, so the ladder
+            # walks it out towards the natural credit within the concession cap. Rounded down onto
+            # the tick grid (towards the market); the target credit is the floor for crossed quotes
+            combo_mid = (short_bid + short_ask) / 2 - (long_bid + long_ask) / 2
+            combo_credit = self.contract_specs.round_price(short_option, combo_mid if combo_mid > 0 else target_net_credit,
+                                                           ContractSpecs.ROUND_DOWN)
+            # Sold as one unit of +1 short put / -1 long put, so the legs go out as sell short, buy long
+            combo_legs = [(short_option, 1), (long_option, -1)]
+
+            # Placing the entry with consolidated logging
+            if self.entry_mode == self.ENTRY_COMBO:
+                self.algorithm.log(f"TRADE ORDER: {self._label}Bull Put Spread ${short_strike:.2f}/${long_strike:.2f}, Width=${width:.2f}, Target Credit=${target_net_credit:.2f} - Combo limit: ${combo_credit:.2f} credit (net mid)")
+            else:
+                self.algorithm.log(f"TRADE ORDER: {self._label}Bull Put Spread ${short_strike:.2f}/${long_strike:.2f}, Width=${width:.2f}, Target Credit=${target_net_credit:.2f} - Short: ${short_limit:.2f}, Long: ${long_limit:.2f} (mid)")
+
+            # Track the spread before submitting - its order events are routed to it by order ID
+            spread = self._new_spread(short_option, long_option, short_strike, long_strike, expiry,
+                                      candidate.multiplier)
+            spread.initial_credit = target_net_credit
+            spread.max_profit = candidate.max_profit
+            spread.max_loss = candidate.max_loss
+            spread.breakeven = candidate.breakeven
+            # Tagged with the spread ID, so fills can be grouped by spread after the fact
+            tag = spread.order_tag(f"TargetCredit:{target_net_credit}")
+
+            combo_placed = []
+
+            def submit():
+                if self.entry_mode == self.ENTRY_COMBO:
+                    combo_tickets = self._place_combo_entry(combo_legs, combo_credit, tag)
+                    if combo_tickets:
+                        combo_placed.append(True)
+                        return combo_tickets
+                    self.algorithm.log(f"Combo entry rejected - falling back to leg-by-leg orders at mid - Short: ${short_limit:.2f}, Long: ${long_limit:.2f}")
+                # In QuantConnect Python API, we need to use the limit_order method
+                # The direction is specified as a negative quantity for selling and positive for buying
+                return [
+                    # Sell the short put with a limit order (negative quantity = sell)
+                    self.algorithm.limit_order(short_option, -1, short_limit, tag),
+                    # Buy the long put with a limit order (positive quantity = buy)
+                    self.algorithm.limit_order(long_option, 1, long_limit, tag),
+                ]
+
+            tickets = self._submit(spread, SpreadPosition.ENTRY, submit)
             self.order_tickets = tickets
-            
+
             if not tickets or len(tickets) == 0:
                 self.algorithm.log("Failed to place spread order - no order tickets returned")
                 return False
-            
-            # No detailed ticket logging to reduce log volume
-                
-            # Update tracking info
-            self.pending_open = True
-            self.current_spread_details['short_strike'] = short_strike
-            self.current_spread_details['long_strike'] = long_strike
-            self.current_spread_details['expiry'] = expiry
-            self.current_spread_details['initial_credit'] = target_net_credit
-            self.current_spread_details['max_profit'] = max_profit
-            self.current_spread_details['max_loss'] = max_loss
-            self.current_spread_details['breakeven'] = breakeven
-            
+
+            # Work the entry until it fills or times out
+            if combo_placed:
+                self.working_orders.track_combo(spread, target_net_credit, tickets, combo_credit, combo_legs)
+            else:
+                self.working_orders.track(spread, target_net_credit, tickets, [short_limit, long_limit])
+
             # No need for detailed spread logging here - will log on fill instead
             return True
-            
+
         except Exception as e:
             self.algorithm.error(f"Error placing spread order: {str(e)}")
-            self.pending_open = False
+            if spread is not None and spread.state == SpreadState.OPENING and not spread.working:
+                self._drop(spread)
             return False
-            
-    def check_stop_loss(self, option_chain):
+
+    def _place_combo_entry(self, legs, credit, tag):
+        """
+        Submit the entry as one combo limit order selling the spread for a net credit.
+
+        Parameters:
+            legs: (symbol, ratio) of each leg per unit of the combo
+            credit: Minimum net credit (the combo's limit price when sold)
+            tag: Order tag
+
+        Returns:
+            list: The leg tickets, or None if the combo was rejected
+        """
+        try:
+            tickets = self.algorithm.combo_limit_order([Leg.create(symbol, ratio) for symbol, ratio in legs],
+                                                       -1, credit, tag)
+        except Exception as e:
+            self.algorithm.error(f"Error placing combo order: {str(e)}")
+            return None
+        if not tickets or any(ticket.status == OrderStatus.INVALID for ticket in tickets):
+            return None
+        return list(tickets)
+
+    def _on_spread_opened(self, spread):
+        """Record the actual entry credit of a spread whose entry legs all filled."""
+        # Calculate the net credit received
+        net_credit = spread.net_credit()
+        spread.entry_time = self.algorithm.time
+
+        if net_credit > 0:
+            # Consolidated fill logging with single comprehensive entry
+            width = spread.width
+            multiplier = self.spread_multiplier(spread)
+            max_profit = net_credit * multiplier
+            max_loss = (width - net_credit) * multiplier
+            breakeven = spread.short_strike - net_credit
+
+            self.algorithm.log(f"TRADE FILLED: {self._label}Bull Put Spread ${spread.short_strike:.2f}/${spread.long_strike:.2f}, Width=${width:.2f}, Actual Credit=${net_credit:.2f}, Max P/L=${max_profit:.2f}/${max_loss:.2f}, Breakeven=${breakeven:.2f}")
+
+            # Update the position details with actual fill values
+            spread.initial_credit = net_credit
+            spread.max_profit = max_profit
+            spread.max_loss = max_loss
+            spread.breakeven = breakeven
+        else:
+            self.algorithm.log(f"Warning: Negative or zero net credit received: ${net_credit:.2f}")
+
+    # ------------------------------------------------------------------
+    # Risk checks (the RiskManager runs its own; kept for direct use)
+    # ------------------------------------------------------------------
+
+    def check_stop_loss(self, snapshot, spread=None):
         """
         Check if stop-loss threshold has been reached.
-        
+
         Parameters:
-            option_chain: Current option chain
-            
+            snapshot: ChainSnapshot of the current option chain
+            spread: SpreadPosition to check (default: the current spread)
+
         Returns:
             bool: True if stop-loss triggered, False otherwise
         """
-        if not self.spread_is_open or self.pending_close:
+        spread = spread or self.current_spread
+        if spread is None or spread.state != SpreadState.OPEN:
             return False
-            
+
         # Get current spread details
-        short_strike = self.current_spread_details['short_strike']
-        long_strike = self.current_spread_details['long_strike']
-        initial_credit = self.current_spread_details['initial_credit']
-        
+        initial_credit = spread.initial_credit
+
         if initial_credit is None:
             # This is an error condition, so always log it
             self.algorithm.log("Warning: initial_credit is None, cannot evaluate stop-loss")
             return False
-            
+
         # Calculate current debit to close
-        current_debit = self.calculate_current_spread_value(option_chain)
-        
+        current_debit = self.calculate_current_spread_value(snapshot, spread)
+
         if current_debit is None:
             # Error condition, so always log it
             self.algorithm.log("Cannot calculate current spread value for stop-loss check")
             return False
-            
+
         # Check stop-loss threshold (debit ≥ 2× credit)
         stop_loss_threshold = initial_credit * 2
-        
+
         if current_debit >= stop_loss_threshold:
             # Always log stop-loss triggers regardless of time interval
             self.algorithm.log(f"STOP-LOSS TRIGGERED: Current debit ${current_debit:.2f} ≥ 2× initial credit ${initial_credit:.2f}")
             # Close the position
-            return self.close_spread_position(reason="(stop-loss triggered)")
-            
+            return self.close_spread_position(reason="(stop-loss triggered)", spread=spread)
+
         return False
-    
-    def check_take_profit(self, option_chain):
+
+    def check_take_profit(self, snapshot, spread=None):
         """
         Check if take-profit threshold has been reached.
-        
+
         Parameters:
-            option_chain: Current option chain
-            
+            snapshot: ChainSnapshot of the current option chain
+            spread: SpreadPosition to check (default: the current spread)
+
         Returns:
             bool: True if take-profit triggered, False otherwise
         """
-        if not self.spread_is_open or self.pending_close:
+        spread = spread or self.current_spread
+        if spread is None or spread.state != SpreadState.OPEN:
             return False
-            
+
         # Get current spread details
-        initial_credit = self.current_spread_details['initial_credit']
-        max_profit = self.current_spread_details['max_profit']
-        
+        initial_credit = spread.initial_credit
+        max_profit = spread.max_profit
+
         if initial_credit is None or max_profit is None:
             # This is an error condition, so always log it
             self.algorithm.log("Warning: initial_credit or max_profit is None, cannot evaluate take-profit")
             return False
-            
+
         # Calculate current debit to close
-        current_debit = self.calculate_current_spread_value(option_chain)
-        
+        current_debit = self.calculate_current_spread_value(snapshot, spread)
+
         if current_debit is None:
             # Error condition, so always log it
             self.algorithm.log("Cannot calculate current spread value for take-profit check")
             return False
-            
+
         # Calculate current profit
-        current_profit = (initial_credit - current_debit) * 100  # Per contract
-        
+        current_profit = (initial_credit - current_debit) * self.spread_multiplier(spread)  # Per spread
+
         # Take-profit threshold (P/L ≥ 50% of maximum profit)
         take_profit_threshold = max_profit * 0.5
-        
+
         if current_profit >= take_profit_threshold:
             # Always log take-profit triggers regardless of time interval
             profit_percentage = (current_profit / max_profit) * 100
             self.algorithm.log(f"TAKE-PROFIT TRIGGERED: Current profit ${current_profit:.2f} is {profit_percentage:.1f}% of max profit ${max_profit:.2f}")
             # Close the position
-            return self.close_spread_position(reason="take-profit")
-            
+            return self.close_spread_position(reason="take-profit", spread=spread)
+
         return False
-    
-    def close_spread_position(self, reason=""):
+
+    # ------------------------------------------------------------------
+    # Close
+    # ------------------------------------------------------------------
+
+    def close_spread_position(self, reason="", spread=None):
         """
-        Close an open spread position using OptionStrategies.
-        Always tries to close the spread as a single unit first, with multiple fallback methods.
-        
+        Close open spread positions using OptionStrategies.
+        Always tries to close a spread as a single unit first, with multiple fallback methods.
+        A spread still opening has its working entry orders canceled first; whatever
+        legs filled are closed once the cancels are through.
+
         Parameters:
             reason: Description of why position is being closed
-            
+            spread: SpreadPosition to close (default: every OPENING or OPEN spread)
+
         Returns:
-            bool: True if close order was placed, False otherwise
+            bool: True if a close (or entry cancel) was initiated, False otherwise
         """
-        if not self.spread_is_open or self.pending_close:
+        candidates = [spread] if spread is not None else list(self.spreads.values())
+        # Skip spreads already closing and entries already being canceled for a close
+        targets = [target for target in candidates
+                   if target.state == SpreadState.OPEN or
+                   (target.state == SpreadState.OPENING and target.close_reason is None)]
+
+        if not targets:
             self.algorithm.log(f"Cannot close position - no open position or close already pending")
             return False
-            
+
+        initiated = False
+        for target in targets:
+            initiated = self._close_spread(target, reason) or initiated
+        return initiated
+
+    def _close_spread(self, spread, reason):
+        """
+        Close one spread: cancel its entry if still opening, else close its legs.
+
+        Parameters:
+            spread: SpreadPosition (OPENING or OPEN)
+            reason: Description of why position is being closed
+
+        Returns:
+            bool: True if close orders (or entry cancels) were placed, False otherwise
+        """
         # Store trade start time for duration calculation
-        self.current_spread_details['close_time'] = self.algorithm.time
-        self.current_spread_details['close_reason'] = reason
-            
+        spread.close_time = self.algorithm.time
+        spread.close_reason = reason
+
         # Format a clear POSITION CLOSE header with reason
-        self.algorithm.log(f"POSITION CLOSE - {reason or 'manual close'} initiated for Bull Put ${self.current_spread_details['short_strike']}/${self.current_spread_details['long_strike']}")
-            
+        self.algorithm.log(f"POSITION CLOSE - {reason or 'manual close'} initiated for {self._label}Bull Put ${spread.short_strike}/${spread.long_strike}")
+
+        if spread.state == SpreadState.OPENING:
+            # Cancel the working entry orders; _advance closes any filled legs once they're done
+            for order_id in spread.working_orders(SpreadPosition.ENTRY):
+                ticket = self.algorithm.transactions.get_order_ticket(order_id)
+                if ticket is not None:
+                    ticket.cancel("Spread close requested")
+            return True
+
         try:
-            # STRATEGY 1: Close using OptionStrategies with current spread details
-            if self._try_close_with_current_details(reason):
-                return True
-                
-            # STRATEGY 2: Try to identify the spread from actual holdings
-            if self._try_close_with_holdings(reason):
-                return True
-                
-            # STRATEGY 3: Last resort - close positions individually
-            self.algorithm.log("Could not close spread as a unit - falling back to individual orders")
-            return self.force_close_positions(reason)
-            
+            if spread.is_complete:
+                # STRATEGY 1: Close using OptionStrategies with current spread details
+                if self._try_close_with_current_details(reason, spread):
+                    return True
+
+                # STRATEGY 2: Try to identify the spread from actual holdings
+                if self._try_close_with_holdings(reason, spread):
+                    return True
+
+                # STRATEGY 3: Last resort - close positions individually
+                self.algorithm.log("Could not close spread as a unit - falling back to individual orders")
+            else:
+                # Closing a partially held spread as a unit would open its missing leg
+                self.algorithm.log("Spread holds only part of its legs - closing them individually")
+            return self.force_close_positions(reason, spread)
+
         except Exception as e:
             self.algorithm.error(f"Error closing spread position: {str(e)} - attempting force close")
-            return self.force_close_positions(reason)
-            
-    def _try_close_with_current_details(self, reason):
+            return self.force_close_positions(reason, spread)
+
+    def _try_close_with_current_details(self, reason, spread):
         """
-        Try to close the spread using current spread details and OptionStrategies.
-        
+        Try to close the spread using its stored details and OptionStrategies.
+
         Parameters:
             reason: Description of why position is being closed
-            
+            spread: SpreadPosition to close
+
         Returns:
             bool: True if close order was placed, False otherwise
         """
         # Validate that we have all required details
-        if (self.current_spread_details['short_strike'] is None or
-            self.current_spread_details['long_strike'] is None or
-            self.current_spread_details['expiry'] is None):
+        if spread.short_strike is None or spread.long_strike is None or spread.expiry is None:
             self.algorithm.log("Missing required spread details for closing")
             return False
-            
+
         # Create the spread object from current details - must use canonical option symbol
-        # We need to find the canonical option symbol from the option chain
-        canonical_option = None
-        option_chain = None
-        
-        # Try to get the option chain from the algorithm's universe builder
-        if hasattr(self.algorithm, 'universe_builder') and hasattr(self.algorithm, '_option_chain'):
-            # Just use the existing option chain that's already loaded by on_data
-            option_chain = self.algorithm._option_chain
-        
+        # Just use this underlying's chain snapshot that's already loaded by on_data
+        snapshot = self.universe.chain_snapshot if self.universe is not None else None
+
         # If we can't get the option chain, we can't create the right strategy object
-        if option_chain is None or len(list(option_chain)) == 0:
+        if snapshot is None or len(snapshot) == 0:
             self.algorithm.log("No option chain available for creating OptionStrategies object")
             return False
-        
+
         # Find the canonical option symbol from the chain
-        for contract in option_chain:
-            if contract is not None and contract.symbol is not None:
-                canonical_option = contract.symbol.canonical
-                break
-                
+        canonical_option = snapshot.canonical_symbol
+
         if canonical_option is None:
             self.algorithm.log("Could not find canonical option symbol for closing spread")
             return False
-            
+
         try:
             # Create the spread object - remember it needs canonical option symbol
-            spread = OptionStrategies.bull_put_spread(
+            strategy = OptionStrategies.bull_put_spread(
                 canonical_option,
-                self.current_spread_details['short_strike'],
-                self.current_spread_details['long_strike'],
-                self.current_spread_details['expiry']
+                spread.short_strike,
+                spread.long_strike,
+                spread.expiry
             )
-            
+
             self.algorithm.log(f"Closing bull put spread using stored details")
-            
+
             # Sell to close (reverse of buy)
-            tickets = self.algorithm.sell(spread, 1)
-            
+            self._transition(spread, SpreadState.CLOSING)
+            tickets = self._submit(spread, SpreadPosition.CLOSE, lambda: self.algorithm.sell(strategy, 1))
+
             if not tickets or len(tickets) == 0:
                 self.algorithm.log("Failed to place close order via stored details")
                 return False
-                
+
             self.order_tickets = tickets
-            self.pending_close = True
-            
+
             self.algorithm.log(f"Placed spread close order: {len(tickets)} tickets created")
             return True
-            
+
         except Exception as e:
             self.algorithm.error(f"Error closing with stored details: {str(e)}")
             return False
-            
-    def _try_close_with_holdings(self, reason):
+
+    def _try_close_with_holdings(self, reason, spread):
         """
-        Try to identify and close the spread by analyzing current holdings.
-        
+        Try to identify and close the spread from the legs it actually holds.
+
         Parameters:
             reason: Description of why position is being closed
-            
+            spread: SpreadPosition to close
+
         Returns:
             bool: True if close order was placed, False otherwise
         """
-        # Find our option positions
-        option_positions = []
-        for symbol, holding in self.algorithm.portfolio.items():
-            if symbol.SecurityType == SecurityType.OPTION and abs(holding.quantity) > 0:
-                option_positions.append((symbol, holding.quantity))
-                
+        # Find our option positions (the spread's legs in the position index)
+        option_positions = [leg for leg in (self.positions.get(symbol) for symbol in spread.held) if leg is not None]
+
         # We should have exactly 2 option positions for a spread
         if len(option_positions) != 2:
             self.algorithm.log(f"Expected 2 option positions, found {len(option_positions)}")
             return False
-            
+
         # Extract details from the existing positions
         try:
             # Get the canonical symbol from either position
             canonical_option = None
             short_position = None
             long_position = None
-            
+
             # Sort into short and long positions
-            for symbol, quantity in option_positions:
-                if quantity < 0:  # Short position
-                    short_position = (symbol, quantity)
+            for leg in option_positions:
+                if leg.quantity < 0:  # Short position
+                    short_position = leg
                 else:  # Long position
-                    long_position = (symbol, quantity)
-                    
+                    long_position = leg
+
                 # Extract canonical symbol
-                if canonical_option is None and symbol.canonical is not None:
-                    canonical_option = symbol.canonical
-                    
+                if canonical_option is None:
+                    canonical_option = leg.canonical
+
             # Verify we have both positions
             if short_position is None or long_position is None:
                 self.algorithm.log("Could not identify both short and long positions")
                 return False
-                
+
             # Extract strike prices
-            short_strike = short_position[0].strike
-            long_strike = long_position[0].strike
-            
+            short_strike = short_position.strike
+            long_strike = long_position.strike
+
             # Verify this is a put spread (both should be puts)
-            if short_position[0].right != OptionRight.PUT or long_position[0].right != OptionRight.PUT:
+            if short_position.right != OptionRight.PUT or long_position.right != OptionRight.PUT:
                 self.algorithm.log("Not a put spread - unexpected option types")
                 return False
-                
+
             # Get expiry (should be the same for both)
-            expiry = short_position[0].expiry.date()
-            
+            expiry = short_position.expiry
+
             # Verify they have the same expiry
-            if expiry != long_position[0].expiry.date():
+            if expiry != long_position.expiry:
                 self.algorithm.log("Legs have different expiration dates")
                 return False
-                
+
             # Verify we have a proper bull put spread (short strike > long strike)
             if short_strike <= long_strike:
                 self.algorithm.log(f"Not a bull put spread: short strike {short_strike} <= long strike {long_strike}")
                 return False
-                
+
             # Verify canonical_option is not None before creating the spread
             if canonical_option is None:
                 self.algorithm.log("Error: canonical_option is None, cannot create spread to close")
                 return False
-                
+
             # Create the spread strategy object
-            spread = OptionStrategies.bull_put_spread(
+            strategy = OptionStrategies.bull_put_spread(
                 canonical_option,
                 short_strike,
                 long_strike,
                 expiry
             )
-            
+
             # Sell to close (reverse of buy)
-            tickets = self.algorithm.sell(spread, 1)
-            
+            self._transition(spread, SpreadState.CLOSING)
+            tickets = self._submit(spread, SpreadPosition.CLOSE, lambda: self.algorithm.sell(strategy, 1))
+
             if not tickets or len(tickets) == 0:
                 self.algorithm.log("Failed to place close order via holdings analysis")
                 return False
-                
+
             self.order_tickets = tickets
-            self.pending_close = True
-            
+
             self.algorithm.log(f"Placed spread close order: {len(tickets)} tickets created")
             return True
-            
+
         except Exception as e:
             self.algorithm.error(f"Error closing with holdings analysis: {str(e)}")
             return False
-    
-    def force_close_positions(self, reason=""):
+
+    def force_close_positions(self, reason="", spread=None):
         """
-        Force close all option positions directly.
+        Force close option positions directly, one market order per leg.
         This is a last-resort method when all spread-based closure methods fail.
-        
+
         Parameters:
             reason: Description of why position is being closed
-            
+            spread: SpreadPosition whose legs to close (default: every held leg of this
+                    underlying, except those of spreads already closing)
+
         Returns:
             bool: True if liquidation orders were placed, False if no positions to close
         """
         self.algorithm.log(f"POSITION CLOSE - Last resort: Closing individual legs {reason or ''}")
-        
+
         # Verify we have positions to close
         has_positions = False
         liquidation_orders = []
-        
-        # Loop through all holdings and close option positions
-        for symbol, holding in self.algorithm.portfolio.items():
-            # Skip any non-option holdings or zero-quantity positions
-            if symbol.SecurityType != SecurityType.OPTION or abs(holding.quantity) == 0:
-                continue
-                
+
+        # Group the legs by the spread holding them, so each spread's orders are attached to it
+        if spread is not None:
+            legs = list(spread.held.items())
+        else:
+            legs = [(leg.symbol, leg.quantity) for leg in self.positions.legs()]
+        groups = {}
+        for symbol, quantity in legs:
+            owner = spread if spread is not None else self._spread_by_leg.get(symbol)
+            if owner is not None and spread is None:
+                if owner.state == SpreadState.CLOSING:
+                    has_positions = True
+                    continue  # Its close orders are already working
+                if owner.state == SpreadState.OPENING:
+                    # Cancel the rest of its entry first; its held legs are closed after that
+                    has_positions = True
+                    if owner.close_reason is None:
+                        self._close_spread(owner, reason)
+                    continue
+            groups.setdefault(owner, []).append((symbol, quantity))
+
+        # Loop through the open legs and close them
+        for owner, owner_legs in groups.items():
             has_positions = True
-            quantity = holding.quantity
-            
-            self.algorithm.log(f"Liquidating position: {symbol} x {quantity}")
-            
-            # Place liquidation order
-            if quantity > 0:
-                # Long position - Sell to close
-                order = self.algorithm.sell(symbol, abs(quantity))
+
+            def submit(owner_legs=owner_legs):
+                tickets = []
+                for symbol, quantity in owner_legs:
+                    self.algorithm.log(f"Liquidating position: {symbol} x {quantity}")
+                    # Place liquidation order
+                    if quantity > 0:
+                        # Long position - Sell to close
+                        tickets.append(self.algorithm.sell(symbol, abs(quantity)))
+                    else:
+                        # Short position - Buy to close
+                        tickets.append(self.algorithm.buy(symbol, abs(quantity)))
+                return tickets
+
+            if owner is not None and owner.state == SpreadState.OPEN:
+                owner.close_time = owner.close_time or self.algorithm.time
+                owner.close_reason = owner.close_reason or reason
+                self._transition(owner, SpreadState.CLOSING)
+                liquidation_orders.extend(self._submit(owner, SpreadPosition.CLOSE, submit))
             else:
-                # Short position - Buy to close
-                order = self.algorithm.buy(symbol, abs(quantity))
-                
-            if order is not None:
-                liquidation_orders.append(order)
-        
+                liquidation_orders.extend(ticket for ticket in submit() if ticket is not None)
+
         if not has_positions:
             self.algorithm.log("No positions found to force close - resetting state flags")
-            self.spread_is_open = False
-            self.pending_open = False
-            self.pending_close = False
-            self._reset_spread_details()
+            for stale in self.spreads_in(SpreadState.OPEN, SpreadState.CLOSING):
+                if spread is None or stale is spread:
+                    self._drop(stale)
             return False
-            
+
         if liquidation_orders:
             self.algorithm.log(f"Placed {len(liquidation_orders)} individual liquidation orders")
-            self.pending_close = True
             return True
         else:
             self.algorithm.log("No liquidation orders were created - force close failed")
             return False
-    
+
+    def _on_spread_closed(self, spread):
+        """Log the trade summary of a spread that is flat again."""
+        # Calculate the net debit paid to close
+        net_debit = spread.net_debit()
+
+        # Calculate profit or loss
+        initial_credit = spread.initial_credit
+        width = spread.width or 0
+
+        # Calculate trade duration if we have both open and close times
+        trade_duration = ""
+        start_time = spread.entry_time
+        close_time = spread.close_time
+        if start_time is not None and close_time is not None:
+            duration_minutes = int((close_time - start_time).total_seconds() / 60)
+            hours, minutes = divmod(duration_minutes, 60)
+            trade_duration = f"{hours}h {minutes}m"
+
+        # Generate comprehensive trade summary
+        if initial_credit is not None:
+            multiplier = self.spread_multiplier(spread)
+            profit_loss = (initial_credit - net_debit) * multiplier  # Per spread
+            profit_pct = profit_loss / (width * multiplier) * 100 if width > 0 else 0
+            reason = spread.close_reason or "manual"
+
+            # Format a structured TRADE SUMMARY log with all key metrics
+            self.algorithm.log(
+                f"TRADE SUMMARY - {self._label}Bull Put ${spread.short_strike}/{spread.long_strike}, Width=${width:.2f}\n" +
+                f"Entry: Credit=${initial_credit:.2f}, Exit: Debit=${net_debit:.2f}\n" +
+                f"P/L: ${profit_loss:.2f} ({profit_pct:.1f}%), Duration: {trade_duration}\n" +
+                f"Close reason: {reason}"
+            )
+        else:
+            self.algorithm.log(f"POSITION CLOSED - Net debit: ${net_debit:.2f}")
+
+    # ------------------------------------------------------------------
+    # Order events
+    # ------------------------------------------------------------------
+
     def on_order_event(self, order_event):
         """
         Handle order events to track position status.
-        
+
+        Each event is routed to the spread its order belongs to (an O(1) lookup by
+        order ID) and advances only that spread's state.
+
         Parameters:
             order_event: The OrderEvent
         """
         # Get information about the status
         order_status = order_event.status
         order_id = order_event.order_id
-        
+
         # Skip order event status logging to reduce verbosity
-        
+
+        # Keep the position index current - fill_quantity is the increment of this fill
+        if order_status in (OrderStatus.FILLED, OrderStatus.PARTIALLY_FILLED):
+            self.positions.apply_fill(order_event.symbol, order_event.fill_quantity)
+
         # Process based on status
         if order_status == OrderStatus.FILLED:
             self.on_order_filled(order_id, order_event.fill_price, order_event.fill_quantity, order_event)
@@ -579,397 +1002,309 @@ class OrderExecutor:
             self.on_order_invalid(order_event)
         # Add handlers for other statuses as needed
         elif order_status == OrderStatus.SUBMITTED:
-            # Skip order submitted logging
-            pass
+            # Attach the order to the spread being submitted - no logging
+            self._spread_for_event(order_event)
         elif order_status == OrderStatus.PARTIALLY_FILLED:
-            # Skip partial fill logging
-            pass
+            # Book the partial fill against its spread, skip logging
+            self._record_fill(order_event)
         elif order_status == OrderStatus.NONE:
             self.algorithm.log(f"Order status none: {order_id}")
+        elif order_status in (OrderStatus.UPDATE_SUBMITTED, OrderStatus.CANCEL_PENDING):
+            # Intermediate states - the final status follows
+            pass
         else:
             self.algorithm.log(f"Unhandled order status: {order_status} for order {order_id}")
-    
+
+        # Fill latency of working entry orders (after the spread booked the fill)
+        self.working_orders.on_order_event(order_event)
+
     def daily_state_verification(self):
         """
-        Perform verification of state flags against actual portfolio holdings.
+        Perform verification of the spread states against actual portfolio holdings.
         This should be called daily to ensure consistency.
         Returns True if positions exist, False otherwise.
         """
         self.reset_state()
-        
+
         # Additional verification specifically for EOD
         # This will help ensure we don't leave positions open overnight
-        has_positions = False
-        option_positions = []
-        
-        for symbol, holding in self.algorithm.portfolio.items():
-            if symbol.SecurityType == SecurityType.OPTION and abs(holding.quantity) > 0:
-                has_positions = True
-                option_positions.append(f"{symbol}: {holding.quantity} shares")
-        
+        # Cross-check the indexed legs against their holdings (a lookup per open leg, no scan)
+        for symbol, indexed, held in self.positions.reconcile(self.algorithm.portfolio):
+            self.algorithm.log(f"Position index corrected for {symbol}: {indexed} -> {held}")
+            self._sync_spread_leg(symbol, held)
+
+        option_positions = [f"{leg.symbol}: {leg.quantity} shares" for leg in self.positions.legs()]
+        has_positions = len(option_positions) > 0
+
         if has_positions:
             positions_str = ", ".join(option_positions)
             self.algorithm.log(f"EOD Verification found positions: {positions_str}")
-            # CRITICAL: Always set spread_is_open to True if positions exist, regardless of current flags
-            # This ensures we never miss closing a position due to flag inconsistency
-            if not self.spread_is_open:
-                self.algorithm.log("Setting spread_is_open flag to True based on actual portfolio holdings")
-            self.spread_is_open = True
+            # CRITICAL: Every held leg must belong to a spread, so no position is missed at the close
+            if self._adopt_untracked_legs() is not None:
+                self.algorithm.log("Tracking untracked legs as a spread based on actual portfolio holdings")
             return True  # Indicate positions exist
         else:
-            # No positions exist - make sure flags reflect this
-            if self.spread_is_open or self.pending_open or self.pending_close:
+            # No positions exist - make sure no spread claims to hold legs
+            stale = self.spreads_in(SpreadState.OPEN, SpreadState.CLOSING)
+            if stale:
                 self.algorithm.log("State flags incorrect - no positions found but flags indicated positions")
-                self.spread_is_open = False
-                self.pending_open = False
-                self.pending_close = False
-                self._reset_spread_details()
+                for spread in stale:
+                    self._drop(spread)
             return False  # Indicate no positions exist
-    
+
+    def _record_fill(self, order_event):
+        """
+        Book a (partial) fill against the spread its order belongs to.
+
+        Fills of orders no spread placed on a leg a spread holds (expiry settlements,
+        exercise/assignment) are booked as closing fills of that spread.
+
+        Returns:
+            SpreadPosition or None: The spread the fill was booked against
+        """
+        order_id = order_event.order_id
+        symbol = order_event.symbol
+        spread = self._spread_for_event(order_event)
+        if spread is None:
+            spread = self._spread_by_leg.get(symbol)
+            if spread is None:
+                return None
+            self._attach(spread, order_id, SpreadPosition.CLOSE, working=False)
+
+        spread.record_fill(order_id, symbol, order_event.fill_quantity, order_event.fill_price)
+        if symbol in spread.held:
+            self._spread_by_leg[symbol] = spread
+        elif self._spread_by_leg.get(symbol) is spread:
+            del self._spread_by_leg[symbol]
+        return spread
+
     def on_order_filled(self, order_id, fill_price, fill_quantity, order_event):
         """
         Handler for order filled events.
-        
+
+        Combo legs fill as one event per leg: each is booked against the spread,
+        which opens with the last leg of its entry (no working entry orders left).
+
         Parameters:
             order_id: The order id
             fill_price: The fill price
-            fill_quantity: The fill quantity 
+            fill_quantity: The fill quantity
             order_event: The order event
         """
-        order_ticket = self.algorithm.transactions.get_order_ticket(order_id)
-        # Get the actual order object to access properties that OrderEvent doesn't have
-        order = self.algorithm.transactions.get_order_by_id(order_id)
-        order_tag = order.tag if order is not None else "Unknown"
-        filled_asset = order_event.symbol
-        
-        # Add the order to active orders if not already there
-        if order_id not in self.active_spread_orders:
-            self.active_spread_orders[order_id] = {
-                'asset': filled_asset,
-                'quantity': fill_quantity,
-                'price': fill_price,
-                'tag': order_tag
-            }
-        
         # Skip detailed order logging to reduce log volume
-        
-        if self.pending_open:
-            # Check if all legs of the spread are filled
-            tickets_filled = all(ticket.status == OrderStatus.FILLED for ticket in self.order_tickets)
-            
-            if tickets_filled:
-                # All legs are filled
-                # Calculate the net credit received
-                net_credit = self._calculate_net_credit()
-                
-                if net_credit > 0:
-                    # Consolidated fill logging with single comprehensive entry
-                    short_strike = self.current_spread_details['short_strike']
-                    long_strike = self.current_spread_details['long_strike']
-                    width = short_strike - long_strike
-                    max_profit = net_credit * 100
-                    max_loss = (width - net_credit) * 100
-                    breakeven = short_strike - net_credit
-                    
-                    self.algorithm.log(f"TRADE FILLED: Bull Put Spread ${short_strike:.2f}/${long_strike:.2f}, Width=${width:.2f}, Actual Credit=${net_credit:.2f}, Max P/L=${max_profit:.2f}/${max_loss:.2f}, Breakeven=${breakeven:.2f}")
-                    
-                    self.spread_is_open = True
-                    self.pending_open = False
-                    
-                    # Update the position details with actual fill values
-                    self.current_spread_details['initial_credit'] = net_credit
-                    self.current_spread_details['entry_time'] = self.algorithm.time
-                else:
-                    self.algorithm.log(f"Warning: Negative or zero net credit received: ${net_credit:.2f}")
-                    
-        elif self.pending_close:
-            # Check if all closing orders are filled
-            tickets_filled = all(ticket.status == OrderStatus.FILLED for ticket in self.order_tickets)
-            
-            if tickets_filled:
-                # Calculate the net debit paid to close
-                net_debit = self._calculate_net_debit()
-                
-                # Calculate profit or loss
-                initial_credit = self.current_spread_details.get('initial_credit')
-                short_strike = self.current_spread_details.get('short_strike')
-                long_strike = self.current_spread_details.get('long_strike')
-                width = 0
-                if short_strike is not None and long_strike is not None:
-                    width = short_strike - long_strike
-                
-                # Calculate trade duration if we have both open and close times
-                trade_duration = ""
-                start_time = self.current_spread_details.get('entry_time')
-                close_time = self.current_spread_details.get('close_time')
-                if start_time is not None and close_time is not None:
-                    duration_minutes = int((close_time - start_time).total_seconds() / 60)
-                    hours, minutes = divmod(duration_minutes, 60)
-                    trade_duration = f"{hours}h {minutes}m"
-                
-                # Generate comprehensive trade summary
-                if initial_credit is not None:
-                    profit_loss = (initial_credit - net_debit) * 100  # Per contract
-                    profit_pct = profit_loss / (width * 100) * 100 if width > 0 else 0
-                    reason = self.current_spread_details.get('close_reason') or "manual"
-                    
-                    # Format a structured TRADE SUMMARY log with all key metrics
-                    self.algorithm.log(
-                        f"TRADE SUMMARY - Bull Put ${short_strike}/{long_strike}, Width=${width:.2f}\n" +
-                        f"Entry: Credit=${initial_credit:.2f}, Exit: Debit=${net_debit:.2f}\n" +
-                        f"P/L: ${profit_loss:.2f} ({profit_pct:.1f}%), Duration: {trade_duration}\n" +
-                        f"Close reason: {reason}"
-                    )
-                else:
-                    self.algorithm.log(f"POSITION CLOSED - Net debit: ${net_debit:.2f}")
-                
-                # Reset position flags
-                self.spread_is_open = False
-                self.pending_close = False
-                self.order_tickets = []
-                
-                # Clear active orders
-                self.active_spread_orders = {}
-                
-                # Reset position details
-                self._reset_spread_details()
-    
+        spread = self._record_fill(order_event)
+        if spread is None:
+            return
+
+        spread.order_done(order_id)
+        self._advance(spread)
+
     def on_order_canceled(self, order_event):
         """
         Process canceled order events.
-        
+
         Parameters:
             order_event: The OrderEvent from the cancellation
         """
         self.algorithm.log(f"Order {order_event.order_id} was canceled: {order_event.message}")
-        
-        # Reset the pending flags if all orders are canceled
-        if self._all_orders_done():
-            if self.pending_open:
-                self.pending_open = False
-                self.algorithm.log("Open order canceled")
-            elif self.pending_close:
-                self.pending_close = False
-                self.algorithm.log("Close order canceled")
-    
+
+        spread = self._spread_for_event(order_event)
+        if spread is not None:
+            spread.order_done(order_event.order_id)
+            self._advance(spread)
+
     def on_order_invalid(self, order_event):
         """
         Process invalid order events.
-        
+
         Parameters:
             order_event: The OrderEvent
         """
         self.algorithm.log(f"Order {order_event.order_id} is invalid: {order_event.message}")
-        
-        # Reset the pending flags if all orders are invalid
-        if self._all_orders_done():
-            if self.pending_open:
-                self.pending_open = False
-                self.algorithm.log("Open order invalid")
-            elif self.pending_close:
-                self.pending_close = False
-                self.algorithm.log("Close order invalid")
-    
-    def _all_orders_filled(self):
-        """Check if all orders in the current batch are filled."""
-        if not self.order_tickets:
-            return False
-            
-        return all(ticket.status == OrderStatus.FILLED for ticket in self.order_tickets)
-    
-    def _all_orders_done(self):
-        """Check if all orders in the current batch are in a terminal state."""
-        if not self.order_tickets:
-            return True
-            
-        terminal_states = [
-            OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.INVALID
-        ]
-        
-        return all(ticket.status in terminal_states for ticket in self.order_tickets)
-    
-    def _calculate_net_credit(self):
-        """
-        Calculate the net credit received from opening a spread.
-        
-        Returns:
-            float: Net credit amount
-        """
-        total_credit = 0.0
-        
-        # Loop through all active orders
-        for order_id, order_info in self.active_spread_orders.items():
-            quantity = order_info['quantity']
-            price = order_info['price']
-            
-            # Skip detailed fill logging
-            # Add to total - but negate it because credit spreads are sells
-            # For bull put spreads, we sell the short put (positive) and buy the long put (negative)
-            total_credit -= quantity * price
-            
-        return total_credit
-    
-    def _calculate_net_debit(self):
-        """
-        Calculate the net debit paid when closing a spread.
-        
-        Returns:
-            float: Net debit amount
-        """
-        total_debit = 0.0
-        
-        # Loop through all active orders
-        for order_id, order_info in self.active_spread_orders.items():
-            quantity = order_info['quantity']
-            price = order_info['price']
-            
-            # Skip detailed close fill logging - remove verbosity
-            
-            # Add to total - but negate it because when closing a credit spread,
-            # we're buying back the short put (negative) and selling the long put (positive)
-            total_debit += quantity * price
-            
-        return total_debit
-    
-    def should_log_monitoring_data(self):
-        """
-        Determine if we should log monitoring data based on time interval.
-        Only logs once per hour to reduce log volume.
-        
-        Returns:
-            bool: True if we should log, False otherwise
-        """
-        current_time = self.algorithm.time
-        
-        # Always log in these cases
-        if self.last_monitoring_log_time is None:
-            self.last_monitoring_log_time = current_time
-            return True
-            
-        # Log if it's been at least an hour since the last log
-        time_diff = current_time - self.last_monitoring_log_time
-        if time_diff.total_seconds() >= 3600:  # 3600 seconds = 1 hour
-            self.last_monitoring_log_time = current_time
-            return True
-            
-        # Also log if P&L changes significantly (can add this later if needed)
-        
-        # Default case - don't log
-        return False
-        
-    def calculate_current_spread_value(self, option_chain):
+
+        spread = self._spread_for_event(order_event)
+        if spread is not None:
+            spread.order_done(order_event.order_id)
+            self._advance(spread)
+
+    # ------------------------------------------------------------------
+    # Valuation
+    # ------------------------------------------------------------------
+
+    def calculate_current_spread_value(self, snapshot=None, spread=None):
         """
         Calculate the current value to close an existing spread.
-        
+
+        With the leg symbols known, the debit comes from the live quotes of the two
+        held leg symbols in algorithm.securities, so each bar only touches two securities.
+        Otherwise the strikes are looked up in the chain snapshot.
+
         Parameters:
-            option_chain: Current option chain
-            
+            snapshot: ChainSnapshot of the current option chain (optional once legs are known)
+            spread: SpreadPosition to value (default: the current spread)
+
         Returns:
             float: Current debit to close, or None if can't be calculated
         """
-        if not option_chain or len(list(option_chain)) == 0:
+        spread = spread or self.current_spread
+        if spread is None:
             return None
-            
+
         # Get today's date
         today = self.algorithm.time.date()
-        
+
         # Get our position details
-        short_strike = self.current_spread_details['short_strike']
-        long_strike = self.current_spread_details['long_strike']
-        initial_credit = self.current_spread_details['initial_credit']
-        
+        short_strike = spread.short_strike
+        long_strike = spread.long_strike
+        initial_credit = spread.initial_credit
+
+        if spread.short_symbol is not None and spread.long_symbol is not None:
+            current_debit = self._calculate_live_spread_debit(spread.short_symbol, spread.long_symbol)
+        else:
+            current_debit = self._calculate_snapshot_spread_debit(snapshot, short_strike, long_strike, today)
+
+        if current_debit is None:
+            return None
+
+        # Consolidated position update - the POSITION UPDATE category is rate limited to
+        # once per hour, so the message is only built when it will actually be emitted
+        if initial_credit is not None and initial_credit > 0:
+            self.log(lambda: self._format_position_update(spread, current_debit), category="POSITION UPDATE")
+
+        return current_debit
+
+    def _format_position_update(self, spread, current_debit):
+        """
+        Build the hourly POSITION UPDATE message.
+
+        Returns:
+            str: The formatted message
+        """
+        initial_credit = spread.initial_credit
+        profit_percentage = (initial_credit - current_debit) / initial_credit
+        profit_dollars = (initial_credit - current_debit) * self.spread_multiplier(spread)  # Per spread
+
+        # Calculate monitoring hour (assuming 9:30 market open)
+        today = self.algorithm.time.date()
+        market_open = datetime.datetime.combine(today, datetime.time(9, 30))
+        # Convert to algorithm timezone
+        market_open = market_open.replace(tzinfo=self.algorithm.time.tzinfo)
+        hours_since_open = max(1, int((self.algorithm.time - market_open).total_seconds() / 3600) + 1)
+
+        return (f"POSITION UPDATE - Hour {hours_since_open} - {self._label}Bull Put ${spread.short_strike}/${spread.long_strike}: " +
+                f"Debit to close=${current_debit:.2f}, P/L=${profit_dollars:.2f} ({profit_percentage:.1%})")
+
+    def _calculate_live_spread_debit(self, short_symbol, long_symbol):
+        """
+        Calculate the debit to close from the held legs' current quotes.
+
+        Parameters:
+            short_symbol: Symbol of the short put leg
+            long_symbol: Symbol of the long put leg
+
+        Returns:
+            float: Current debit to close, or None if either leg has no quote yet
+        """
+        securities = self.algorithm.securities
+        if short_symbol not in securities or long_symbol not in securities:
+            return None
+
+        short_ask = securities[short_symbol].ask_price
+        long_bid = securities[long_symbol].bid_price
+
+        # No ask on the short leg means we have no usable quote this bar
+        if short_ask <= 0:
+            return None
+
+        # Calculate debit to close (buy back short, sell long)
+        # Using conservative prices (ask for short, bid for long)
+        return short_ask - long_bid
+
+    def _calculate_snapshot_spread_debit(self, snapshot, short_strike, long_strike, today):
+        """
+        Calculate the debit to close by looking the strikes up in a chain snapshot.
+
+        Parameters:
+            snapshot: ChainSnapshot of the current option chain
+            short_strike: Strike price of the short put
+            long_strike: Strike price of the long put
+            today: Expiration date of the spread
+
+        Returns:
+            float: Current debit to close, or None if it can't be calculated
+        """
+        if snapshot is None or len(snapshot) == 0:
+            return None
+
         if short_strike is None or long_strike is None:
-            if self.should_log_monitoring_data():
-                self.algorithm.log(f"Missing strike prices: short={short_strike}, long={long_strike}")
+            self.log("Missing strike prices: short=%s, long=%s", short_strike, long_strike, category="POSITION UPDATE")
             return None
-        
-        should_log = self.should_log_monitoring_data()
-        
-        # Find the current prices for our strikes
-        put_contracts = [contract for contract in option_chain 
-                        if contract.right == OptionRight.PUT 
-                        and contract.expiry.date() == today]
-        
-        if not put_contracts:
-            if should_log:
-                self.algorithm.log(f"POSITION UPDATE - No put contracts found for today's expiration ({today})")
+
+        if len(snapshot.indices(ChainSnapshot.RIGHT_PUT, today)) == 0:
+            self.log("POSITION UPDATE - No put contracts found for today's expiration (%s)", today)
             return None
-        
+
         # Find the specific contracts that match our spread
-        short_put = next((c for c in put_contracts if abs(c.strike - short_strike) < 0.001), None)
-        long_put = next((c for c in put_contracts if abs(c.strike - long_strike) < 0.001), None)
-        
-        if short_put is None or long_put is None:
-            if should_log:
-                self.algorithm.log(f"POSITION UPDATE - Could not find contracts for ${short_strike}/${long_strike} spread")
+        short_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, short_strike)
+        long_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, long_strike)
+
+        if short_row is None or long_row is None:
+            self.log("POSITION UPDATE - Could not find contracts for $%s/$%s spread", short_strike, long_strike)
             return None
-            
+
         # Calculate debit to close (buy back short, sell long)
         # Using conservative prices (ask for short, bid for long)
-        current_debit = short_put.AskPrice - long_put.BidPrice
-        
-        # Calculate profit percentage and log consolidated position update
-        if initial_credit > 0 and should_log:
-            profit_percentage = (initial_credit - current_debit) / initial_credit
-            profit_dollars = (initial_credit - current_debit) * 100  # Per contract
-            
-            # Calculate monitoring hour (assuming 9:30 market open)
-            market_open = datetime.datetime.combine(today, datetime.time(9, 30))
-            # Convert to algorithm timezone
-            market_open = market_open.replace(tzinfo=self.algorithm.time.tzinfo)
-            hours_since_open = max(1, int((self.algorithm.time - market_open).total_seconds() / 3600) + 1)
-            
-            # Log consolidated position update
-            self.algorithm.log(f"POSITION UPDATE - Hour {hours_since_open} - Bull Put ${short_strike}/${long_strike}: " +
-                              f"Debit to close=${current_debit:.2f}, P/L=${profit_dollars:.2f} ({profit_percentage:.1%})")
-        
-        return current_debit
-    
-    def _log_active_spread(self):
-        """Log the details of the active spread."""
-        details = self.current_spread_details
-        
+        return float(snapshot.ask[short_row] - snapshot.bid[long_row])
+
+    def _log_active_spread(self, spread=None):
+        """Log the details of an active spread (default: the current spread)."""
+        spread = spread or self.current_spread
+        if spread is None:
+            return
+
         # Calculate width from short strike and long strike
-        width = None
-        if details['short_strike'] is not None and details['long_strike'] is not None:
-            width = details['short_strike'] - details['long_strike']
-        
+        width = spread.width
+
         # Build the log message
         log_message = f"Active Bull Put Spread - "
-        
-        if details['short_strike'] is not None:
-            log_message += f"Short=${details['short_strike']:.2f}, "
-        
-        if details['long_strike'] is not None:
-            log_message += f"Long=${details['long_strike']:.2f}, "
-        
+
+        if spread.short_strike is not None:
+            log_message += f"Short=${spread.short_strike:.2f}, "
+
+        if spread.long_strike is not None:
+            log_message += f"Long=${spread.long_strike:.2f}, "
+
         if width is not None:
             log_message += f"Width=${width:.2f}, "
-        
-        if details['max_profit'] is not None:
-            log_message += f"Max Profit=${details['max_profit']:.2f}, "
-        
-        if details['max_loss'] is not None:
-            log_message += f"Max Loss=${details['max_loss']:.2f}, "
-        
-        if details['breakeven'] is not None:
-            log_message += f"Breakeven=${details['breakeven']:.2f}"
-        
-        if details['initial_credit'] is not None:
-            log_message += f", Initial Credit=${details['initial_credit']:.2f}"
-        
+
+        if spread.max_profit is not None:
+            log_message += f"Max Profit=${spread.max_profit:.2f}, "
+
+        if spread.max_loss is not None:
+            log_message += f"Max Loss=${spread.max_loss:.2f}, "
+
+        if spread.breakeven is not None:
+            log_message += f"Breakeven=${spread.breakeven:.2f}"
+
+        if spread.initial_credit is not None:
+            log_message += f", Initial Credit=${spread.initial_credit:.2f}"
+
         self.algorithm.log(log_message)
-    
-    def _reset_spread_details(self):
-        """Reset the current spread details."""
-        self.current_spread_details = {
-            'symbol': None,
-            'short_strike': None,
-            'long_strike': None,
-            'expiry': None,
-            'width': None,
-            'initial_credit': None,
-            'max_profit': None,
-            'max_loss': None,
-            'breakeven': None
-        }
+
+    def spread_multiplier(self, spread=None) -> float:
+        """
+        Contract multiplier of a spread's legs.
+
+        Parameters:
+            spread: SpreadPosition (default: the current spread)
+
+        Returns:
+            float: Multiplier recorded at order placement, else looked up from the legs or the option universe
+        """
+        spread = spread or self.current_spread
+        if spread is not None and spread.multiplier is not None:
+            return spread.multiplier
+        short_symbol = spread.short_symbol if spread is not None else None
+        if short_symbol is None:
+            short_symbol = self.universe.option_symbol if self.universe is not None else self.algorithm.option_symbol
+        return self.contract_specs.multiplier(short_symbol)
@@ -0,0 +1,162 @@
+from AlgorithmImports import *
+import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+class OptionLeg:
+    """
+    An open option position held by one OrderExecutor.
+
+    The contract details are read from the symbol once, when the leg opens, so
+    queries never touch the Symbol (or the portfolio) again.
+    """
+
+    __slots__ = ("symbol", "canonical", "expiry", "strike", "right", "quantity")
+
+    def __init__(self, symbol: Symbol, quantity: float):
+        self.symbol = symbol
+        self.canonical = symbol.canonical
+        self.expiry = symbol.id.date.date()
+        self.strike = float(symbol.id.strike_price)
+        self.right = symbol.id.option_right
+        self.quantity = quantity
+
+    @property
+    def key(self) -> Tuple:
+        """(canonical symbol, expiry, strike, right) lookup key"""
+        return (self.canonical, self.expiry, self.strike, self.right)
+
+
+class PositionIndex:
+    """
+    Open option legs of one underlying, kept up to date from fill events.
+
+    OrderExecutor.on_order_event applies every fill, so position checks are dict
+    lookups instead of scans over algorithm.portfolio (which grows with every
+    underlying and equity holding we add). Legs are indexed by symbol and by
+    (canonical symbol, expiry, strike, right); the underlying's own quantity
+    (e.g. shares delivered by an assignment) is tracked alongside.
+
+    The index only knows about fills it was shown: rebuild() seeds it from the
+    portfolio once (holdings that predate the algorithm, e.g. a live restart)
+    and reconcile() re-checks the indexed legs against their holdings.
+    """
+
+    def __init__(self, is_option: Callable[[Symbol], bool], underlying_symbol: Optional[Symbol] = None):
+        """
+        Initialize an empty index.
+
+        Parameters:
+            is_option: Predicate for the option contracts this index holds (the shard's options)
+            underlying_symbol: The shard's underlying, whose quantity is tracked (None: not tracked)
+        """
+        self._is_option = is_option
+        self._underlying_symbol = underlying_symbol
+        self._legs: Dict[Symbol, OptionLeg] = {}         # Symbol -> open leg
+        self._by_key: Dict[Tuple, OptionLeg] = {}        # (canonical, expiry, strike, right) -> open leg
+        self.underlying_quantity = 0                     # Shares/units of the underlying held
+
+    def __len__(self) -> int:
+        """Number of open option legs"""
+        return len(self._legs)
+
+    def __contains__(self, symbol: Symbol) -> bool:
+        return symbol in self._legs
+
+    @property
+    def has_option_positions(self) -> bool:
+        """Whether any option leg is open"""
+        return bool(self._legs)
+
+    @property
+    def has_positions(self) -> bool:
+        """Whether any option leg or underlying quantity is open"""
+        return bool(self._legs) or self.underlying_quantity != 0
+
+    def legs(self) -> List[OptionLeg]:
+        """Open option legs (a copy, safe to iterate while orders are placed)"""
+        return list(self._legs.values())
+
+    def get(self, symbol: Symbol) -> Optional[OptionLeg]:
+        """Open leg of a contract (None if not held)"""
+        return self._legs.get(symbol)
+
+    def quantity(self, symbol: Symbol) -> float:
+        """Held quantity of a contract (0 if not held)"""
+        leg = self._legs.get(symbol)
+        return leg.quantity if leg is not None else 0
+
+    def find(self, canonical: Symbol, expiry: datetime.date, strike: float,
+             right=OptionRight.PUT) -> Optional[OptionLeg]:
+        """
+        Open leg with the given contract details.
+
+        Returns:
+            OptionLeg or None if no such leg is held
+        """
+        return self._by_key.get((canonical, expiry, float(strike), right))
+
+    def apply_fill(self, symbol: Symbol, fill_quantity: float) -> None:
+        """
+        Apply a fill (signed quantity) to the index.
+
+        Parameters:
+            symbol: Filled symbol (option contract or the underlying)
+            fill_quantity: Signed fill quantity (negative for sells)
+        """
+        if not fill_quantity:
+            return
+        if not self._is_option(symbol):
+            # Underlying fills (assignment/exercise deliveries, hedges) - quantity only
+            if symbol == self._underlying_symbol:
+                self.underlying_quantity += fill_quantity
+            return
+        leg = self._legs.get(symbol)
+        self._set(symbol, (leg.quantity if leg is not None else 0) + fill_quantity)
+
+    def _set(self, symbol: Symbol, quantity: float) -> None:
+        """Set a contract's held quantity, opening or removing its leg"""
+        leg = self._legs.get(symbol)
+        if quantity == 0:
+            if leg is not None:
+                del self._legs[symbol]
+                del self._by_key[leg.key]
+        elif leg is not None:
+            leg.quantity = quantity
+        else:
+            leg = OptionLeg(symbol, quantity)
+            self._legs[symbol] = leg
+            self._by_key[leg.key] = leg
+
+    def rebuild(self, portfolio) -> None:
+        """
+        Re-seed the index from the portfolio (one full scan).
+
+        Parameters:
+            portfolio: algorithm.portfolio
+        """
+        self._legs.clear()
+        self._by_key.clear()
+        self.underlying_quantity = 0
+        for symbol, holding in portfolio.items():
+            if holding.quantity != 0:
+                self.apply_fill(symbol, holding.quantity)
+
+    def reconcile(self, portfolio) -> List[Tuple[Symbol, float, float]]:
+        """
+        Check the indexed legs against their portfolio holdings and correct any drift.
+
+        Only the indexed symbols are looked up, so this is O(open legs).
+
+        Parameters:
+            portfolio: algorithm.portfolio
+
+        Returns:
+            list: (symbol, indexed quantity, held quantity) for every corrected leg
+        """
+        corrections = []
+        for leg in self.legs():
+            held = portfolio[leg.symbol].quantity
+            if held != leg.quantity:
+                corrections.append((leg.symbol, leg.quantity, held))
+                self._set(leg.symbol, held)
+        return corrections
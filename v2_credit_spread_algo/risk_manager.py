@@ -1,5 +1,6 @@
 from AlgorithmImports import *
 import datetime
+from spread_position import SpreadState
 
 class RiskManager:
     """
@@ -20,6 +21,8 @@ class RiskManager:
         """
         self.algorithm = algorithm
         self.order_executor = order_executor
+        universe = order_executor.universe
+        self._label = f"{universe.ticker} " if universe is not None else ""  # Ticker prefix for risk logs
         
         # Risk management parameters from strategy spec
         self.stop_loss_multiple = 2.0      # Close when debit ≥ 2× initial credit
@@ -29,59 +32,208 @@ class RiskManager:
         # Risk monitoring state
         self.last_check_time = None
         self.max_drawdown = 0
-        self.daily_loss_limit_pct = 0.05   # 5% portfolio limit (configurable)
+        
+        # Incremental P/L statistics of this underlying, kept from its own fills and leg marks
+        # (never a portfolio scan). Equity = portfolio value at the start + this underlying's P/L.
+        # The loss limits are enforced on the sum over all underlyings by PortfolioRiskManager
+        self.starting_equity = None        # Portfolio value when the statistics started
+        self.day_start_equity = None       # Equity at the start of the current day
+        self.peak_equity = None            # Highest equity seen
+        self.equity = None                 # Current equity (fills + marks)
+        self.daily_pnl = 0.0               # Equity change since the start of the day
+        self.drawdown = 0.0                # Current drawdown from peak equity (fraction)
+        self.stats_date = None             # Day the daily statistics belong to
+        self._cash_flow = 0.0              # Net premium received (+) / paid (-) by all fills, less fees
+        self._held_legs = {}               # Symbol -> [quantity, multiplier, marked value]
+        self._open_value = 0.0             # Marked value of the held legs (sum of the leg values)
+        self._stats_changed = False        # A fill arrived since the last update
+        
+        # Kill switch, tripped by PortfolioRiskManager when a portfolio loss limit is hit:
+        # blocks new trades and closes the open spread until resume() (next day, daily limit only)
+        self.trading_halted = False
+        self.halt_reason = None
+        self._halt_is_permanent = False
+        
+        # Stop-loss triggers precomputed at fill time, per spread ID: (spread, short_symbol, long_symbol, stop_debit).
+        # A spread's debit is only re-evaluated on bars where one of its two legs is re-quoted
+        self._stop_triggers = {}
+        self._last_quotes = {}             # Spread ID -> (short ask, long bid) of the last evaluation
         
         self.algorithm.log("RISK MANAGER - Initialized with stop-loss multiple: " + 
                          f"{self.stop_loss_multiple}x, take-profit %: {self.take_profit_pct*100}%")
     
-    def monitor_positions(self, option_chain):
+    def monitor_positions(self, snapshot, slice=None):
         """
         Monitor all open positions and enforce risk parameters.
         
+        Once a spread is filled its stop-loss is an armed trigger on its two leg
+        symbols, checked only on bars where slice.quote_bars re-quotes one of them.
+        
         Parameters:
-            option_chain: Current option chain
+            snapshot: ChainSnapshot of the current option chain, only used until
+                      a spread's leg symbols are known (may be None)
+            slice: The current Slice (optional - without it every bar is checked)
             
         Returns:
             bool: True if any risk action was taken, False otherwise
         """
+        # Spreads holding legs with no close working
+        open_spreads = self.order_executor.spreads_in(SpreadState.OPEN)
+        
         # No active positions to monitor
-        if not self.order_executor.spread_is_open:
+        if not open_spreads:
+            if self._stop_triggers:
+                self.disarm_stop_loss()
             return False
         
         # Initialize check time if not set
         if self.last_check_time is None:
             self.last_check_time = self.algorithm.time
         
-        # Check stop-loss condition (our priority)
-        if self._check_stop_loss(option_chain):
-            return True
+        acted = False
+        for spread in open_spreads:
+            # Half a spread has no spread debit to stop on - it is closed at the end of the day
+            if spread.short_symbol is not None and not spread.is_complete:
+                continue
+            
+            # Arm the trigger if the fill event hasn't done it yet (e.g. state recovered from holdings)
+            trigger = self._stop_triggers.get(spread.spread_id)
+            if trigger is None:
+                self.arm_stop_loss(spread)
+                trigger = self._stop_triggers.get(spread.spread_id)
+            
+            # Check stop-loss condition (our priority)
+            if trigger is None or slice is None:
+                # Leg symbols or credit unknown - value the spread from the chain every bar
+                acted = self._check_stop_loss(snapshot, spread) or acted
+            else:
+                acted = self._check_stop_trigger(trigger, slice) or acted
         
         # We'll implement other risk checks in future updates
+        return acted
+    
+    def arm_stop_loss(self, spread):
+        """
+        Precompute the stop-loss trigger of an open spread from its fill.
+        
+        Parameters:
+            spread: SpreadPosition to arm
+        
+        Returns:
+            bool: True if the trigger is armed, False if the legs or credit aren't known yet
+        """
+        initial_credit = spread.initial_credit
+        
+        if spread.state != SpreadState.OPEN or not spread.is_complete or initial_credit is None or \
+                spread.short_symbol is None or spread.long_symbol is None:
+            self.disarm_stop_loss(spread)
+            return False
+        
+        # Close once the debit to close (short ask - long bid) reaches the stop-loss multiple
+        self._stop_triggers[spread.spread_id] = (spread, spread.short_symbol, spread.long_symbol,
+                                                 initial_credit * self.stop_loss_multiple)
+        self._last_quotes.pop(spread.spread_id, None)
+        return True
+    
+    def disarm_stop_loss(self, spread=None):
+        """
+        Drop a spread's stop-loss trigger (no longer open).
+        
+        Parameters:
+            spread: SpreadPosition to disarm (default: all)
+        """
+        if spread is None:
+            self._stop_triggers.clear()
+            self._last_quotes.clear()
+        else:
+            self._stop_triggers.pop(spread.spread_id, None)
+            self._last_quotes.pop(spread.spread_id, None)
+    
+    def on_order_event(self, order_event):
+        """
+        Record a fill in the P/L statistics, arm the stop-loss trigger of a spread
+        whose entry filled and drop the triggers of spreads closing or closed.
+        Called after the order executor has processed the event.
+        
+        Parameters:
+            order_event: The OrderEvent
+        """
+        if order_event.status != OrderStatus.FILLED:
+            return
+        self._record_fill(order_event)
+        
+        # Drop triggers of spreads that are no longer open
+        for spread, _, _, _ in list(self._stop_triggers.values()):
+            if spread.state != SpreadState.OPEN:
+                self.disarm_stop_loss(spread)
+        
+        # Arm the spread this fill completed (a lookup by order ID)
+        spread = self.order_executor.spread_for_order(order_event.order_id)
+        if spread is not None and spread.state == SpreadState.OPEN:
+            self.arm_stop_loss(spread)
+    
+    def _check_stop_trigger(self, trigger, slice):
+        """
+        Evaluate an armed stop-loss trigger if this slice re-quotes one of its legs.
+        
+        Parameters:
+            trigger: (spread, short_symbol, long_symbol, stop_debit) from arm_stop_loss
+            slice: The current Slice
+            
+        Returns:
+            bool: True if stop-loss triggered, False otherwise
+        """
+        spread, short_symbol, long_symbol, stop_debit = trigger
+        
+        # Quiet minute for both legs - nothing can have crossed the threshold
+        quote_bars = slice.quote_bars
+        if short_symbol not in quote_bars and long_symbol not in quote_bars:
+            return False
+        
+        if spread.state != SpreadState.OPEN:
+            return False
+        
+        # The leg that wasn't re-quoted keeps its last quote in algorithm.securities
+        securities = self.algorithm.securities
+        quotes = (securities[short_symbol].ask_price, securities[long_symbol].bid_price)
+        if quotes == self._last_quotes.get(spread.spread_id):
+            return False
+        
+        current_debit = self.order_executor.calculate_current_spread_value(spread=spread)
+        if current_debit is None:
+            return False
+        
+        if current_debit >= stop_debit and self._trigger_stop_loss(current_debit, spread):
+            return True
+        
+        # A failed close is retried on the next quote, even an unchanged one
+        self._last_quotes[spread.spread_id] = quotes
         return False
     
-    def _check_stop_loss(self, option_chain):
+    def _check_stop_loss(self, snapshot, spread):
         """
         Check if stop-loss threshold has been reached.
         Closes position when debit to close ≥ 2× initial credit.
         
         Parameters:
-            option_chain: Current option chain
+            snapshot: ChainSnapshot of the current option chain
+            spread: SpreadPosition to check
             
         Returns:
             bool: True if stop-loss triggered, False otherwise
         """
-        if not self.order_executor.spread_is_open or self.order_executor.pending_close:
+        if spread.state != SpreadState.OPEN:
             return False
             
         # Get current spread details
-        initial_credit = self.order_executor.current_spread_details.get('initial_credit')
+        initial_credit = spread.initial_credit
         
         if initial_credit is None:
             # Skip check if we don't have initial credit information
             return False
             
         # Calculate current debit to close
-        current_debit = self.order_executor.calculate_current_spread_value(option_chain)
+        current_debit = self.order_executor.calculate_current_spread_value(snapshot, spread)
         
         if current_debit is None:
             # Skip check if we can't calculate current spread value
@@ -91,24 +243,204 @@ class RiskManager:
         stop_loss_threshold = initial_credit * self.stop_loss_multiple
         
         if current_debit >= stop_loss_threshold:
-            # Calculate loss amount and percentage
-            loss_amount = (current_debit - initial_credit) * 100  # Per contract
-            max_possible_profit = initial_credit * 100  # Per contract
-            loss_percentage = (loss_amount / max_possible_profit) * 100 if max_possible_profit > 0 else 0
+            return self._trigger_stop_loss(current_debit, spread)
             
-            # Log stop-loss event with detailed metrics
-            self.algorithm.log(f"RISK MANAGER - STOP-LOSS TRIGGERED: Current debit ${current_debit:.2f} exceeds " +
-                             f"{self.stop_loss_multiple}x initial credit ${initial_credit:.2f}")
-            self.algorithm.log(f"RISK MANAGER - Loss amount: ${loss_amount:.2f}, " +
-                             f"Percentage of max profit: {loss_percentage:.1f}%")
+        return False
+    
+    def _trigger_stop_loss(self, current_debit, spread):
+        """
+        Log the stop-loss event and close the spread.
+        
+        Parameters:
+            current_debit: Debit to close that crossed the threshold
+            spread: SpreadPosition to close
             
-            # Close the position
-            return self.order_executor.close_spread_position(reason="stop-loss")
+        Returns:
+            bool: True if the close was initiated, False otherwise
+        """
+        # Calculate loss amount and percentage
+        initial_credit = spread.initial_credit
+        multiplier = self.order_executor.spread_multiplier(spread)
+        loss_amount = (current_debit - initial_credit) * multiplier  # Per spread
+        max_possible_profit = initial_credit * multiplier  # Per spread
+        loss_percentage = (loss_amount / max_possible_profit) * 100 if max_possible_profit > 0 else 0
+        
+        # Log stop-loss event with detailed metrics
+        self.algorithm.log(f"RISK MANAGER - STOP-LOSS TRIGGERED: Current debit ${current_debit:.2f} exceeds " +
+                         f"{self.stop_loss_multiple}x initial credit ${initial_credit:.2f}")
+        self.algorithm.log(f"RISK MANAGER - Loss amount: ${loss_amount:.2f}, " +
+                         f"Percentage of max profit: {loss_percentage:.1f}%")
+        
+        # Close the position
+        return self.order_executor.close_spread_position(reason="stop-loss", spread=spread)
+    
+    def _record_fill(self, order_event):
+        """
+        Apply a fill to the cash flow and held legs: O(1), no portfolio access.
+        
+        Parameters:
+            order_event: The filled OrderEvent
+        """
+        symbol = order_event.symbol
+        quantity = order_event.fill_quantity
+        leg = self._held_legs.get(symbol)
+        multiplier = leg[1] if leg is not None else self.order_executor.contract_specs.multiplier(symbol)
+        
+        # Selling (negative quantity) receives premium, buying pays it
+        self._cash_flow -= order_event.fill_price * quantity * multiplier
+        if order_event.order_fee is not None:
+            self._cash_flow -= order_event.order_fee.value.amount
+        
+        held = (leg[0] if leg is not None else 0) + quantity
+        if held == 0:
+            if leg is not None:
+                self._open_value -= leg[2]
+                del self._held_legs[symbol]
+        else:
+            # The fill price marks the leg until its next quote
+            value = held * order_event.fill_price * multiplier
+            self._open_value += value - (leg[2] if leg is not None else 0.0)
+            self._held_legs[symbol] = [held, multiplier, value]
+        self._stats_changed = True
+    
+    @property
+    def pnl(self):
+        """Net P/L of this underlying since the statistics started (fills less fees, plus leg marks)."""
+        return self._cash_flow + self._open_value
+    
+    def update_statistics(self, slice=None):
+        """
+        Update daily P/L, peak equity and drawdown, and close the open spread while halted.
+        
+        Only the held legs re-quoted in the slice are re-marked (at the price that
+        closes them: ask for short legs, bid for long legs), so a bar costs O(held legs)
+        regardless of portfolio size. Call once per bar before monitor_positions, and
+        before PortfolioRiskManager.update_statistics checks the loss limits.
+        
+        Parameters:
+            slice: The current Slice (optional - without it every held leg is re-marked)
             
+        Returns:
+            bool: True if a kill switch close was initiated, False otherwise
+        """
+        today = self.algorithm.time.date()
+        if self.stats_date != today:
+            self._start_day(today)
+        
+        # Re-mark held legs with a new quote
+        if self._held_legs:
+            securities = self.algorithm.securities
+            quote_bars = slice.quote_bars if slice is not None else None
+            for symbol, leg in self._held_legs.items():
+                if quote_bars is not None and symbol not in quote_bars:
+                    continue
+                security = securities[symbol]
+                price = security.ask_price if leg[0] < 0 else security.bid_price
+                if price <= 0:
+                    continue
+                value = leg[0] * price * leg[1]
+                if value != leg[2]:
+                    self._open_value += value - leg[2]
+                    leg[2] = value
+                    self._stats_changed = True
+        
+        if self._stats_changed:
+            self._stats_changed = False
+            self.equity = self.starting_equity + self._cash_flow + self._open_value
+            self.daily_pnl = self.equity - self.day_start_equity
+            self.peak_equity = max(self.peak_equity, self.equity)
+            self.drawdown = (self.peak_equity - self.equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+            self.max_drawdown = max(self.max_drawdown, self.drawdown)
+        
+        return self.close_if_halted()
+    
+    def close_if_halted(self):
+        """
+        Close the open spread while the kill switch is tripped.
+        A halted shard holds no spread - this also catches entries that fill after the halt.
+        
+        Returns:
+            bool: True if a kill switch close was initiated, False otherwise
+        """
+        if self.trading_halted and any(spread.close_reason is None for spread in
+                                       self.order_executor.spreads_in(SpreadState.OPENING, SpreadState.OPEN)):
+            return self.order_executor.close_spread_position(reason=f"kill switch ({self.halt_reason})")
         return False
     
-    def update_parameters(self, stop_loss_multiple=None, take_profit_pct=None, 
-                         eod_close_time=None, daily_loss_limit_pct=None):
+    def _start_day(self, today):
+        """
+        Roll the daily statistics over to a new day.
+        
+        Parameters:
+            today: The new day
+        """
+        if self.starting_equity is None:
+            # The only portfolio read: the value the statistics start from
+            self.starting_equity = self.algorithm.portfolio.total_portfolio_value
+            self.equity = self.peak_equity = self.starting_equity
+        self.day_start_equity = self.equity
+        self.daily_pnl = 0.0
+        self.stats_date = today
+    
+    def halt(self, reason, permanent):
+        """
+        Trip the kill switch: no new trades, and update_statistics closes the open spread.
+        
+        Parameters:
+            reason: Limit that was hit, for the logs
+            permanent: True to halt for the rest of the run, False until resume()
+        """
+        self.trading_halted = True
+        self.halt_reason = reason
+        self._halt_is_permanent = permanent
+        self.algorithm.log(f"RISK MANAGER - {self._label}KILL SWITCH - Trading halted " +
+                         f"{'for the rest of the run' if permanent else 'for the day'} ({reason})")
+    
+    def resume(self):
+        """Clear a daily halt (a permanent one stays)."""
+        if self.trading_halted and not self._halt_is_permanent:
+            self.algorithm.log(f"RISK MANAGER - {self._label}Trading resumed after {self.halt_reason}")
+            self.trading_halted = False
+            self.halt_reason = None
+    
+    def can_open_trades(self):
+        """
+        Whether the kill switch allows new entries.
+        
+        Returns:
+            bool: False while trading is halted
+        """
+        return not self.trading_halted
+    
+    def statistics(self):
+        """
+        Current P/L statistics.
+        
+        Returns:
+            dict: equity, daily P/L, peak equity, drawdown, max drawdown and halt state
+        """
+        return {
+            'equity': self.equity,
+            'daily_pnl': self.daily_pnl,
+            'day_start_equity': self.day_start_equity,
+            'peak_equity': self.peak_equity,
+            'drawdown': self.drawdown,
+            'max_drawdown': self.max_drawdown,
+            'trading_halted': self.trading_halted,
+            'halt_reason': self.halt_reason,
+        }
+    
+    def report_day_end(self):
+        """Log the day's P/L statistics (called from on_end_of_day)."""
+        if self.stats_date is None:
+            return
+        pnl_pct = self.daily_pnl / self.day_start_equity if self.day_start_equity else 0.0
+        self.algorithm.log(f"RISK MANAGER - {self._label}DAY END - P/L ${self.daily_pnl:.2f} ({pnl_pct:.2%}), " +
+                         f"Equity ${self.equity:.2f}, Peak ${self.peak_equity:.2f}, " +
+                         f"Drawdown {self.drawdown:.2%}, Max drawdown {self.max_drawdown:.2%}" +
+                         (f", HALTED ({self.halt_reason})" if self.trading_halted else ""))
+    
+    def update_parameters(self, stop_loss_multiple=None, take_profit_pct=None, eod_close_time=None):
         """
         Update risk management parameters.
         
@@ -116,7 +448,6 @@ class RiskManager:
             stop_loss_multiple: Multiple of initial credit to trigger stop-loss
             take_profit_pct: Percentage of max profit to trigger take-profit
             eod_close_time: Time to close positions (datetime.time object)
-            daily_loss_limit_pct: Daily loss limit as percentage of portfolio
         """
         if stop_loss_multiple is not None:
             self.stop_loss_multiple = stop_loss_multiple
@@ -126,10 +457,166 @@ class RiskManager:
             
         if eod_close_time is not None:
             self.eod_close_time = eod_close_time
+        
+        # Armed stop-loss triggers were computed with the old multiple
+        for spread, _, _, _ in list(self._stop_triggers.values()):
+            self.arm_stop_loss(spread)
             
+        self.algorithm.log(f"RISK MANAGER - Parameters updated: SL={self.stop_loss_multiple}x, " + 
+                         f"TP={self.take_profit_pct*100}%, EOD={self.eod_close_time.strftime('%H:%M')}")
+
+
+class PortfolioRiskManager:
+    """
+    Portfolio-level loss limits over every underlying's RiskManager.
+    
+    Each shard keeps the P/L of its own fills and leg marks; checking a shard's
+    P/L against the whole portfolio value would let every underlying lose the
+    full limit. Here the shards' P/L is summed onto the portfolio value at the
+    start, and the daily loss and drawdown limits are checked once on that
+    total. When one is hit every shard is halted and closes its open spread.
+    """
+    
+    def __init__(self, algorithm, risk_managers):
+        """
+        Initialize the portfolio risk manager.
+        
+        Parameters:
+            algorithm: The algorithm instance
+            risk_managers: RiskManager of every underlying
+        """
+        self.algorithm = algorithm
+        self.risk_managers = list(risk_managers)
+        
+        self.daily_loss_limit_pct = 0.05   # 5% portfolio limit (configurable)
+        self.max_drawdown_limit_pct = None # Kill switch on drawdown from peak equity (None = disabled)
+        
+        # Portfolio statistics: portfolio value at the start + the P/L of all shards
+        self.starting_equity = None        # Portfolio value when the statistics started
+        self.day_start_equity = None       # Equity at the start of the current day
+        self.peak_equity = None            # Highest equity seen
+        self.equity = None                 # Current equity
+        self.daily_pnl = 0.0               # Equity change since the start of the day
+        self.drawdown = 0.0                # Current drawdown from peak equity (fraction)
+        self.max_drawdown = 0.0
+        self.stats_date = None             # Day the daily statistics belong to
+        
+        # The daily loss limit clears at the next day, the drawdown limit stays for the rest of the run
+        self.trading_halted = False
+        self.halt_reason = None
+        self._halt_is_permanent = False
+    
+    def update_statistics(self):
+        """
+        Sum the shards' P/L and enforce the loss limits on the portfolio.
+        Call once per bar after every shard's update_statistics.
+        
+        Returns:
+            bool: True if a kill switch close was initiated, False otherwise
+        """
+        today = self.algorithm.time.date()
+        if self.stats_date != today:
+            self._start_day(today)
+        
+        self.equity = self.starting_equity + sum(risk_manager.pnl for risk_manager in self.risk_managers)
+        self.daily_pnl = self.equity - self.day_start_equity
+        self.peak_equity = max(self.peak_equity, self.equity)
+        self.drawdown = (self.peak_equity - self.equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+        
+        if self.trading_halted:
+            return False
+        if self.daily_pnl <= -self.daily_loss_limit_pct * self.day_start_equity:
+            self._halt(f"portfolio daily loss limit: P/L ${self.daily_pnl:.2f} <= -{self.daily_loss_limit_pct:.1%} " +
+                       f"of ${self.day_start_equity:.2f}", permanent=False)
+        elif self.max_drawdown_limit_pct is not None and self.drawdown >= self.max_drawdown_limit_pct:
+            self._halt(f"portfolio max drawdown: {self.drawdown:.1%} from peak ${self.peak_equity:.2f} >= " +
+                       f"{self.max_drawdown_limit_pct:.1%}", permanent=True)
+        else:
+            return False
+        
+        # Close every shard's spread on this bar - the shards already ran their updates
+        closing = [risk_manager.close_if_halted() for risk_manager in self.risk_managers]
+        return any(closing)
+    
+    def _start_day(self, today):
+        """
+        Roll the daily statistics over to a new day and clear a daily-loss halt on every shard.
+        
+        Parameters:
+            today: The new day
+        """
+        if self.starting_equity is None:
+            self.starting_equity = self.algorithm.portfolio.total_portfolio_value
+            self.equity = self.peak_equity = self.starting_equity
+        self.day_start_equity = self.equity
+        self.daily_pnl = 0.0
+        self.stats_date = today
+        if self.trading_halted and not self._halt_is_permanent:
+            self.algorithm.log(f"RISK MANAGER - PORTFOLIO - Trading resumed after {self.halt_reason}")
+            self.trading_halted = False
+            self.halt_reason = None
+            for risk_manager in self.risk_managers:
+                risk_manager.resume()
+    
+    def _halt(self, reason, permanent):
+        """
+        Trip the kill switch on every shard.
+        
+        Parameters:
+            reason: Limit that was hit, for the logs
+            permanent: True to halt for the rest of the run, False until the next day
+        """
+        self.trading_halted = True
+        self.halt_reason = reason
+        self._halt_is_permanent = permanent
+        self.algorithm.log(f"RISK MANAGER - PORTFOLIO KILL SWITCH - Halting {len(self.risk_managers)} " +
+                         f"underlying(s) ({reason})")
+        for risk_manager in self.risk_managers:
+            risk_manager.halt(reason, permanent)
+    
+    def statistics(self):
+        """
+        Current portfolio P/L statistics.
+        
+        Returns:
+            dict: equity, daily P/L, peak equity, drawdown, max drawdown and halt state
+        """
+        return {
+            'equity': self.equity,
+            'daily_pnl': self.daily_pnl,
+            'day_start_equity': self.day_start_equity,
+            'peak_equity': self.peak_equity,
+            'drawdown': self.drawdown,
+            'max_drawdown': self.max_drawdown,
+            'trading_halted': self.trading_halted,
+            'halt_reason': self.halt_reason,
+        }
+    
+    def report_day_end(self):
+        """Log the portfolio's P/L statistics for the day (called from on_end_of_day)."""
+        if self.stats_date is None:
+            return
+        pnl_pct = self.daily_pnl / self.day_start_equity if self.day_start_equity else 0.0
+        self.algorithm.log(f"RISK MANAGER - PORTFOLIO DAY END - P/L ${self.daily_pnl:.2f} ({pnl_pct:.2%}), " +
+                         f"Equity ${self.equity:.2f}, Peak ${self.peak_equity:.2f}, " +
+                         f"Drawdown {self.drawdown:.2%}, Max drawdown {self.max_drawdown:.2%}" +
+                         (f", HALTED ({self.halt_reason})" if self.trading_halted else ""))
+    
+    def update_parameters(self, daily_loss_limit_pct=None, max_drawdown_limit_pct=None):
+        """
+        Update the portfolio loss limits.
+        
+        Parameters:
+            daily_loss_limit_pct: Daily loss limit as a fraction of the portfolio value at the start of the day
+            max_drawdown_limit_pct: Drawdown from peak equity that halts trading for the rest of the run
+        """
         if daily_loss_limit_pct is not None:
             self.daily_loss_limit_pct = daily_loss_limit_pct
-            
-        self.algorithm.log(f"RISK MANAGER - Parameters updated: SL={self.stop_loss_multiple}x, " + 
-                         f"TP={self.take_profit_pct*100}%, EOD={self.eod_close_time.strftime('%H:%M')}, " +
-                         f"Daily limit={self.daily_loss_limit_pct*100}%")
+        
+        if max_drawdown_limit_pct is not None:
+            self.max_drawdown_limit_pct = max_drawdown_limit_pct
+        
+        self.algorithm.log(f"RISK MANAGER - PORTFOLIO - Parameters updated: " +
+                         f"Daily limit={self.daily_loss_limit_pct*100}%, " +
+                         f"Drawdown limit={'off' if self.max_drawdown_limit_pct is None else f'{self.max_drawdown_limit_pct*100}%'}")
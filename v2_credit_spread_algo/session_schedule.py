@@ -0,0 +1,217 @@
+from AlgorithmImports import *
+from typing import Callable, Optional
+import datetime
+import zoneinfo
+
+def session_hours(algorithm: QCAlgorithm, symbol: Symbol, date: datetime.date):
+    """
+    Regular session of a security on a date, in the algorithm time zone.
+
+    Read from the security's exchange hours (LEAN's market-hours database), so
+    holidays, early closes and late opens are included. Hours listed in another
+    time zone (e.g. SPX in Chicago time) are converted to the algorithm's.
+
+    Parameters:
+        algorithm: The algorithm instance
+        symbol: Subscribed security whose exchange hours to read
+        date: Calendar date
+
+    Returns:
+        tuple: (market open, market close) naive datetimes, or None if the market is closed
+    """
+    hours = algorithm.securities[symbol].exchange.hours
+    day_start = datetime.datetime.combine(date, datetime.time())
+    market_open = hours.get_next_market_open(day_start, False)
+    if market_open is None or market_open.date() != date:
+        return None
+    market_close = hours.get_next_market_close(market_open, False)
+
+    # Convert an exchange-local time to the algorithm time zone (naive in, naive out)
+    exchange_zone, algorithm_zone = str(hours.time_zone), str(algorithm.time_zone)
+    if exchange_zone == algorithm_zone:
+        return market_open, market_close
+    exchange, local = zoneinfo.ZoneInfo(exchange_zone), zoneinfo.ZoneInfo(algorithm_zone)
+    return tuple(time.replace(tzinfo=exchange).astimezone(local).replace(tzinfo=None)
+                 for time in (market_open, market_close))
+
+
+class SessionEvent:
+    """A daily event anchored to the session open or close."""
+
+    def __init__(self, name: str, anchor: str, minutes: float, callback: Callable[[], None]):
+        self.name = name
+        self.anchor = anchor            # "open" or "close"
+        self.minutes = minutes          # After the open / before the close
+        self.callback = callback
+
+    def time_in(self, market_open: datetime.datetime, market_close: datetime.datetime) -> datetime.datetime:
+        """Fire time of the event in a session."""
+        if self.anchor == "open":
+            return market_open + datetime.timedelta(minutes=self.minutes)
+        return market_close - datetime.timedelta(minutes=self.minutes)
+
+
+class SessionSchedule:
+    """
+    Compiles the strategy's daily events into per-session scheduled events.
+
+    Fixed clock times (9:30, 15:30) fire on holidays and miss the close on half
+    days. Instead, each event is declared relative to the session open or close,
+    and every trading day is compiled from the exchange hours (LEAN's market-hours
+    database, holidays, early closes and late opens included) into one-off
+    date_rules.on / time_rules.at events:
+
+    - Days the exchange is closed get no events at all
+    - Close-anchored events move with early closes (15:30 becomes 12:30 on a 13:00 close)
+    - Events that would land outside the session are dropped, as are open-anchored
+      events that would fire at or after the day's first close-anchored event
+      (e.g. no new entries after the exit time on a very short session)
+
+    Sessions are compiled a few days ahead and extended once per day, so live
+    algorithms never register more than a handful of events. Sessions are read
+    in the exchange time zone and converted to the algorithm time zone when the
+    two differ (e.g. SPX, whose hours are listed in Chicago time).
+    """
+
+    def __init__(self, algorithm: QCAlgorithm, symbol: Symbol, days_ahead: int = 5):
+        """
+        Initialize the schedule.
+
+        Parameters:
+            algorithm: The algorithm instance
+            symbol: Security whose exchange hours define the sessions (the underlying)
+            days_ahead: Calendar days compiled ahead of the current date (default: 5)
+        """
+        self.algorithm = algorithm
+        self.symbol = symbol
+        self.days_ahead = days_ahead
+        self.events = []
+        self._compiled_through = None       # Last date compiled
+        self._longest_session = None        # Longest session seen, to spot short ones
+        self._log_method = None
+
+    @property
+    def log_method(self) -> Optional[Callable]:
+        """Get the current logging method"""
+        return self._log_method
+
+    @log_method.setter
+    def log_method(self, method: Callable):
+        """Setter for log_method property"""
+        self._log_method = method
+
+    def log(self, message: str, *args, **kwargs) -> None:
+        """Log through the shared log method, or algorithm.log when none is set."""
+        if self._log_method:
+            self._log_method(message, *args, **kwargs)
+        else:
+            self.algorithm.log(message % args if args else message)
+
+    def after_open(self, name: str, minutes: float, callback: Callable[[], None]) -> None:
+        """
+        Declare an event a number of minutes after the session open.
+
+        Parameters:
+            name: Event name for logs
+            minutes: Minutes after the open (0 = at the open)
+            callback: Function to call
+        """
+        self.events.append(SessionEvent(name, "open", minutes, callback))
+
+    def before_close(self, name: str, minutes: float, callback: Callable[[], None]) -> None:
+        """
+        Declare an event a number of minutes before the session close.
+
+        Parameters:
+            name: Event name for logs
+            minutes: Minutes before the (possibly early) close
+            callback: Function to call
+        """
+        self.events.append(SessionEvent(name, "close", minutes, callback))
+
+    def session(self, date: datetime.date):
+        """
+        Regular session of a date from the exchange hours.
+
+        Parameters:
+            date: Calendar date
+
+        Returns:
+            tuple: (market open, market close) datetimes, or None if the market is closed
+        """
+        return session_hours(self.algorithm, self.symbol, date)
+
+    def plan(self, date: datetime.date):
+        """
+        Events for one date with their fire times.
+
+        Parameters:
+            date: Calendar date
+
+        Returns:
+            list: (fire time, SessionEvent) in time order, empty when the market is closed
+        """
+        session = self.session(date)
+        if session is None:
+            return []
+        market_open, market_close = session
+
+        timed = [(event.time_in(market_open, market_close), event) for event in self.events]
+        timed = [(time, event) for time, event in timed if market_open <= time <= market_close]
+
+        # Open-anchored events must come before the first close-anchored one
+        close_times = [time for time, event in timed if event.anchor == "close"]
+        if close_times:
+            cutoff = min(close_times)
+            timed = [(time, event) for time, event in timed if event.anchor == "close" or time < cutoff]
+
+        timed.sort(key=lambda item: item[0])
+        return timed
+
+    def compile_through(self, last_date: datetime.date) -> int:
+        """
+        Register the events of every date up to last_date that isn't compiled yet.
+
+        Parameters:
+            last_date: Last date to compile
+
+        Returns:
+            int: Number of events registered
+        """
+        if self._compiled_through is None:
+            first_date = self.algorithm.start_date.date()
+        else:
+            first_date = self._compiled_through + datetime.timedelta(days=1)
+
+        registered = 0
+        date = first_date
+        while date <= last_date:
+            plan = self.plan(date)
+            for time, event in plan:
+                self.algorithm.schedule.on(self.algorithm.date_rules.on(date.year, date.month, date.day),
+                                           self.algorithm.time_rules.at(time.hour, time.minute, time.second),
+                                           event.callback)
+            registered += len(plan)
+
+            # Log sessions shorter than a regular one (early close / late open) with their events
+            session = self.session(date)
+            if session is not None:
+                length = session[1] - session[0]
+                if self._longest_session is not None and length < self._longest_session:
+                    self.log("SCHEDULE - Short session %s %s-%s, events: %s", date,
+                             session[0].strftime("%H:%M"), session[1].strftime("%H:%M"),
+                             ", ".join(f"{event.name} {time:%H:%M}" for time, event in plan) or "none")
+                self._longest_session = max(length, self._longest_session or length)
+            self._compiled_through = date
+            date += datetime.timedelta(days=1)
+        return registered
+
+    def extend(self) -> int:
+        """
+        Keep the schedule compiled days_ahead days past the current date.
+        Call once per day (e.g. from on_end_of_day).
+
+        Returns:
+            int: Number of events registered
+        """
+        return self.compile_through(self.algorithm.time.date() + datetime.timedelta(days=self.days_ahead))
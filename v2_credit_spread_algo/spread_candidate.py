@@ -0,0 +1,47 @@
+from AlgorithmImports import *
+from dataclasses import dataclass
+import datetime
+
+@dataclass
+class SpreadCandidate:
+    """
+    A bull put spread chosen by the SpreadSelector, ready for order execution.
+
+    Carries everything the OrderExecutor needs to submit the legs directly:
+    the leg symbols, the quotes and greeks the selection was based on, and the
+    spread's risk figures. This avoids re-deriving strikes from the risk figures
+    and re-requesting the option chain between selection and order submission.
+    """
+
+    spread: object                 # OptionStrategy from OptionStrategies.bull_put_spread
+    short_symbol: Symbol
+    long_symbol: Symbol
+    short_strike: float
+    long_strike: float
+    expiry: datetime.datetime
+    short_bid: float
+    short_ask: float
+    long_bid: float
+    long_ask: float
+    short_delta: float
+    long_delta: float
+    width: float
+    net_credit: float              # Conservative credit estimate: short bid - long ask
+    credit_percentage: float       # Net credit as a percentage of width
+    spread_type: str               # "PREFERRED" or "FALLBACK"
+    multiplier: float = 100.0      # Contract multiplier from the symbol properties
+
+    @property
+    def max_profit(self) -> float:
+        """Maximum profit per spread (net credit × contract multiplier)."""
+        return self.net_credit * self.multiplier
+
+    @property
+    def max_loss(self) -> float:
+        """Maximum loss per spread ((width - net credit) × contract multiplier)."""
+        return (self.width - self.net_credit) * self.multiplier
+
+    @property
+    def breakeven(self) -> float:
+        """Underlying price at expiry where the spread neither gains nor loses."""
+        return self.short_strike - self.net_credit
@@ -0,0 +1,165 @@
+from AlgorithmImports import *
+import datetime
+from typing import Dict, Optional, Set
+
+class SpreadState:
+    """
+    Lifecycle states of one credit spread.
+
+        OPENING --all entry legs filled--> OPEN --close submitted--> CLOSING --all legs flat--> CLOSED
+           |  \\--entry ended with some legs--> OPEN                    |
+           |                                                            \\--close canceled/invalid--> OPEN
+           \\--entry ended without fills--> CANCELED
+        OPEN --legs settled at expiry--> CLOSED
+
+    CLOSED and CANCELED are terminal: the OrderExecutor forgets the spread.
+    """
+
+    OPENING = "OPENING"     # Entry orders working
+    OPEN = "OPEN"           # Legs held, no close working
+    CLOSING = "CLOSING"     # Close orders working
+    CLOSED = "CLOSED"       # Flat again after a close or settlement
+    CANCELED = "CANCELED"   # Entry ended without any fill
+
+    TERMINAL = (CLOSED, CANCELED)
+
+    # Allowed transitions (anything else is a bookkeeping error)
+    TRANSITIONS = {
+        OPENING: (OPEN, CANCELED),
+        OPEN: (CLOSING, CLOSED),
+        CLOSING: (CLOSED, OPEN),
+    }
+
+
+class SpreadPosition:
+    """
+    One bull put spread tracked by the OrderExecutor, from entry order to close.
+
+    Orders are attached to the spread by order ID with the phase they belong to
+    (entry or close), and every fill is booked against its order. The spread
+    therefore knows which of its orders are still working, which legs it holds
+    and the credit/debit it actually traded, without looking at the portfolio or
+    at other spreads.
+    """
+
+    ENTRY = "entry"
+    CLOSE = "close"
+
+    def __init__(self, spread_id: int, short_symbol: Optional[Symbol], long_symbol: Optional[Symbol],
+                 short_strike: Optional[float], long_strike: Optional[float],
+                 expiry: Optional[datetime.date], multiplier: Optional[float] = None):
+        """
+        Initialize a spread in the OPENING state.
+
+        Parameters:
+            spread_id: Executor-unique ID (for logs)
+            short_symbol: Short put contract
+            long_symbol: Long put contract
+            short_strike: Short put strike
+            long_strike: Long put strike
+            expiry: Expiration date of both legs
+            multiplier: Contract multiplier (None: looked up by the executor)
+        """
+        self.spread_id = spread_id
+        self.state = SpreadState.OPENING
+        self.short_symbol = short_symbol
+        self.long_symbol = long_symbol
+        self.short_strike = short_strike
+        self.long_strike = long_strike
+        self.expiry = expiry
+        self.multiplier = multiplier
+
+        # Risk figures: estimates at order time, replaced by the actual fill credit
+        self.initial_credit = None
+        self.max_profit = None
+        self.max_loss = None
+        self.breakeven = None
+
+        self.entry_time = None
+        self.close_time = None
+        self.close_reason = None        # Set when a close is requested (kept while entry orders cancel)
+
+        self.orders: Dict[int, str] = {}                # order ID -> phase (ENTRY / CLOSE)
+        self.working: Set[int] = set()                  # Order IDs not yet filled, canceled or invalid
+        self.fills: Dict[int, list] = {}                # order ID -> [filled quantity, filled value]
+        self.held: Dict[Symbol, float] = {}             # Leg symbol -> quantity held by this spread
+
+    def __repr__(self):
+        return f"SpreadPosition(#{self.spread_id} {self.state} ${self.short_strike}/${self.long_strike})"
+
+    def order_tag(self, text: str) -> str:
+        """Tag for one of the spread's orders - the spread ID lets reports group fills by spread"""
+        return f"Spread #{self.spread_id} {text}"
+
+    @property
+    def width(self) -> Optional[float]:
+        """Strike width (None if a strike is unknown)"""
+        if self.short_strike is None or self.long_strike is None:
+            return None
+        return self.short_strike - self.long_strike
+
+    @property
+    def is_active(self) -> bool:
+        return self.state not in SpreadState.TERMINAL
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether both legs are held in the spread's direction (short put short, long put long)"""
+        return self.held.get(self.short_symbol, 0) < 0 and self.held.get(self.long_symbol, 0) > 0
+
+    @property
+    def is_flat(self) -> bool:
+        """Whether the spread holds no legs"""
+        return not self.held
+
+    def add_order(self, order_id: int, phase: str, working: bool = True) -> None:
+        """
+        Attach an order to the spread.
+
+        Parameters:
+            order_id: Order ID
+            phase: ENTRY or CLOSE
+            working: False for orders that arrive already done (e.g. expiry settlements)
+        """
+        self.orders[order_id] = phase
+        if working:
+            self.working.add(order_id)
+
+    def record_fill(self, order_id: int, symbol: Symbol, quantity: float, price: float) -> None:
+        """
+        Book a (partial) fill against its order and the held legs.
+
+        Parameters:
+            order_id: Filled order
+            symbol: Filled contract
+            quantity: Signed fill quantity of this event
+            price: Fill price
+        """
+        fill = self.fills.setdefault(order_id, [0.0, 0.0])
+        fill[0] += quantity
+        fill[1] += quantity * price
+        held = self.held.get(symbol, 0) + quantity
+        if held == 0:
+            self.held.pop(symbol, None)
+        else:
+            self.held[symbol] = held
+
+    def order_done(self, order_id: int) -> None:
+        """Mark an order filled, canceled or invalid"""
+        self.working.discard(order_id)
+
+    def working_orders(self, phase: Optional[str] = None) -> list:
+        """IDs of the working orders (of one phase)"""
+        return [order_id for order_id in self.working if phase is None or self.orders[order_id] == phase]
+
+    def _net_value(self, phase: str) -> float:
+        """Sum of quantity × price over the fills of a phase's orders"""
+        return sum(value for order_id, (_, value) in self.fills.items() if self.orders.get(order_id) == phase)
+
+    def net_credit(self) -> float:
+        """Net credit received by the entry fills (selling is negative quantity)"""
+        return -self._net_value(self.ENTRY)
+
+    def net_debit(self) -> float:
+        """Net debit paid by the close fills"""
+        return self._net_value(self.CLOSE)
@@ -1,4 +1,10 @@
 from AlgorithmImports import *
+import numpy as np
+from typing import Callable, Optional
+from chain_snapshot import ChainSnapshot
+from spread_candidate import SpreadCandidate
+from greeks_engine import GreeksEngine
+from contract_specs import ContractSpecs
 
 class SpreadSelector:
     """
@@ -7,7 +13,7 @@ class SpreadSelector:
     Handles:
     - Finding put options with delta ≤ 0.30, prioritizing lower delta options
     - Creating bull put spreads with appropriate width for the underlying
-    - Returning spread parameters for order execution
+    - Returning a SpreadCandidate (legs, quotes, greeks, risk figures) for order execution
     """
     
     def __init__(self, algorithm: QCAlgorithm, 
@@ -17,7 +23,10 @@ class SpreadSelector:
                  min_spread_width: float = 1.0,
                  min_credit_pct: float = 0.20,
                  min_credit_fallback_pct: float = 0.15,
-                 width_fallbacks: list = None):
+                 width_fallbacks: list = None,
+                 evaluation_mode: str = "loop",
+                 greeks_engine: Optional[GreeksEngine] = None,
+                 contract_specs: Optional[ContractSpecs] = None):
         """Initialize with reference to parent algorithm and customizable parameters.
         
         Parameters:
@@ -29,6 +38,11 @@ class SpreadSelector:
             min_credit_pct: Minimum required credit as percentage of width (default: 30%)
             min_credit_fallback_pct: Minimum required credit as percentage of width for fallback (default: 15%)
             width_fallbacks: Optional list of width options to try (default: [$5.00, $4.00, $3.00, $2.00, $1.00])
+            evaluation_mode: "loop" evaluates pairs one at a time, "grid" evaluates the full
+                             short × width matrix in one NumPy pass (default: "loop")
+            greeks_engine: Optional GreeksEngine used to compute deltas the chain is missing
+                           (default: None, contracts without greeks are skipped)
+            contract_specs: Shared ContractSpecs for contract multipliers (default: a private instance)
         """
         self.algorithm = algorithm
         self.target_delta = target_delta  # Target delta to start short put selection
@@ -44,112 +58,167 @@ class SpreadSelector:
         else:
             self.width_fallbacks = width_fallbacks
         
-    def select_bull_put_spread(self, option_chain, underlying_price: float):
+        if evaluation_mode not in ("loop", "grid"):
+            raise ValueError(f"Unknown evaluation_mode '{evaluation_mode}', expected 'loop' or 'grid'")
+        self.evaluation_mode = evaluation_mode
+        self.greeks_engine = greeks_engine
+        self.contract_specs = contract_specs or ContractSpecs(algorithm)
+        self._log_method = None  # Will be set by main algorithm
+    
+    @property
+    def log_method(self) -> Optional[Callable]:
+        """Getter for log_method property"""
+        return self._log_method
+    
+    @log_method.setter
+    def log_method(self, method: Callable):
+        """Setter for log_method property"""
+        self._log_method = method
+        
+    def log(self, message, *args, **kwargs) -> None:
+        """Log a message using the provided log method or fall back to algorithm.log
+        
+        Parameters:
+            message: Message (or %-style format string) to log
+            *args: Format arguments, formatted lazily by the log method
+            **kwargs: Extra options for the log method (e.g. category)
+        """
+        if self._log_method:
+            self._log_method(message, *args, **kwargs)
+        else:
+            self.algorithm.log(message % args if args else message)
+        
+    def select_bull_put_spread(self, snapshot: ChainSnapshot, underlying_price: float):
         """
         Select the best bull put spread from available options.
         Prioritizes options with delta close to target_delta, then tries different widths.
         
         Parameters:
-            option_chain: Option chain containing available contracts
+            snapshot: ChainSnapshot of the current option chain
             underlying_price: Current price of the underlying asset
             
         Returns:
-            tuple: (spread, max_profit, max_loss, breakeven) or (None, None, None, None) if no suitable spread
+            SpreadCandidate: The selected spread, or None if no suitable spread
         """
-        # Start of selection process - use structured headers for logging
-        num_contracts = len(list(option_chain)) if option_chain else 0
-        
-        # We don't need to log this as the main algorithm already logs a TRADE ANALYSIS header
-        
-        if not option_chain or num_contracts == 0:
-            self.algorithm.log("No option chain available for spread selection")
-            return None, None, None, None
+        # We don't need to log a header as the main algorithm already logs a TRADE ANALYSIS header
+        if snapshot is None or len(snapshot) == 0:
+            self.log("No option chain available for spread selection")
+            return None
             
-        # Extract only put options that expire today (0 DTE)
+        # Extract only put options that expire today (0 DTE) - positions into the snapshot columns
         today = self.algorithm.time.date()
-        put_contracts = [contract for contract in option_chain 
-                        if contract.right == OptionRight.PUT 
-                        and contract.expiry.date() == today]
+        put_idx = snapshot.indices(ChainSnapshot.RIGHT_PUT, today)
+        num_puts = len(put_idx)
+        
+        if num_puts == 0:
+            self.log("OPTIONS UNIVERSE - No put options available for today's expiration")
+            return None
         
-        # Log information about available put contracts with structured header
-        num_puts = len(put_contracts)
+        # Early in the session the chain may not carry greeks yet - compute the missing
+        # deltas from the quotes instead of skipping those contracts
+        if self.greeks_engine is not None and np.isnan(snapshot.delta[put_idx]).any():
+            filled = self.greeks_engine.fill_missing_deltas(snapshot, snapshot.underlying_price or underlying_price)
+            if filled > 0:
+                self.log("GREEKS - Computed %d missing deltas from quotes (Black-Scholes implied volatility)", filled)
         
-        if not put_contracts:
-            self.algorithm.log("OPTIONS UNIVERSE - No put options available for today's expiration")
-            return None, None, None, None
+        put_strikes = snapshot.strike[put_idx]
+        put_deltas = np.abs(snapshot.delta[put_idx])  # NaN where greeks are missing
+        has_delta = ~np.isnan(put_deltas)
             
         # Consolidated logging of available options universe
-        if num_puts > 0:
-            deltas = [abs(contract.greeks.delta) if contract.greeks and contract.greeks.delta else 0 for contract in put_contracts]
-            strikes = [contract.strike for contract in put_contracts]
-            delta_info = f", Delta range: {min(deltas):.4f}-{max(deltas):.4f}" if any(deltas) else ", No valid deltas found"
-            self.algorithm.log(f"OPTIONS UNIVERSE - Strike range: ${min(strikes):.2f}-${max(strikes):.2f}, {num_puts} put contracts expiring today{delta_info}")
-            
-        # Identify all valid put contracts with delta <= max_delta
-        valid_short_candidates = []
-        for contract in put_contracts:
-            # Check if greeks exist and delta is valid
-            if contract.greeks and contract.greeks.delta is not None:
-                delta = abs(contract.greeks.delta)
-                if delta <= self.max_delta:
-                    valid_short_candidates.append(contract)
-            else:
-                self.algorithm.log(f"Skipping contract with strike ${contract.strike:.2f} - missing or invalid greeks")
+        deltas = np.where(has_delta, put_deltas, 0.0)
+        delta_info = f", Delta range: {deltas.min():.4f}-{deltas.max():.4f}" if deltas.any() else ", No valid deltas found"
+        self.log(f"OPTIONS UNIVERSE - Strike range: ${put_strikes.min():.2f}-${put_strikes.max():.2f}, {num_puts} put contracts expiring today{delta_info}")
         
-        # Log candidates with structured header and more compact format
-        if valid_short_candidates:
-            # Sort candidates by strike price for clearer presentation
-            sorted_candidates = sorted(valid_short_candidates, key=lambda x: x.strike)
+        for strike in put_strikes[~has_delta]:
+            self.log("Skipping contract with strike $%.2f - missing or invalid greeks", strike)
             
-            # Format the candidates in a compact way, limiting to key information
-            if len(sorted_candidates) > 10:
-                # For many candidates, show count and key statistics
-                avg_delta = sum(abs(c.greeks.delta) for c in sorted_candidates) / len(sorted_candidates)
-                key_strikes = sorted([c.strike for c in sorted_candidates])
-                strike_range = f"${key_strikes[0]:.0f}-${key_strikes[-1]:.0f}"
-                
-                self.algorithm.log(f"CANDIDATES - Found {len(sorted_candidates)} potential short puts with delta ≤ {self.max_delta}, Strike range: {strike_range}, Avg delta: {avg_delta:.4f}")
-            else:
-                # For fewer candidates, show details of each
-                candidates_details = ", ".join([f"${c.strike:.0f}/{abs(c.greeks.delta):.4f}" for c in sorted_candidates])
-                self.algorithm.log(f"CANDIDATES - Found {len(sorted_candidates)} potential short puts: {candidates_details}")
+        # Identify all valid put contracts with delta <= max_delta (positions into put_idx)
+        valid = np.flatnonzero(has_delta & (put_deltas <= self.max_delta))
+        
+        if len(valid) == 0:
+            self.log(f"No put options found with delta ≤ {self.max_delta}")
+            return None
         
-        if not valid_short_candidates:
-            self.algorithm.log(f"No put options found with delta ≤ {self.max_delta}")
-            return None, None, None, None
+        # Log candidates with structured header and more compact format
+        if len(valid) > 10:
+            # For many candidates, show count and key statistics
+            avg_delta = put_deltas[valid].mean()
+            strike_range = f"${put_strikes[valid].min():.0f}-${put_strikes[valid].max():.0f}"
+            self.log(f"CANDIDATES - Found {len(valid)} potential short puts with delta ≤ {self.max_delta}, Strike range: {strike_range}, Avg delta: {avg_delta:.4f}")
+        else:
+            # For fewer candidates, show details of each sorted by strike
+            by_strike = valid[np.argsort(put_strikes[valid], kind='stable')]
+            candidates_details = ", ".join([f"${put_strikes[i]:.0f}/{put_deltas[i]:.4f}" for i in by_strike])
+            self.log(f"CANDIDATES - Found {len(valid)} potential short puts: {candidates_details}")
         
         # Sort ALL candidates by delta (ascending)
-        valid_short_candidates.sort(key=lambda x: abs(x.greeks.delta))
+        valid = valid[np.argsort(put_deltas[valid], kind='stable')]
+        valid_deltas = put_deltas[valid]
         
         # Find strikes with delta less than or equal to target_delta
-        target_candidates = [c for c in valid_short_candidates if abs(c.greeks.delta) <= self.target_delta]
+        at_or_below_target = valid_deltas <= self.target_delta
         
         # If no strikes meet target delta criteria, start with lowest delta available
-        if not target_candidates:
-            self.algorithm.log(f"No strikes with delta ≤ {self.target_delta}, starting with lowest delta available")
-            # Get candidates sorted by delta (ascending)
-            starting_candidates = valid_short_candidates
+        if not at_or_below_target.any():
+            self.log(f"No strikes with delta ≤ {self.target_delta}, starting with lowest delta available")
+            starting_candidates = valid
         else:
-            # Find the strike with delta closest to target_delta
-            target_candidates.sort(key=lambda x: abs(self.target_delta - abs(x.greeks.delta)))
-            closest_to_target = target_candidates[0]
-            closest_delta = abs(closest_to_target.greeks.delta)
+            # Find the delta closest to target_delta among those at or below it
+            target_deltas = valid_deltas[at_or_below_target]
+            closest_delta = target_deltas[np.argmin(np.abs(self.target_delta - target_deltas))]
             
-            # Get all candidates with delta >= the closest match, sorted by ascending delta
+            # Get all candidates with delta >= the closest match, already sorted by ascending delta
             # This ensures we start at or near our target and move UP in delta
-            starting_candidates = [c for c in valid_short_candidates if abs(c.greeks.delta) >= closest_delta]
-            starting_candidates.sort(key=lambda x: abs(x.greeks.delta))
+            starting_candidates = valid[valid_deltas >= closest_delta]
+        
+        # Evaluate short/long pairs with the configured strategy
+        if self.evaluation_mode == "grid":
+            result = self._evaluate_pairs_grid(snapshot, put_idx, put_deltas, has_delta, starting_candidates)
+        else:
+            result = self._evaluate_pairs_loop(snapshot, put_idx, put_deltas, has_delta, starting_candidates)
+        
+        # If we've tried all short strikes and none worked - use consistent format
+        if result is None:
+            self.log("SPREAD SUMMARY - No valid spread found after evaluating all candidates")
+            return None
+        
+        short_row, selected_spread, all_tested_spreads = result
+        
+        # Log summary of all tested spreads
+        self._log_spread_test_summary(all_tested_spreads, selected_spread['short_strike'])
+        
+        return self._build_candidate(snapshot, short_row, selected_spread)
+    
+    def _evaluate_pairs_loop(self, snapshot, put_idx, put_deltas, has_delta, starting_candidates):
+        """
+        Evaluate short/long pairs one short candidate and one width at a time.
+        
+        Parameters:
+            snapshot: ChainSnapshot of the current option chain
+            put_idx: Snapshot positions of today's puts
+            put_deltas: Absolute deltas aligned with put_idx (NaN where missing)
+            has_delta: Boolean mask of put_idx entries with a valid delta
+            starting_candidates: Positions into put_idx of short candidates in priority order
+            
+        Returns:
+            tuple: (short_row, selected_spread, all_tested_spreads) or None if no suitable spread
+        """
+        put_strikes = snapshot.strike[put_idx]
+        
+        # Lowest available strike bounds the widest spread we can build - computed once
+        min_strike = put_strikes.min()
         
         # Try each short strike candidate, starting with delta closest to target (0.15) and moving UP to higher deltas if needed
-        for short_put in starting_candidates:
-            short_strike = short_put.strike
-            short_delta = abs(short_put.greeks.delta)
-            short_price = short_put.LastPrice
-            short_bid = short_put.BidPrice
+        for short_pos in starting_candidates:
+            short_row = put_idx[short_pos]
+            short_strike = float(put_strikes[short_pos])
+            short_delta = float(put_deltas[short_pos])
+            short_bid = float(snapshot.bid[short_row])
             
             # Skip if bid price is zero or insufficient for a viable spread
             if short_bid <= 0:
-                self.algorithm.log(f"Skipping short put: Strike=${short_strike:.2f}, Delta={short_delta:.4f} - No bid available")
+                self.log("Skipping short put: Strike=$%.2f, Delta=%.4f - No bid available", short_strike, short_delta)
                 continue
                 
             # Track all tested spreads for later comprehensive logging
@@ -159,6 +228,10 @@ class SpreadSelector:
             preferred_spreads = []
             fallback_spreads = []
             
+            # Distance from the short strike to every lower put strike
+            distances = short_strike - put_strikes
+            below_short = put_strikes < short_strike
+            
             # Sort width fallbacks by preference (largest to smallest)
             for target_width in self.width_fallbacks:
                 # Skip widths that exceed our maximum spread width
@@ -166,28 +239,23 @@ class SpreadSelector:
                     continue
                     
                 # Skip if width is greater than distance to furthest long strike
-                min_strike = min([c.strike for c in put_contracts])
                 if short_strike - min_strike < target_width:
                     continue
                 
                 # Find long put candidates that create a spread with width <= target_width
-                long_candidates = [c for c in put_contracts if c.strike < short_strike and 
-                                 (short_strike - c.strike) <= target_width]
+                long_candidates = np.flatnonzero(below_short & (distances <= target_width))
                 
-                if not long_candidates:
+                if len(long_candidates) == 0:
                     # Don't log individual width failures
                     continue
                     
-                # Sort by spread width descending (wider spreads first, but all ≤ target_width)
-                # This prioritizes spreads closer to our target width without exceeding it
-                long_candidates.sort(key=lambda x: short_strike - x.strike, reverse=True)
-                
                 # Select the long put with the widest spread (while still ≤ target_width)
-                long_put = long_candidates[0]
-                long_strike = long_put.strike
-                long_delta = abs(long_put.greeks.delta) if long_put.greeks and long_put.greeks.delta else 0
-                long_price = long_put.LastPrice
-                long_ask = long_put.AskPrice
+                # argmax keeps the first contract in chain order on ties
+                long_pos = long_candidates[np.argmax(distances[long_candidates])]
+                long_row = put_idx[long_pos]
+                long_strike = float(put_strikes[long_pos])
+                long_delta = float(put_deltas[long_pos]) if has_delta[long_pos] else 0
+                long_ask = float(snapshot.ask[long_row])
                 
                 # Calculate actual spread width
                 spread_width = short_strike - long_strike
@@ -198,44 +266,21 @@ class SpreadSelector:
                 
                 # Calculate spread details
                 net_credit = short_bid - long_ask  # Conservative estimate using bid-ask
-                credit_percentage = (net_credit / spread_width) * 100 if spread_width > 0 else 0
                 
                 if net_credit <= 0:
                     continue
                 
-                # Check if meets preferred threshold (20%)
-                min_required_credit = spread_width * self.min_credit_pct
-                fallback_required_credit = spread_width * self.min_credit_fallback_pct
-                
-                # Store valid spreads for later comparison
-                spread_info = {
-                    'short_strike': short_strike,
-                    'short_delta': short_delta,
-                    'short_bid': short_bid,
-                    'long_strike': long_strike,
-                    'long_delta': long_delta,
-                    'long_ask': long_ask,
-                    'width': spread_width,
-                    'credit': net_credit,
-                    'credit_percentage': credit_percentage
-                }
-                
-                # Add to all_tested_spreads for summary logging
-                test_result = "PREFERRED" if net_credit >= min_required_credit else \
-                              "FALLBACK" if net_credit >= fallback_required_credit else "REJECTED"
-                
-                # Add result to the spread_info dict
-                spread_info['result'] = test_result
-                spread_info['required_credit'] = min_required_credit
-                spread_info['fallback_required_credit'] = fallback_required_credit
+                spread_info = self._make_spread_info(short_strike, short_delta, short_bid,
+                                                     long_strike, long_delta, long_ask,
+                                                     spread_width, net_credit, long_row)
                 
                 # Add to all tested spreads
                 all_tested_spreads.append(spread_info)
                 
                 # Add to appropriate list for selection
-                if net_credit >= min_required_credit:
+                if spread_info['result'] == "PREFERRED":
                     preferred_spreads.append(spread_info)
-                elif net_credit >= fallback_required_credit:
+                elif spread_info['result'] == "FALLBACK":
                     fallback_spreads.append(spread_info)
             
             # After checking all widths, select the best spread
@@ -246,50 +291,206 @@ class SpreadSelector:
                 # Get the spread with the highest absolute credit
                 preferred_spreads.sort(key=lambda x: x['credit'], reverse=True)
                 selected_spread = preferred_spreads[0]
-                spread_type = "PREFERRED"
             # Fall back to 15% spreads only if no 20% spreads found
             elif fallback_spreads:
                 # Get the spread with the highest absolute credit
                 fallback_spreads.sort(key=lambda x: x['credit'], reverse=True)
                 selected_spread = fallback_spreads[0]
-                spread_type = "FALLBACK"
             
             # If we found a valid spread, return it
             if selected_spread:
-                # Pull out the values from the selected spread
-                short_strike = selected_spread['short_strike']
-                short_delta = selected_spread['short_delta']
-                short_bid = selected_spread['short_bid']
-                long_strike = selected_spread['long_strike']
-                long_delta = selected_spread['long_delta']
-                long_ask = selected_spread['long_ask']
-                spread_width = selected_spread['width']
-                net_credit = selected_spread['credit']
-                credit_percentage = selected_spread['credit_percentage']
-                
-                # Create the bull put spread using OptionStrategies
-                expiry = short_put.expiry
-                # Use the underlying symbol from the option chain and construct canonical option symbol
-                canonical_option = short_put.symbol.canonical
-                spread = OptionStrategies.bull_put_spread(canonical_option, short_strike, long_strike, expiry)
-                
-                # Calculate breakeven, max profit and max loss
-                breakeven = short_strike - net_credit
-                max_profit = net_credit * 100  # Per contract (100 shares)
-                max_loss = (spread_width - net_credit) * 100  # Per contract
-                risk_reward = max_loss / max_profit if max_profit > 0 else float('inf')
-                
-                # Log summary of all tested spreads
-                self._log_spread_test_summary(all_tested_spreads, short_strike)
-                
-                # Consolidated logging with a single comprehensive entry - keep the SPREAD SELECTED format
-                self.algorithm.log(f"SPREAD SELECTED: Bull Put ${short_strike}/{long_strike}, Width=${spread_width:.2f}, Credit=${net_credit:.2f} ({credit_percentage:.2f}%), Max P/L=${max_profit:.2f}/${max_loss:.2f}, Breakeven=${breakeven:.2f}, R/R={risk_reward:.2f}")
-                
-                return spread, max_profit, max_loss, breakeven
+                return short_row, selected_spread, all_tested_spreads
         
-        # If we've tried all short strikes and none worked - use consistent format
-        self.algorithm.log("SPREAD SUMMARY - No valid spread found after evaluating all candidates")
-        return None, None, None, None
+        return None
+    
+    def _evaluate_pairs_grid(self, snapshot, put_idx, put_deltas, has_delta, starting_candidates):
+        """
+        Evaluate every short candidate × width combination in one NumPy pass.
+        
+        Builds (short × put) distance and (short × width) credit/width/credit-percentage
+        matrices, classifies them as PREFERRED/FALLBACK/REJECTED with boolean masks and
+        picks the winner with argmax. Mirrors _evaluate_pairs_loop exactly, including
+        tie-breaking: first short in priority order, then first width in width_fallbacks
+        order with the highest credit, then first long put in chain order.
+        
+        Parameters:
+            snapshot: ChainSnapshot of the current option chain
+            put_idx: Snapshot positions of today's puts
+            put_deltas: Absolute deltas aligned with put_idx (NaN where missing)
+            has_delta: Boolean mask of put_idx entries with a valid delta
+            starting_candidates: Positions into put_idx of short candidates in priority order
+            
+        Returns:
+            tuple: (short_row, selected_spread, all_tested_spreads) or None if no suitable spread
+        """
+        put_strikes = snapshot.strike[put_idx]
+        put_asks = snapshot.ask[put_idx]
+        min_strike = put_strikes.min()
+        
+        short_strikes = put_strikes[starting_candidates]
+        short_bids = snapshot.bid[put_idx[starting_candidates]]
+        has_bid = short_bids > 0
+        
+        # Widths in priority order, dropping those above the maximum
+        widths = np.array([w for w in self.width_fallbacks if w <= self.max_spread_width], dtype=np.float64)
+        if len(widths) == 0:
+            self._log_no_bid_shorts(short_strikes, put_deltas[starting_candidates], has_bid, len(starting_candidates))
+            return None
+        
+        # distances[s, p]: short strike minus every put strike
+        distances = short_strikes[:, None] - put_strikes[None, :]
+        
+        # in_width[s, w, p]: put p is a long candidate for short s at target width w
+        in_width = (distances[:, None, :] > 0) & (distances[:, None, :] <= widths[None, :, None])
+        has_long = in_width.any(axis=2)
+        
+        # Widest qualifying long per (short, width); argmax keeps the first in chain order on ties
+        long_pos = np.argmax(np.where(in_width, distances[:, None, :], -np.inf), axis=2)
+        spread_width = np.take_along_axis(distances, long_pos, axis=1)
+        net_credit = short_bids[:, None] - put_asks[long_pos]
+        
+        # tested[s, w]: combinations the loop would record in all_tested_spreads
+        tested = (has_bid[:, None]
+                  & ((short_strikes - min_strike)[:, None] >= widths[None, :])
+                  & has_long
+                  & (spread_width >= self.min_spread_width)
+                  & (net_credit > 0))
+        preferred = tested & (net_credit >= spread_width * self.min_credit_pct)
+        fallback = tested & ~preferred & (net_credit >= spread_width * self.min_credit_fallback_pct)
+        
+        # First short (in priority order) with any preferred or fallback spread wins
+        has_pref = preferred.any(axis=1)
+        has_selection = has_pref | fallback.any(axis=1)
+        if not has_selection.any():
+            self._log_no_bid_shorts(short_strikes, put_deltas[starting_candidates], has_bid, len(starting_candidates))
+            return None
+        
+        s = int(np.argmax(has_selection))
+        self._log_no_bid_shorts(short_strikes, put_deltas[starting_candidates], has_bid, s)
+        
+        # Highest credit within the winning tier; argmax keeps the first width on ties
+        tier = preferred[s] if has_pref[s] else fallback[s]
+        w = int(np.argmax(np.where(tier, net_credit[s], -np.inf)))
+        
+        # Rebuild the winning short's tested combinations in width order for summary logging
+        short_pos = starting_candidates[s]
+        short_strike = float(short_strikes[s])
+        short_delta = float(put_deltas[short_pos])
+        short_bid = float(short_bids[s])
+        all_tested_spreads = []
+        selected_spread = None
+        for j in np.flatnonzero(tested[s]):
+            lp = long_pos[s, j]
+            spread_info = self._make_spread_info(short_strike, short_delta, short_bid,
+                                                 float(put_strikes[lp]),
+                                                 float(put_deltas[lp]) if has_delta[lp] else 0,
+                                                 float(put_asks[lp]),
+                                                 float(spread_width[s, j]), float(net_credit[s, j]),
+                                                 put_idx[lp])
+            all_tested_spreads.append(spread_info)
+            if j == w:
+                selected_spread = spread_info
+        
+        return put_idx[short_pos], selected_spread, all_tested_spreads
+    
+    def _log_no_bid_shorts(self, short_strikes, short_deltas, has_bid, stop):
+        """
+        Log skipped short candidates without a bid, up to (not including) position stop.
+        
+        Parameters:
+            short_strikes: Short candidate strikes in priority order
+            short_deltas: Short candidate absolute deltas in priority order
+            has_bid: Boolean mask of short candidates with a positive bid
+            stop: Number of leading candidates the selection walked through
+        """
+        for i in np.flatnonzero(~has_bid[:stop]):
+            self.log("Skipping short put: Strike=$%.2f, Delta=%.4f - No bid available", short_strikes[i], short_deltas[i])
+    
+    def _make_spread_info(self, short_strike, short_delta, short_bid,
+                          long_strike, long_delta, long_ask, spread_width, net_credit, long_row):
+        """
+        Build the spread info dictionary for a tested short/long combination.
+        
+        Returns:
+            dict: Spread details including the PREFERRED/FALLBACK/REJECTED result
+        """
+        credit_percentage = (net_credit / spread_width) * 100 if spread_width > 0 else 0
+        
+        # Check if meets preferred threshold (20%)
+        min_required_credit = spread_width * self.min_credit_pct
+        fallback_required_credit = spread_width * self.min_credit_fallback_pct
+        
+        test_result = "PREFERRED" if net_credit >= min_required_credit else \
+                      "FALLBACK" if net_credit >= fallback_required_credit else "REJECTED"
+        
+        return {
+            'short_strike': short_strike,
+            'short_delta': short_delta,
+            'short_bid': short_bid,
+            'long_strike': long_strike,
+            'long_delta': long_delta,
+            'long_ask': long_ask,
+            'width': spread_width,
+            'credit': net_credit,
+            'credit_percentage': credit_percentage,
+            'result': test_result,
+            'required_credit': min_required_credit,
+            'fallback_required_credit': fallback_required_credit,
+            'long_row': int(long_row)  # Position of the long put in the snapshot
+        }
+    
+    def _build_candidate(self, snapshot, short_row, selected_spread):
+        """
+        Build the SpreadCandidate for the winning combination.
+        
+        Parameters:
+            snapshot: ChainSnapshot the selection was made from
+            short_row: Position of the short put in the snapshot
+            selected_spread: Spread info dictionary of the winning combination
+            
+        Returns:
+            SpreadCandidate: The selected spread with leg symbols, quotes and greeks
+        """
+        long_row = selected_spread['long_row']
+        short_put = snapshot.contracts[short_row]
+        long_put = snapshot.contracts[long_row]
+        short_strike = selected_spread['short_strike']
+        long_strike = selected_spread['long_strike']
+        
+        # Create the bull put spread using OptionStrategies
+        expiry = short_put.expiry
+        # Use the underlying symbol from the option chain and construct canonical option symbol
+        canonical_option = short_put.symbol.canonical
+        spread = OptionStrategies.bull_put_spread(canonical_option, short_strike, long_strike, expiry)
+        
+        candidate = SpreadCandidate(
+            spread=spread,
+            short_symbol=short_put.symbol,
+            long_symbol=long_put.symbol,
+            short_strike=short_strike,
+            long_strike=long_strike,
+            expiry=expiry,
+            short_bid=selected_spread['short_bid'],
+            short_ask=float(snapshot.ask[short_row]),
+            long_bid=float(snapshot.bid[long_row]),
+            long_ask=selected_spread['long_ask'],
+            short_delta=selected_spread['short_delta'],
+            long_delta=selected_spread['long_delta'],
+            width=selected_spread['width'],
+            net_credit=selected_spread['credit'],
+            credit_percentage=selected_spread['credit_percentage'],
+            spread_type=selected_spread['result'],
+            multiplier=self.contract_specs.multiplier(short_put.symbol)
+        )
+        
+        max_profit = candidate.max_profit
+        max_loss = candidate.max_loss
+        risk_reward = max_loss / max_profit if max_profit > 0 else float('inf')
+        
+        # Consolidated logging with a single comprehensive entry - keep the SPREAD SELECTED format
+        self.log(f"SPREAD SELECTED: Bull Put ${short_strike}/{long_strike}, Width=${candidate.width:.2f}, Credit=${candidate.net_credit:.2f} ({candidate.credit_percentage:.2f}%), Max P/L=${max_profit:.2f}/${max_loss:.2f}, Breakeven=${candidate.breakeven:.2f}, R/R={risk_reward:.2f}")
+        
+        return candidate
     
     def _log_spread_test_summary(self, tested_spreads, short_strike):
         """
@@ -312,7 +513,7 @@ class SpreadSelector:
         width_range = f"${widths[0]:.1f}-${widths[-1]:.1f}" if len(widths) > 1 else f"${widths[0]:.1f}"
         
         # Log summary counts
-        self.algorithm.log(f"SPREAD TESTS - Short strike ${short_strike}: Tested {len(tested_spreads)} combinations, " + 
+        self.log(f"SPREAD TESTS - Short strike ${short_strike}: Tested {len(tested_spreads)} combinations, " + 
                           f"Width range: {width_range}, Results: {preferred_count} preferred, {fallback_count} fallback, {rejected_count} rejected")
         
         # Log details of valid spreads (preferred and fallback)
@@ -331,14 +532,14 @@ class SpreadSelector:
             
             # Log top spreads
             if spread_details:
-                self.algorithm.log(f"TOP SPREADS - {', '.join(spread_details)}")
+                self.log(f"TOP SPREADS - {', '.join(spread_details)}")
     
-    def calculate_current_spread_value(self, option_chain, short_strike, long_strike, initial_credit):
+    def calculate_current_spread_value(self, snapshot: ChainSnapshot, short_strike, long_strike, initial_credit):
         """
         Calculate the current value to close an existing spread.
         
         Parameters:
-            option_chain: Current option chain
+            snapshot: ChainSnapshot of the current option chain
             short_strike: Strike price of the short put
             long_strike: Strike price of the long put
             initial_credit: Initial credit received when opening spread
@@ -346,36 +547,31 @@ class SpreadSelector:
         Returns:
             float: Current debit to close, or None if can't be calculated
         """
-        if not option_chain or len(list(option_chain)) == 0:
+        if snapshot is None or len(snapshot) == 0:
             return None
             
         # Get today's date
         today = self.algorithm.time.date()
         
-        # Find the current prices for our strikes
-        put_contracts = [contract for contract in option_chain 
-                        if contract.right == OptionRight.PUT 
-                        and contract.expiry.date() == today]
-        
         # Find the specific contracts that match our spread
-        short_put = next((c for c in put_contracts if c.strike == short_strike), None)
-        long_put = next((c for c in put_contracts if c.strike == long_strike), None)
+        short_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, short_strike)
+        long_row = snapshot.find(ChainSnapshot.RIGHT_PUT, today, long_strike)
         
-        if short_put is None or long_put is None:
+        if short_row is None or long_row is None:
             return None
             
         # Calculate debit to close (buy back short, sell long)
         # Using conservative prices (ask for short, bid for long)
-        current_debit = short_put.AskPrice - long_put.BidPrice
+        current_debit = float(snapshot.ask[short_row] - snapshot.bid[long_row])
         
         # Calculate profit percentage
         if initial_credit > 0:
             profit_percentage = (initial_credit - current_debit) / initial_credit
-            profit_dollars = (initial_credit - current_debit) * 100  # Per contract
+            profit_dollars = (initial_credit - current_debit) * self.contract_specs.multiplier(snapshot.canonical_symbol)
             
             # Only log when there's a significant change
             if abs(profit_percentage) >= 0.1:  # 10% change
-                self.algorithm.log(f"Current spread value: debit ${current_debit:.2f}, " +
+                self.log(f"Current spread value: debit ${current_debit:.2f}, " +
                                   f"P/L: ${profit_dollars:.2f} ({profit_percentage:.1%})")
         
         return current_debit
@@ -1,28 +1,147 @@
 from AlgorithmImports import *
 from typing import Callable, Optional
+import math
+from chain_snapshot import ChainSnapshot
+from greeks_engine import GreeksEngine
+
+class UnderlyingUniverse:
+    """
+    One underlying's slice of the universe: its subscriptions, chain filter,
+    chain snapshots and the trading modules that work its options.
+    
+    Each underlying is an independent shard - the algorithm keeps one daily chain
+    snapshot, one OrderExecutor and one RiskManager per shard, so a spread on QQQ
+    never sees SPY's chain or positions. Work per bar is one pass per shard.
+    """
+    
+    def __init__(self, ticker: str, underlying_symbol: Symbol, option_symbol: Symbol, strike_range: int):
+        """
+        Parameters:
+        ticker (str): Underlying ticker (e.g. 'SPY', 'SPX')
+        underlying_symbol (Symbol): Equity or index symbol
+        option_symbol (Symbol): Canonical option symbol (e.g. ?SPY, ?SPXW)
+        strike_range (int): Strikes either side of ATM kept by the chain filter
+        """
+        self.ticker = ticker
+        self.underlying_symbol = underlying_symbol
+        self.option_symbol = option_symbol
+        self.strike_range = strike_range
+        
+        # Daily chain state (set when the day's first chain arrives)
+        self.chain_snapshot = None
+        self.chains_loaded_today = False
+        
+        # Trading modules, attached by the algorithm
+        self.order_executor = None
+        self.risk_manager = None
+        
+        # Per-slice snapshot cache so the chain is only walked once per slice
+        self._snapshot = None
+        self._snapshot_time = None
+    
+    @property
+    def equity_symbol(self) -> Symbol:
+        """Underlying symbol (kept under its original name; may be an index)."""
+        return self.underlying_symbol
+    
+    def owns(self, symbol: Symbol) -> bool:
+        """
+        Check whether a symbol is this shard's underlying or one of its options.
+        
+        Parameters:
+        symbol (Symbol): Any symbol (order event, holding, contract)
+        
+        Returns:
+        bool: True if the symbol belongs to this underlying
+        """
+        if symbol == self.underlying_symbol:
+            return True
+        return symbol.has_underlying and symbol.underlying == self.underlying_symbol
+    
+    def is_option(self, symbol: Symbol) -> bool:
+        """
+        Check whether a symbol is an option contract (equity or index option) on this underlying.
+        
+        Parameters:
+        symbol (Symbol): Any symbol
+        
+        Returns:
+        bool: True for this underlying's option contracts
+        """
+        return symbol.SecurityType in UniverseBuilder.OPTION_TYPES and self.owns(symbol)
+    
+    def reset_day(self) -> None:
+        """Forget the previous session's chain at the open."""
+        self.chain_snapshot = None
+        self.chains_loaded_today = False
+
 
 class UniverseBuilder:
     """
     Module responsible for building and managing option universes.
     
     Responsibilities:
-    1. Subscribe to option data
-    2. Apply appropriate filters (DTE, strike range)
-    3. Provide access to filtered option chains
+    1. Subscribe to option data for each underlying (equity or index)
+    2. Apply appropriate filters (DTE, strike range) per underlying
+    3. Provide access to filtered option chains, one UnderlyingUniverse shard per underlying
     """
     
-    def __init__(self, algorithm: QCAlgorithm):
+    # Security types of option contracts (equity options and index options)
+    OPTION_TYPES = (SecurityType.OPTION, SecurityType.INDEX_OPTION)
+    
+    # Index underlyings and the option root holding their daily (0 DTE) expiries
+    INDEX_OPTION_TARGETS = {
+        "SPX": "SPXW",
+        "NDX": "NDXP",
+        "RUT": "RUTW",
+        "VIX": "VIXW",
+    }
+    
+    def __init__(self, algorithm: QCAlgorithm, greeks_engine: Optional[GreeksEngine] = None):
         """
         Initialize the universe builder with algorithm reference.
         
         Parameters:
         algorithm (QCAlgorithm): The algorithm instance
+        greeks_engine (GreeksEngine): Optional engine for deltas the chain doesn't report
         """
         self.algorithm = algorithm
-        self.option_symbol = None
-        self.equity_symbol = None
-        self.strike_range = 20  # ±20 strikes around ATM
+        self.greeks_engine = greeks_engine
+        self.strike_range = 20  # Default ±20 strikes around ATM
         self._log_method = None  # Will be set by main algorithm
+        
+        # Shards in the order they were added, plus an index by underlying symbol
+        # so events, holdings and contracts are routed with one dict lookup
+        self.universes = {}          # ticker -> UnderlyingUniverse
+        self._by_underlying = {}     # underlying Symbol -> UnderlyingUniverse
+    
+    @property
+    def primary(self) -> Optional[UnderlyingUniverse]:
+        """The first underlying added (drives the session schedule and benchmark)."""
+        return next(iter(self.universes.values()), None)
+    
+    @property
+    def option_symbol(self) -> Optional[Symbol]:
+        """Canonical option symbol of the primary underlying."""
+        return self.primary.option_symbol if self.primary is not None else None
+    
+    @property
+    def equity_symbol(self) -> Optional[Symbol]:
+        """Underlying symbol of the primary underlying."""
+        return self.primary.underlying_symbol if self.primary is not None else None
+    
+    def universe_for(self, symbol: Symbol) -> Optional[UnderlyingUniverse]:
+        """
+        Find the shard a symbol belongs to.
+        
+        Parameters:
+        symbol (Symbol): Underlying, canonical option or option contract symbol
+        
+        Returns:
+        UnderlyingUniverse or None: The owning shard, None for symbols outside the universe
+        """
+        underlying = symbol.underlying if symbol.has_underlying else symbol
+        return self._by_underlying.get(underlying)
     
     @property
     def log_method(self) -> Optional[Callable]:
@@ -34,50 +153,67 @@ class UniverseBuilder:
         """Setter for log_method property"""
         self._log_method = method
         
-    def log(self, message: str) -> None:
+    def log(self, message: str, *args, **kwargs) -> None:
         """Log a message using the provided log method or fall back to algorithm.log
         
         Parameters:
-        message (str): Message to log
+        message (str): Message (or %-style format string when args are given) to log
+        *args: Format arguments, formatted lazily by the log method
+        **kwargs: Extra options for the log method (e.g. category)
         """
         if self._log_method:
-            self._log_method(message)
+            self._log_method(message, *args, **kwargs)
         else:
-            self.algorithm.log(message)
+            self.algorithm.log(message % args if args else message)
         
-    def initialize_universe(self, equity_ticker: str, resolution: Resolution) -> None:
+    def initialize_universe(self, ticker: str, resolution: Resolution, strike_range: Optional[int] = None) -> UnderlyingUniverse:
         """
-        Initialize the option universe for a given equity.
+        Initialize the option universe for a given underlying and add it as a shard.
+        Index tickers (SPX, NDX, RUT) subscribe the index and its daily-expiry option root.
         
         Parameters:
-        equity_ticker (str): Ticker symbol (e.g., 'SPY')
+        ticker (str): Ticker symbol (e.g., 'SPY', 'SPX')
         resolution (Resolution): Data resolution enum
+        strike_range (int): Strikes either side of ATM (default: the builder's strike_range)
         
         Returns:
-        None
+        UnderlyingUniverse: The new shard
         """
-        # Add the equity
-        equity = self.algorithm.add_equity(equity_ticker, resolution)
-        self.equity_symbol = equity.Symbol
-        self.log(f"Added equity {equity_ticker}")
+        ticker = ticker.upper()
+        if ticker in self.universes:
+            return self.universes[ticker]
+        
+        target_option = self.INDEX_OPTION_TARGETS.get(ticker)
+        if target_option is not None:
+            # Add the index and its weekly/daily option root (SPX -> SPXW)
+            underlying = self.algorithm.add_index(ticker, resolution)
+            option = self.algorithm.add_index_option(underlying.Symbol, target_option, resolution)
+            self.log(f"Added index {ticker}")
+        else:
+            # Add the equity and its options
+            underlying = self.algorithm.add_equity(ticker, resolution)
+            option = self.algorithm.add_option(ticker, resolution)
+            self.log(f"Added equity {ticker}")
         
-        # Add the option
-        option = self.algorithm.add_option(equity_ticker, resolution)
+        universe = UnderlyingUniverse(ticker, underlying.Symbol, option.Symbol,
+                                      strike_range if strike_range is not None else self.strike_range)
         
         # Set the filter for 0 DTE (include weeklys to get same-day expiry options)
-        # and limit strike range to ±20 strikes around ATM to keep chain scan light
-        option.set_filter(self._option_filter_function)
+        # and limit strike range to ±N strikes around ATM to keep chain scan light
+        option.set_filter(lambda option_universe: self._option_filter_function(option_universe, universe.strike_range))
         
-        # Save the option symbol
-        self.option_symbol = option.Symbol
-        self.log(f"Added option chain for {equity_ticker} with 0 DTE filter")
+        self.universes[ticker] = universe
+        self._by_underlying[universe.underlying_symbol] = universe
+        self.log(f"Added option chain {universe.option_symbol.value} for {ticker} with 0 DTE filter")
+        return universe
         
-    def _option_filter_function(self, universe: OptionFilterUniverse) -> OptionFilterUniverse:
+    def _option_filter_function(self, universe: OptionFilterUniverse, strike_range: int) -> OptionFilterUniverse:
         """
         Filter function for option universe to select 0 DTE options within strike range.
         
         Parameters:
         universe (OptionFilterUniverse): The universe to filter
+        strike_range (int): Strikes either side of ATM to keep
         
         Returns:
         OptionFilterUniverse: Filtered universe
@@ -85,24 +221,29 @@ class UniverseBuilder:
         # Include weeklys is essential for 0 DTE strategies
         return universe.include_weeklys() \
                       .expiration(0, 0) \
-                      .strikes(-self.strike_range, self.strike_range)
+                      .strikes(-strike_range, strike_range)
     
-    def get_option_chains(self, slice: Slice) -> OptionChain:
+    def get_option_chains(self, slice: Slice, universe: Optional[UnderlyingUniverse] = None) -> OptionChain:
         """
-        Get option chains from the current slice.
+        Get an underlying's option chain from the current slice.
         
         Parameters:
         slice (Slice): Current data slice
+        universe (UnderlyingUniverse): Shard whose chain to get (default: the primary underlying)
         
         Returns:
-        OptionChain or None: Option chain if available
+        OptionChain or None: Option chain if the slice has one (not checked for content -
+        get_chain_snapshot checks emptiness and expiries on the snapshot arrays)
         """
+        universe = universe or self.primary
+        option_symbol = universe.option_symbol
+        
         # Detailed diagnostics for option chain loading
         if slice is None:
             # This can happen during diagnostic calls when slice isn't available
             # Check if we can get any option data from securities
             try:
-                option_security = self.algorithm.securities[self.option_symbol]
+                option_security = self.algorithm.securities[option_symbol]
                 if option_security is not None:
                     self.log(f"Option security exists but no slice available")
                 return None
@@ -112,90 +253,106 @@ class UniverseBuilder:
         
         # Check if slice has option chains at all
         if not slice.option_chains:
-            # Only log this before noon to avoid spamming logs
-            if self.algorithm.time.hour < 12 and self.algorithm.time.minute % 10 == 0:  # Log every 10 minutes
-                self.log(f"No option chains in slice at {self.algorithm.time.strftime('%H:%M:%S')}")
+            # Only log this before noon; each underlying's CHAIN WAIT category is rate limited to avoid spamming logs
+            if self.algorithm.time.hour < 12:
+                self.log("No option chains in slice at %s", self.algorithm.time, category=f"CHAIN WAIT {universe.ticker}")
             return None
         
         # Check if our specific option symbol is in the chains
-        if self.option_symbol.value not in slice.option_chains:
-            # Only log this before noon to avoid spamming logs
-            if self.algorithm.time.hour < 12 and self.algorithm.time.minute % 10 == 0:  # Log every 10 minutes
-                available_symbols = list(slice.option_chains.keys())
-                symbol_count = len(available_symbols)
+        if option_symbol.value not in slice.option_chains:
+            # Only log this before noon; each underlying's CHAIN WAIT category is rate limited to avoid spamming logs
+            if self.algorithm.time.hour < 12:
+                symbol_count = len(slice.option_chains)
                 if symbol_count > 0:
-                    self.log(f"Option chain slice has {symbol_count} symbols, but {self.option_symbol.value} not found")
+                    self.log("Option chain slice has %d symbols, but %s not found",
+                             symbol_count, option_symbol.value, category=f"CHAIN WAIT {universe.ticker}")
                 else:
-                    self.log(f"Option chain slice is empty (has keys but no content)")
+                    self.log("Option chain slice is empty (has keys but no content)",
+                             category=f"CHAIN WAIT {universe.ticker}")
             return None
         
-        # We have the chain, now check if it has content
-        chain = slice.option_chains[self.option_symbol.value]
-        if chain is None or len(list(chain)) == 0:
-            self.log(f"Found empty option chain for {self.option_symbol.value}")
-            return None
-            
-        # Check if today's expiry is in the chain
-        today = self.algorithm.time.date()
-        expiries = [contract.expiry.date() for contract in chain]
-        unique_expiries = set(expiries)
+        # Return the chain without walking it - emptiness and expiries are checked on the
+        # snapshot's arrays (get_chain_snapshot), so the contracts are iterated once per slice
+        return slice.option_chains[option_symbol.value]
+    
+    def get_chain_snapshot(self, slice: Slice, universe: Optional[UnderlyingUniverse] = None) -> Optional[ChainSnapshot]:
+        """
+        Get an array-backed snapshot of an underlying's option chain in the current slice.
+        The snapshot is built at most once per slice and underlying; repeated calls at
+        the same algorithm time return the shard's cached instance.
+        
+        Parameters:
+        slice (Slice): Current data slice
+        universe (UnderlyingUniverse): Shard whose chain to snapshot (default: the primary underlying)
         
-        if today not in unique_expiries and self.algorithm.time.hour < 12:
-            expiry_str = ', '.join([d.strftime('%Y-%m-%d') for d in sorted(unique_expiries)])
-            self.log(f"Chain loaded but missing today's expiry. Available expiries: {expiry_str}")
+        Returns:
+        ChainSnapshot or None: Snapshot of the chain if available
+        """
+        universe = universe or self.primary
+        current_time = self.algorithm.time
+        if universe._snapshot_time == current_time:
+            return universe._snapshot
         
-        return chain
+        chain = self.get_option_chains(slice, universe)
+        snapshot = ChainSnapshot.from_chain(chain, current_time) if chain is not None else None
+        
+        if snapshot is not None:
+            # We have the chain, now check if it has content
+            if len(snapshot) == 0:
+                self.log(f"Found empty option chain for {universe.option_symbol.value}")
+                snapshot = None
+            # Check if today's expiry is in the chain
+            elif current_time.hour < 12 and not snapshot.has_expiry(current_time.date()):
+                expiry_str = ', '.join(d.strftime('%Y-%m-%d') for d in snapshot.expiry_dates())
+                self.log(f"{universe.ticker} chain loaded but missing today's expiry. Available expiries: {expiry_str}")
+
+        # Only cache results built from a real slice - diagnostic calls pass None
+        if slice is not None:
+            universe._snapshot = snapshot
+            universe._snapshot_time = current_time
+        return snapshot
     
-    def get_latest_equity_price(self) -> float:
+    def get_latest_equity_price(self, universe: Optional[UnderlyingUniverse] = None) -> float:
         """
-        Get the latest price for the underlying equity.
+        Get the latest price for an underlying.
+        
+        Parameters:
+        universe (UnderlyingUniverse): Shard whose underlying to price (default: the primary underlying)
         
         Returns:
-        float: Latest equity price
+        float: Latest underlying price
         """
-        return self.algorithm.securities[self.equity_symbol].price
+        universe = universe or self.primary
+        return self.algorithm.securities[universe.underlying_symbol].price
         
-    def calculate_option_delta(self, contract) -> float:
+    def calculate_option_delta(self, contract) -> Optional[float]:
         """
         Calculate the delta of an option contract.
         
+        Uses the delta reported with the contract when there is one; otherwise the
+        GreeksEngine implies volatility from the contract's quote and computes the
+        delta on the intraday time left to expiry.
+        
         Parameters:
         contract (OptionContract): The option contract to calculate delta for
         
         Returns:
-        float: The delta value (absolute value)
+        float or None: The delta value (absolute value), None if it can't be determined
         """
+        # LEAN reports uncomputed greeks as 0.0 - those are computed here like missing ones
+        reported = ChainSnapshot.reported_delta(contract.greeks)
+        if not math.isnan(reported):
+            return abs(reported)
+        
+        if self.greeks_engine is None:
+            return None
+        
         try:
-            # Use the contract symbol to look up the security and get the delta from greeks
-            if contract.symbol in self.algorithm.securities:
-                security = self.algorithm.securities[contract.symbol]
-                # If we have greeks data available, use it
-                if hasattr(security, 'greeks') and security.greeks is not None and security.greeks.delta is not None:
-                    return abs(security.greeks.delta)
-                    
-            # Fallback: use approximation based on moneyness
-            # This is a simple approximation that should only be used when proper greeks are unavailable
-            equity_price = self.get_latest_equity_price()
-            strike_price = contract.strike
-            days_to_expiry = (contract.expiry.date() - self.algorithm.time.date()).days
-            
-            # Very rough delta approximation
-            if days_to_expiry == 0:
-                # 0 DTE options - delta is approximately binary
-                if contract.right == OptionRight.CALL:
-                    return 1.0 if equity_price > strike_price else 0.1
-                else:  # PUT
-                    return 1.0 if equity_price < strike_price else 0.1
-            else:
-                # Simple moneyness-based approximation for non-zero DTE
-                moneyness = equity_price / strike_price
-                if contract.right == OptionRight.CALL:
-                    # For calls: higher delta when in the money
-                    return min(0.99, max(0.01, (moneyness - 0.9) * 5)) 
-                else:  # PUT
-                    # For puts: higher delta when in the money
-                    return min(0.99, max(0.01, (1.1 - moneyness) * 5))
-                    
+            universe = self.universe_for(contract.symbol)
+            if universe is None:
+                return None
+            delta = self.greeks_engine.contract_delta(contract, self.get_latest_equity_price(universe))
+            return abs(delta) if delta is not None else None
         except Exception as e:
             self.log(f"Error calculating delta: {str(e)}")
-            return 0.5  # Return a mid-range value as fallback
+            return None
@@ -0,0 +1,355 @@
+from AlgorithmImports import *
+from typing import Dict, List, Optional, Sequence, Tuple
+from contract_specs import ContractSpecs
+from spread_position import SpreadPosition, SpreadState
+
+class WorkingOrder:
+    """
+    One working entry limit order and its repricing history.
+
+    A combo order is one WorkingOrder over all of its leg tickets: its limit is
+    the net price of the legs and it is filled once every leg has filled.
+    """
+
+    __slots__ = ("tickets", "ticket", "symbol", "legs", "direction", "initial_limit", "limit",
+                 "submitted_bar", "unfilled", "bars_to_fill", "reprices")
+
+    def __init__(self, tickets: List, limit_price: float, submitted_bar: int,
+                 legs: Optional[List[Tuple[Symbol, float]]] = None, direction: Optional[int] = None):
+        self.tickets = tickets
+        self.ticket = tickets[0]                    # Ticket used for limit updates
+        self.symbol = self.ticket.symbol            # Symbol whose tick grid the limit is on
+        self.legs = legs                            # Combo legs: (symbol, ratio), None for a single-leg order
+        self.direction = direction if direction is not None else \
+            (1 if self.ticket.quantity > 0 else -1)  # +1 buy, -1 sell
+        self.initial_limit = limit_price
+        self.limit = limit_price
+        self.submitted_bar = submitted_bar
+        self.unfilled = {ticket.order_id for ticket in tickets}
+        self.bars_to_fill = None        # Set when the order (every leg of a combo) has filled
+        self.reprices = 0
+
+    @property
+    def order_ids(self) -> List[int]:
+        return [ticket.order_id for ticket in self.tickets]
+
+    @property
+    def concession(self) -> float:
+        """How far the limit was moved against us from its first price (per contract)"""
+        return (self.limit - self.initial_limit) * self.direction
+
+
+class EntryTracker:
+    """
+    The working entry orders of one spread.
+    """
+
+    __slots__ = ("spread", "target_credit", "submitted_bar", "orders", "timed_out")
+
+    def __init__(self, spread: SpreadPosition, target_credit: float, submitted_bar: int):
+        self.spread = spread
+        self.target_credit = target_credit
+        self.submitted_bar = submitted_bar
+        self.orders: List[WorkingOrder] = []
+        self.timed_out = False
+
+    @property
+    def concession(self) -> float:
+        """Net credit given up by repricing, summed over the orders (per spread)"""
+        return sum(order.concession for order in self.orders)
+
+
+class WorkingOrderManager:
+    """
+    Works the entry limit orders of an OrderExecutor until they fill or time out.
+
+    Every bar an entry leg is still working, its limit is re-anchored to the leg's
+    live quote on a per-bar ladder: rung k (k bars after submission) prices a sell
+    at mid - ladder[k] × half-spread and a buy at mid + ladder[k] × half-spread, so
+    a stale order follows the market from mid towards the far touch (leg entries
+    are submitted at mid, rung 0, so the ladder has room to walk). Limits only
+    ever move towards the market, and the credit given up across both legs is
+    capped at max_concession_pct of the spread's target credit. A spread whose
+    entry is still working after timeout_bars is closed (its working legs are
+    canceled and any filled leg is closed by the executor).
+
+    A combo entry is worked the same way as one order on the legs' net quote.
+
+    Fill latency is recorded per entry: bars to fill, concession paid and the
+    credit captured against the target.
+    """
+
+    DEFAULT_LADDER = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+    def __init__(self, algorithm, order_executor, reprice_ladder: Sequence[float] = DEFAULT_LADDER,
+                 max_concession_pct: float = 0.25, timeout_bars: int = 30):
+        """
+        Initialize the manager.
+
+        Parameters:
+            algorithm: The algorithm instance
+            order_executor: OrderExecutor whose entry orders are worked
+            reprice_ladder: Fraction of the half-spread conceded beyond mid on each bar after
+                            submission (the last rung holds; empty disables repricing)
+            max_concession_pct: Cap on the credit given up by repricing, as a fraction of target credit
+            timeout_bars: Bars an entry may work before it is canceled (None disables the timeout)
+        """
+        self.algorithm = algorithm
+        self.order_executor = order_executor
+        self.reprice_ladder = tuple(reprice_ladder)
+        self.max_concession_pct = max_concession_pct
+        self.timeout_bars = timeout_bars
+
+        self._bar = 0                                   # Bars seen (on_bar calls)
+        self._entries: Dict[int, EntryTracker] = {}     # Spread ID -> entry being worked
+        self._by_order: Dict[int, EntryTracker] = {}    # Order ID -> entry it belongs to
+
+        # Fill-latency metrics over the run
+        self.entries_filled = 0
+        self.entries_timed_out = 0
+        self.total_bars_to_fill = 0
+        self.total_concession = 0.0                     # Per-spread price units
+        self.total_credit = 0.0                         # Credit captured by filled entries
+        self.total_target_credit = 0.0                  # Target credit of the same entries
+        self.total_reprices = 0
+
+    def update_parameters(self, reprice_ladder: Optional[Sequence[float]] = None,
+                          max_concession_pct: Optional[float] = None, timeout_bars: Optional[int] = None):
+        """
+        Update the repricing parameters.
+
+        Parameters:
+            reprice_ladder: Per-bar half-spread fractions beyond mid
+            max_concession_pct: Concession cap as a fraction of target credit
+            timeout_bars: Bars before an unfilled entry is canceled (0 disables)
+        """
+        if reprice_ladder is not None:
+            self.reprice_ladder = tuple(reprice_ladder)
+        if max_concession_pct is not None:
+            self.max_concession_pct = max_concession_pct
+        if timeout_bars is not None:
+            self.timeout_bars = timeout_bars or None
+
+    def track(self, spread: SpreadPosition, target_credit: float, tickets: List, limit_prices: List[float]):
+        """
+        Start working a spread's leg-by-leg entry orders.
+
+        Parameters:
+            spread: SpreadPosition the orders belong to
+            target_credit: Net credit the entry was priced for
+            tickets: Entry order tickets
+            limit_prices: Limit price of each ticket
+        """
+        entry = self._new_entry(spread, target_credit)
+        for ticket, limit_price in zip(tickets, limit_prices):
+            self._add_order(entry, WorkingOrder([ticket], limit_price, self._bar))
+        self._complete_if_done(entry)
+
+    def track_combo(self, spread: SpreadPosition, target_credit: float, tickets: List, credit_limit: float,
+                    legs: List[Tuple[Symbol, float]]):
+        """
+        Start working a spread's combo entry order (one net-credit limit over both legs).
+
+        Parameters:
+            spread: SpreadPosition the order belongs to
+            target_credit: Net credit the entry was priced for
+            tickets: The combo's leg tickets
+            credit_limit: Net credit limit of the combo
+            legs: (symbol, ratio) of each leg of the sold combo
+        """
+        entry = self._new_entry(spread, target_credit)
+        self._add_order(entry, WorkingOrder(tickets, credit_limit, self._bar, legs=legs, direction=-1))
+        self._complete_if_done(entry)
+
+    def _new_entry(self, spread: SpreadPosition, target_credit: float) -> EntryTracker:
+        entry = EntryTracker(spread, target_credit, self._bar)
+        self._entries[spread.spread_id] = entry
+        return entry
+
+    def _add_order(self, entry: EntryTracker, order: WorkingOrder):
+        entry.orders.append(order)
+        for ticket in order.tickets:
+            self._by_order[ticket.order_id] = entry
+            # Filled while being submitted - no latency
+            if ticket.status == OrderStatus.FILLED:
+                order.unfilled.discard(ticket.order_id)
+        if not order.unfilled:
+            order.bars_to_fill = 0
+
+    def on_bar(self):
+        """
+        Advance one bar: time out or reprice every entry still working.
+        Call once per on_data, after the slice's quotes are in algorithm.securities.
+        """
+        self._bar += 1
+        if not self._entries:
+            return
+
+        for entry in list(self._entries.values()):
+            spread = entry.spread
+            if spread.state != SpreadState.OPENING:
+                self._forget(entry)
+                continue
+            if entry.timed_out:
+                continue
+            bars = self._bar - entry.submitted_bar
+
+            if self.timeout_bars is not None and bars >= self.timeout_bars:
+                entry.timed_out = True
+                self.entries_timed_out += 1
+                self.algorithm.log(f"ENTRY TIMEOUT - {self.order_executor._label}Bull Put ${spread.short_strike}/${spread.long_strike} " +
+                                   f"not filled after {bars} bars - canceling")
+                self.order_executor.close_spread_position(reason=f"entry timeout ({bars} bars)", spread=spread)
+                continue
+
+            if self.reprice_ladder:
+                rung = self.reprice_ladder[min(bars, len(self.reprice_ladder)) - 1]
+                for order in entry.orders:
+                    if order.bars_to_fill is None and any(order_id in spread.working for order_id in order.unfilled):
+                        self._reprice(entry, order, rung, bars)
+
+    def _reprice(self, entry: EntryTracker, order: WorkingOrder, rung: float, bars: int):
+        """
+        Move a working leg's limit to its ladder rung, within the concession cap.
+
+        Parameters:
+            entry: EntryTracker of the leg's spread
+            order: The working leg
+            rung: Fraction of the half-spread beyond mid
+            bars: Bars since submission (for the order tag)
+        """
+        bid, ask = self._quote(order)
+        if bid <= 0 or ask <= 0 or ask < bid:
+            return
+
+        mid = (bid + ask) / 2
+        target = mid + order.direction * rung * (ask - bid) / 2
+
+        # Credit the other legs have already given up limits this leg's room
+        budget = self.max_concession_pct * entry.target_credit - (entry.concession - order.concession)
+        cap = order.initial_limit + order.direction * budget
+
+        # Round towards the market, except at the cap, which is rounded back inside it;
+        # and only ever move towards the market
+        towards, away = ((ContractSpecs.ROUND_UP, ContractSpecs.ROUND_DOWN) if order.direction > 0 else
+                         (ContractSpecs.ROUND_DOWN, ContractSpecs.ROUND_UP))
+        rounding = towards
+        if (target - cap) * order.direction >= 0:
+            target, rounding = cap, away
+        target = self.order_executor.contract_specs.round_price(order.symbol, target, rounding)
+        if (target - order.limit) * order.direction <= 0:
+            return
+
+        response = order.ticket.update_limit_price(target, entry.spread.order_tag(f"Reprice bar {bars}"))
+        if response is not None and not response.is_success:
+            return
+        order.limit = target
+        order.reprices += 1
+        self.total_reprices += 1
+
+    def _quote(self, order: WorkingOrder) -> Tuple[float, float]:
+        """
+        (bid, ask) of what an order trades: the leg's quote, or a combo's net quote
+        (long ratios at the leg's bid/ask, short ratios at the opposite side).
+        """
+        securities = self.algorithm.securities
+        if order.legs is None:
+            security = securities[order.symbol]
+            return security.bid_price, security.ask_price
+        bid = ask = 0.0
+        for symbol, ratio in order.legs:
+            security = securities[symbol]
+            if security.bid_price <= 0 or security.ask_price <= 0:
+                return 0.0, 0.0
+            bid += ratio * (security.bid_price if ratio > 0 else security.ask_price)
+            ask += ratio * (security.ask_price if ratio > 0 else security.bid_price)
+        return bid, ask
+
+    def on_order_event(self, order_event):
+        """
+        Record a working entry order's fill, or forget it once it is canceled.
+
+        Parameters:
+            order_event: The OrderEvent
+        """
+        entry = self._by_order.get(order_event.order_id)
+        if entry is None:
+            return
+        status = order_event.status
+        if status == OrderStatus.FILLED:
+            # A combo's legs fill one event at a time - it is filled with its last leg
+            order = next(order for order in entry.orders if order_event.order_id in order.unfilled)
+            order.unfilled.discard(order_event.order_id)
+            if not order.unfilled:
+                order.bars_to_fill = self._bar - order.submitted_bar
+                self._complete_if_done(entry)
+        elif status in (OrderStatus.CANCELED, OrderStatus.INVALID):
+            # The entry did not fill as priced - no latency sample
+            self._forget(entry)
+
+    def _complete_if_done(self, entry: EntryTracker):
+        """Record the latency metrics once every entry leg has filled."""
+        orders = entry.orders
+        if not orders or any(order.bars_to_fill is None for order in orders):
+            return
+
+        spread = entry.spread
+        bars = max(order.bars_to_fill for order in orders)
+        concession = entry.concession
+        credit = spread.net_credit()
+        multiplier = self.order_executor.spread_multiplier(spread)
+        captured_pct = credit / entry.target_credit if entry.target_credit else 0.0
+        reprices = sum(order.reprices for order in orders)
+
+        self.entries_filled += 1
+        self.total_bars_to_fill += bars
+        self.total_concession += concession
+        self.total_credit += credit
+        self.total_target_credit += entry.target_credit
+
+        self.algorithm.log(f"ENTRY LATENCY - {self.order_executor._label}Bull Put ${spread.short_strike}/${spread.long_strike}: " +
+                           f"{bars} bars to fill, {reprices} reprices, concession ${concession * multiplier:.2f}, " +
+                           f"credit captured ${credit:.2f} of target ${entry.target_credit:.2f} ({captured_pct:.0%})")
+        self._forget(entry)
+
+    def _forget(self, entry: EntryTracker):
+        """Stop tracking an entry."""
+        if self._entries.get(entry.spread.spread_id) is entry:
+            del self._entries[entry.spread.spread_id]
+        for order in entry.orders:
+            for order_id in order.order_ids:
+                if self._by_order.get(order_id) is entry:
+                    del self._by_order[order_id]
+
+    def statistics(self):
+        """
+        Fill-latency metrics of the filled entries.
+
+        Returns:
+            dict: entries filled/timed out, average bars to fill, concession and credit captured
+        """
+        filled = self.entries_filled
+        return {
+            'entries_filled': filled,
+            'entries_timed_out': self.entries_timed_out,
+            'avg_bars_to_fill': self.total_bars_to_fill / filled if filled else None,
+            'avg_concession': self.total_concession / filled if filled else None,
+            'credit_captured_pct': self.total_credit / self.total_target_credit if self.total_target_credit else None,
+            'reprices': self.total_reprices,
+        }
+
+    def report(self):
+        """Log the fill-latency summary (called at the end of the run)."""
+        stats = self.statistics()
+        if stats['entries_filled'] == 0 and stats['entries_timed_out'] == 0:
+            return
+        multiplier = self.order_executor.spread_multiplier()
+        avg_bars = stats['avg_bars_to_fill']
+        avg_concession = stats['avg_concession']
+        captured = stats['credit_captured_pct']
+        self.algorithm.log(f"ORDER MANAGER - {self.order_executor._label}Entries filled: {stats['entries_filled']}, " +
+                           f"timed out: {stats['entries_timed_out']}, " +
+                           f"avg bars to fill: {'n/a' if avg_bars is None else f'{avg_bars:.1f}'}, " +
+                           f"avg concession: {'n/a' if avg_concession is None else f'${avg_concession * multiplier:.2f}'}, " +
+                           f"credit captured: {'n/a' if captured is None else f'{captured:.0%}'} of target, " +
+                           f"reprices: {stats['reprices']}")